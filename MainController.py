@@ -4,7 +4,12 @@ MainController Class
 מדגים: תבנית MVC (Controller), REPL Loop, SoC
 """
 
+import random
+from typing import List, Optional
+
 from cli_view import CLIView
+from combat_engine import CombatEngine
+from models.job_store import JobStore
 from models.repository import Repository
 from fighter import Fighter
 from striker import Striker
@@ -18,19 +23,136 @@ class MainController:
     מדגים: תבנית MVC, הפרדת אחריות (SoC)
     """
     
-    def __init__(self):
-        """אתחול הבקר"""
+    def __init__(self, db_name: str = "ufc_v3.db", seed: Optional[int] = None):
+        """
+        אתחול הבקר
+        
+        Args:
+            db_name: קובץ מסד הנתונים
+            seed: זרע למנוע הקרבות (תוצאות זהות בכל הרצה)
+        """
         self._view = CLIView()
-        self._repository = Repository()
+        self._repository = Repository(db_name)
+        self._combat_engine = CombatEngine(seed)
+        self._jobs = JobStore(db_name)
+        self._job_workers = None
+        self._rankings = None
+        self._matchmaker = None
         self._running = False
         self._next_fighter_id = self._get_next_fighter_id()
     
+    @property
+    def repository(self):
+        return self._repository
+    
+    @property
+    def combat_engine(self):
+        return self._combat_engine
+    
+    @property
+    def jobs(self):
+        return self._jobs
+    
+    @property
+    def rankings(self):
+        """דירוגי הקטגוריות - נטענים בשימוש הראשון ומתעדכנים מכל כתיבה דרך ה-Repository"""
+        if self._rankings is None:
+            from rankings import Rankings
+            self._rankings = Rankings(self._repository)
+        return self._rankings
+    
+    @property
+    def matchmaker(self):
+        """אינדקס השידוכים (KD-tree לכל קטגוריה) - נטען בשימוש הראשון"""
+        if self._matchmaker is None:
+            from matchmaking import Matchmaker
+            self._matchmaker = Matchmaker(self._repository)
+        return self._matchmaker
+    
     def _get_next_fighter_id(self) -> int:
         """חישוב ID הבא ללוחם חדש"""
-        fighters = self._repository.get_all_fighters()
-        if not fighters:
-            return 1
-        return max(f.fighter_id for f in fighters) + 1
+        return self._repository.get_max_fighter_id() + 1
+    
+    def allocate_fighter_id(self) -> int:
+        """ID ללוחם חדש (מחוץ ל-REPL, למשל מה-CLI)"""
+        fighter_id = self._next_fighter_id
+        self._next_fighter_id += 1
+        return fighter_id
+    
+    # פעולות ללא קלט - משותפות ל-REPL ול-batch_cli
+    def record_fight(self, fighter1: Fighter, fighter2: Fighter) -> dict:
+        """סימולציית קרב ושמירת התוצאה והרקורדים המעודכנים"""
+        result = self._combat_engine.simulate_fight(fighter1, fighter2)
+        self._repository.save_fight_batch([fighter1, fighter2], [result])
+        return result
+    
+    def run_tournament(self, fighters: List[Fighter]) -> dict:
+        """טורניר נוקאאוט ושמירת כל הקרבות בטרנזקציה אחת"""
+        tournament = self._combat_engine.simulate_tournament(fighters)
+        results = [r for rnd in tournament['rounds'] for r in rnd]
+        self._repository.save_fight_batch(fighters, results)
+        return tournament
+    
+    def run_card(self, card: List[dict]) -> List[dict]:
+        """הרצת ערב קרבות מ-Matchmaker.build_card ושמירה בטרנזקציה אחת"""
+        ids = [bout[key] for bout in card for key in ('fighter1_id', 'fighter2_id')]
+        fighters = {f.fighter_id: f for f in self._repository.get_fighters_by_ids(ids)}
+        results = [self._combat_engine.simulate_fight(fighters[b['fighter1_id']], fighters[b['fighter2_id']])
+                   for b in card if b['fighter1_id'] in fighters and b['fighter2_id'] in fighters]
+        if results:
+            self._repository.save_fight_batch(list(fighters.values()), results)
+        return results
+    
+    def simulate_batch(self, fighters: List[Fighter], count: int, rng: random.Random,
+                       save: bool = True) -> List[dict]:
+        """
+        count קרבות בין זוגות אקראיים מתוך fighters
+        כל הלוחמים וכל התוצאות נשמרים בסוף בטרנזקציה אחת
+        """
+        results = []
+        touched = {}
+        for _ in range(count):
+            f1, f2 = rng.sample(fighters, 2)
+            results.append(self._combat_engine.simulate_fight(f1, f2))
+            touched[f1.fighter_id] = f1
+            touched[f2.fighter_id] = f2
+        if save and results:
+            self._repository.save_fight_batch(list(touched.values()), results)
+        return results
+    
+    def simulate_sharded(self, fighters: List[Fighter], count: int, seed: Optional[int] = None,
+                         workers: Optional[int] = None, save: bool = True) -> List[dict]:
+        """
+        כמו simulate_batch, אבל הקרבות עצמם רצים בכמה תהליכים מעל טבלת סטטיסטיקות משותפת
+        (sim_shards) - מתאים למיליוני קרבות; הרקורדים מתעדכנים ונשמרים כאן בסוף
+        """
+        from sim_shards import ShardedSimulator
+        with ShardedSimulator(fighters, workers) as sim:
+            shard_results = sim.run(count, seed)
+        engine = self._combat_engine
+        results = [engine.apply_outcome(fighters[i], fighters[j], outcome)
+                   for i, j, outcome in shard_results.outcomes()]
+        if save and results:
+            touched = {fighters[i].fighter_id: fighters[i] for i in set(shard_results.pairs)}
+            self._repository.save_fight_batch(list(touched.values()), results)
+        return results
+    
+    def submit_job(self, kind: str, params: Optional[dict] = None, start_workers: bool = True) -> int:
+        """
+        הגשת עבודת רקע (simulate / matrix / import / season) - חוזר מיד
+        start_workers: להעלות עובד ברקע מהתהליך הזה (אחרת - job_runner.py נפרד)
+        """
+        job_id = self._jobs.submit(kind, params)
+        if start_workers:
+            self.start_job_workers()
+        return job_id
+    
+    def start_job_workers(self, workers: int = 1):
+        # ייבוא מקומי - job_runner מעלה multiprocessing רק כשבאמת צריך עובדים
+        from job_runner import JobWorkers
+        if self._job_workers is None:
+            self._job_workers = JobWorkers(self._jobs.db_name, workers)
+        self._job_workers.start()
     
     def run(self):
         """
@@ -67,10 +189,13 @@ class MainController:
             '7': self._delete_fighter,
             '8': self._show_fight_history,
             '9': self._show_statistics,
+            'J': self._jobs_menu,
+            'K': self._rankings_menu,
+            'M': self._matchmaking_menu,
             '0': self._exit
         }
         
-        action = menu_actions.get(choice)
+        action = menu_actions.get(choice.upper())
         if action:
             action()
         else:
@@ -184,13 +309,13 @@ class MainController:
     
     def _show_all_fighters(self):
         """הצגת כל הלוחמים"""
-        fighters = self._repository.get_all_fighters()
+        total = self._repository.count_fighters()
         
-        if not fighters:
+        if not total:
             self._view.show_error("אין לוחמים במערכת")
             return
         
-        self._view.show_info(f"נמצאו {len(fighters)} לוחמים")
+        self._view.show_info(f"נמצאו {total} לוחמים")
         
         # בחירת סוג תצוגה
         print("\n1. Simple Display")
@@ -199,13 +324,12 @@ class MainController:
         
         view_choice = self._view.get_user_choice()
         
-        if view_choice == '1':
-            self._view.display_fighters_list(fighters)
-        elif view_choice == '2':
+        # הלוחמים מגיעים בזרימה מהמאגר - גם רוסטר ענק לא נטען כולו לזיכרון
+        fighters = self._repository.iter_fighters()
+        if view_choice == '2':
             self._view.display_fighters_table(fighters)
         elif view_choice == '3':
-            for fighter in fighters:
-                self._view.display_fighter(fighter)
+            self._view.display_fighters_full(fighters)
         else:
             self._view.display_fighters_list(fighters)
     
@@ -262,7 +386,15 @@ class MainController:
         
         try:
             id1 = int(self._view.get_input("ID לוחם ראשון: "))
-            id2 = int(self._view.get_input("ID לוחם שני: "))
+            id2 = self._view.get_input("ID לוחם שני (ריק = היריב הכי שקול): ")
+            if not id2:
+                suggestion = self.matchmaker.nearest(id1, 1)
+                if not suggestion:
+                    self._view.show_error("אין יריב מתאים באותה קטגוריה")
+                    return
+                id2 = suggestion[0]['fighter2_id']
+                self._view.show_info(f"יריב: {suggestion[0]['fighter2']}")
+            id2 = int(id2)
             
             fighter1 = self._repository.get_fighter_by_id(id1)
             fighter2 = self._repository.get_fighter_by_id(id2)
@@ -275,14 +407,10 @@ class MainController:
                 self._view.show_error("לא ניתן להילחם מול עצמך")
                 return
             
-            # סימולציית הקרב
-            result = self._combat_engine.simulate_fight(fighter1, fighter2)
-            
-            # עדכון במסד נתונים
-            self._repository.update_fighter(fighter1)
-            self._repository.update_fighter(fighter2)
-            self._repository.save_fight_result(result)
+            # סימולציית הקרב ועדכון במסד נתונים
+            result = self.record_fight(fighter1, fighter2)
             
+            self._view.display_fight_history([result])
             self._view.show_success("הקרב הסתיים ונשמר במערכת!")
             
         except ValueError:
@@ -324,6 +452,12 @@ class MainController:
             except ValueError:
                 self._view.show_error("יש להזין מספר")
                 return
+        
+        tournament = self.run_tournament(selected_fighters)
+        for i, results in enumerate(tournament['rounds'], 1):
+            self._view.show_info(f"סיבוב {i}")
+            self._view.display_fight_history(results)
+        self._view.show_success(f"🏆 אלוף הטורניר: {tournament['champion']}")
     
     def _update_fighter(self):
         """עדכון לוחם"""
@@ -395,9 +529,121 @@ class MainController:
         combined_stats = {**db_stats, **combat_stats}
         self._view.display_statistics(combined_stats)
     
+    def _jobs_menu(self):
+        """עבודות רקע: הגשה, מעקב, ביטול והמשך"""
+        self._view.display_jobs(self._jobs.list_jobs(limit=10))
+        print("\n1. Simulate many fights")
+        print("2. Win-probability matrix (CSV)")
+        print("3. Import fighters from file")
+        print("4. Refresh status")
+        print("5. Cancel job")
+        print("6. Resume job")
+        print("7. Season (career mode)")
+        
+        choice = self._view.get_user_choice()
+        try:
+            if choice == '1':
+                count = int(self._view.get_input("כמה קרבות? [10000]: ") or "10000")
+                weight_class = self._view.get_input("קטגוריית משקל (ריק = כולם): ") or None
+                job_id = self.submit_job("simulate", {"count": count, "weight_class": weight_class})
+            elif choice == '2':
+                weight_class = self._view.get_input("קטגוריית משקל (ריק = כולם): ") or None
+                limit = int(self._view.get_input("כמה לוחמים? [100]: ") or "100")
+                samples = int(self._view.get_input("קרבות לכל זוג? [100]: ") or "100")
+                job_id = self.submit_job("matrix", {"weight_class": weight_class, "limit": limit,
+                                                    "samples": samples})
+            elif choice == '3':
+                path = self._view.get_input("קובץ JSON / NDJSON: ")
+                job_id = self.submit_job("import", {"path": path, "new_ids": True})
+            elif choice == '7':
+                years = float(self._view.get_input("כמה שנים? [1]: ") or "1")
+                events = int(self._view.get_input("אירועים בשנה? [52]: ") or "52")
+                job_id = self.submit_job("season", {"years": years, "events_per_year": events})
+            elif choice == '4':
+                self._view.display_jobs(self._jobs.list_jobs(limit=10))
+                return
+            elif choice in ('5', '6'):
+                job_id = int(self._view.get_input("Job ID: "))
+                action = self._jobs.cancel if choice == '5' else self._jobs.resume
+                if action(job_id):
+                    if choice == '6':
+                        self.start_job_workers()
+                    self._view.show_success(f"Job #{job_id} updated")
+                else:
+                    self._view.show_error(f"Job #{job_id} לא במצב מתאים")
+                return
+            else:
+                self._view.show_error("בחירה לא חוקית")
+                return
+        except ValueError:
+            self._view.show_error("יש להזין מספר")
+            return
+        self._view.show_success(f"Job #{job_id} נשלח לרקע - אפשר להמשיך לעבוד (J לבדיקת מצב)")
+    
+    def _rankings_menu(self):
+        """דירוג לפי קטגוריית משקל, או המקום של לוחם אחד בקטגוריה שלו"""
+        from rankings import ORDERS
+        print("\n1. Top fighters in a weight class")
+        print("2. Rank of a fighter")
+        choice = self._view.get_user_choice()
+        try:
+            print(f"\nסדר: {', '.join(f'{i}. {o}' for i, o in enumerate(ORDERS, 1))}")
+            order = ORDERS[int(self._view.get_input("בחר סדר [1]: ") or "1") - 1]
+            if choice == '1':
+                weight_classes = self._view.show_weight_classes_menu()
+                weight_class = weight_classes[int(self._view.get_user_choice()) - 1]
+                limit = int(self._view.get_input("כמה לוחמים? [15]: ") or "15")
+                self._view.display_rankings(weight_class, order, self.rankings.top(weight_class, limit, order))
+            elif choice == '2':
+                fighter_id = int(self._view.get_input("הכנס ID: "))
+                fighter = self._repository.get_fighter_by_id(fighter_id)
+                rank = self.rankings.rank_of(fighter_id, order) if fighter else None
+                if rank is None:
+                    self._view.show_error(f"לא נמצא לוחם עם ID {fighter_id}")
+                    return
+                size = self.rankings.division_size(fighter.weight_class)
+                self._view.show_info(f"{fighter.name}: #{rank} of {size} in {fighter.weight_class} (by {order})")
+            else:
+                self._view.show_error("בחירה לא חוקית")
+        except (ValueError, IndexError):
+            self._view.show_error("בחירה לא חוקית")
+    
+    def _matchmaking_menu(self):
+        """יריבים מתאימים ללוחם, או ערב קרבות שלם של זוגות מאוזנים"""
+        print("\n1. Closest opponents (even fight)")
+        print("2. Style contrast (same level, opposite style)")
+        print("3. Build an event card")
+        choice = self._view.get_user_choice()
+        try:
+            if choice in ('1', '2'):
+                mode = 'closest' if choice == '1' else 'contrast'
+                fighter_id = int(self._view.get_input("הכנס ID: "))
+                k = int(self._view.get_input("כמה יריבים? [5]: ") or "5")
+                bouts = self.matchmaker.nearest(fighter_id, k, mode)
+                self._view.display_matchups(f"Opponents for #{fighter_id} ({mode})", bouts)
+            elif choice == '3':
+                bouts = int(self._view.get_input("כמה קרבות? [10]: ") or "10")
+                weight_class = self._view.get_input("קטגוריית משקל (ריק = כולן): ") or None
+                card = self.matchmaker.build_card(bouts, [weight_class] if weight_class else None)
+                self._view.display_matchups("Event card", card)
+                if card and self._view.confirm_action("להריץ את ערב הקרבות?"):
+                    results = self.run_card(card)
+                    self._view.display_fight_history(results)
+                    self._view.show_success(f"{len(results)} קרבות נשמרו")
+            else:
+                self._view.show_error("בחירה לא חוקית")
+        except ValueError:
+            self._view.show_error("יש להזין מספר")
+    
     def _exit(self):
         """יציאה מהתוכנית"""
         if self._view.confirm_action("האם אתה בטוח שברצונך לצאת?"):
+            if self._job_workers is not None:
+                # עבודה שרצה חוזרת לתור וממשיכה מנקודת השמירה בהפעלה הבאה
+                active = self._jobs.count_active()
+                self._job_workers.stop()
+                if active:
+                    self._view.show_info(f"{active} עבודות רקע ימשיכו בהפעלה הבאה (או: python job_runner.py)")
             self._running = False
 
 
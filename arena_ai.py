@@ -0,0 +1,354 @@
+"""
+Arena AI
+המחשב בזירה לפי טבלת מדיניות: המצב (מרחק, החיים שלי ושל היריב, סטמינה, אילו מכות טעונות
+והאם היריב בהגנה) מעוגל לתא בטבלה, ולכל תא יש ציון לכל פעולה. הטבלה נבנית מראש מהמון קרבות
+בלי חלון (Q-learning מול ה-AI הקלאסי ומול עצמה) ונשמרת ב-assets/arena_policy.bin; בזמן קרב
+כל החלטה היא חישוב אינדקס, שליפה והגרלה אחת - O(1) לטיק, גם עם הרבה זירות במקביל
+
+הסגנון של הלוחם (הסטטיסטיקות שלו) מטה את הציונים - סטרייקר בועט יותר, גראפלר מתגושש יותר -
+והקושי קובע טמפרטורה, זמן תגובה וטעויות
+
+מדגים: Tabular Q-learning, דיסקרטיזציה של מצב, טבלת הסתברויות מצטברות (O(1) לדגימה)
+
+שימוש:
+    python arena_ai.py build --fights 20000     # בונה מחדש את assets/arena_policy.bin
+    python arena_ai.py bench --fights 400       # אחוז ניצחונות מול ה-AI הקלאסי ועלות לטיק
+"""
+
+import argparse
+import array
+import bisect
+import functools
+import math
+import os
+import random
+import struct
+import sys
+import time
+from typing import NamedTuple, Optional
+
+from arena_sim import ArenaSim, DT, TICK_RATE, LEFT, RIGHT, JAB, KICK, GRAPPLE, BLOCK, RECOVER
+from combat_engine import STAT_FIELDS, fighter_stats
+
+POLICY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "arena_policy.bin")
+MAGIC = b"UFCP"
+VERSION = 1
+Q_SCALE = 256  # הציונים נשמרים כ-int16 (ציון * Q_SCALE)
+
+# ----- מצב -----
+DIST_BINS = (60, 90, 115, 135, 200, 400)  # טווח הגרפלינג 90, טווח המכות 135
+HP_BINS = (34, 67)
+STA_BINS = (10, 15, 20)  # המחיר של jab / kick / grapple
+N_STATES = (len(DIST_BINS) + 1) * (len(HP_BINS) + 1) ** 2 * (len(STA_BINS) + 1) * 8 * 2
+
+ACTIONS = ("advance", "retreat", "hold", "jab", "kick", "grapple", "block", "recover")
+N_ACTIONS = len(ACTIONS)
+ADVANCE, RETREAT, HOLD = 0, 1, 2
+ACTION_BITS = (0, 0, 0, JAB, KICK, GRAPPLE, BLOCK, RECOVER)
+
+# ----- בנייה -----
+TRAIN_HOLD = 6  # טיקים בין החלטות באימון
+TRAIN_MAX_TICKS = 60 * TICK_RATE
+WIN_REWARD = 30.0  # ביחידות של נקודות חיים
+GAMMA = 0.95
+ALPHA = 0.1
+
+STYLE_WEIGHT = 3.0  # כמה נקודות ציון שווה סטטיסטיקה של 100 (מול 50)
+
+
+class Difficulty(NamedTuple):
+    temperature: float  # softmax על הציונים; נמוך - כמעט תמיד הפעולה הטובה ביותר
+    reaction: int  # טיקים בין החלטות
+    blunder: float  # סיכוי לפעולה אקראית
+
+
+# מכוילות מול ה-AI הקלאסי (bench, 400 קרבות): easy ~30%, normal ~48% (כמו קלאסי מול קלאסי), hard ~100%
+DIFFICULTIES = {
+    "easy": Difficulty(10.0, 36, 0.8),
+    "normal": Difficulty(8.0, 30, 0.7),
+    "hard": Difficulty(0.2, 4, 0.0),
+}
+# לבחירה במסך: ה-AI הקלאסי (ai_input), הרמות מהטבלה + champion (חיפוש MCTS, arena_mcts)
+LEVELS = ("classic", *DIFFICULTIES, "champion")
+
+
+def state_index(sim: ArenaSim, who: str) -> int:
+    """התא בטבלה של המצב הנוכחי מנקודת המבט של who, לקראת הטיק הבא"""
+    if who == "p1":
+        dist, hp, foe_hp, sta, foe_block = abs(sim.x1 - sim.x2), sim.hp1, sim.hp2, sim.sta1, sim.block2_until
+    else:
+        dist, hp, foe_hp, sta, foe_block = abs(sim.x1 - sim.x2), sim.hp2, sim.hp1, sim.sta2, sim.block1_until
+    now = (sim.tick + 1) * DT
+    cd = sim.cooldowns[who]
+    ready = (now >= cd["jab"]) | (now >= cd["kick"]) << 1 | (now >= cd["grapple"]) << 2
+    s = bisect.bisect(DIST_BINS, dist)
+    s = s * (len(HP_BINS) + 1) + bisect.bisect(HP_BINS, hp)
+    s = s * (len(HP_BINS) + 1) + bisect.bisect(HP_BINS, foe_hp)
+    s = s * (len(STA_BINS) + 1) + bisect.bisect(STA_BINS, sta)
+    return (s * 8 + ready) * 2 + (now < foe_block)
+
+
+def action_mask(action: int, sim: ArenaSim, who: str, attack: bool = True) -> int:
+    """מסכת הקלט של פעולה; attack=False - רק חלק התנועה (בין החלטות)"""
+    if action > RETREAT:
+        return ACTION_BITS[action] if attack else 0
+    me, foe = (sim.x1, sim.x2) if who == "p1" else (sim.x2, sim.x1)
+    toward = RIGHT if foe > me else LEFT
+    if action == ADVANCE:
+        return toward
+    return LEFT if toward == RIGHT else RIGHT
+
+
+class Policy:
+    """הטבלה: N_STATES * N_ACTIONS ציונים (נזק צפוי לטובתי) בשורה אחת"""
+
+    def __init__(self, q):
+        if len(q) != N_STATES * N_ACTIONS:
+            raise ValueError(f"policy has {len(q)} values, expected {N_STATES * N_ACTIONS} "
+                             f"(rebuild with 'python arena_ai.py build')")
+        self.q = list(q)
+
+    def best(self, state: int) -> int:
+        row = self.q[state * N_ACTIONS:(state + 1) * N_ACTIONS]
+        return row.index(max(row))
+
+    def to_bytes(self) -> bytes:
+        packed = array.array("h", (max(-32767, min(32767, round(v * Q_SCALE))) for v in self.q))
+        if sys.byteorder != "little": packed.byteswap()
+        return struct.pack("<4sBII", MAGIC, VERSION, N_STATES, N_ACTIONS) + packed.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Policy":
+        magic, version, states, actions = struct.unpack_from("<4sBII", data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not an arena policy file (or an older version)")
+        if (states, actions) != (N_STATES, N_ACTIONS):
+            raise ValueError(f"policy is {states}x{actions}, expected {N_STATES}x{N_ACTIONS} "
+                             f"(rebuild with 'python arena_ai.py build')")
+        packed = array.array("h")
+        packed.frombytes(data[struct.calcsize("<4sBII"):])
+        if sys.byteorder != "little": packed.byteswap()
+        return cls([v / Q_SCALE for v in packed])
+
+    def save(self, path: str = POLICY_FILE) -> str:
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+        return path
+
+
+@functools.lru_cache(maxsize=None)
+def load_policy(path: str = POLICY_FILE) -> Policy:
+    """טבלה אחת משותפת לכל הזירות"""
+    with open(path, "rb") as f:
+        return Policy.from_bytes(f.read())
+
+
+def style_bias(fighter=None) -> tuple:
+    """תוספת לציון של כל פעולה לפי הסטטיסטיקות של הלוחם (50 - בלי הטיה)"""
+    if fighter is None:
+        return (0.0,) * N_ACTIONS
+    stats = dict(zip(STAT_FIELDS, fighter_stats(fighter)))
+    rel = lambda *names: sum(stats[n] - 50 for n in names) / (50.0 * len(names))
+    speed = rel("speed")
+    return tuple(STYLE_WEIGHT * v for v in (speed, -speed / 2, 0.0, rel("striking_power"), rel("kick_power"),
+                                             rel("grappling_skill", "submission_skill"), rel("takedown_defense"),
+                                             0.0))
+
+
+@functools.lru_cache(maxsize=64)
+def _cumulative(policy: Policy, bias: tuple, temperature: float, blunder: float) -> tuple:
+    # לכל תא: התפלגות מצטברת של softmax((ציון + הטיה) / טמפרטורה), מעורבבת עם בחירה אקראית
+    out = []
+    uniform = blunder / N_ACTIONS
+    for s in range(N_STATES):
+        row = [v + b for v, b in zip(policy.q[s * N_ACTIONS:(s + 1) * N_ACTIONS], bias)]
+        top = max(row)
+        weights = [math.exp((v - top) / temperature) for v in row]
+        total = sum(weights)
+        acc = 0.0
+        for w in weights:
+            acc += (1 - blunder) * w / total + uniform
+            out.append(acc)
+        out[-1] = 1.0
+    return tuple(out)
+
+
+class PolicyAI:
+    """
+    בקר מחשב לצד אחד בזירה (ArenaSim.ai). מחליט כל reaction טיקים ומחזיק את התנועה ביניהם
+
+    Args:
+        fighter: הלוחם שבשליטת המחשב (להטיית הסגנון), או None
+        difficulty: מפתח ב-DIFFICULTIES
+        seed: זרע להגרלות (אותו seed ואותו קרב - אותן החלטות)
+        policy: Policy (ברירת מחדל - assets/arena_policy.bin)
+    """
+
+    def __init__(self, fighter=None, difficulty: str = "normal", seed=None, policy: Optional[Policy] = None):
+        diff = DIFFICULTIES[difficulty]
+        self.difficulty = difficulty
+        self.reaction = diff.reaction
+        self.cumulative = _cumulative(policy or load_policy(), style_bias(fighter), diff.temperature, diff.blunder)
+        self.rng = random.Random(seed)
+        self.action = HOLD
+        self.wait = 0
+
+    def input(self, sim: ArenaSim, who: str) -> int:
+        self.wait -= 1
+        if self.wait > 0:
+            return action_mask(self.action, sim, who, attack=False)
+        self.wait = self.reaction
+        lo = state_index(sim, who) * N_ACTIONS
+        self.action = bisect.bisect(self.cumulative, self.rng.random(), lo, lo + N_ACTIONS - 1) - lo
+        return action_mask(self.action, sim, who)
+
+
+def make_ai(difficulty: str, fighter=None, seed=None, threaded: bool = False):
+    """
+    הבקר לצד שבשליטת המחשב; None - ה-AI הקלאסי של ArenaSim (ai_input)
+    threaded - ל-champion: החיפוש ב-thread עובד, כך שהטיק לא מחכה לו
+    """
+    if difficulty == "classic":
+        return None
+    if difficulty == "champion":
+        from arena_mcts import MctsAI
+        return MctsAI(fighter, seed=seed, threaded=threaded)
+    return PolicyAI(fighter, difficulty, seed)
+
+
+# ----- בנייה (offline) -----
+def build_policy(fights: int = 20000, seed: int = 1, progress=None) -> Policy:
+    """
+    Q-learning על קרבות בלי חלון: בכל קרב צד אחד או שניהם לומדים (מול ה-AI הקלאסי או מול
+    עצמם), החלטה כל TRAIN_HOLD טיקים, והתגמול הוא הנזק שנתתי פחות הנזק שספגתי עד ההחלטה הבאה
+    (ו-WIN_REWARD בסוף הקרב)
+    """
+    rng = random.Random(seed)
+    q = [0.0] * (N_STATES * N_ACTIONS)
+    sides = ("p1", "p2")
+    for n in range(fights):
+        eps = max(0.05, 0.3 * (1 - n / max(1, fights)))
+        sim = ArenaSim(rng.randrange(2 ** 32), "SIM")
+        kind = rng.randrange(3)  # 0/1 - צד אחד לומד מול הקלאסי, 2 - שניהם (מול עצמם)
+        learning = (kind != 1, kind != 0)
+        pending = [None, None]  # (state, action, hp שלי, hp של היריב) מההחלטה האחרונה
+        actions = [HOLD, HOLD]
+        while not sim.over and sim.tick < TRAIN_MAX_TICKS:
+            decide = sim.tick % TRAIN_HOLD == 0
+            masks = [0, 0]
+            for side, who in enumerate(sides):
+                if not learning[side]:
+                    masks[side] = sim.ai_input(who)
+                    continue
+                if decide:
+                    s = state_index(sim, who)
+                    hp, foe_hp = (sim.hp1, sim.hp2) if side == 0 else (sim.hp2, sim.hp1)
+                    if pending[side] is not None:
+                        _learn(q, pending[side], hp, foe_hp, s)
+                    row = q[s * N_ACTIONS:(s + 1) * N_ACTIONS]
+                    a = rng.randrange(N_ACTIONS) if rng.random() < eps else row.index(max(row))
+                    pending[side], actions[side] = (s, a, hp, foe_hp), a
+                masks[side] = action_mask(actions[side], sim, who, attack=decide)
+            sim.step(*masks)
+        for side in range(2):
+            if pending[side] is not None:
+                hp, foe_hp = (sim.hp1, sim.hp2) if side == 0 else (sim.hp2, sim.hp1)
+                bonus = 0.0 if not sim.over else WIN_REWARD if sim.winner_side == side + 1 else -WIN_REWARD
+                _learn(q, pending[side], hp, foe_hp, None, bonus)
+        if progress is not None and (n + 1) % 500 == 0:
+            progress(n + 1, fights)
+    return Policy(q)
+
+
+def _learn(q, pending, hp, foe_hp, next_state, bonus=0.0):
+    s, a, hp0, foe_hp0 = pending
+    reward = (foe_hp0 - foe_hp) - (hp0 - hp) + bonus
+    target = reward
+    if next_state is not None:
+        target += GAMMA * max(q[next_state * N_ACTIONS:(next_state + 1) * N_ACTIONS])
+    i = s * N_ACTIONS + a
+    q[i] += ALPHA * (target - q[i])
+
+
+# ----- benchmark -----
+def play(ai1, ai2, seed: int, max_ticks: int = 120 * TICK_RATE, profiles=None) -> ArenaSim:
+    """קרב אחד בלי חלון בין שני בקרים (None - ai_input הקלאסי); profiles - כמו ב-ArenaSim"""
+    sim = ArenaSim(seed, "SIM", profiles)
+    sim.ai = [ai1, ai2]
+    while not sim.over and sim.tick < max_ticks:
+        sim.step(*sim.tick_inputs())
+    return sim
+
+
+def bench(difficulty: str, fights: int = 400, seed: int = 1, opponent: str = "classic") -> dict:
+    """difficulty מול opponent, חצי מהקרבות בכל צד; זמן ההחלטה נמדד רק לבקר הנבדק"""
+    rng = random.Random(seed)
+    wins = losses = ticks = 0
+    ai_time, ai_calls = 0.0, 0
+    for n in range(fights):
+        side = n % 2
+        tested = _Timed(make_ai(difficulty, seed=rng.randrange(2 ** 32)))
+        other = make_ai(opponent, seed=rng.randrange(2 ** 32))
+        sim = play(*((tested, other) if side == 0 else (other, tested)), seed=rng.randrange(2 ** 32))
+        ticks += sim.tick
+        wins += sim.winner_side == side + 1
+        losses += sim.winner_side == 2 - side
+        ai_time += tested.elapsed
+        ai_calls += tested.calls
+    return {"difficulty": difficulty, "opponent": opponent, "fights": fights, "win_pct": 100.0 * wins / fights,
+            "loss_pct": 100.0 * losses / fights, "avg_seconds": ticks / fights / TICK_RATE,
+            "us_per_tick": 1e6 * ai_time / max(1, ai_calls)}
+
+
+class _Timed:
+    """עוטף בקר (או ai_input הקלאסי כשהבקר None) ומודד כמה זמן לוקחת כל החלטה"""
+
+    def __init__(self, ai):
+        self.ai, self.elapsed, self.calls = ai, 0.0, 0
+
+    def input(self, sim, who):
+        t0 = time.perf_counter()
+        mask = self.ai.input(sim, who) if self.ai is not None else sim.ai_input(who)
+        self.elapsed += time.perf_counter() - t0
+        self.calls += 1
+        return mask
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build and benchmark the arena policy-table AI")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="train the policy table on headless fights")
+    p.add_argument("--fights", type=int, default=20000)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--out", default=POLICY_FILE)
+    p = sub.add_parser("bench", help="win rate and per-tick cost of each difficulty")
+    p.add_argument("--fights", type=int, default=400)
+    p.add_argument("--opponent", default="classic")
+    p.add_argument("--difficulty", action="append", dest="difficulties")
+    p.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+
+        def report(done, total):
+            print(f"\r{done}/{total} fights  {done / (time.perf_counter() - t0):,.0f} fights/s", end="",
+                  file=sys.stderr)
+
+        policy = build_policy(args.fights, args.seed, report)
+        print(file=sys.stderr)
+        path = policy.save(args.out)
+        print(f"{path}: {N_STATES} states x {N_ACTIONS} actions, {os.path.getsize(path)} bytes, "
+              f"{time.perf_counter() - t0:.0f}s")
+        return 0
+
+    print(f"{'difficulty':<10} {'vs':<9} {'fights':>6} {'win %':>6} {'loss %':>6} {'avg s':>6} {'us/tick':>8}")
+    for difficulty in args.difficulties or ["classic", *DIFFICULTIES]:
+        r = bench(difficulty, args.fights, args.seed, args.opponent)
+        print(f"{difficulty:<10} {args.opponent:<9} {r['fights']:>6} {r['win_pct']:>6.1f} {r['loss_pct']:>6.1f} "
+              f"{r['avg_seconds']:>6.1f} {r['us_per_tick']:>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
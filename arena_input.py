@@ -0,0 +1,375 @@
+"""
+Arena Input
+שכבת הקלט של הזירה: מצב המקלדת נדגם פעם בכל טיק סימולציה (לא רק כשמגיע אירוע), לחיצת
+פעולה שנופלת על טעינה (cooldown) או על חוסר סטמינה נשמרת בחוצץ כמה טיקים ונשלחת בטיק
+הראשון שבו היא תתבצע, המקשים ניתנים לשינוי (controls.json), ולכל לחיצה נמדד כמה טיקים
+עברו עד שבוצעה
+
+מדגים: Polling מול Events, Input Buffering, Rebinding, מדידת השהיית קלט
+
+שימוש:
+    python arena_input.py show
+    python arena_input.py bind P1 jab j          # נשמר ב-controls.json
+    python arena_input.py reset
+    python arena_input.py bench --load-ms 0 40 120 --seconds 60
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import pygame
+
+from arena_sim import ArenaSim, DT, TICK_RATE, LEFT, RIGHT, JAB, KICK, GRAPPLE, BLOCK, RECOVER
+from sim_clock import FixedStepClock
+
+CONTROLS_FILE = "controls.json"
+BUFFER_TICKS = 8  # כמה טיקים לחיצה מחכה בחוצץ (~133ms)
+HOLD_BITS = LEFT | RIGHT  # תנועה - לפי מצב המקש בכל טיק; השאר - לחיצות
+
+ACTIONS = {"left": LEFT, "right": RIGHT, "jab": JAB, "kick": KICK, "grapple": GRAPPLE,
+           "block": BLOCK, "recover": RECOVER}
+DEFAULT_KEYS = (
+    {"left": pygame.K_LEFT, "right": pygame.K_RIGHT, "jab": pygame.K_1, "kick": pygame.K_2,
+     "grapple": pygame.K_3, "block": pygame.K_4, "recover": pygame.K_5},
+    {"left": pygame.K_a, "right": pygame.K_d, "jab": pygame.K_6, "kick": pygame.K_7,
+     "grapple": pygame.K_8, "block": pygame.K_9, "recover": pygame.K_0},
+)
+# מקשים שהזירה והאפליקציה תופסות לפני הקלט של השחקנים (זמן, הקלטה, איפוס, F-ים, יציאה)
+RESERVED_KEYS = {pygame.K_p: "pause", pygame.K_LEFTBRACKET: "slower", pygame.K_RIGHTBRACKET: "faster",
+                 pygame.K_r: "restart", pygame.K_s: "save replay", pygame.K_v: "watch replay",
+                 pygame.K_ESCAPE: "back", pygame.K_F3: "profiler", pygame.K_F4: "export timings",
+                 pygame.K_F6: "background job", pygame.K_F7: "cancel job"}
+SIDES = ("p1", "p2")
+HINT_LABELS = {"jab": "Jab", "kick": "Kick", "grapple": "Grapple", "block": "Block", "recover": "Rest"}
+
+
+class KeyBindings:
+    """מקש לכל פעולה של כל שחקן (P1 / P2). מקש משויך לפעולה אחת בלבד"""
+
+    def __init__(self, players=None):
+        self.players = [dict(keys) for keys in (players or DEFAULT_KEYS)]
+        self._reindex()
+
+    def _reindex(self):
+        self._by_key = {key: (player, ACTIONS[action])
+                        for player, keys in enumerate(self.players) for action, key in keys.items()}
+
+    def action_for(self, key: int) -> Optional[Tuple[int, int]]:
+        """(שחקן, ביט קלט) של המקש, או None"""
+        return self._by_key.get(key)
+
+    def held_mask(self, player: int, keys) -> int:
+        """כיוון מוחזק לפי מצב המקלדת (pygame.key.get_pressed() או כל דבר שאפשר לשאול keys[key])"""
+        b = self.players[player]
+        return (LEFT if keys[b["left"]] else 0) | (RIGHT if keys[b["right"]] else 0)
+
+    def bind(self, player: int, action: str, key: int) -> Optional[Tuple[int, str]]:
+        """
+        שינוי מקש. אם המקש כבר שייך לפעולה אחרת - הן מחליפות מקשים
+
+        Returns:
+            (שחקן, פעולה) שקיבלה את המקש הקודם, או None
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action {action!r} (one of {', '.join(ACTIONS)})")
+        _check_reserved(key)
+        old = self.players[player][action]
+        swapped = None
+        for other, keys in enumerate(self.players):
+            for name, k in keys.items():
+                if k == key and (other, name) != (player, action):
+                    keys[name] = old
+                    swapped = (other, name)
+        self.players[player][action] = key
+        self._reindex()
+        return swapped
+
+    def describe(self, player: int) -> str:
+        b = self.players[player]
+        return " | ".join(f"{action.title()} {pygame.key.name(b[action]).upper()}" for action in ACTIONS)
+
+    def hint(self, player: int, labels: bool = True) -> str:
+        """שורת עזרה קצרה למסך: "Move=LEFT/RIGHT | 1 Jab 2 Kick ..." (labels=False - "LEFT/RIGHT + 1 2 3 4 5")"""
+        name = lambda action: pygame.key.name(self.players[player][action]).upper()
+        move = f"{name('left')}/{name('right')}"
+        if labels:
+            return f"Move={move} | " + " ".join(f"{name(a)} {label}" for a, label in HINT_LABELS.items())
+        return f"{move} + " + " ".join(name(a) for a in HINT_LABELS)
+
+    # ----- שמירה -----
+    def to_dict(self) -> dict:
+        return {f"P{i + 1}": {action: pygame.key.name(key) for action, key in keys.items()}
+                for i, keys in enumerate(self.players)}
+
+    def save(self, path: str = CONTROLS_FILE) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path: str = CONTROLS_FILE) -> "KeyBindings":
+        """המקשים מהקובץ; פעולה שחסרה בו (או קובץ שלא קיים) - ברירת המחדל"""
+        players = [dict(keys) for keys in DEFAULT_KEYS]
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            for i, keys in enumerate(players):
+                for action, name in data.get(f"P{i + 1}", {}).items():
+                    if action in keys:
+                        keys[action] = pygame.key.key_code(name)
+        seen = {}
+        for i, keys in enumerate(players):
+            for action, key in keys.items():
+                _check_reserved(key)
+                if key in seen:
+                    raise ValueError(f"key {pygame.key.name(key)!r} is bound to both {seen[key]} and P{i + 1} {action}")
+                seen[key] = f"P{i + 1} {action}"
+        return cls(players)
+
+
+def _check_reserved(key: int):
+    if key in RESERVED_KEYS:
+        raise ValueError(f"key {pygame.key.name(key)!r} is reserved for {RESERVED_KEYS[key]}")
+
+
+class InputBuffer:
+    """
+    לחיצות פעולה של צד אחד שעוד לא בוצעו. peek() לפני הצעד מחזיר את מה שיתבצע בטיק הבא,
+    commit() אחריו מוציא מהחוצץ את מה שנשלח - כך קלט שלא נצרך (רשת שמחכה ליריב) לא הולך לאיבוד
+    """
+
+    def __init__(self, window: int = BUFFER_TICKS):
+        self.window = window
+        self.pending: Dict[int, int] = {}  # ביט -> הטיק שבו נלחץ
+        self.late: Dict[int, int] = {}  # ביט -> טיקים שעברו מהלחיצה עד שהגיעה לחוצץ
+        self.latency = Counter()  # טיקים מלחיצה לביצוע -> כמה לחיצות
+        self.buffered = 0  # בוצעו רק אחרי המתנה בחוצץ
+        self.dropped = 0
+
+    def press(self, bit: int, tick: int, late: int = 0):
+        # לחיצה חוזרת לפני הביצוע לא מאחרת את הראשונה
+        if bit not in self.pending:
+            self.pending[bit], self.late[bit] = tick, late
+
+    def peek(self, tick: int, ready) -> int:
+        """ready(bit) - האם הפעולה תתבצע בטיק הבא; לחיצה שחיכתה window טיקים נזרקת"""
+        mask = 0
+        for bit, pressed in list(self.pending.items()):
+            if ready(bit):
+                mask |= bit
+            elif tick - pressed >= self.window:
+                del self.pending[bit], self.late[bit]
+                self.dropped += 1
+        return mask
+
+    def commit(self, mask: int, tick: int):
+        """mask נשלח לסימולציה ויתבצע בטיק tick"""
+        for bit in [b for b in self.pending if mask & b]:
+            waited = tick - self.pending.pop(bit)
+            self.latency[waited + self.late.pop(bit)] += 1
+            if waited > 1: self.buffered += 1
+
+    def percentile(self, pct: float) -> int:
+        """אחוזון (nearest-rank) של ההשהיה בטיקים"""
+        total = sum(self.latency.values())
+        if not total:
+            return 0
+        k, seen = max(1, math.ceil(pct / 100.0 * total)), 0
+        for ticks in sorted(self.latency):
+            seen += self.latency[ticks]
+            if seen >= k:
+                return ticks
+        return 0
+
+    def stats(self) -> dict:
+        return {"executed": sum(self.latency.values()), "buffered": self.buffered, "dropped": self.dropped,
+                "p50_ticks": self.percentile(50), "p95_ticks": self.percentile(95),
+                "max_ticks": max(self.latency, default=0)}
+
+
+class ArenaInput:
+    """
+    הקלט של זירה אחת. key_down() לכל KEYDOWN, ובכל טיק: poll() לפני הצעד ו-commit() אחריו
+
+    Args:
+        sim: ArenaSim (או FightArena) שהקלט נשלח אליו
+        bindings: KeyBindings
+        players: לכל צד בזירה - איזה שחקן במקלדת שולט בו (0 = P1, 1 = P2) או None (מחשב / יריב ברשת)
+        window: BUFFER_TICKS; 0 - בלי חוצץ (לחיצה על טעינה נזרקת מיד)
+    """
+
+    def __init__(self, sim: ArenaSim, bindings: Optional[KeyBindings] = None, players=(0, 1),
+                 window: int = BUFFER_TICKS):
+        self.sim = sim
+        self.bindings = bindings or KeyBindings()
+        self.players = tuple(players)
+        self.buffers = (InputBuffer(window), InputBuffer(window))
+
+    def key_down(self, key: int, late: int = 0) -> bool:
+        """late - טיקים שעברו מהלחיצה בפועל עד עכשיו, אם ידוע (האירוע חיכה לתחילת הפריים)"""
+        hit = self.bindings.action_for(key)
+        if hit is None:
+            return False
+        player, bit = hit
+        for side, owner in enumerate(self.players):
+            if owner == player and not bit & HOLD_BITS:
+                self.buffers[side].press(bit, self.sim.tick, late)
+        return player in self.players
+
+    def poll(self, keys) -> Tuple[int, int]:
+        """הקלט לטיק הבא: כיוון לפי מצב המקשים עכשיו + פעולות מהחוצץ שיתבצעו בטיק הזה"""
+        masks = [0, 0]
+        for side, owner in enumerate(self.players):
+            if owner is None: continue
+            who = SIDES[side]
+            ready = lambda bit, who=who: self.sim.can_act(who, bit)
+            masks[side] = self.bindings.held_mask(owner, keys) | self.buffers[side].peek(self.sim.tick, ready)
+        return masks[0], masks[1]
+
+    def commit(self, in1: int, in2: int, delay: int = 0):
+        """אחרי הצעד; delay - טיקים עד שהקלט מופעל בפועל (input delay ברשת)"""
+        tick = self.sim.tick + delay
+        self.buffers[0].commit(in1, tick)
+        self.buffers[1].commit(in2, tick)
+
+    def stats(self, side: Optional[int] = None) -> dict:
+        """סטטיסטיקה של צד אחד, או של הצד הראשון שבשליטת המקלדת"""
+        if side is None:
+            side = next((s for s, owner in enumerate(self.players) if owner is not None), 0)
+        return self.buffers[side].stats()
+
+
+# ----- benchmark -----
+class _ScriptedPlayer:
+    """שחקן "אנושי" בזמן אמיתי: הולך לכיוון היריב ולוחץ על פעולות בקצב קבוע בממוצע"""
+
+    WEIGHTS = ((JAB, 5), (KICK, 3), (GRAPPLE, 1), (BLOCK, 1))
+
+    def __init__(self, seed: int, presses_per_second: float):
+        self.rng = random.Random(seed)
+        self.rate = presses_per_second
+        self.next_press = self.rng.expovariate(self.rate)
+
+    def presses_until(self, now: float):
+        """(זמן הלחיצה, ביט) לכל לחיצה עד now"""
+        while self.next_press <= now:
+            at = self.next_press
+            self.next_press += self.rng.expovariate(self.rate)
+            yield at, self.rng.choices([b for b, _ in self.WEIGHTS], [w for _, w in self.WEIGHTS])[0]
+
+    def keys(self, sim: ArenaSim, bindings: KeyBindings) -> Dict[int, bool]:
+        b = bindings.players[0]
+        state = dict.fromkeys((b["left"], b["right"]), False)
+        if abs(sim.x2 - sim.x1) > 110:
+            state[b["right"] if sim.x2 > sim.x1 else b["left"]] = True
+        return state
+
+
+def bench(load_ms: float, seconds: float = 60, window: int = BUFFER_TICKS, seed: int = 1,
+          presses_per_second: float = 2.0) -> dict:
+    """
+    קרבות נגד המחשב בלי חלון, כשכל פריים נמשך 1/60 שנייה + load_ms (±50%). האירועים נאספים
+    פעם בפריים כמו בלולאה של App, והטיקים רצים דרך FixedStepClock (כמה טיקים בפריים כבד).
+    ההשהיה נמדדת מרגע הלחיצה עצמה - כולל ההמתנה של האירוע עד תחילת הפריים הבא
+    """
+    rng = random.Random(seed)
+    bindings = KeyBindings()
+    key_of = {ACTIONS[action]: key for action, key in bindings.players[0].items()}
+    player = _ScriptedPlayer(seed, presses_per_second)
+    clock = FixedStepClock(DT)
+    total = InputBuffer(window)  # ההשהיה של כל הקרבות יחד
+    now, frames, presses, fights = 0.0, 0, 0, 1
+    sim = ArenaSim(seed, "CPU")
+    arena_input = ArenaInput(sim, bindings, players=(0, None), window=window)
+    while now < seconds:
+        frame_dt = 1 / TICK_RATE + load_ms / 1000.0 * rng.uniform(0.5, 1.5)
+        now += frame_dt
+        frames += 1
+        for at, bit in player.presses_until(now):
+            arena_input.key_down(key_of[bit], round((now - at) / DT))
+            presses += 1
+        keys = player.keys(sim, bindings)
+        for _ in range(clock.advance(frame_dt)):
+            in1, in2 = arena_input.poll(keys)
+            sim.step(*sim.tick_inputs(in1, in2))
+            arena_input.commit(in1, in2)
+            if sim.over:
+                _merge(total, arena_input.buffers[0])
+                sim = ArenaSim(rng.randrange(2 ** 32), "CPU")
+                arena_input = ArenaInput(sim, bindings, players=(0, None), window=window)
+                fights += 1
+    _merge(total, arena_input.buffers[0])
+    return {"load_ms": load_ms, "window": window, "fps": frames / now, "fights": fights, "presses": presses,
+            **total.stats()}
+
+
+def _merge(into: InputBuffer, buf: InputBuffer):
+    into.latency.update(buf.latency)
+    into.buffered += buf.buffered
+    into.dropped += buf.dropped
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Show, rebind and benchmark arena controls")
+    parser.add_argument("--file", default=CONTROLS_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("show", help="print the current key bindings")
+    p = sub.add_parser("bind", help="bind a key to an action (keys already in use are swapped)")
+    p.add_argument("player", choices=("P1", "P2", "p1", "p2"))
+    p.add_argument("action", choices=tuple(ACTIONS))
+    p.add_argument("key", help="pygame key name, e.g. j, space, left, 'right shift'")
+    sub.add_parser("reset", help="restore the default bindings")
+    p = sub.add_parser("bench", help="input-to-action latency under simulated frame load")
+    p.add_argument("--load-ms", type=float, nargs="+", default=[0, 40, 120])
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--window", type=int, default=BUFFER_TICKS)
+    p.add_argument("--presses-per-second", type=float, default=2.0)
+    p.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    pygame.init()  # key_code / name צריכים את SDL
+
+    if args.command == "bench":
+        print(f"{'load ms':>7} {'buffer':>6} {'fps':>6} {'presses':>7} {'executed':>8} {'buffered':>8} "
+              f"{'dropped':>7} {'p50':>4} {'p95':>4} {'max':>4}  (latency in ticks of {1000 * DT:.1f} ms)")
+        for load in args.load_ms:
+            for window in (0, args.window):
+                r = bench(load, args.seconds, window, args.seed, args.presses_per_second)
+                print(f"{load:>7g} {window:>6} {r['fps']:>6.1f} {r['presses']:>7} {r['executed']:>8} "
+                      f"{r['buffered']:>8} {r['dropped']:>7} {r['p50_ticks']:>4} {r['p95_ticks']:>4} "
+                      f"{r['max_ticks']:>4}")
+        return 0
+
+    try:
+        bindings = KeyBindings() if args.command == "reset" else KeyBindings.load(args.file)
+    except ValueError as e:
+        print(f"{args.file}: {e} (run 'reset' to restore the defaults)")
+        return 1
+    if args.command == "bind":
+        try:
+            key = pygame.key.key_code(args.key)
+        except ValueError:
+            print(f"unknown key name {args.key!r}")
+            return 1
+        player = int(args.player[1]) - 1
+        try:
+            swapped = bindings.bind(player, args.action, key)
+        except ValueError as e:
+            print(e)
+            return 1
+        if swapped:
+            print(f"P{swapped[0] + 1} {swapped[1]} moved to {pygame.key.name(bindings.players[swapped[0]][swapped[1]])}")
+    if args.command in ("bind", "reset"):
+        bindings.save(args.file)
+    for i in range(len(bindings.players)):
+        print(f"P{i + 1}: {bindings.describe(i)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Arena MCTS
+הקושי "champion": המחשב מחפש רצפי פעולות (advance / retreat / hold / jab / kick / grapple /
+block / recover) ב-Monte Carlo Tree Search על עותק של מצב הזירה בלי ציור (ArenaSim.snapshot
+ו-restore). כל פעולה בעץ נמשכת SEARCH_HOLD טיקים, היריב מדומה לפי טבלת המדיניות (arena_ai),
+ועלה בעומק MAX_DEPTH מוערך לפי הנזק שנצבר + הציון שלו בטבלה
+
+החיפוש רץ בתקציב זמן קבוע לכל טיק (2ms כברירת מחדל) - בין החלטות הוא ממשיך לשפר את העץ של
+ההחלטה הבאה, ואחרי כל החלטה תת-העץ של הפעולה שנבחרה הופך לשורש (שימוש חוזר בעץ).
+threaded=True - החיפוש רץ ב-thread עובד, והטיק עצמו רק מפרסם את המצב ולוקח את ההחלטה
+
+מדגים: Open-loop MCTS (UCB1), תקציב זמן, שימוש חוזר בעץ, חיפוש ברקע
+
+שימוש:
+    python arena_mcts.py bench --fights 40 --budget-ms 2
+    python arena_mcts.py bench --threaded --fights 10
+"""
+
+import argparse
+import math
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+from arena_sim import ArenaSim, TICK_RATE
+from arena_ai import (N_ACTIONS, HOLD, GAMMA, WIN_REWARD, Policy, action_mask, load_policy, make_ai,
+                      state_index, style_bias)
+from frame_profiler import percentile
+
+SEARCH_HOLD = 6  # טיקים לכל פעולה בעץ - גם הקצב שבו המחשב מחליט
+MAX_DEPTH = 3  # פעולות לעומק; אחריהן - ההערכה מהטבלה
+BUDGET_MS = 2.0
+EXPLORATION = 8.0  # קבוע UCB1 ביחידות של נקודות חיים
+
+
+class _Node:
+    __slots__ = ("visits", "value", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.value = 0.0  # סכום הערכים שעברו דרך הצומת
+        self.children = None
+
+
+class MctsAI:
+    """
+    בקר מחשב לצד אחד בזירה (ArenaSim.ai), כמו arena_ai.PolicyAI
+
+    Args:
+        fighter: הלוחם שבשליטת המחשב - הסגנון שלו מטה את הבחירות בשורש
+        budget_ms: זמן חיפוש לכל טיק
+        seed: זרע להגרלות החיפוש
+        threaded: חיפוש ב-thread עובד (budget_ms מכל 1/60 שנייה) במקום בתוך הטיק
+        policy: Policy להערכת עלים ולמודל היריב (ברירת מחדל - assets/arena_policy.bin)
+    """
+
+    def __init__(self, fighter=None, budget_ms: float = BUDGET_MS, seed=None, threaded: bool = False,
+                 policy: Optional[Policy] = None):
+        self.policy = policy or load_policy()
+        self.bias = style_bias(fighter)
+        self.budget = budget_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.scratch = ArenaSim(0, "SIM")
+        self.root = _Node()
+        self.action, self.wait = HOLD, 0
+        self.who = self.foe = None
+        self.side = 0
+        self._base = None  # (snapshot, טיקים שנשארו לפעולה הנוכחית, הפעולה) - מאיפה כל איטרציה מתחילה
+        self._opp_action, self._opp_wait = HOLD, 0
+
+        # סטטיסטיקה
+        self.iterations = 0
+        self.decisions = 0
+        self.reused = 0  # ביקורים שעברו לשורש החדש מהחיפוש הקודם
+
+        self.threaded = threaded
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ----- ממשק בקר -----
+    def input(self, sim: ArenaSim, who: str) -> int:
+        if self.who is None:
+            self.who, self.foe, self.side = who, ("p2" if who == "p1" else "p1"), int(who == "p2")
+            self.scratch.cpu = sim.cpu  # מהירות התנועה תלויה בזה
+            self.scratch.set_profiles(sim.profiles)  # והנזק - בפרופילים של הלוחמים
+            if self.threaded:
+                self._thread = threading.Thread(target=self._run, name="mcts", daemon=True)
+                self._thread.start()
+        if sim.over:
+            self.close()
+            return 0
+        self.wait -= 1
+        decide = self.wait <= 0
+        base = (sim.snapshot(rng=False), max(0, self.wait), self.action)
+        if self.threaded:
+            with self._lock:
+                self._base = base
+                if decide: self._decide(sim, base[0])
+        else:
+            self._base = base
+            deadline = time.perf_counter() + self.budget
+            while time.perf_counter() < deadline:
+                self._iterate()
+            if decide: self._decide(sim, base[0])
+        return action_mask(self.action, sim, who, attack=decide)
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {"iterations": self.iterations, "decisions": self.decisions,
+                "iterations_per_decision": self.iterations / max(1, self.decisions),
+                "reused_per_decision": self.reused / max(1, self.decisions)}
+
+    # ----- חיפוש -----
+    def _decide(self, sim: ArenaSim, snap):
+        # הפעולה עם הכי הרבה ביקורים בשורש; תת-העץ שלה הוא השורש החדש
+        children = self.root.children
+        if children and any(c.visits for c in children):
+            a = max(range(N_ACTIONS), key=lambda i: (children[i].visits, children[i].value))
+            self.root = children[a]
+        else:
+            a = self.policy.best(state_index(sim, self.who))
+            self.root = _Node()
+        self.action, self.wait = a, SEARCH_HOLD
+        self._base = (snap, SEARCH_HOLD, a)
+        self.decisions += 1
+        self.reused += self.root.visits
+
+    def _run(self):
+        period = 1.0 / TICK_RATE
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            while time.perf_counter() - start < self.budget and not self._stop.is_set():
+                with self._lock:
+                    if self._base is None: break
+                    self._iterate()
+                # מוותרים על ה-GIL אחרי כל איטרציה - אחרת הלולאה הראשית מחכה לו עד switch interval שלם
+                time.sleep(0)
+            self._stop.wait(max(0.0, period - (time.perf_counter() - start)))
+
+    def _iterate(self):
+        snap, remaining, action = self._base
+        sim = self.scratch
+        sim.restore(snap)
+        # גם הנזק מוגרל מחדש - החיפוש לא מציץ ב-rng האמיתי של הקרב
+        sim.rng.seed(self.rng.getrandbits(32))
+        self._opp_wait = 0
+        hp0, foe_hp0 = self._hp(sim)
+
+        # קודם - מה שנשאר מהפעולה שכבר נבחרה (מכה רק אם היא עוד לא יצאה)
+        self._play(sim, action, remaining, attack=remaining == SEARCH_HOLD)
+
+        node, path, depth = self.root, [self.root], 0
+        while depth < MAX_DEPTH and not sim.over:
+            if node.children is None:
+                node.children = [_Node() for _ in range(N_ACTIONS)]
+            a = self._select(node, depth == 0)
+            self._play(sim, a, SEARCH_HOLD, attack=True)
+            node = node.children[a]
+            path.append(node)
+            depth += 1
+            if node.visits == 0: break
+
+        hp, foe_hp = self._hp(sim)
+        value = (foe_hp0 - foe_hp) - (hp0 - hp)
+        if sim.over:
+            value += WIN_REWARD if sim.winner_side == self.side + 1 else -WIN_REWARD
+        else:
+            s = state_index(sim, self.who) * N_ACTIONS
+            value += GAMMA ** depth * max(self.policy.q[s:s + N_ACTIONS])
+        for n in path:
+            n.visits += 1
+            n.value += value
+        self.iterations += 1
+
+    def _select(self, node: _Node, at_root: bool) -> int:
+        # UCB1; צומת שלא בוקר קודם (בסדר אקראי), ובשורש - הטיה לפי הסגנון שנחלשת עם הביקורים
+        log_n = math.log(node.visits + 1)
+        best, best_score = 0, -math.inf
+        for a, child in enumerate(node.children):
+            if child.visits == 0:
+                score = 1e9 + self.rng.random()
+            else:
+                score = child.value / child.visits + EXPLORATION * math.sqrt(log_n / child.visits)
+                if at_root: score += self.bias[a] / (1 + child.visits)
+            if score > best_score:
+                best, best_score = a, score
+        return best
+
+    def _play(self, sim: ArenaSim, action: int, ticks: int, attack: bool):
+        # ticks טיקים של action מול מודל היריב (הפעולה הטובה ביותר שלו בטבלה, כל SEARCH_HOLD טיקים)
+        for t in range(ticks):
+            if sim.over: return
+            opp_attack = self._opp_wait <= 0
+            if opp_attack:
+                self._opp_action = self.policy.best(state_index(sim, self.foe))
+                self._opp_wait = SEARCH_HOLD
+            self._opp_wait -= 1
+            mine = action_mask(action, sim, self.who, attack=attack and t == 0)
+            theirs = action_mask(self._opp_action, sim, self.foe, attack=opp_attack)
+            sim.step(*((mine, theirs) if self.side == 0 else (theirs, mine)))
+
+    def _hp(self, sim: ArenaSim):
+        return (sim.hp1, sim.hp2) if self.side == 0 else (sim.hp2, sim.hp1)
+
+
+# ----- benchmark -----
+def bench(opponent: str, fights: int = 40, budget_ms: float = BUDGET_MS, threaded: bool = False,
+          seed: int = 1, max_ticks: int = 120 * TICK_RATE) -> dict:
+    """
+    champion מול opponent (classic = ai_input המקורי), חצי מהקרבות בכל צד. נמדד הזמן של כל
+    קריאה ל-input של champion - עם threaded הקרב רץ בקצב אמיתי כדי שלחיפוש יהיה זמן
+    """
+    rng = random.Random(seed)
+    wins = losses = ticks = 0
+    times, iterations, decisions = [], 0, 0
+    for n in range(fights):
+        side = n % 2
+        champ = MctsAI(budget_ms=budget_ms, seed=rng.randrange(2 ** 32), threaded=threaded)
+        other = make_ai(opponent, seed=rng.randrange(2 ** 32))
+        sim = ArenaSim(rng.randrange(2 ** 32), "SIM")
+        who = ("p1", "p2")[side]
+        while not sim.over and sim.tick < max_ticks:
+            tick_start = time.perf_counter()
+            t0 = time.perf_counter()
+            mine = champ.input(sim, who)
+            times.append((time.perf_counter() - t0) * 1000.0)
+            foe = "p2" if side == 0 else "p1"
+            theirs = other.input(sim, foe) if other is not None else sim.ai_input(foe)
+            sim.step(*((mine, theirs) if side == 0 else (theirs, mine)))
+            if threaded:
+                time.sleep(max(0.0, 1 / TICK_RATE - (time.perf_counter() - tick_start)))
+        champ.close()
+        ticks += sim.tick
+        wins += sim.winner_side == side + 1
+        losses += sim.winner_side == 2 - side
+        iterations += champ.iterations
+        decisions += champ.decisions
+    return {"opponent": opponent, "fights": fights, "win_pct": 100.0 * wins / fights,
+            "loss_pct": 100.0 * losses / fights, "avg_seconds": ticks / fights / TICK_RATE,
+            "tick_p50_ms": percentile(times, 50), "tick_p99_ms": percentile(times, 99), "tick_max_ms": max(times),
+            "iterations_per_decision": iterations / max(1, decisions)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the MCTS (champion) arena AI")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("bench", help="win rate and per-tick cost against the other AIs")
+    p.add_argument("--opponent", action="append", dest="opponents")
+    p.add_argument("--fights", type=int, default=40)
+    p.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    p.add_argument("--threaded", action="store_true")
+    p.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"champion: {args.budget_ms:g} ms/tick {'(worker thread)' if args.threaded else '(in tick)'}")
+    print(f"{'vs':<8} {'fights':>6} {'win %':>6} {'loss %':>6} {'avg s':>6} {'iter/dec':>8} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'max ms':>7}")
+    for opponent in args.opponents or ["classic", "normal", "hard"]:
+        r = bench(opponent, args.fights, args.budget_ms, args.threaded, args.seed)
+        print(f"{opponent:<8} {r['fights']:>6} {r['win_pct']:>6.1f} {r['loss_pct']:>6.1f} {r['avg_seconds']:>6.1f} "
+              f"{r['iterations_per_decision']:>8.0f} {r['tick_p50_ms']:>7.2f} {r['tick_p99_ms']:>7.2f} "
+              f"{r['tick_max_ms']:>7.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
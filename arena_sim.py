@@ -0,0 +1,241 @@
+"""
+Arena Sim
+הלוגיקה של קרב הזירה (FightArena) בלי pygame: צעד קבוע, rng עם seed, וקלט לכל טיק
+כמסכת ביטים לכל שחקן - כך שאותו seed ואותם קלטים נותנים בדיוק אותו קרב (replay.py)
+
+מדגים: סימולציה דטרמיניסטית, הפרדה בין קלט/לוגיקה/ציור, snapshot/restore לקפיצה בזמן
+"""
+
+import random
+import struct
+import zlib
+from typing import Optional
+
+from move_table import NEUTRAL_PROFILE, load_moves
+
+TICK_RATE = 60
+DT = 1 / TICK_RATE
+
+# ביטים של קלט לטיק אחד. תנועה - מצב (מוחזק), פעולות - לחיצה שנאספה מאז הטיק הקודם
+LEFT, RIGHT, JAB, KICK, GRAPPLE, BLOCK, RECOVER = (1 << i for i in range(7))
+
+MODES = ("CPU", "SIM", "2P")
+HUMAN_SPEED = 280
+CPU_SPEED = 240
+
+# גבולות הזירה - כמו ה-Rect של FightArena (70, 120, 1140, 520)
+ARENA_LEFT, ARENA_RIGHT, ARENA_BOTTOM = 70, 1210, 640
+GROUND_Y = ARENA_BOTTOM - 120
+
+# המכות מ-assets/moves.json (move_table), מקומפלות פעם אחת; מזהה מכה = אינדקס בטבלה
+MOVE_TABLE = load_moves()
+_ATTACK_BITS = {"jab": JAB, "kick": KICK, "grapple": GRAPPLE}
+if sorted(MOVE_TABLE.names) != sorted(_ATTACK_BITS):
+    raise ValueError(f"moves.json must define exactly {sorted(_ATTACK_BITS)}, got {list(MOVE_TABLE.names)}")
+MOVE_BITS = tuple(_ATTACK_BITS[name] for name in MOVE_TABLE.names)
+MOVES = dict(zip(MOVE_BITS, range(MOVE_TABLE.n)))  # ביט קלט -> מזהה מכה
+# העמודות שבשימוש בכל מכה, כגלובלים (שליפה מ-NamedTuple היא קריאה ל-property)
+_N_MOVES = MOVE_TABLE.n
+_NAMES, _COST, _COOLDOWN = MOVE_TABLE.names, MOVE_TABLE.cost, MOVE_TABLE.cooldown
+_REACH, _BLOCK_DIVISOR = MOVE_TABLE.reach, MOVE_TABLE.block_divisor
+
+# השדות שמרכיבים את מצב הקרב (snapshot ו-checksum)
+_STATE_FIELDS = ("tick", "t", "hp1", "hp2", "sta1", "sta2", "x1", "x2", "vx1", "vx2", "prev_x1", "prev_x2",
+                 "p1_hit_timer", "p2_hit_timer", "block1_until", "block2_until", "stun1_until", "stun2_until",
+                 "over", "winner_side")
+_HASH = struct.Struct("<I16d")
+
+
+class ArenaSim:
+    """
+    קרב אחד. cpu[i] - האם שחקן i בשליטת המחשב (לפי mode); המחשב מחליט עם rng נפרד,
+    כך שהפעלה חוזרת של הקלטים המוקלטים לא צריכה להריץ את ה-AI בכלל
+
+    Args:
+        seed: זרע לנזק ול-AI
+        mode: "CPU" (שחקן מול מחשב), "SIM" (מחשב מול מחשב) או "2P"
+        profiles: הפרופיל של כל לוחם (move_table.fighter_profile) - סגנון וסטטיסטיקות לנזק
+    """
+
+    def __init__(self, seed: Optional[int] = None, mode: str = "CPU", profiles=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.set_profiles(profiles)
+        self.mode = mode
+        self.cpu = (mode == "SIM", mode in ("CPU", "SIM"))
+        self.rng = random.Random(self.seed)
+        self.ai_rng = random.Random(f"{self.seed}:ai")
+        self.ai = [None, None]  # בקר לכל צד בשליטת המחשב (arena_ai); None - ai_input
+        self.tick = 0
+        self.t = 0.0  # זמן סימולציה - tick * DT
+
+        # נתוני חיים וכוח
+        self.hp1, self.hp2 = 100, 100
+        self.sta1, self.sta2 = 100, 100
+
+        # טיימרים להבהוב (אפקט פגיעה)
+        self.p1_hit_timer, self.p2_hit_timer = 0.0, 0.0
+
+        # הגנה וטעינה
+        self.block1_until, self.block2_until = 0.0, 0.0
+        self.cooldowns = {"p1": dict.fromkeys(MOVE_TABLE.names, 0), "p2": dict.fromkeys(MOVE_TABLE.names, 0)}
+        self.stun1_until, self.stun2_until = 0.0, 0.0
+
+        # מיקום (ציר x בלבד - כולם על הקרקע)
+        self.x1, self.x2 = ARENA_LEFT + 220, ARENA_RIGHT - 220
+        self.vx1, self.vx2 = 0, 0
+        self.prev_x1, self.prev_x2 = self.x1, self.x2  # לאינטרפולציה בציור
+        self.over = False
+        self.winner_side = 0  # 1 / 2 כשהקרב נגמר
+
+    def set_profiles(self, profiles=None):
+        """הפרופילים של שני הלוחמים וטבלת הנזק שלהם - קבועים לכל הקרב, לא חלק מה-snapshot"""
+        self.profiles = tuple(tuple(p) for p in profiles) if profiles else (NEUTRAL_PROFILE, NEUTRAL_PROFILE)
+        self.dmg_lo, self.dmg_hi = MOVE_TABLE.damage_table(*self.profiles)
+
+    # ----- קלט -----
+    def ai_input(self, who: str = "p2") -> int:
+        """ההחלטה של המחשב לטיק הבא, כמסכת קלט"""
+        me, foe = (self.x2, self.x1) if who == "p2" else (self.x1, self.x2)
+        if self.t < (self.stun2_until if who == "p2" else self.stun1_until):
+            return 0
+        dist = abs(me - foe)
+        mask = 0
+        if dist > 115:
+            mask |= RIGHT if foe > me else LEFT
+        # 3% לכל טיק של 60
+        if dist < 135 and self.ai_rng.random() < 0.03 * DT * TICK_RATE:
+            mask |= JAB
+        return mask
+
+    def _apply_input(self, who: str, mask: int):
+        speed = CPU_SPEED if self.cpu[who == "p2"] else HUMAN_SPEED
+        vx = 0
+        if mask & LEFT: vx = -speed
+        if mask & RIGHT: vx = speed
+        if who == "p1": self.vx1 = vx
+        else: self.vx2 = vx
+
+        for m, bit in enumerate(MOVE_BITS):
+            if mask & bit: self.try_attack(who, m)
+        if mask & BLOCK:
+            if who == "p1": self.block1_until = self.t + 0.6
+            else: self.block2_until = self.t + 0.6
+        if mask & RECOVER:
+            if who == "p1": self.sta1 = _clamp(self.sta1 + 15, 0, 100)
+            else: self.sta2 = _clamp(self.sta2 + 15, 0, 100)
+
+    def can_act(self, who: str, bit: int) -> bool:
+        """האם פעולה (ביט קלט) תתבצע בטיק הבא - אותם תנאים כמו try_attack (arena_input)"""
+        if self.over: return False
+        m = MOVES.get(bit)
+        if m is None: return True
+        sta = self.sta1 if who == "p1" else self.sta2
+        return (self.tick + 1) * DT >= self.cooldowns[who][_NAMES[m]] and sta >= _COST[m]
+
+    # ----- צעד -----
+    def tick_inputs(self, in1: int = 0, in2: int = 0) -> tuple:
+        """הקלטים שיופעלו בטיק הבא: שחקן בשליטת המחשב מקבל את ההחלטה של ה-AI"""
+        if self.cpu[0]: in1 = self.ai[0].input(self, "p1") if self.ai[0] else self.ai_input("p1")
+        if self.cpu[1]: in2 = self.ai[1].input(self, "p2") if self.ai[1] else self.ai_input("p2")
+        return in1, in2
+
+    def step(self, in1: int, in2: int):
+        """טיק אחד (DT) עם הקלטים של שני השחקנים"""
+        self.prev_x1, self.prev_x2 = self.x1, self.x2
+        if self.over: return
+        self.tick += 1
+        self.t = self.tick * DT
+
+        self._apply_input("p1", in1)
+        self._apply_input("p2", in2)
+
+        # התחדשות סטמינה
+        self.sta1 = _clamp(self.sta1 + 7 * DT, 0, 100)
+        self.sta2 = _clamp(self.sta2 + 7 * DT, 0, 100)
+
+        # תנועה
+        self.x1 += self.vx1 * DT
+        self.x2 += self.vx2 * DT
+
+        # --- פיזיקה: מעבר חופשי בין צדדים עם דחייה קלה ---
+        dist_x = self.x1 - self.x2
+        if abs(dist_x) < 55:
+            nudge = 2.5
+            if dist_x >= 0:
+                self.x1 += nudge; self.x2 -= nudge
+            else:
+                self.x1 -= nudge; self.x2 += nudge
+
+        # גבולות זירה
+        self.x1 = _clamp(self.x1, ARENA_LEFT + 40, ARENA_RIGHT - 40)
+        self.x2 = _clamp(self.x2, ARENA_LEFT + 40, ARENA_RIGHT - 40)
+
+        # עדכון טיימרים להבהוב נזק
+        self.p1_hit_timer = max(0, self.p1_hit_timer - DT)
+        self.p2_hit_timer = max(0, self.p2_hit_timer - DT)
+
+        if int(self.hp1) <= 0 or int(self.hp2) <= 0:
+            self.over = True
+            self.winner_side = 2 if self.hp1 <= 0 else 1
+
+    def try_attack(self, who, m):
+        now = self.t
+        cd = self.cooldowns[who]
+        move = _NAMES[m]
+        if now < cd[move]: return
+
+        cost = _COST[m]
+        if who == "p1" and self.sta1 < cost: return
+        if who == "p2" and self.sta2 < cost: return
+
+        if who == "p1": self.sta1 -= cost
+        else: self.sta2 -= cost
+
+        cd[move] = now + _COOLDOWN[m]
+        self.resolve_attack(who, m)
+
+    def resolve_attack(self, who, m):
+        dist = abs(self.x1 - self.x2)
+        if dist > _REACH[m]: return
+
+        i = m if who == "p1" else _N_MOVES + m
+        dmg = self.rng.randint(self.dmg_lo[i], self.dmg_hi[i])
+        if (self.t < self.block2_until if who == "p1" else self.t < self.block1_until):
+            dmg //= _BLOCK_DIVISOR[m]
+
+        if who == "p1":
+            self.hp2 = _clamp(self.hp2 - dmg, 0, 100)
+            self.p2_hit_timer = 0.15
+        else:
+            self.hp1 = _clamp(self.hp1 - dmg, 0, 100)
+            self.p1_hit_timer = 0.15
+
+    # ----- מצב -----
+    def snapshot(self, rng: bool = True) -> tuple:
+        """
+        כל המצב שמשפיע על ההמשך, כולל מצב ה-rng - ל-restore בקפיצה בזמן
+        rng=False - בלי מצב ה-rng (זול בהרבה; לחיפוש שמגריל מחדש בכל מקרה, arena_mcts)
+        """
+        return (tuple(getattr(self, name) for name in _STATE_FIELDS),
+                {who: dict(cd) for who, cd in self.cooldowns.items()},
+                self.rng.getstate() if rng else None, self.ai_rng.getstate() if rng else None)
+
+    def restore(self, snap: tuple):
+        values, cooldowns, rng_state, ai_state = snap
+        for name, value in zip(_STATE_FIELDS, values):
+            setattr(self, name, value)
+        self.cooldowns = {who: dict(cd) for who, cd in cooldowns.items()}
+        if rng_state is not None:
+            self.rng.setstate(rng_state)
+            self.ai_rng.setstate(ai_state)
+
+    def state_hash(self) -> int:
+        """crc32 של מצב הקרב (בלי ה-AI) - להשוואה בין ריצה מקורית להפעלה חוזרת"""
+        cd1, cd2 = self.cooldowns["p1"], self.cooldowns["p2"]
+        packed = _HASH.pack(self.tick, self.hp1, self.hp2, self.sta1, self.sta2, self.x1, self.x2,
+                            self.block1_until, self.block2_until, self.p1_hit_timer, self.p2_hit_timer,
+                            cd1["jab"], cd1["kick"], cd1["grapple"], cd2["jab"], cd2["kick"], cd2["grapple"])
+        return zlib.crc32(packed + bytes((self.winner_side,)))
+
+
+def _clamp(v, lo, hi): return max(lo, min(hi, v))
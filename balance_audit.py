@@ -0,0 +1,403 @@
+"""
+Balance Audit
+בדיקת איזון בין הסגנונות (Fighter / Striker / Grappler / HybridChampion) על הרבה קרבות:
+רוסטר סינתטי מרובד - אותו מספר לוחמים לכל סוג, רמת סטטיסטיקות וקטגוריית משקל - וקרבות
+מרובדים: אותו מספר קרבות לכל צמד (סוג, רמה) בתוך כל קטגוריה, בכמה תהליכים.
+ברירת המחדל היא מודל הסיבובים (resolve_bout דרך ShardedSimulator); --engine arena מריץ
+קרבות זירה (ArenaSim + arena_ai, עם טבלת המכות של move_table)
+
+הדוח: אחוז ניצחונות לכל צמד סגנונות - בסך הכל, באותה רמה, לפי קטגוריה ולפי פער
+הסטטיסטיקות - עם רווח סמך Wilson, ל-CSV / HTML. צמד שרווח הסמך שלו רחוק מ-50% יותר
+מ-tolerance מסומן; מול baseline שנשמר ב-commit קודם מסומנים צמדים שהחמירו (יציאה 1)
+
+מדגים: דגימה מרובדת, רווח סמך Wilson, השוואה ל-baseline בין גרסאות
+
+שימוש:
+    python balance_audit.py --bouts 200000 --csv balance.csv --html balance.html
+    python balance_audit.py --save-baseline balance_baseline.json
+    python balance_audit.py --baseline balance_baseline.json     # יציאה 1 אם האיזון החמיר
+    python balance_audit.py --engine arena --bouts 4000 --per-cell 4
+"""
+
+import argparse
+import csv
+import html
+import inspect
+import itertools
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from combat_engine import STAT_FIELDS, fighter_stats
+from models.repository import FIGHTER_TYPES
+from sim_shards import ShardedSimulator
+
+STYLES = tuple(FIGHTER_TYPES)  # Fighter, Striker, Grappler, HybridChampion
+TIERS = {"low": (35, 55), "mid": (55, 75), "high": (75, 95)}
+WEIGHT_CLASSES = ("Flyweight", "Bantamweight", "Featherweight", "Lightweight",
+                  "Welterweight", "Middleweight", "Light Heavyweight", "Heavyweight")
+ENGINES = ("rounds", "arena")
+
+# פער בממוצע הסטטיסטיקות (לוחם א' פחות לוחם ב')
+DELTA_BINS = (-20, -10, -3, 3, 10, 20)
+Z = 1.96  # רווח סמך 95%
+TOLERANCE = 0.05
+MIN_BOUTS = 200  # פחות קרבות בתא - לא מסמנים
+FLAGGED_TABLES = ("style", "tier", "weight_class")
+TABLES = FLAGGED_TABLES + ("stat_delta",)
+CSV_FIELDS = ("table", "a", "b", "group", "n", "wins", "losses", "draws", "win_rate", "ci_lo", "ci_hi", "flag")
+
+ARENA_CHUNK = 100
+ARENA_DIFFICULTY = "hard"  # בלי טעויות אקראיות - ההבדל בין הקרבות בא מהסגנון
+ARENA_MAX_TICKS = 120 * 60
+
+
+# ----- רוסטר ודגימה -----
+def _own_stats(cls) -> tuple:
+    """הסטטיסטיקות שהסוג מקבל ב-__init__ (השאר - STAT_DEFAULT ב-fighter_stats)"""
+    params = inspect.signature(cls.__init__).parameters
+    return tuple(name for name in STAT_FIELDS if name in params)
+
+
+def synthetic_roster(per_cell: int = 8, seed: int = 1, weight_classes: Sequence[str] = WEIGHT_CLASSES):
+    """
+    per_cell לוחמים לכל (סוג, רמה, קטגוריה); כל סטטיסטיקה של הסוג מוגרלת בטווח של הרמה
+
+    Returns:
+        tuple: (fighters, meta) - meta[i] = (סוג, רמה, קטגוריה)
+    """
+    if per_cell < 1:
+        raise ValueError(f"per_cell must be at least 1, got {per_cell}")
+    rng = random.Random(seed)
+    fighters, meta = [], []
+    for wc, style, tier in itertools.product(weight_classes, STYLES, TIERS):
+        cls = FIGHTER_TYPES[style]
+        lo, hi = TIERS[tier]
+        for k in range(per_cell):
+            stats = {name: rng.randint(lo, hi) for name in _own_stats(cls)}
+            fighters.append(cls(len(fighters) + 1, f"{style} {tier} {wc} #{k + 1}", wc, **stats))
+            meta.append((style, tier, wc))
+    return fighters, meta
+
+
+def stratified_pairs(meta: Sequence[tuple], bouts: int, seed: int = 1) -> array:
+    """
+    זוגות (שטוח: i0, j0, i1, j1, ...) - אותו מספר קרבות לכל צמד תאים (סוג, רמה) בכל קטגוריה,
+    כולל תא מול עצמו (כשיש בו לפחות שני לוחמים); הסדר בזוג מוגרל
+    """
+    rng = random.Random(f"{seed}:pairs")
+    cells = defaultdict(list)
+    for i, (style, tier, wc) in enumerate(meta):
+        cells[wc, style, tier].append(i)
+    strata = []
+    for wc in dict.fromkeys(m[2] for m in meta):
+        keys = [key for key in cells if key[0] == wc]
+        strata.extend(itertools.combinations_with_replacement(keys, 2))
+    per_stratum = max(1, bouts // len(strata))
+    pairs = array("i")
+    for a, b in strata:
+        ca, cb = cells[a], cells[b]
+        if a == b and len(ca) < 2:
+            continue  # לוחם יחיד בתא - אין לו יריב בתוכו
+        for _ in range(per_stratum):
+            i = rng.choice(ca)
+            j = rng.choice(cb)
+            while j == i:
+                j = rng.choice(cb)
+            if rng.random() < 0.5:
+                i, j = j, i
+            pairs.append(i)
+            pairs.append(j)
+    return pairs
+
+
+# ----- הרצה -----
+def run_rounds(fighters, pairs: array, seed: int, workers: Optional[int] = None) -> array:
+    """המנצח בכל קרב (0 / 1 / -1 תיקו) במודל הסיבובים - ShardedSimulator"""
+    with ShardedSimulator(fighters, workers) as sim:
+        return sim.run(len(pairs) // 2, seed, pairs=pairs).codes[0::3]
+
+
+_arena = None
+
+
+def _init_arena(fighters, difficulty: str):
+    global _arena
+    from move_table import fighter_profile
+    _arena = (fighters, [fighter_profile(f) for f in fighters], difficulty)
+
+
+def _arena_chunk(start: int, pairs: Sequence[int], seed) -> bytes:
+    from arena_ai import make_ai, play
+    fighters, profiles, difficulty = _arena
+    rng = random.Random(f"{seed}:{start}")
+    out = array("b")
+    for k in range(0, len(pairs), 2):
+        i, j = pairs[k], pairs[k + 1]
+        sim = play(make_ai(difficulty, fighters[i], rng.randrange(2 ** 32)),
+                   make_ai(difficulty, fighters[j], rng.randrange(2 ** 32)),
+                   rng.randrange(2 ** 32), ARENA_MAX_TICKS, (profiles[i], profiles[j]))
+        out.append(sim.winner_side - 1 if sim.over else -1)
+    return out.tobytes()
+
+
+def run_arena(fighters, pairs: array, seed: int, workers: Optional[int] = None,
+              difficulty: str = ARENA_DIFFICULTY) -> array:
+    """
+    המנצח בכל קרב בזירה (קרב שלא נגמר ב-ARENA_MAX_TICKS - תיקו). כל תהליך מקבל את הרוסטר
+    פעם אחת; טבלת ההסתברויות של כל לוחם נשמרת ב-cache של arena_ai (עד 64 לוחמים שונים)
+    """
+    chunk = 2 * ARENA_CHUNK
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_arena,
+                             initargs=(fighters, difficulty)) as pool:
+        futures = [pool.submit(_arena_chunk, start // 2, pairs[start:start + chunk], seed)
+                   for start in range(0, len(pairs), chunk)]
+        winners = array("b")
+        for future in futures:
+            winners.frombytes(future.result())
+    return winners
+
+
+# ----- סטטיסטיקה -----
+def wilson(score: float, n: int, z: float = Z) -> tuple:
+    """רווח סמך Wilson לשיעור score / n (תיקו נספר כחצי)"""
+    if n == 0:
+        return 0.0, 1.0
+    p = score / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def _delta_bin(delta: float) -> str:
+    for k, edge in enumerate(DELTA_BINS):
+        if delta < edge:
+            return f"<{edge}" if k == 0 else f"{DELTA_BINS[k - 1]}..{edge}"
+    return f">={DELTA_BINS[-1]}"
+
+
+def tally(fighters, meta: Sequence[tuple], pairs: array, winners: Sequence[int],
+          tolerance: float = TOLERANCE, min_bouts: int = MIN_BOUTS) -> List[dict]:
+    """
+    שורות הדוח: לכל טבלה ומפתח - ניצחונות של סגנון a מול b. בזוג של סגנונות שונים a הוא
+    הראשון ב-STYLES; באותו סגנון a הוא הלוחם הראשון בזוג (בודק הטיה לפי צד).
+    style / tier מסומנים כשהם רחוקים מ-50% ("imbalanced"); weight_class - כשהוא רחוק
+    מהצמד בכלל הקטגוריות ("outlier")
+    """
+    mean = [sum(s) / len(s) for s in map(fighter_stats, fighters)]
+    order = {style: k for k, style in enumerate(STYLES)}
+    counts = defaultdict(lambda: [0, 0, 0])
+    for k, winner in enumerate(winners):
+        i, j = pairs[2 * k], pairs[2 * k + 1]
+        if order[meta[j][0]] < order[meta[i][0]]:
+            i, j = j, i
+            winner = 1 - winner if winner >= 0 else winner
+        (sa, ta, wc), (sb, tb, _) = meta[i], meta[j]
+        slot = 0 if winner == 0 else 1 if winner == 1 else 2
+        keys = [("style", sa, sb, "all"), ("weight_class", sa, sb, wc),
+                ("stat_delta", sa, sb, _delta_bin(mean[i] - mean[j]))]
+        if ta == tb:
+            keys.append(("tier", sa, sb, ta))
+        for key in keys:
+            counts[key][slot] += 1
+
+    overall = {(a, b): (w + d / 2) / (w + l + d)
+               for (table, a, b, _), (w, l, d) in counts.items() if table == "style"}
+    rows = []
+    for (table, a, b, group), (wins, losses, draws) in counts.items():
+        n = wins + losses + draws
+        lo, hi = wilson(wins + draws / 2, n)
+        ref = overall[a, b] if table == "weight_class" else 0.5
+        flag = ""
+        if table in FLAGGED_TABLES and n >= min_bouts and (lo > ref + tolerance or hi < ref - tolerance):
+            flag = "outlier" if table == "weight_class" else "imbalanced"
+        rows.append({"table": table, "a": a, "b": b, "group": group, "n": n, "wins": wins, "losses": losses,
+                     "draws": draws, "win_rate": round((wins + draws / 2) / n, 4),
+                     "ci_lo": round(lo, 4), "ci_hi": round(hi, 4), "flag": flag})
+    group_order = {g: k for k, g in enumerate(("all", *TIERS, *WEIGHT_CLASSES))}
+    rows.sort(key=lambda r: (TABLES.index(r["table"]), order[r["a"]], order[r["b"]],
+                             group_order.get(r["group"], len(group_order)), _delta_key(r["group"])))
+    return rows
+
+
+def _delta_key(group: str) -> float:
+    if group.startswith("<"): return -math.inf
+    if group.startswith(">="): return math.inf
+    try: return float(group.split("..")[0])
+    except ValueError: return 0.0
+
+
+def regressions(rows: Sequence[dict], baseline: Sequence[dict]) -> List[dict]:
+    """
+    צמדים שהחמירו מול ה-baseline: מסומנים עכשיו, הסטייה מ-50% גדלה ורווחי הסמך של שתי
+    הריצות לא חופפים. להשוואה בין commits צריך אותו seed ואותו bouts - אז גם הרוסטר
+    והזוגות זהים, וכל שינוי בא מהקוד
+    """
+    old = {(r["table"], r["a"], r["b"], r["group"]): r for r in baseline}
+    found = []
+    for row in rows:
+        if row["table"] not in FLAGGED_TABLES:
+            continue
+        prev = old.get((row["table"], row["a"], row["b"], row["group"]))
+        if prev is None:
+            continue
+        worse = abs(row["win_rate"] - 0.5) > abs(prev["win_rate"] - 0.5)
+        apart = row["ci_lo"] > prev["ci_hi"] or row["ci_hi"] < prev["ci_lo"]
+        if row["flag"] and worse and apart:
+            found.append(dict(row, baseline_win_rate=prev["win_rate"]))
+    return found
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def audit(engine: str = "rounds", bouts: int = 200000, per_cell: int = 8, seed: int = 1,
+          workers: Optional[int] = None, tolerance: float = TOLERANCE, min_bouts: int = MIN_BOUTS) -> dict:
+    """ריצה שלמה: רוסטר, זוגות, סימולציה ודוח"""
+    if engine not in ENGINES:
+        raise ValueError(f"unknown engine {engine!r}")
+    t0 = time.perf_counter()
+    # בזירה אין קטגוריות משקל (והרוסטר צריך להיכנס ל-cache של arena_ai)
+    weight_classes = WEIGHT_CLASSES if engine == "rounds" else ("Open",)
+    fighters, meta = synthetic_roster(per_cell, seed, weight_classes)
+    pairs = stratified_pairs(meta, bouts, seed)
+    run = run_rounds if engine == "rounds" else run_arena
+    winners = run(fighters, pairs, seed, workers)
+    rows = tally(fighters, meta, pairs, winners, tolerance, min_bouts)
+    return {"commit": git_commit(), "engine": engine, "seed": seed, "bouts": len(winners),
+            "fighters": len(fighters), "tolerance": tolerance, "elapsed_s": round(time.perf_counter() - t0, 2),
+            "rows": rows}
+
+
+# ----- דוחות -----
+def write_csv(report: dict, path: str) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(report["rows"])
+    return path
+
+
+def _cell_color(row: dict) -> str:
+    # לבן ב-50%, כחול כשסגנון a מנצח יותר, אדום כשפחות
+    skew = max(-1.0, min(1.0, (row["win_rate"] - 0.5) / 0.25))
+    fade = int(255 - 120 * abs(skew))
+    return f"rgb({fade},{fade},255)" if skew > 0 else f"rgb(255,{fade},{fade})"
+
+
+def write_html(report: dict, path: str, regressed: Sequence[dict] = ()) -> str:
+    esc = html.escape
+    parts = ["<!DOCTYPE html><html><head><meta charset='utf-8'><title>Style balance audit</title>",
+             "<style>body{font-family:sans-serif;margin:24px}table{border-collapse:collapse;margin-bottom:24px}"
+             "td,th{border:1px solid #ccc;padding:3px 8px;text-align:right}th{background:#eee}"
+             ".flag{font-weight:bold;color:#b00}</style></head><body>",
+             f"<h1>Style balance audit</h1><p>commit {esc(report['commit'] or '-')}, engine {esc(report['engine'])}, "
+             f"{report['bouts']} bouts, {report['fighters']} synthetic fighters, seed {report['seed']}, "
+             f"tolerance &plusmn;{report['tolerance']:g}, {report['elapsed_s']} s</p>"]
+    flagged = [r for r in report["rows"] if r["flag"]]
+    parts.append(f"<p>{len(flagged)} flagged cells, {len(regressed)} regressions vs baseline</p>")
+    if regressed:
+        parts.append("<h2>Regressions</h2><table><tr><th>table</th><th>matchup</th><th>group</th>"
+                     "<th>baseline</th><th>now</th><th>95% CI</th></tr>")
+        for r in regressed:
+            parts.append(f"<tr><td>{esc(r['table'])}</td><td>{esc(r['a'])} vs {esc(r['b'])}</td>"
+                         f"<td>{esc(r['group'])}</td><td>{r['baseline_win_rate']:.3f}</td>"
+                         f"<td>{r['win_rate']:.3f}</td><td>{r['ci_lo']:.3f}-{r['ci_hi']:.3f}</td></tr>")
+        parts.append("</table>")
+    for table in TABLES:
+        rows = [r for r in report["rows"] if r["table"] == table]
+        if not rows:
+            continue
+        parts.append(f"<h2>{esc(table)}</h2><table><tr><th>a</th><th>b</th><th>group</th><th>bouts</th>"
+                     "<th>a wins</th><th>b wins</th><th>draws</th><th>a win rate</th><th>95% CI</th><th></th></tr>")
+        for r in rows:
+            parts.append(f"<tr><td>{esc(r['a'])}</td><td>{esc(r['b'])}</td><td>{esc(r['group'])}</td>"
+                         f"<td>{r['n']}</td><td>{r['wins']}</td><td>{r['losses']}</td><td>{r['draws']}</td>"
+                         f"<td style='background:{_cell_color(r)}'>{r['win_rate']:.3f}</td>"
+                         f"<td>{r['ci_lo']:.3f}-{r['ci_hi']:.3f}</td><td class='flag'>{esc(r['flag'])}</td></tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write("\n".join(parts))
+    return path
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Audit win rates between fighter styles on synthetic rosters")
+    parser.add_argument("--engine", choices=ENGINES, default="rounds",
+                        help="rounds: resolve_bout (seasons, batch jobs); arena: ArenaSim with arena_ai")
+    parser.add_argument("--bouts", type=int, help="total bouts (default 200000 rounds / 4000 arena)")
+    parser.add_argument("--per-cell", type=int, help="fighters per style/tier/weight class (default 8 / 4)")
+    parser.add_argument("--workers", type=int, help="processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="flag when the 95%% CI is entirely outside 50%% (weight classes: the "
+                             "matchup's overall rate) +- tolerance")
+    parser.add_argument("--min-bouts", type=int, default=MIN_BOUTS)
+    parser.add_argument("--csv", help="write all rows as CSV")
+    parser.add_argument("--html", help="write an HTML report")
+    parser.add_argument("--baseline", help="compare with a saved report; exit 1 on regressions")
+    parser.add_argument("--save-baseline", help="save this report as JSON for later comparison")
+    args = parser.parse_args(argv)
+    if args.per_cell is not None and args.per_cell < 1:
+        parser.error("--per-cell must be at least 1")
+
+    arena = args.engine == "arena"
+    bouts = args.bouts or (4000 if arena else 200000)
+    per_cell = args.per_cell or (4 if arena else 8)
+    report = audit(args.engine, bouts, per_cell, args.seed, args.workers, args.tolerance, args.min_bouts)
+
+    regressed = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            base = json.load(fh)
+        for key in ("engine", "seed", "bouts", "fighters"):
+            if base.get(key) != report[key]:
+                print(f"warning: baseline {key} {base.get(key)} != {report[key]}", file=sys.stderr)
+        regressed = regressions(report["rows"], base["rows"])
+
+    print(f"{report['bouts']} bouts ({report['engine']}), {report['fighters']} fighters, "
+          f"commit {report['commit'] or '-'}, {report['elapsed_s']} s")
+    print(f"{'matchup':<32}{'bouts':>8}{'a win':>8}{'95% CI':>16}")
+    for r in report["rows"]:
+        if r["table"] == "style":
+            ci = f"{r['ci_lo']:.3f}-{r['ci_hi']:.3f}"
+            print(f"{r['a'] + ' vs ' + r['b']:<32}{r['n']:>8}{r['win_rate']:>8.3f}{ci:>16}  {r['flag']}")
+    flagged = [r for r in report["rows"] if r["flag"]]
+    print(f"{len(flagged)} flagged cells (tolerance +-{args.tolerance:g})")
+    for r in flagged[:20]:
+        print(f"  {r['table']:<13}{r['a']} vs {r['b']} [{r['group']}]: {r['win_rate']:.3f} "
+              f"({r['ci_lo']:.3f}-{r['ci_hi']:.3f}, {r['n']} bouts)")
+    if args.baseline:
+        print(f"{len(regressed)} regressions vs {args.baseline} (commit {base.get('commit') or '-'})")
+        for r in regressed:
+            print(f"  {r['table']:<13}{r['a']} vs {r['b']} [{r['group']}]: "
+                  f"{r['baseline_win_rate']:.3f} -> {r['win_rate']:.3f}")
+    if args.csv:
+        print(f"wrote {write_csv(report, args.csv)}")
+    if args.html:
+        print(f"wrote {write_html(report, args.html, regressed)}")
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=1)
+        print(f"wrote {args.save_baseline}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,459 @@
+"""
+Batch CLI
+ממשק שורת פקודה לא-אינטראקטיבי (argparse) לצד ה-REPL של MainController
+מתאים להרצה מ-cron: פלט JSON/NDJSON וקודי יציאה קבועים
+
+שימוש:
+    python batch_cli.py import fighters.ndjson
+    python batch_cli.py export --format ndjson > fighters.ndjson
+    python batch_cli.py add --type Striker --name "Max Holloway" --weight-class Featherweight --speed 90
+    python batch_cli.py update 3 --add-win --train
+    python batch_cli.py simulate 10000 --seed 7 --format json
+    python batch_cli.py tournament --size 8 --weight-class Lightweight
+    python batch_cli.py history --limit 50 --format ndjson
+    python batch_cli.py stats --format json
+    python batch_cli.py job submit simulate --param count=100000 --param seed=7
+    python batch_cli.py job submit season --param years=10 --param start=2026-01-03
+    python batch_cli.py job status 3 --wait
+    python batch_cli.py job work --workers 2 --once
+    python batch_cli.py ratings top --limit 20 --weight-class Lightweight
+    python batch_cli.py ratings rebuild
+    python batch_cli.py rankings Lightweight --order record --limit 15
+    python batch_cli.py rankings --fighter 42
+    python batch_cli.py match 42 --mode contrast -k 5
+    python batch_cli.py card --bouts 12 --simulate
+"""
+
+import argparse
+import contextlib
+import json
+import random
+import sys
+import time
+
+from MainController import MainController
+from models.job_store import FINAL_STATUSES, STATUS_DONE
+from models.repository import FIGHTER_TYPES, fighter_from_dict, fighter_to_dict
+from striker import Striker
+from grappler import Grappler
+from hybrid_champion import HybridChampion
+
+# קודי יציאה
+EXIT_OK = 0
+EXIT_ERROR = 1      # כשל בזמן ריצה (מסד נתונים, קובץ)
+EXIT_USAGE = 2      # ארגומנטים לא חוקיים (כמו argparse)
+EXIT_NOT_FOUND = 3  # לוחם לא קיים / אין מספיק לוחמים
+
+WEIGHT_CLASSES = ["Flyweight", "Bantamweight", "Featherweight", "Lightweight",
+                  "Welterweight", "Middleweight", "Light Heavyweight", "Heavyweight"]
+STAT_OPTIONS = ("striking_power", "grappling_skill", "speed", "kick_power",
+                "submission_skill", "takedown_defense", "versatility")
+
+
+class CLIError(Exception):
+    """שגיאה שמסתיימת בהודעה ל-stderr ובקוד יציאה"""
+
+    def __init__(self, message: str, code: int = EXIT_ERROR):
+        super().__init__(message)
+        self.code = code
+
+
+# ----- output -----
+def emit(records, fmt: str, out):
+    """
+    כתיבת רשומות (מילונים) ל-out
+    json - מערך אחד, ndjson - שורה לכל רשומה (בזרימה), text - טבלה פשוטה
+    """
+    if fmt == "ndjson":
+        for rec in records:
+            out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    elif fmt == "json":
+        json.dump(list(records), out, ensure_ascii=False, indent=2)
+        out.write("\n")
+    else:
+        for rec in records:
+            out.write("  ".join(f"{k}={v}" for k, v in rec.items()) + "\n")
+
+
+def read_records(path: str):
+    """קריאת לוחמים מ-JSON (מערך) או NDJSON; '-' זה stdin"""
+    fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        text = fh.read()
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return json.loads(stripped)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def _get_fighter(repo, fighter_id: int):
+    fighter = repo.get_fighter_by_id(fighter_id)
+    if not fighter:
+        raise CLIError(f"fighter {fighter_id} not found", EXIT_NOT_FOUND)
+    return fighter
+
+
+def _select_fighters(repo, ids, weight_class):
+    if ids:
+        return [_get_fighter(repo, i) for i in ids]
+    if weight_class:
+        return repo.get_fighters_by_weight_class(weight_class)
+    return repo.get_all_fighters()
+
+
+# ----- commands -----
+# כל פקודה מקבלת (controller, args) ומחזירה איטרבל של רשומות לפלט
+def cmd_import(ctl, args):
+    records = read_records(args.file)
+    fighters = []
+    for i, data in enumerate(records, 1):
+        if "name" not in data or "weight_class" not in data:
+            raise CLIError(f"record {i}: 'name' and 'weight_class' are required", EXIT_USAGE)
+        if "fighter_id" not in data or args.new_ids:
+            data = dict(data, fighter_id=ctl.allocate_fighter_id())
+        fighters.append(fighter_from_dict(data))
+    added = ctl.repository.add_fighters_bulk(fighters)
+    return [{"read": len(fighters), "added": added, "skipped": len(fighters) - added}]
+
+
+def cmd_export(ctl, args):
+    # בזרימה - עם ndjson גם רוסטר ענק לא נטען כולו לזיכרון
+    return (fighter_to_dict(f) for f in ctl.repository.iter_fighters(args.weight_class))
+
+
+def cmd_add(ctl, args):
+    data = {
+        "fighter_id": ctl.allocate_fighter_id(),
+        "name": args.name,
+        "weight_class": args.weight_class,
+        "fighter_type": args.type,
+    }
+    data.update({k: getattr(args, k) for k in STAT_OPTIONS if getattr(args, k) is not None})
+    fighter = fighter_from_dict(data)
+    if not ctl.repository.add_fighter(fighter):
+        raise CLIError(f"could not add {args.name}")
+    return [fighter_to_dict(fighter)]
+
+
+def cmd_update(ctl, args):
+    fighter = _get_fighter(ctl.repository, args.fighter_id)
+    if args.name:
+        fighter.name = args.name
+    for _ in range(args.add_win):
+        fighter.add_win()
+    for _ in range(args.add_loss):
+        fighter.add_loss()
+    for _ in range(args.add_draw):
+        fighter.add_draw()
+    if args.train:
+        # כמו בתפריט העדכון של ה-REPL
+        if isinstance(fighter, HybridChampion):
+            fighter.train_complete_mma()
+        elif isinstance(fighter, Striker):
+            fighter.train_striking()
+        elif isinstance(fighter, Grappler):
+            fighter.train_grappling()
+    if not ctl.repository.update_fighter(fighter):
+        raise CLIError(f"could not update fighter {args.fighter_id}")
+    return [fighter_to_dict(fighter)]
+
+
+def cmd_simulate(ctl, args):
+    fighters = _select_fighters(ctl.repository, args.ids, args.weight_class)
+    if len(fighters) < 2:
+        raise CLIError("need at least 2 fighters to simulate", EXIT_NOT_FOUND)
+    if args.workers:
+        results = ctl.simulate_sharded(fighters, args.count, args.seed, args.workers, save=not args.dry_run)
+    else:
+        results = ctl.simulate_batch(fighters, args.count, random.Random(args.seed), save=not args.dry_run)
+    if args.summary:
+        wins = {}
+        for r in results:
+            wins[r["winner"]] = wins.get(r["winner"], 0) + 1
+        return [{"fights": len(results), "saved": not args.dry_run, "wins": wins,
+                 **ctl.combat_engine.get_fight_stats()}]
+    return results
+
+
+def cmd_tournament(ctl, args):
+    fighters = _select_fighters(ctl.repository, args.ids, args.weight_class)
+    if not args.ids:
+        fighters = random.Random(args.seed).sample(fighters, min(args.size, len(fighters)))
+    if len(fighters) < 2:
+        raise CLIError("need at least 2 fighters for a tournament", EXIT_NOT_FOUND)
+    tournament = ctl.run_tournament(fighters)
+    return [dict(r, stage=i) for i, rnd in enumerate(tournament["rounds"], 1) for r in rnd] + [
+        {"champion": tournament["champion"]}]
+
+
+def cmd_history(ctl, args):
+    return ctl.repository.get_fight_history(args.limit)
+
+
+def cmd_stats(ctl, args):
+    return [ctl.repository.get_statistics()]
+
+
+def _parse_param(text: str):
+    """key=value; הערך מפורש כ-JSON אם אפשר (מספרים, true, רשימות), אחרת נשאר מחרוזת"""
+    key, sep, value = text.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected key=value, got '{text}'")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def _job_record(job: dict) -> dict:
+    return {k: job[k] for k in ("job_id", "kind", "status", "done", "total", "progress",
+                                "message", "result", "error", "attempts")}
+
+
+def _get_job(ctl, job_id: int) -> dict:
+    job = ctl.jobs.get(job_id)
+    if not job:
+        raise CLIError(f"job {job_id} not found", EXIT_NOT_FOUND)
+    return job
+
+
+def cmd_job_submit(ctl, args):
+    from job_runner import JOB_HANDLERS
+    if args.kind not in JOB_HANDLERS:
+        raise CLIError(f"unknown job kind '{args.kind}' (one of: {', '.join(JOB_HANDLERS)})", EXIT_USAGE)
+    params = dict(args.param)
+    if args.seed is not None:
+        # --seed הכללי, אלא אם נתנו --param seed=... במפורש
+        params.setdefault("seed", args.seed)
+    job_id = ctl.submit_job(args.kind, params, start_workers=False)
+    return [_job_record(ctl.jobs.get(job_id))]
+
+
+def cmd_job_status(ctl, args):
+    job = _get_job(ctl, args.job_id)
+    while args.wait and job["status"] not in FINAL_STATUSES:
+        time.sleep(args.interval)
+        job = _get_job(ctl, args.job_id)
+        print(f"job {job['job_id']}: {job['status']} {job['progress'] * 100:.0f}% {job['message']}")
+    if args.wait and job["status"] != STATUS_DONE:
+        raise CLIError(f"job {job['job_id']} {job['status']}" + (f": {job['error']}" if job["error"] else ""))
+    return [_job_record(job)]
+
+
+def cmd_job_list(ctl, args):
+    return [_job_record(j) for j in ctl.jobs.list_jobs(args.status, args.limit)]
+
+
+def cmd_job_cancel(ctl, args):
+    _get_job(ctl, args.job_id)
+    if not ctl.jobs.cancel(args.job_id):
+        raise CLIError(f"job {args.job_id} is not queued or running")
+    return [_job_record(ctl.jobs.get(args.job_id))]
+
+
+def cmd_job_resume(ctl, args):
+    _get_job(ctl, args.job_id)
+    if not ctl.jobs.resume(args.job_id):
+        raise CLIError(f"job {args.job_id} is not cancelled or failed")
+    return [_job_record(ctl.jobs.get(args.job_id))]
+
+
+def cmd_job_work(ctl, args):
+    import job_runner
+    job_runner.main(["--db", args.db, "--workers", str(args.workers)] + (["--once"] if args.once else []))
+    return [{"active_jobs": ctl.jobs.count_active()}]
+
+
+def cmd_ratings_top(ctl, args):
+    return ctl.repository.get_top_rated(args.limit, args.weight_class)
+
+
+def cmd_ratings_history(ctl, args):
+    _get_fighter(ctl.repository, args.fighter_id)
+    return ctl.repository.get_rating_history(args.fighter_id, args.limit)
+
+
+def cmd_ratings_rebuild(ctl, args):
+    return [{"fights_rated": ctl.repository.rebuild_ratings(args.chunk_size)}]
+
+
+def cmd_rankings(ctl, args):
+    if args.fighter is not None:
+        fighter = _get_fighter(ctl.repository, args.fighter)
+        return [{"fighter_id": fighter.fighter_id, "name": fighter.name, "weight_class": fighter.weight_class,
+                 "order": args.order, "rank": ctl.rankings.rank_of(fighter.fighter_id, args.order),
+                 "of": ctl.rankings.division_size(fighter.weight_class)}]
+    if not args.weight_class:
+        raise CLIError("give a weight class or --fighter ID", EXIT_USAGE)
+    return ctl.rankings.top(args.weight_class, args.limit, args.order)
+
+
+def cmd_match(ctl, args):
+    _get_fighter(ctl.repository, args.fighter_id)
+    return ctl.matchmaker.nearest(args.fighter_id, args.k, args.mode)
+
+
+def cmd_card(ctl, args):
+    card = ctl.matchmaker.build_card(args.bouts, args.weight_class, args.mode)
+    if not card:
+        raise CLIError("not enough fighters for a card", EXIT_NOT_FOUND)
+    if args.simulate:
+        return ctl.run_card(card)
+    return card
+
+
+def _add_common(parser, default):
+    parser.add_argument("--db", default=default("ufc_v3.db"), help="SQLite database file")
+    parser.add_argument("--format", choices=("text", "json", "ndjson"), default=default("text"))
+    parser.add_argument("--seed", type=int, default=default(None), help="seed for fight simulation")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="UFC management - batch commands")
+    _add_common(parser, lambda value: value)
+    # אותן אפשרויות גם אחרי שם הפקודה; SUPPRESS כדי לא לדרוס ערך שניתן לפניה
+    common = argparse.ArgumentParser(add_help=False)
+    _add_common(common, lambda value: argparse.SUPPRESS)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", parents=[common], help="import fighters from JSON or NDJSON ('-' = stdin)")
+    p.add_argument("file")
+    p.add_argument("--new-ids", action="store_true", help="ignore fighter_id in the file")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", parents=[common], help="export fighters")
+    p.add_argument("--weight-class", choices=WEIGHT_CLASSES)
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("add", parents=[common], help="add one fighter")
+    p.add_argument("--type", choices=sorted(FIGHTER_TYPES), default="Fighter")
+    p.add_argument("--name", required=True)
+    p.add_argument("--weight-class", choices=WEIGHT_CLASSES, required=True)
+    for stat in STAT_OPTIONS:
+        p.add_argument("--" + stat.replace("_", "-"), dest=stat, type=int, metavar="0-100")
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("update", parents=[common], help="update one fighter")
+    p.add_argument("fighter_id", type=int)
+    p.add_argument("--name")
+    p.add_argument("--add-win", nargs="?", type=int, const=1, default=0, metavar="N")
+    p.add_argument("--add-loss", nargs="?", type=int, const=1, default=0, metavar="N")
+    p.add_argument("--add-draw", nargs="?", type=int, const=1, default=0, metavar="N")
+    p.add_argument("--train", action="store_true", help="run the fighter's training routine")
+    p.set_defaults(func=cmd_update)
+
+    p = sub.add_parser("simulate", parents=[common], help="simulate N fights between random pairs")
+    p.add_argument("count", type=int)
+    p.add_argument("--ids", type=int, nargs="+", help="fighter pool (default: everyone)")
+    p.add_argument("--weight-class", choices=WEIGHT_CLASSES)
+    p.add_argument("--dry-run", action="store_true", help="do not save results")
+    p.add_argument("--summary", action="store_true", help="print totals instead of every fight")
+    p.add_argument("--workers", type=int, help="run the fights in N processes over shared memory (sim_shards)")
+    p.set_defaults(func=cmd_simulate)
+
+    p = sub.add_parser("tournament", parents=[common], help="single-elimination tournament")
+    p.add_argument("--ids", type=int, nargs="+")
+    p.add_argument("--size", type=int, default=8, help="random entrants when --ids is not given")
+    p.add_argument("--weight-class", choices=WEIGHT_CLASSES)
+    p.set_defaults(func=cmd_tournament)
+
+    p = sub.add_parser("history", parents=[common], help="recent fights")
+    p.add_argument("--limit", type=int, default=10)
+    p.set_defaults(func=cmd_history)
+
+    p = sub.add_parser("stats", parents=[common], help="database statistics")
+    p.set_defaults(func=cmd_stats)
+
+    # עבודות רקע - submit רק מוסיף לתור; job work (או job_runner.py) מריץ
+    job = sub.add_parser("job", help="background jobs").add_subparsers(dest="job_command", required=True)
+    p = job.add_parser("submit", parents=[common], help="queue a job (simulate, matrix, import, season)")
+    p.add_argument("kind")
+    p.add_argument("--param", type=_parse_param, action="append", default=[], metavar="KEY=VALUE")
+    p.set_defaults(func=cmd_job_submit)
+
+    p = job.add_parser("status", parents=[common], help="show one job")
+    p.add_argument("job_id", type=int)
+    p.add_argument("--wait", action="store_true", help="poll until the job finishes (exit 1 unless done)")
+    p.add_argument("--interval", type=float, default=1.0)
+    p.set_defaults(func=cmd_job_status)
+
+    p = job.add_parser("list", parents=[common], help="recent jobs")
+    p.add_argument("--status", choices=("queued", "running", "done", "failed", "cancelled"))
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_job_list)
+
+    p = job.add_parser("cancel", parents=[common], help="cancel a queued or running job")
+    p.add_argument("job_id", type=int)
+    p.set_defaults(func=cmd_job_cancel)
+
+    p = job.add_parser("resume", parents=[common], help="re-queue a cancelled or failed job from its checkpoint")
+    p.add_argument("job_id", type=int)
+    p.set_defaults(func=cmd_job_resume)
+
+    p = job.add_parser("work", parents=[common], help="run job workers in the foreground")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    p.set_defaults(func=cmd_job_work)
+
+    # דירוג Glicko - מתעדכן בכל שמירת קרב; rebuild מחשב מחדש מכל ההיסטוריה
+    ratings = sub.add_parser("ratings", help="fighter ratings").add_subparsers(dest="ratings_command", required=True)
+    p = ratings.add_parser("top", parents=[common], help="top fighters by conservative rating")
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--weight-class", choices=WEIGHT_CLASSES)
+    p.set_defaults(func=cmd_ratings_top)
+
+    p = ratings.add_parser("history", parents=[common], help="one fighter's rating after each fight")
+    p.add_argument("fighter_id", type=int)
+    p.add_argument("--limit", type=int, help="only the most recent fights")
+    p.set_defaults(func=cmd_ratings_history)
+
+    p = ratings.add_parser("rebuild", parents=[common], help="recompute all ratings from the fight history")
+    p.add_argument("--chunk-size", type=int, default=5000, help="fights fetched per round trip")
+    p.set_defaults(func=cmd_ratings_rebuild)
+
+    p = sub.add_parser("rankings", parents=[common], help="weight-class rankings, or one fighter's rank")
+    p.add_argument("weight_class", nargs="?", choices=WEIGHT_CLASSES)
+    p.add_argument("--fighter", type=int, metavar="ID", help="rank of this fighter in its own weight class")
+    p.add_argument("--order", choices=("rating", "record", "skill"), default="rating")
+    p.add_argument("--limit", type=int, default=15)
+    p.set_defaults(func=cmd_rankings)
+
+    p = sub.add_parser("match", parents=[common], help="nearest opponents for one fighter (KD-tree)")
+    p.add_argument("fighter_id", type=int)
+    p.add_argument("--mode", choices=("closest", "contrast"), default="closest")
+    p.add_argument("-k", type=int, default=5)
+    p.set_defaults(func=cmd_match)
+
+    p = sub.add_parser("card", parents=[common], help="event card of balanced pairings")
+    p.add_argument("--bouts", type=int, default=10)
+    p.add_argument("--weight-class", choices=WEIGHT_CLASSES, action="append",
+                   help="repeatable; default: every weight class")
+    p.add_argument("--mode", choices=("closest", "contrast"), default="closest")
+    p.add_argument("--simulate", action="store_true", help="fight the card and save the results")
+    p.set_defaults(func=cmd_card)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    out = sys.stdout
+    try:
+        # ה-Repository מדפיס הודעות ✅/❌ - מפנים אותן ל-stderr כדי שה-stdout יישאר JSON נקי
+        with contextlib.redirect_stdout(sys.stderr):
+            ctl = MainController(args.db, seed=args.seed)
+            records = args.func(ctl, args)
+            emit(records, args.format, out)
+    except CLIError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return e.code
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
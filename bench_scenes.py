@@ -0,0 +1,265 @@
+"""
+Scene Benchmark
+הרצת כל סצנות ה-App בלי חלון (SDL dummy driver) עם אירועים סינתטיים
+ורוסטרים סינתטיים בגדלים שונים - מדווח FPS ו-p50/p95/p99 לכל סצנה
+
+שימוש:
+    python bench_scenes.py --sizes 10 1000 100000 --frames 300 --out bench.json
+    python bench_scenes.py --compare bench_old.json --out bench_new.json
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import pygame
+
+from ufc_fight_simulator_pygame import App, FPS
+from frame_profiler import CSV_FIELDS, percentile
+from models.repository import Repository
+from fighter import Fighter
+from striker import Striker
+from grappler import Grappler
+from hybrid_champion import HybridChampion
+
+SCENES = ("home", "select", "create", "roster", "fight", "about")
+WEIGHT_CLASSES = ["Flyweight", "Bantamweight", "Featherweight", "Lightweight",
+                  "Welterweight", "Middleweight", "Light Heavyweight", "Heavyweight"]
+SYLLABLES = ["ka", "ro", "mi", "ta", "shi", "no", "va", "le", "do", "gor", "an", "zu", "bel", "ix"]
+
+
+def synthetic_fighters(count: int, seed: int = 1):
+    """לוחמים אקראיים (דטרמיניסטי לפי seed) מכל הסוגים"""
+    rnd = random.Random(seed)
+    stat = lambda: rnd.randint(30, 99)
+    for fid in range(1, count + 1):
+        first = "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 3))).title()
+        last = "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))).title()
+        name = f"{first} {last}"
+        wc = rnd.choice(WEIGHT_CLASSES)
+        record = (rnd.randint(0, 30), rnd.randint(0, 15), rnd.randint(0, 3))
+        kind = rnd.randrange(4)
+        if kind == 0:
+            yield Striker(fid, name, wc, *record, stat(), stat(), stat(), stat())
+        elif kind == 1:
+            yield Grappler(fid, name, wc, *record, stat(), stat(), stat(), stat())
+        elif kind == 2:
+            yield HybridChampion(fid, name, wc, *record, stat(), stat(), stat(), stat(), stat(), stat(), stat())
+        else:
+            yield Fighter(fid, name, wc, *record, stat(), stat())
+
+
+# ----- synthetic input per scene -----
+# כל פונקציה מקבלת (app, frame, rnd) ומחזירה רשימת אירועים; אף אחד מהם לא יוצא מהסצנה
+
+def _mouse(pos):
+    pygame.mouse.set_pos(pos)
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+
+def _click(pos):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+
+def _key(key, unicode=""):
+    return pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0)
+
+
+def _wheel(y):
+    return pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=y, flipped=False)
+
+
+def events_home(app, frame, rnd):
+    return [_mouse((rnd.randint(0, 1279), rnd.randint(0, 719)))]
+
+
+def events_about(app, frame, rnd):
+    return [_mouse((rnd.randint(0, 900), rnd.randint(0, 500)))]
+
+
+def events_select(app, frame, rnd):
+    sc = app.get_scene("select")
+    side = sc.panel_a if (frame // 60) % 2 == 0 else sc.panel_b
+    pos = (side.x + rnd.randint(30, side.w - 30), side.y + rnd.randint(80, side.h - 30))
+    evs = [_mouse(pos)]
+    if frame % 4 == 0:
+        evs.append(_wheel(rnd.choice((-3, -1, 1))))
+    if frame % 45 == 0:
+        letter = chr(ord("a") + rnd.randrange(26))
+        evs.append(_key(getattr(pygame, f"K_{letter}"), letter))
+    if frame % 20 == 0:
+        evs.append(_click(pos))
+    return evs
+
+
+def events_create(app, frame, rnd):
+    evs = [_mouse((rnd.randint(0, 880), rnd.randint(150, 690)))]
+    if frame % 3 == 0:
+        if len(app.get_scene("create").create_name) >= 20:
+            evs.append(_key(pygame.K_BACKSPACE))
+        else:
+            letter = chr(ord("a") + rnd.randrange(26))
+            evs.append(_key(getattr(pygame, f"K_{letter}"), letter))
+    if frame % 10 == 0:
+        evs.append(_key(rnd.choice((pygame.K_TAB, pygame.K_PLUS, pygame.K_MINUS, pygame.K_LEFT, pygame.K_UP))))
+    return evs
+
+
+def events_roster(app, frame, rnd):
+    pos = (rnd.randint(80, 940), rnd.randint(160, 640))
+    evs = [_mouse(pos)]
+    if frame % 3 == 0:
+        evs.append(_wheel(rnd.choice((-1, -1, 1))))
+    if frame % 60 == 0:
+        letter = chr(ord("a") + rnd.randrange(26))
+        evs.append(_key(getattr(pygame, f"K_{letter}"), letter))
+    if frame % 15 == 0:
+        evs.append(_click(pos))
+    return evs
+
+
+def events_fight(app, frame, rnd):
+    if app.fight.over:
+        return [_key(pygame.K_r)]
+    if frame % 7 == 0:
+        key = rnd.choice((pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5))
+        return [_key(key)]
+    return []
+
+
+SCENE_EVENTS = {
+    "home": events_home, "about": events_about, "select": events_select,
+    "create": events_create, "roster": events_roster, "fight": events_fight,
+}
+
+
+def enter_scene(app, scene):
+    app.wait_for_roster()
+    if scene == "fight":
+        app.sel_a, app.sel_b = app.roster.get(0), app.roster.get(1)
+        app.start_fight()
+    app.scene = scene
+    app.current_scene().ensure_built()
+
+
+def bench_scene(app, scene, frames, warmup, seed):
+    """הרצת סצנה אחת: מחזיר מדדים מתוך ה-FrameProfiler של ה-App"""
+    rnd = random.Random(seed)
+    enter_scene(app, scene)
+    make_events = SCENE_EVENTS[scene]
+    app.profiler.records.clear()
+    start = time.perf_counter()
+    for frame in range(warmup + frames):
+        if frame == warmup:
+            app.profiler.records.clear()
+            start = time.perf_counter()
+        for ev in make_events(app, frame, rnd):
+            pygame.event.post(ev)
+        app.run_frame(1.0 / FPS)
+        app.scene = scene  # קליק אקראי לא יוציא אותנו מהסצנה
+    wall = time.perf_counter() - start
+
+    total_idx = CSV_FIELDS.index("total_ms")
+    totals = [rec[total_idx] for rec in app.profiler.records]
+    summary = app.profiler.summary().get(scene, {})
+    return {
+        "frames": len(totals),
+        "fps": len(totals) / wall if wall else 0.0,
+        "p50_ms": percentile(totals, 50),
+        "p95_ms": percentile(totals, 95),
+        "p99_ms": percentile(totals, 99),
+        "max_ms": max(totals) if totals else 0.0,
+        "avg_draw_ms": summary.get("avg_draw_ms", 0.0),
+        "avg_update_ms": summary.get("avg_update_ms", 0.0),
+    }
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(sizes, scenes, frames, warmup, seed):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            db = os.path.join(tmp, f"bench_{size}.db")
+            Repository(db).add_fighters_bulk(synthetic_fighters(size, seed))
+            app = App(db_name=db)
+            for scene in scenes:
+                res = bench_scene(app, scene, frames, warmup, seed)
+                results[f"{scene}@{size}"] = res
+                print(f"{scene:<8} {size:>7}  fps {res['fps']:8.1f}  p50 {res['p50_ms']:6.2f}  "
+                      f"p95 {res['p95_ms']:6.2f}  p99 {res['p99_ms']:6.2f} ms")
+            app.fight = None
+    pygame.quit()
+    return {
+        "meta": {
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "frames": frames,
+            "warmup": warmup,
+            "seed": seed,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict, threshold_pct: float) -> list:
+    """השוואת p95 בין שתי הרצות; מחזיר רשימת רגרסיות מעל הסף"""
+    regressions = []
+    print(f"\nvs {old['meta'].get('git')} -> {new['meta'].get('git')}")
+    for key, res in new["results"].items():
+        base = old["results"].get(key)
+        if not base or not base["p95_ms"]:
+            continue
+        delta = (res["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        flag = "  <-- REGRESSION" if delta > threshold_pct else ""
+        print(f"{key:<16} p95 {base['p95_ms']:6.2f} -> {res['p95_ms']:6.2f} ms ({delta:+6.1f}%){flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless per-scene rendering benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 100000], help="roster sizes")
+    parser.add_argument("--scenes", nargs="+", default=list(SCENES), choices=SCENES)
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scene")
+    parser.add_argument("--warmup", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="previous results JSON to compare p95 against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="p95 regression threshold in percent")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.sizes, args.scenes, args.frames, args.warmup, args.seed)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+    if args.compare:
+        with open(args.compare) as fh:
+            if compare(json.load(fh), report, args.threshold):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Build Optimizer
+חיפוש חלוקת סטטיסטיקות ללוחם חדש (מסך Create Fighter): סכום הנקודות של הסטטיסטיקות שהסוג
+משתמש בהן קבוע (התקציב), ואלגוריתם גנטי מחפש את החלוקה שמנצחת הכי הרבה מול הרוסטר
+הנוכחי באותה קטגוריה. כל מועמד נבדק במנה של קרבות resolve_bout על טאפלים בלבד (בלי אובייקטי
+Fighter), מול אותם יריבים ואותו seed לכל המועמדים (common random numbers) - כך שההבדל
+בציון בא מהחלוקה ולא מהמזל, והציון של חלוקה שכבר נבדקה נשמר
+
+רץ ב-thread ברקע עם מגבלת זמן; best מתעדכן אחרי כל דור, והמסך מציג אותו תוך כדי
+
+מדגים: אלגוריתם גנטי (טורניר, הצלבה, מוטציה, תיקון לתקציב, אליטיזם), common random numbers
+
+שימוש:
+    python build_optimizer.py --type Striker --weight-class Lightweight --seconds 5
+"""
+
+import argparse
+import contextlib
+import random
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from combat_engine import STAT_DEFAULT, STAT_FIELDS, resolve_bout
+
+# המפתחות של מסך היצירה -> שדות ב-STAT_FIELDS (STA לא משפיע על אף סימולציה)
+STAT_KEY_FIELDS = {"STR": "striking_power", "GRP": "grappling_skill", "SPD": "speed", "KICK": "kick_power",
+                   "SUB": "submission_skill", "DEF": "takedown_defense", "VERS": "versatility"}
+# הסטטיסטיקות שכל סוג במסך מקבל (כמו CreateScene.build_custom_fighter)
+TYPE_KEYS = {
+    "Striker": ("STR", "GRP", "SPD", "KICK"),
+    "Grappler": ("STR", "GRP", "SUB", "DEF"),
+    "Hybrid": ("STR", "GRP", "SPD", "KICK", "SUB", "DEF", "VERS"),
+}
+STAT_MIN, STAT_MAX = 10, 100
+
+POPULATION = 20
+ELITE = 2
+TOURNAMENT = 3
+MUTATION_RATE = 0.3
+MUTATION_SIGMA = 8.0
+OPPONENTS = 32     # יריבים לדוגמה מהרוסטר
+BOUTS = 8          # קרבות מול כל יריב לכל מועמד
+TIME_LIMIT = 8.0   # שניות
+
+
+def budget_of(stats: Dict[str, int], fighter_type: str) -> int:
+    """התקציב: סכום הסטטיסטיקות שהסוג משתמש בהן"""
+    return sum(int(stats[k]) for k in TYPE_KEYS[fighter_type])
+
+
+def load_opponents(repo, weight_class: Optional[str] = None, limit: int = OPPONENTS, seed=None) -> List[tuple]:
+    """
+    טאפלים של סטטיסטיקות (לפי STAT_FIELDS) של עד limit לוחמים מהקטגוריה -
+    וכשיש בה פחות מ-4, מכל הרוסטר
+    """
+    from combat_engine import fighter_stats
+    ids = repo.get_fighter_ids(weight_class) if weight_class else []
+    if len(ids) < 4:
+        ids = repo.get_fighter_ids()
+    ids = sorted(ids)
+    if len(ids) > limit:
+        ids = random.Random(seed).sample(ids, limit)
+    return [fighter_stats(f) for f in repo.get_fighters_by_ids(ids)]
+
+
+class BuildOptimizer:
+    """
+    GA על החלוקה של budget נקודות בין הסטטיסטיקות של fighter_type (כל אחת ב-10..100)
+
+    Args:
+        fighter_type: מפתח ב-TYPE_KEYS
+        opponents: טאפלים של סטטיסטיקות (load_opponents); None - נטענים ב-start_background
+        budget: סכום הנקודות
+        start: חלוקה התחלתית (dict לפי מפתחות המסך) - נכנסת לאוכלוסייה הראשונה
+        seed: זרע ל-GA ולקרבות
+    """
+
+    def __init__(self, fighter_type: str, opponents: Optional[Sequence[tuple]], budget: int,
+                 start: Optional[Dict[str, int]] = None, seed=None, population: int = POPULATION,
+                 bouts: int = BOUTS):
+        if fighter_type not in TYPE_KEYS:
+            raise ValueError(f"unknown fighter type {fighter_type!r}")
+        if opponents is not None and not opponents:
+            raise ValueError("no opponents to score against")
+        self.fighter_type = fighter_type
+        self.keys = TYPE_KEYS[fighter_type]
+        self.opponents = list(opponents or ())
+        self.budget = max(STAT_MIN * len(self.keys), min(STAT_MAX * len(self.keys), int(budget)))
+        self.start = start
+        self.population = max(ELITE + 2, population)
+        self.bouts = bouts
+        self.rng = random.Random(seed)
+        self.eval_seed = self.rng.getrandbits(32)
+        self._fields = [STAT_FIELDS.index(STAT_KEY_FIELDS[k]) for k in self.keys]
+        self._cache: Dict[tuple, float] = {}
+
+        self.best: Optional[Dict[str, int]] = None
+        self.best_score = 0.0
+        self.generation = 0
+        self.evaluations = 0
+        self.elapsed = 0.0
+        self.done = False
+        self.error = None  # הודעה כשהריצה ברקע נכשלה (למשל אין יריבים)
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ----- ציון -----
+    def score(self, genes: tuple) -> float:
+        """אחוז ניצחונות (תיקו - חצי) מול כל היריבים; אותו seed לכל מועמד"""
+        cached = self._cache.get(genes)
+        if cached is not None:
+            return cached
+        stats = [STAT_DEFAULT] * len(STAT_FIELDS)
+        for field, value in zip(self._fields, genes):
+            stats[field] = value
+        stats = tuple(stats)
+        rng = random.Random(self.eval_seed)
+        points = 0.0
+        for opp in self.opponents:
+            for _ in range(self.bouts):
+                winner = resolve_bout(stats, opp, rng)[0]
+                points += 1.0 if winner == 0 else 0.5 if winner == -1 else 0.0
+        result = points / (len(self.opponents) * self.bouts)
+        self._cache[genes] = result
+        self.evaluations += 1
+        return result
+
+    # ----- GA -----
+    def repair(self, genes) -> tuple:
+        """גבולות 10..100 וסכום בדיוק budget - נקודות עודפות יורדות / חסרות מתווספות באקראי"""
+        genes = [int(max(STAT_MIN, min(STAT_MAX, round(g)))) for g in genes]
+        diff = self.budget - sum(genes)
+        while diff:
+            step = 1 if diff > 0 else -1
+            free = [i for i, g in enumerate(genes) if (g < STAT_MAX if step > 0 else g > STAT_MIN)]
+            # מחלקים את ההפרש בין כל מי שיש לו מקום, ולא נקודה אחת בכל סיבוב
+            share = max(1, abs(diff) // len(free))
+            for i in self.rng.sample(free, len(free)):
+                room = STAT_MAX - genes[i] if step > 0 else genes[i] - STAT_MIN
+                d = min(share, room, abs(diff))
+                genes[i] += step * d
+                diff -= step * d
+                if not diff:
+                    break
+        return tuple(genes)
+
+    def _random_genes(self) -> tuple:
+        return self.repair([self.rng.uniform(STAT_MIN, STAT_MAX) for _ in self.keys])
+
+    def _pick(self, ranked: List[tuple]) -> tuple:
+        # טורניר: הטוב מבין TOURNAMENT מקריים (ranked ממוין מהטוב לגרוע)
+        return ranked[min(self.rng.randrange(len(ranked)) for _ in range(TOURNAMENT))]
+
+    def _child(self, a: tuple, b: tuple) -> tuple:
+        w = self.rng.random()
+        genes = [w * x + (1 - w) * y for x, y in zip(a, b)]
+        for i in range(len(genes)):
+            if self.rng.random() < MUTATION_RATE:
+                genes[i] += self.rng.gauss(0, MUTATION_SIGMA)
+        return self.repair(genes)
+
+    def run(self, time_limit: float = TIME_LIMIT, on_best: Optional[Callable[[dict, float], None]] = None,
+            yield_gil: bool = False) -> Dict[str, int]:
+        """
+        דורות עד time_limit (או stop); on_best(stats, score) בכל שיפור.
+        yield_gil - מוותרים על ה-GIL אחרי כל מועמד (כשרץ לצד לולאת הפריימים)
+        """
+        if not self.opponents:
+            raise ValueError("no opponents to score against")
+        t0 = time.perf_counter()
+        deadline = t0 + time_limit
+        pop = [self._random_genes() for _ in range(self.population)]
+        if self.start:
+            pop[0] = self.repair([self.start.get(k, STAT_MIN) for k in self.keys])
+        best = None
+        while not self._stop.is_set():
+            scored = []
+            for genes in pop:
+                scored.append((self.score(genes), genes))
+                if yield_gil:
+                    time.sleep(0)
+                if time.perf_counter() >= deadline or self._stop.is_set():
+                    break
+            scored.sort(key=lambda sg: sg[0], reverse=True)
+            if best is None or scored[0][0] > best[0]:
+                best = scored[0]
+                self.best, self.best_score = dict(zip(self.keys, best[1])), best[0]
+                if on_best is not None:
+                    on_best(self.best, self.best_score)
+            self.generation += 1
+            self.elapsed = time.perf_counter() - t0
+            if time.perf_counter() >= deadline:
+                break
+            ranked = [genes for _, genes in scored]
+            pop = ranked[:ELITE] + [self._child(self._pick(ranked), self._pick(ranked))
+                                    for _ in range(self.population - ELITE)]
+        self.elapsed = time.perf_counter() - t0
+        self.done = True
+        return self.best
+
+    # ----- רקע -----
+    def start_background(self, time_limit: float = TIME_LIMIT,
+                         opponents_loader: Optional[Callable[[], Sequence[tuple]]] = None):
+        """run ב-thread; opponents_loader (למשל טעינה מהמאגר) רץ קודם באותו thread ולא בקורא"""
+        self._thread = threading.Thread(target=self._background, args=(time_limit, opponents_loader),
+                                        name="build-optimizer", daemon=True)
+        self._thread.start()
+
+    def _background(self, time_limit, opponents_loader):
+        try:
+            if opponents_loader is not None:
+                self.opponents = list(opponents_loader())
+            self.run(time_limit, None, True)
+        except Exception as e:
+            self.error = str(e)
+            self.done = True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+def validate(fighter_type: str, stats: Dict[str, int], opponents: Sequence[tuple], bouts: int = 200,
+             seed=None) -> float:
+    """אחוז ניצחונות בקרבות חדשים (seed אחר מזה של החיפוש) - לבדוק שהחלוקה לא 'למדה' את המזל"""
+    opt = BuildOptimizer(fighter_type, opponents, budget_of(stats, fighter_type), seed=seed, bouts=bouts)
+    return opt.score(tuple(int(stats[k]) for k in opt.keys))
+
+
+def main(argv=None) -> int:
+    from models.repository import Repository
+
+    parser = argparse.ArgumentParser(description="Search the best stat allocation for a new fighter")
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--type", choices=tuple(TYPE_KEYS), default="Striker")
+    parser.add_argument("--weight-class", default="Lightweight")
+    parser.add_argument("--budget", type=int, help="points across the type's stats (default: 70 each)")
+    parser.add_argument("--seconds", type=float, default=TIME_LIMIT)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        repo = Repository(args.db)
+    opponents = load_opponents(repo, args.weight_class, seed=args.seed)
+    if not opponents:
+        print("no fighters in the database", file=sys.stderr)
+        return 1
+    keys = TYPE_KEYS[args.type]
+    opt = BuildOptimizer(args.type, opponents, args.budget or 70 * len(keys), seed=args.seed)
+    # התקציב אחרי ההגבלה ל-10..100 לכל סטטיסטיקה
+    even = opt.start = {k: opt.budget // len(keys) for k in keys}
+    opt.run(args.seconds, on_best=lambda stats, score: print(
+        f"  gen {opt.generation:>4}  {score * 100:5.1f}%  " + " ".join(f"{k} {v}" for k, v in stats.items())))
+    print(f"{args.type}, {opt.budget} points, vs {len(opponents)} {args.weight_class} opponents: "
+          f"{opt.generation} generations, {opt.evaluations} builds scored in {opt.elapsed:.1f}s")
+    for label, stats in (("even", even), ("best", opt.best)):
+        print(f"  {label}: " + " ".join(f"{k} {v}" for k, v in stats.items()) +
+              f" -> {validate(args.type, stats, opponents, seed=args.seed + 1) * 100:.1f}% on fresh bouts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
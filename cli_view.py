@@ -4,26 +4,47 @@ CLI View Class
 מדגים: SoC, תבנית MVC (View)
 """
 
-from typing import List
+import os
+import shlex
+import subprocess
+import sys
+from itertools import chain
+from typing import Iterable, Optional
 from fighter import Fighter
 
+ANSI_COLORS = {
+    'HEADER': '\033[95m',
+    'BLUE': '\033[94m',
+    'GREEN': '\033[92m',
+    'YELLOW': '\033[93m',
+    'RED': '\033[91m',
+    'ENDC': '\033[0m',
+    'BOLD': '\033[1m'
+}
+CHUNK_SIZE = 64 * 1024  # כתיבה ל-stdout בבלוקים במקום print לכל שורה
+DEFAULT_PAGER = "less -FRX"
+
 
 class CLIView:
     """
     מחלקת תצוגה - אחראית על כל הקלט והפלט מהמשתמש
+    טבלאות ארוכות נבנות לבאפר ונכתבות בבלוקים; בטרמינל הן עוברות דרך pager
     """
     
-    def __init__(self):
-        """אתחול תצוגה"""
-        self._colors = {
-            'HEADER': '\033[95m',
-            'BLUE': '\033[94m',
-            'GREEN': '\033[92m',
-            'YELLOW': '\033[93m',
-            'RED': '\033[91m',
-            'ENDC': '\033[0m',
-            'BOLD': '\033[1m'
-        }
+    def __init__(self, color: Optional[bool] = None, pager: Optional[bool] = None):
+        """
+        אתחול תצוגה
+        
+        Args:
+            color: צבעי ANSI; ברירת מחדל - רק כשה-stdout הוא טרמינל ו-NO_COLOR לא מוגדר
+            pager: העברת טבלאות ארוכות ל-$PAGER; ברירת מחדל - רק בטרמינל
+        """
+        is_tty = sys.stdout.isatty()
+        if color is None:
+            color = is_tty and 'NO_COLOR' not in os.environ
+        self._pager = is_tty if pager is None else pager
+        # בלי צבעים כל הקודים הם מחרוזת ריקה, כך שאין צורך לבדוק בכל שורה
+        self._colors = dict(ANSI_COLORS) if color else dict.fromkeys(ANSI_COLORS, '')
     
     def show_welcome(self):
         """הצגת מסך פתיחה"""
@@ -46,6 +67,9 @@ class CLIView:
         print(f"{self._colors['GREEN']}7.{self._colors['ENDC']} Delete Fighter")
         print(f"{self._colors['GREEN']}8.{self._colors['ENDC']} Fight History")
         print(f"{self._colors['GREEN']}9.{self._colors['ENDC']} Statistics")
+        print(f"{self._colors['GREEN']}J.{self._colors['ENDC']} Background Jobs")
+        print(f"{self._colors['GREEN']}K.{self._colors['ENDC']} Rankings")
+        print(f"{self._colors['GREEN']}M.{self._colors['ENDC']} Matchmaking")
         print(f"{self._colors['RED']}0.{self._colors['ENDC']} Exit")
         print("-" * 60)
     
@@ -78,74 +102,208 @@ class CLIView:
     
     def display_fighter(self, fighter: Fighter):
         """הצגת פרטי לוחם בודד"""
-        print(f"\n{self._colors['BOLD']}{self._colors['HEADER']}{'=' * 60}{self._colors['ENDC']}")
-        print(f"{self._colors['BOLD']}🥊 {fighter.name}{self._colors['ENDC']}")
-        print(f"{self._colors['HEADER']}{'=' * 60}{self._colors['ENDC']}")
-        print(fighter)
-        print(f"{self._colors['HEADER']}{'=' * 60}{self._colors['ENDC']}\n")
+        self.write_lines(self._fighter_lines(fighter))
+    
+    # ----- פלט בבלוקים -----
+    def _open_pager(self):
+        """pager מ-$PAGER (ברירת מחדל less); None אם אין או שלא בטרמינל"""
+        if not self._pager:
+            return None
+        try:
+            return subprocess.Popen(shlex.split(os.environ.get('PAGER') or DEFAULT_PAGER),
+                                    stdin=subprocess.PIPE, encoding='utf-8', errors='replace')
+        except OSError:
+            return None
     
-    def display_fighters_list(self, fighters: List[Fighter]):
-        """הצגת רשימת לוחמים"""
-        if not fighters:
+    def write_lines(self, lines: Iterable[str], paged: bool = False):
+        """
+        כתיבת שורות בבלוקים של CHUNK_SIZE תווים
+        
+        Args:
+            lines: איטרטור של שורות (בלי \n) - נצרך בזרימה, לא נשמר בזיכרון
+            paged: להעביר דרך pager כשה-stdout הוא טרמינל
+        """
+        proc = self._open_pager() if paged else None
+        out = proc.stdin if proc else sys.stdout
+        buf, size = [], 0
+        try:
+            for line in lines:
+                buf.append(line)
+                size += len(line) + 1
+                if size >= CHUNK_SIZE:
+                    out.write("\n".join(buf) + "\n")
+                    buf, size = [], 0
+            if buf:
+                out.write("\n".join(buf) + "\n")
+            out.flush()
+        except BrokenPipeError:
+            pass  # המשתמש יצא מה-pager (או head סגר את ה-pipe)
+        finally:
+            if proc:
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+                proc.wait()
+    
+    @staticmethod
+    def _peek(items: Iterable):
+        """האיבר הראשון ואיטרטור שמתחיל ממנו, או (None, None) אם ריק"""
+        it = iter(items)
+        for first in it:
+            return first, chain((first,), it)
+        return None, None
+    
+    def display_fighters_list(self, fighters: Iterable[Fighter]):
+        """הצגת רשימת לוחמים (כל איטרבל, גם generator מה-Repository)"""
+        first, fighters = self._peek(fighters)
+        if first is None:
             self.show_error("No fighters found")
             return
-        
-        print(f"\n{self._colors['BOLD']}{self._colors['HEADER']}")
-        print("=" * 100)
-        print(f"{'ID':<5} {'Name':<25} {'Category':<20} {'Record':<15} {'Win Percentage':<15}")
-        print("=" * 100)
-        print(f"{self._colors['ENDC']}")
+        self.write_lines(self._fighters_list_lines(fighters), paged=True)
+    
+    def _fighters_list_lines(self, fighters: Iterable[Fighter]):
+        c = self._colors
+        yield f"\n{c['BOLD']}{c['HEADER']}"
+        yield "=" * 100
+        yield f"{'ID':<5} {'Name':<25} {'Category':<20} {'Record':<15} {'Win Percentage':<15}"
+        yield "=" * 100
+        yield f"{c['ENDC']}"
         
         for fighter in fighters:
             record = f"{fighter.wins}-{fighter.losses}-{fighter.draws}"
             win_pct = f"{fighter.win_percentage:.1f}%"
-            print(f"{fighter.fighter_id:<5} {fighter.name:<25} {fighter.weight_class:<20} "
-                  f"{record:<15} {win_pct:<15}")
+            yield (f"{fighter.fighter_id:<5} {fighter.name:<25} {fighter.weight_class:<20} "
+                   f"{record:<15} {win_pct:<15}")
         
-        print(f"{self._colors['HEADER']}{'=' * 100}{self._colors['ENDC']}\n")
+        yield f"{c['HEADER']}{'=' * 100}{c['ENDC']}\n"
     
-    def display_fighters_table(self, fighters: List[Fighter]):
+    def display_fighters_table(self, fighters: Iterable[Fighter]):
         """הצגת טבלה מפורטת של לוחמים"""
-        if not fighters:
+        first, fighters = self._peek(fighters)
+        if first is None:
             self.show_error("No fighters found")
             return
-        
-        print(f"\n{self._colors['BOLD']}{self._colors['HEADER']}")
-        print("=" * 120)
-        print(f"{'ID':<5} {'Name':<20} {'Category':<15} {'W-L-D':<12} {'Striking':<8} "
-              f"{'Grappling':<10} {'Overall Skill':<12}")
-        print("=" * 120)
-        print(f"{self._colors['ENDC']}")
+        self.write_lines(self._fighters_table_lines(fighters), paged=True)
+    
+    def _fighters_table_lines(self, fighters: Iterable[Fighter]):
+        c = self._colors
+        yield f"\n{c['BOLD']}{c['HEADER']}"
+        yield "=" * 120
+        yield (f"{'ID':<5} {'Name':<20} {'Category':<15} {'W-L-D':<12} {'Striking':<8} "
+               f"{'Grappling':<10} {'Overall Skill':<12}")
+        yield "=" * 120
+        yield f"{c['ENDC']}"
         
         for f in fighters:
             record = f"{f.wins}-{f.losses}-{f.draws}"
             skill = f"{f.overall_skill:.1f}"
-            print(f"{f.fighter_id:<5} {f.name:<20} {f.weight_class:<15} {record:<12} "
-                  f"{f.striking_power:<8} {f.grappling_skill:<10} {skill:<12}")
+            yield (f"{f.fighter_id:<5} {f.name:<20} {f.weight_class:<15} {record:<12} "
+                   f"{f.striking_power:<8} {f.grappling_skill:<10} {skill:<12}")
         
-        print(f"{self._colors['HEADER']}{'=' * 120}{self._colors['ENDC']}\n")
+        yield f"{c['HEADER']}{'=' * 120}{c['ENDC']}\n"
+    
+    def display_fighters_full(self, fighters: Iterable[Fighter]):
+        """הצגה מלאה (כמו display_fighter) של הרבה לוחמים ברצף אחד"""
+        first, fighters = self._peek(fighters)
+        if first is None:
+            self.show_error("No fighters found")
+            return
+        self.write_lines(chain.from_iterable(self._fighter_lines(f) for f in fighters), paged=True)
     
-    def display_fight_history(self, fights: List[dict]):
+    def _fighter_lines(self, fighter: Fighter):
+        c = self._colors
+        yield f"\n{c['BOLD']}{c['HEADER']}{'=' * 60}{c['ENDC']}"
+        yield f"{c['BOLD']}🥊 {fighter.name}{c['ENDC']}"
+        yield f"{c['HEADER']}{'=' * 60}{c['ENDC']}"
+        yield str(fighter)
+        yield f"{c['HEADER']}{'=' * 60}{c['ENDC']}\n"
+    
+    def display_fight_history(self, fights: Iterable[dict]):
         """הצגת היסטוריית קרבות"""
-        if not fights:
+        first, fights = self._peek(fights)
+        if first is None:
             self.show_error("No fights in history")
             return
-        
-        print(f"\n{self._colors['BOLD']}{self._colors['HEADER']}")
-        print("=" * 100)
-        print("📜 Fight History")
-        print("=" * 100)
-        print(f"{self._colors['ENDC']}")
+        self.write_lines(self._fight_history_lines(fights), paged=True)
+    
+    def _fight_history_lines(self, fights: Iterable[dict]):
+        c = self._colors
+        yield f"\n{c['BOLD']}{c['HEADER']}"
+        yield "=" * 100
+        yield "📜 Fight History"
+        yield "=" * 100
+        yield f"{c['ENDC']}"
         
         for fight in fights:
-            print(f"\n{self._colors['BOLD']}Fight #{fight.get('fight_id', 'N/A')}:{self._colors['ENDC']}")
-            print(f"  {fight['fighter1']} vs {fight['fighter2']}")
-            print(f"  {self._colors['GREEN']}🏆 Winnner: {fight['winner']}{self._colors['ENDC']}")
-            print(f"  שיטה: {fight['method']}")
+            yield f"\n{c['BOLD']}Fight #{fight.get('fight_id', 'N/A')}:{c['ENDC']}"
+            yield f"  {fight['fighter1']} vs {fight['fighter2']}"
+            yield f"  {c['GREEN']}🏆 Winnner: {fight['winner']}{c['ENDC']}"
+            yield f"  שיטה: {fight['method']}"
             if 'date' in fight:
-                print(f"  Date: {fight['date']}")
+                yield f"  Date: {fight['date']}"
         
-        print(f"\n{self._colors['HEADER']}{'=' * 100}{self._colors['ENDC']}\n")
+        yield f"\n{c['HEADER']}{'=' * 100}{c['ENDC']}\n"
+    
+    def display_jobs(self, jobs: Iterable[dict]):
+        """הצגת עבודות רקע: מצב, התקדמות והודעה אחרונה"""
+        first, jobs = self._peek(jobs)
+        if first is None:
+            self.show_info("No background jobs")
+            return
+        self.write_lines(self._jobs_lines(jobs))
+    
+    def _jobs_lines(self, jobs: Iterable[dict]):
+        c = self._colors
+        status_colors = {'done': c['GREEN'], 'failed': c['RED'], 'cancelled': c['YELLOW'], 'running': c['BLUE']}
+        yield f"\n{c['BOLD']}{'ID':<6}{'Kind':<10}{'Status':<11}{'Progress':>9}  Message{c['ENDC']}"
+        yield "-" * 80
+        for job in jobs:
+            color = status_colors.get(job['status'], '')
+            detail = job['error'] or job['message'] or ''
+            yield (f"{job['job_id']:<6}{job['kind']:<10}{color}{job['status']:<11}{c['ENDC']}"
+                   f"{job['progress'] * 100:>8.0f}%  {detail[:60]}")
+            if job['status'] == 'done' and job['result'] is not None:
+                yield f"      {c['GREEN']}→ {job['result']}{c['ENDC']}"
+        yield "-" * 80
+    
+    def display_rankings(self, weight_class: str, order: str, rows: Iterable[dict]):
+        """טבלת דירוג של קטגוריה אחת (rows מ-Rankings.top)"""
+        first, rows = self._peek(rows)
+        if first is None:
+            self.show_error(f"No ranked fighters in {weight_class}")
+            return
+        self.write_lines(self._rankings_lines(weight_class, order, rows))
+    
+    def _rankings_lines(self, weight_class: str, order: str, rows: Iterable[dict]):
+        c = self._colors
+        yield f"\n{c['BOLD']}{c['HEADER']}🏆 {weight_class} - by {order}{c['ENDC']}"
+        yield f"{c['BOLD']}{'#':<4}{'ID':<7}{'Name':<26}{'W-L-D':<12}{'Skill':>7}{'Rating':>9}{'±RD':>7}{c['ENDC']}"
+        yield "-" * 72
+        for row in rows:
+            record = f"{row['wins']}-{row['losses']}-{row['draws']}"
+            color = c['YELLOW'] if row['rank'] == 1 else ''
+            yield (f"{color}{row['rank']:<4}{row['fighter_id']:<7}{row['name'][:25]:<26}{record:<12}"
+                   f"{row['skill']:>7.1f}{row['rating']:>9.0f}{row['rd']:>7.0f}{c['ENDC']}")
+        yield "-" * 72
+    
+    def display_matchups(self, title: str, bouts: Iterable[dict]):
+        """זוגות מה-Matchmaker: מרחק בין הווקטורים וסיכוי הניצחון של הראשון"""
+        first, bouts = self._peek(bouts)
+        if first is None:
+            self.show_error("No opponents found")
+            return
+        self.write_lines(self._matchups_lines(title, bouts))
+    
+    def _matchups_lines(self, title: str, bouts: Iterable[dict]):
+        c = self._colors
+        yield f"\n{c['BOLD']}{c['HEADER']}🤝 {title}{c['ENDC']}"
+        yield f"{c['BOLD']}{'#':<4}{'Weight Class':<19}{'Fighter 1':<26}{'Fighter 2':<26}{'Dist':>7}{'P1 win':>8}{c['ENDC']}"
+        yield "-" * 90
+        for i, bout in enumerate(bouts, 1):
+            yield (f"{i:<4}{bout['weight_class'][:18]:<19}{bout['fighter1'][:25]:<26}{bout['fighter2'][:25]:<26}"
+                   f"{bout['distance']:>7.1f}{bout['fighter1_win_prob'] * 100:>7.0f}%")
+        yield "-" * 90
     
     def display_statistics(self, stats: dict):
         """הצגת סטטיסטיקות"""
@@ -0,0 +1,177 @@
+"""
+CombatEngine Class
+מנוע הקרבות - סימולציית קרב וטורניר בלי ממשק
+מדגים: הפרדה בין לוגיקה טהורה (resolve_bout) לבין עדכון אובייקטים
+"""
+
+import random
+from collections import Counter
+from typing import List, Optional, Sequence
+
+from fighter import Fighter
+from striker import Striker
+from grappler import Grappler
+
+# סדר השדות בטאפל הסטטיסטיקות של לוחם
+STAT_FIELDS = ("striking_power", "grappling_skill", "speed", "kick_power",
+               "submission_skill", "takedown_defense", "versatility")
+STAT_DEFAULT = 50
+ROUNDS = 3
+
+METHOD_KO = "KO/TKO"
+METHOD_SUB = "Submission"
+METHOD_DECISION = "Decision"
+METHOD_DRAW = "Draw"
+
+
+def fighter_stats(f: Fighter) -> tuple:
+    """טאפל הסטטיסטיקות של לוחם (לפי STAT_FIELDS); שדה שאין ללוחם מקבל STAT_DEFAULT"""
+    return tuple(int(getattr(f, name, STAT_DEFAULT) or STAT_DEFAULT) for name in STAT_FIELDS)
+
+
+def resolve_bout(s1: Sequence[int], s2: Sequence[int], rng: random.Random, rounds: int = ROUNDS) -> tuple:
+    """
+    קרב בין שני טאפלים של סטטיסטיקות - פונקציה טהורה, כל האקראיות מגיעה מ-rng
+
+    Returns:
+        tuple: (winner, method, round, score1, score2) - winner הוא 0/1, או -1 בתיקו
+    """
+    str1, grp1, spd1, kick1, sub1, tdd1, ver1 = s1
+    str2, grp2, spd2, kick2, sub2, tdd2, ver2 = s2
+    # עמידה: מכות + בעיטות + מהירות, קרקע: היאבקות + סאבמישן מול הגנת טייקדאון
+    stand1 = str1 * 0.5 + kick1 * 0.25 + spd1 * 0.25
+    stand2 = str2 * 0.5 + kick2 * 0.25 + spd2 * 0.25
+    ground1 = grp1 * 0.5 + sub1 * 0.3 + ver1 * 0.2 - tdd2 * 0.3
+    ground2 = grp2 * 0.5 + sub2 * 0.3 + ver2 * 0.2 - tdd1 * 0.3
+
+    score1 = score2 = 0.0
+    for rnd in range(1, rounds + 1):
+        r1 = max(stand1, ground1) + rng.gauss(0, 12)
+        r2 = max(stand2, ground2) + rng.gauss(0, 12)
+        score1 += r1
+        score2 += r2
+        lead = r1 - r2
+        if abs(lead) > 25:
+            # פער גדול בסיבוב - סיכוי לסיום לפי התחום החזק של המנצח בסיבוב
+            w = 0 if lead > 0 else 1
+            stand, ground = (stand1, ground1) if w == 0 else (stand2, ground2)
+            if rng.random() < (abs(lead) - 25) / 50:
+                return w, METHOD_KO if stand >= ground else METHOD_SUB, rnd, round(score1, 1), round(score2, 1)
+
+    if abs(score1 - score2) < 1.0:
+        return -1, METHOD_DRAW, rounds, round(score1, 1), round(score2, 1)
+    return (0 if score1 > score2 else 1), METHOD_DECISION, rounds, round(score1, 1), round(score2, 1)
+
+
+def resolve_batch(pairs: Sequence[tuple], seed: Optional[int] = None, rounds: int = ROUNDS) -> list:
+    """
+    הרבה קרבות בקריאה אחת - רק טאפלים פנימה ותוצאות החוצה, כך שאפשר להריץ ב-ProcessPoolExecutor
+
+    Args:
+        pairs: רשימת (stats1, stats2)
+        seed: זרע ל-rng של המנה
+    """
+    rng = random.Random(seed)
+    return [resolve_bout(s1, s2, rng, rounds) for s1, s2 in pairs]
+
+
+class CombatEngine:
+    """
+    מנוע קרבות: מריץ resolve_bout ומעדכן את הרקורד של הלוחמים
+    seed קבוע נותן תוצאות זהות בכל הרצה
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._rng = random.Random(seed)
+        self._fights = 0
+        self._methods = Counter()
+
+    def simulate_fight(self, f1: Fighter, f2: Fighter) -> dict:
+        """
+        סימולציית קרב אחד; מעדכן ניצחון/הפסד/תיקו על האובייקטים
+
+        Returns:
+            dict: תוצאה בפורמט של Repository.save_fight_result
+        """
+        return self.apply_outcome(f1, f2, resolve_bout(fighter_stats(f1), fighter_stats(f2), self._rng))
+
+    def apply_outcome(self, f1: Fighter, f2: Fighter, outcome: tuple, title_holder: Optional[Fighter] = None) -> dict:
+        """
+        עדכון הרקורדים לפי תוצאה של resolve_bout (גם כזו שחושבה בתהליך אחר)
+
+        Args:
+            title_holder: בקרב על תואר - האלוף; אם הוא מנצח ויש לו defend_title, זה הניצחון שנרשם
+
+        Returns:
+            dict: תוצאה בפורמט של Repository.save_fight_result
+        """
+        winner, method, rnd, score1, score2 = outcome
+        if winner == -1:
+            f1.add_draw()
+            f2.add_draw()
+            winner_name, winner_id = METHOD_DRAW, None
+        else:
+            w, l = (f1, f2) if winner == 0 else (f2, f1)
+            if w is title_holder and hasattr(w, 'defend_title'):
+                w.defend_title()
+            elif method == METHOD_KO and isinstance(w, Striker):
+                w.add_knockout_win()
+            elif method == METHOD_SUB and isinstance(w, Grappler):
+                w.add_submission_win()
+            else:
+                w.add_win()
+            l.add_loss()
+            winner_name, winner_id = w.name, w.fighter_id
+
+        self._fights += 1
+        self._methods[method] += 1
+        return {
+            'fighter1': f1.name,
+            'fighter2': f2.name,
+            'winner': winner_name,
+            'fighter1_id': f1.fighter_id,
+            'fighter2_id': f2.fighter_id,
+            'winner_id': winner_id,
+            'method': method,
+            'round': rnd,
+            'fighter1_score': score1,
+            'fighter2_score': score2,
+        }
+
+    def simulate_tournament(self, fighters: List[Fighter]) -> dict:
+        """
+        טורניר נוקאאוט; מי שאין לו יריב בסיבוב עולה ישר (bye)
+        בתיקו עולה מי שצבר יותר נקודות
+
+        Returns:
+            dict: champion, ו-rounds - רשימת תוצאות לכל סיבוב
+        """
+        alive = list(fighters)
+        rounds = []
+        while len(alive) > 1:
+            results, next_round = [], []
+            for i in range(0, len(alive) - 1, 2):
+                a, b = alive[i], alive[i + 1]
+                res = self.simulate_fight(a, b)
+                results.append(res)
+                if res['winner_id'] == a.fighter_id:
+                    next_round.append(a)
+                elif res['winner_id'] == b.fighter_id:
+                    next_round.append(b)
+                else:
+                    next_round.append(a if res['fighter1_score'] >= res['fighter2_score'] else b)
+            if len(alive) % 2:
+                next_round.append(alive[-1])
+            rounds.append(results)
+            alive = next_round
+        return {'champion': alive[0].name if alive else None, 'rounds': rounds}
+
+    def get_fight_stats(self) -> dict:
+        """סטטיסטיקות המנוע מאז שנוצר"""
+        return {
+            'fights_simulated': self._fights,
+            'ko_finishes': self._methods[METHOD_KO],
+            'submission_finishes': self._methods[METHOD_SUB],
+            'decisions': self._methods[METHOD_DECISION],
+            'draws': self._methods[METHOD_DRAW],
+        }
@@ -0,0 +1,206 @@
+"""
+Frame Profiler
+מדידת זמן פריים לפי שלבים (אירועים, עדכון, ציור, flip) עם שכבת HUD
+מדגים: Ring Buffer, מדידת ביצועים, ייצוא ל-CSV/JSON
+"""
+
+import csv
+import json
+import math
+import time
+from collections import deque
+
+import pygame
+
+FRAME_BUDGET_MS = 1000.0 / 60
+PHASES = ("events", "update", "draw", "flip")
+PHASE_COLORS = {
+    "events": (80, 150, 255),
+    "update": (95, 235, 170),
+    "draw": (255, 210, 120),
+    "flip": (235, 70, 85),
+}
+DRAW_PRIMITIVES = ("rect", "line", "lines", "aaline", "aalines", "circle", "ellipse", "arc", "polygon")
+CSV_FIELDS = ("frame", "scene") + tuple(f"{p}_ms" for p in PHASES) + (
+    "total_ms", "interval_ms", "draw_calls", "text_renders")
+
+
+class RenderCounters:
+    """מונים גלובליים שמתקדמים בכל קריאת ציור / רינדור טקסט"""
+    draw_calls = 0
+    text_renders = 0
+
+
+class CountingFont(pygame.font.Font):
+    """פונט שסופר כל render - זהה ל-SysFont(None, size)"""
+
+    def render(self, *args, **kwargs):
+        RenderCounters.text_renders += 1
+        return super().render(*args, **kwargs)
+
+
+_draw_counters_installed = False
+
+
+def install_draw_counters():
+    """עטיפת הפונקציות של pygame.draw כך שכל קריאה תיספר (פעם אחת לתהליך)"""
+    global _draw_counters_installed
+    if _draw_counters_installed:
+        return
+    for name in DRAW_PRIMITIVES:
+        original = getattr(pygame.draw, name)
+
+        def counted(*args, _original=original, **kwargs):
+            RenderCounters.draw_calls += 1
+            return _original(*args, **kwargs)
+
+        setattr(pygame.draw, name, counted)
+    _draw_counters_installed = True
+
+
+def percentile(values, pct):
+    """אחוזון (nearest-rank) של רשימת מספרים"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+class FrameProfiler:
+    """
+    אוסף תזמונים לכל פריים לתוך Ring Buffer
+    שימוש: begin_frame -> mark("events") -> mark("update") -> mark("draw") -> mark("flip") -> end_frame
+    """
+
+    def __init__(self, capacity: int = 1200):
+        self.records = deque(maxlen=capacity)
+        self.visible = False
+        self.frame_no = 0
+        self._scene = None
+        self._phase_ms = {}
+        self._last = 0.0
+        self._last_begin = None
+        self._interval_ms = 0.0
+        self._counts = (0, 0)
+        self._draw0 = self._text0 = 0
+
+    def begin_frame(self, scene: str):
+        now = time.perf_counter()
+        self._interval_ms = (now - self._last_begin) * 1000.0 if self._last_begin else 0.0
+        self._last_begin = now
+        self._last = now
+        self._scene = scene
+        self._phase_ms = dict.fromkeys(PHASES, 0.0)
+        self._draw0 = RenderCounters.draw_calls
+        self._text0 = RenderCounters.text_renders
+        self._counted = False
+
+    def mark(self, phase: str):
+        """סגירת השלב הנוכחי - הזמן מאז ה-mark הקודם נזקף ל-phase"""
+        now = time.perf_counter()
+        self._phase_ms[phase] += (now - self._last) * 1000.0
+        self._last = now
+        if phase == "draw" and not self._counted:
+            self.count()
+
+    def count(self):
+        """
+        צילום מוני הציור של הפריים. נקרא אחרי ציור הסצנה ולפני ה-HUD-ים - הזמן שלהם נזקף
+        ל-draw, אבל ספירת הקריאות שמוצגת היא של הסצנה בלבד
+        """
+        self._counts = (RenderCounters.draw_calls - self._draw0,
+                        RenderCounters.text_renders - self._text0)
+        self._counted = True
+
+    def end_frame(self):
+        self.frame_no += 1
+        phases = self._phase_ms
+        self.records.append((self.frame_no, self._scene) + tuple(phases[p] for p in PHASES) + (
+            sum(phases.values()), self._interval_ms) + self._counts)
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    # ----- reports -----
+    def summary(self) -> dict:
+        """סיכום לכל סצנה: ממוצע, p50/p95/p99, מקסימום ומספר פריימים שחרגו מהתקציב"""
+        by_scene = {}
+        for rec in self.records:
+            by_scene.setdefault(rec[1], []).append(rec)
+        out = {}
+        total_idx = CSV_FIELDS.index("total_ms")
+        for scene, recs in by_scene.items():
+            totals = [r[total_idx] for r in recs]
+            out[scene] = {
+                "frames": len(recs),
+                "avg_ms": sum(totals) / len(totals),
+                "p50_ms": percentile(totals, 50),
+                "p95_ms": percentile(totals, 95),
+                "p99_ms": percentile(totals, 99),
+                "max_ms": max(totals),
+                "over_budget": sum(1 for t in totals if t > FRAME_BUDGET_MS),
+                **{f"avg_{p}_ms": sum(r[2 + i] for r in recs) / len(recs) for i, p in enumerate(PHASES)},
+            }
+        return out
+
+    def export_csv(self, path: str):
+        with open(path, "w", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(CSV_FIELDS)
+            writer.writerows(self.records)
+
+    def export_json(self, path: str):
+        with open(path, "w") as fh:
+            json.dump({
+                "budget_ms": FRAME_BUDGET_MS,
+                "summary": self.summary(),
+                "frames": [dict(zip(CSV_FIELDS, rec)) for rec in self.records],
+            }, fh, indent=1)
+
+    def export(self, prefix: str = "profile") -> str:
+        """ייצוא ל-CSV ול-JSON עם חותמת זמן, מחזיר את שם הקובץ בלי סיומת"""
+        base = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}"
+        self.export_csv(base + ".csv")
+        self.export_json(base + ".json")
+        return base
+
+    # ----- HUD -----
+    def draw_hud(self, surf, font, x=10, y=10, graph_w=240, graph_h=80):
+        if not self.visible or not self.records:
+            return
+        last = self.records[-1]
+        fps = 1000.0 / last[CSV_FIELDS.index("interval_ms")] if last[CSV_FIELDS.index("interval_ms")] else 0.0
+
+        lines = [
+            f"{self._scene}  FPS {fps:5.1f}  frame {last[CSV_FIELDS.index('total_ms')]:5.2f} ms",
+            "  ".join(f"{p} {last[2 + i]:.2f}" for i, p in enumerate(PHASES)),
+            f"draw calls {last[-2]}  text renders {last[-1]}",
+            "F3 hide | F4 export CSV+JSON",
+        ]
+        texts = [font.render(ln, True, (240, 240, 255)) for ln in lines]
+        panel_w = max([graph_w] + [t.get_width() for t in texts]) + 20
+        panel = pygame.Rect(x, y, panel_w, graph_h + 28 + 18 * len(texts))
+        pygame.draw.rect(surf, (12, 12, 18), panel, border_radius=8)
+        pygame.draw.rect(surf, (85, 85, 120), panel, width=1, border_radius=8)
+
+        # גרף עמודות מוערמות: כל עמודה היא פריים, כל צבע הוא שלב
+        gx, gy = x + 10, y + 10
+        scale = graph_h / (FRAME_BUDGET_MS * 2)
+        recent = list(self.records)[-graph_w:]
+        for i, rec in enumerate(recent):
+            bottom = gy + graph_h
+            for p_idx, phase in enumerate(PHASES):
+                h = rec[2 + p_idx] * scale
+                if h < 0.5:
+                    continue
+                top = max(gy, bottom - h)
+                pygame.draw.line(surf, PHASE_COLORS[phase], (gx + i, bottom), (gx + i, top))
+                bottom = top
+        budget_y = gy + graph_h - FRAME_BUDGET_MS * scale
+        pygame.draw.line(surf, (240, 240, 255), (gx, budget_y), (gx + graph_w, budget_y))
+
+        ty = gy + graph_h + 8
+        for t in texts:
+            surf.blit(t, (gx, ty))
+            ty += 18
@@ -0,0 +1,258 @@
+"""
+Fusion Explorer
+כל הצירופים (Fighter.__add__) של זוגות לוחמים בקטגוריה, בלי ליצור אובייקט Fighter לכל זוג:
+הסטטיסטיקות נטענות פעם אחת למערכים (array), כל שורה i מחושבת מול כל j>i בביטוי אחד
+על המערכים, וה-k הטובים נשמרים בערימה (heapq) בגודל k
+
+הלוחמים ממוינים לפי striking + grappling, ולכן הציון של צירוף חסום מלמעלה ב-(t_i + t_j) / 4:
+שורה שהחסם שלה לא עובר את המקום ה-k נחתכת (וכל השורות אחריה) - אותה תוצאה כמו מעבר
+על כל n² הזוגות, בלי לחשב את רובם
+
+by="win_rate": הצירופים המובילים לפי overall_skill עוברים סימולציה (resolve_bout) מול
+הרוסטר של הקטגוריה; לצירוף יש רק striking / grappling (השאר STAT_DEFAULT), כך שכל
+(striking, grappling) שונה מסומלץ פעם אחת
+
+מדגים: heapq, מערכים במקום אובייקטים, חיתוך לפי חסם (branch and bound)
+
+שימוש:
+    python fusion_explorer.py --weight-class Lightweight -k 10
+    python fusion_explorer.py --by win_rate -k 10
+"""
+
+import argparse
+import bisect
+import contextlib
+import heapq
+import random
+import sys
+import time
+from array import array
+from typing import List, NamedTuple, Optional, Sequence
+
+from combat_engine import STAT_DEFAULT, STAT_FIELDS, resolve_bout
+
+TOP_K = 50
+SHORTLIST = 400  # מועמדים לפי overall_skill שעוברים סימולציה ב-by="win_rate"
+BOUTS = 8        # קרבות מול כל יריב
+BY = ("skill", "win_rate")
+
+
+class Fusion(NamedTuple):
+    """צירוף אחד - מה ש-fighter1 + fighter2 היה מחזיר, בלי האובייקט"""
+    id1: int
+    id2: int
+    name1: str
+    name2: str
+    weight_class: str
+    striking_power: int
+    grappling_skill: int
+    overall_skill: float
+    win_rate: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.name1} + {self.name2} Hybrid"
+
+    @property
+    def fighter_id(self) -> tuple:
+        # מפתח ייחודי לרשימה הווירטואלית (virtual_list) - כמו fighter_id ללוחם
+        return self.id1, self.id2
+
+
+class FusionTable:
+    """הלוחמים של קטגוריה כמערכים, ממוינים לפי striking + grappling (מהגבוה)"""
+
+    def __init__(self, fighters: Sequence, weight_class: str = ""):
+        fighters = sorted(fighters, key=lambda f: (-(f.striking_power + f.grappling_skill), f.fighter_id))
+        self.weight_class = weight_class
+        self.ids = array("i", (f.fighter_id for f in fighters))
+        self.names = [f.name for f in fighters]
+        self.striking = array("i", (f.striking_power for f in fighters))
+        self.grappling = array("i", (f.grappling_skill for f in fighters))
+        # -t ממוין בסדר עולה - ל-bisect
+        self.neg_total = array("i", (-(s + g) for s, g in zip(self.striking, self.grappling)))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, repo, weight_class: str) -> "FusionTable":
+        return cls(repo.get_fighters_by_ids(repo.get_fighter_ids(weight_class)), weight_class)
+
+    def fusion(self, i: int, j: int, win_rate: Optional[float] = None) -> Fusion:
+        s = (self.striking[i] + self.striking[j]) // 2
+        g = (self.grappling[i] + self.grappling[j]) // 2
+        return Fusion(self.ids[i], self.ids[j], self.names[i], self.names[j], self.weight_class,
+                      s, g, (s + g) / 2, win_rate)
+
+
+def top_by_skill(table: FusionTable, k: int = TOP_K) -> tuple:
+    """
+    k הצירופים עם overall_skill הגבוה ביותר (כמו Fighter.overall_skill של התוצאה של __add__)
+
+    Returns:
+        tuple: (רשימת (ציון, i, j) מהגבוה לנמוך, מספר הזוגות שחושבו)
+    """
+    if k < 1:
+        return [], 0
+    n = len(table)
+    S, G, neg_t = table.striking, table.grappling, table.neg_total
+    heap = []  # (ציון, -i, -j) - המקום ה-k בראש; בשוויון עדיף i / j נמוך
+    evaluated = 0
+    for i in range(n - 1):
+        floor = heap[0][0] if len(heap) == k else -1.0
+        ti = -neg_t[i]
+        # השותף הכי טוב האפשרי הוא i+1; מכאן והלאה החסם רק יורד. בשוויון לראש הערימה
+        # שורה מאוחרת מפסידה (שובר השוויון), לכן מספיק החסם שעובר את floor ממש
+        if (ti - neg_t[i + 1]) / 4 <= floor:
+            break
+        # רק j שהחסם שלהם (ti + tj) / 4 > floor - כלומר tj > 4 * floor - ti
+        stop = bisect.bisect_left(neg_t, ti - 4 * floor, i + 1)
+        si, gi = S[i], G[i]
+        row = [((si + sj) // 2 + (gi + gj) // 2) / 2 for sj, gj in zip(S[i + 1:stop], G[i + 1:stop])]
+        evaluated += len(row)
+        for jj in heapq.nlargest(k, range(len(row)), key=row.__getitem__):
+            item = (row[jj], -i, -(i + 1 + jj))
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+            else:
+                break  # nlargest ממוין - השאר לא ייכנסו
+    return [(score, -i, -j) for score, i, j in sorted(heap, reverse=True)], evaluated
+
+
+def top_by_win_rate(table: FusionTable, opponents: Sequence[tuple], k: int = TOP_K, shortlist: int = SHORTLIST,
+                    bouts: int = BOUTS, seed=None) -> tuple:
+    """
+    k הצירופים עם אחוז הניצחונות הגבוה ביותר מול opponents, מתוך shortlist המובילים
+    לפי overall_skill; כל (striking, grappling) שונה מסומלץ פעם אחת, באותו seed לכולם
+
+    Returns:
+        tuple: (רשימת (אחוז, i, j) מהגבוה לנמוך, מספר הזוגות שחושבו, מספר הסימולציות)
+    """
+    if k < 1:
+        return [], 0, 0
+    candidates, evaluated = top_by_skill(table, max(k, shortlist))
+    eval_seed = random.Random(seed).getrandbits(32)
+    rates = {}
+    heap = []
+    for _, i, j in candidates:
+        key = ((table.striking[i] + table.striking[j]) // 2, (table.grappling[i] + table.grappling[j]) // 2)
+        rate = rates.get(key)
+        if rate is None:
+            stats = [STAT_DEFAULT] * len(STAT_FIELDS)
+            stats[0], stats[1] = key  # striking_power, grappling_skill
+            stats = tuple(stats)
+            rng = random.Random(eval_seed)
+            points = 0.0
+            for opp in opponents:
+                for _ in range(bouts):
+                    winner = resolve_bout(stats, opp, rng)[0]
+                    points += 1.0 if winner == 0 else 0.5 if winner == -1 else 0.0
+            rate = rates[key] = points / max(1, len(opponents) * bouts)
+        item = (rate, -i, -j)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+    return [(rate, -i, -j) for rate, i, j in sorted(heap, reverse=True)], evaluated, len(rates)
+
+
+def explore(repo, weight_class: str, k: int = TOP_K, by: str = "skill", seed=None) -> dict:
+    """טעינה + חיפוש; ה-dict כולל את רשימת ה-Fusion ונתוני ריצה"""
+    if by not in BY:
+        raise ValueError(f"unknown ranking {by!r}")
+    t0 = time.perf_counter()
+    table = FusionTable.load(repo, weight_class)
+    t_load = time.perf_counter() - t0
+    simulated = 0
+    if by == "skill":
+        ranked, evaluated = top_by_skill(table, k)
+        fusions = [table.fusion(i, j) for _, i, j in ranked]
+    else:
+        from build_optimizer import load_opponents
+        ranked, evaluated, simulated = top_by_win_rate(table, load_opponents(repo, weight_class, seed=seed),
+                                                       k, seed=seed)
+        fusions = [table.fusion(i, j, rate) for rate, i, j in ranked]
+    n = len(table)
+    return {"weight_class": weight_class, "by": by, "fighters": n, "pairs": n * (n - 1) // 2,
+            "evaluated": evaluated, "simulated": simulated, "fusions": fusions,
+            "load_ms": t_load * 1000, "search_ms": (time.perf_counter() - t0 - t_load) * 1000}
+
+
+class FusionList:
+    """תוצאות explore כמקור ל-VirtualList (len / get / version / index_of_prefix)"""
+
+    def __init__(self, fusions: Sequence[Fusion] = ()):
+        self.items = list(fusions)
+        self.version = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, index: int) -> Optional[Fusion]:
+        return self.items[index] if 0 <= index < len(self.items) else None
+
+    def index_of_prefix(self, prefix: str) -> int:
+        prefix = prefix.upper()
+        return next((k for k, f in enumerate(self.items) if f.name1.upper().startswith(prefix)), 0)
+
+    def set(self, fusions: Sequence[Fusion]):
+        self.items = list(fusions)
+        self.version += 1
+
+
+def _brute_force(table: FusionTable, k: int) -> List[float]:
+    # בדיקה: אותם ציונים כמו מעבר על כל הזוגות עם Fighter.__add__ האמיתי
+    from fighter import Fighter
+    fighters = [Fighter(table.ids[i], table.names[i], table.weight_class, 0, 0, 0, table.striking[i],
+                        table.grappling[i]) for i in range(len(table))]
+    scores = [(a + b).overall_skill for x, a in enumerate(fighters) for b in fighters[x + 1:]]
+    return heapq.nlargest(k, scores)
+
+
+def _positive_int(text: str) -> int:
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer, got '{text}'")
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return value
+
+
+def main(argv=None) -> int:
+    from models.repository import Repository
+
+    parser = argparse.ArgumentParser(description="Top-k pair fusions (Fighter.__add__) in a weight class")
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--weight-class", default="Lightweight")
+    parser.add_argument("-k", type=_positive_int, default=10)
+    parser.add_argument("--by", choices=BY, default="skill")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--check", action="store_true", help="compare with building every Fighter pair (slow)")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        repo = Repository(args.db)
+    r = explore(repo, args.weight_class, args.k, args.by, args.seed)
+    print(f"{r['weight_class']}: {r['fighters']} fighters, {r['pairs']} pairs, {r['evaluated']} evaluated"
+          + (f", {r['simulated']} simulated" if r["simulated"] else "")
+          + f" - load {r['load_ms']:.0f} ms, search {r['search_ms']:.1f} ms")
+    for rank, f in enumerate(r["fusions"], 1):
+        extra = f"  win {f.win_rate * 100:5.1f}%" if f.win_rate is not None else ""
+        print(f"{rank:>3}. {f.overall_skill:5.1f}  STR {f.striking_power:>3} GRP {f.grappling_skill:>3}{extra}  {f.name}")
+    if args.check:
+        t0 = time.perf_counter()
+        table = FusionTable.load(repo, args.weight_class)
+        expected = _brute_force(table, args.k)
+        got = [score for score, _, _ in top_by_skill(table, args.k)[0]]
+        print(f"brute force over Fighter objects: {(time.perf_counter() - t0) * 1000:.0f} ms, "
+              f"same top-{args.k} scores: {expected == got}")
+        return 0 if expected == got else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+"""
+HTTP Service
+שירות JSON מקומי מעל HTTP (asyncio, בלי תלויות) - גישה לרוסטר ולסימולציות בלי לייבא את המשחק
+מדגים: Event Loop, ThreadPoolExecutor למסד, ProcessPoolExecutor לעבודה כבדה
+
+נקודות קצה:
+    GET    /fighters?offset=0&limit=50        דף לפי שם
+    GET    /fighters/search?name=&weight_class=&limit=
+    GET    /fighters/<id>
+    POST   /fighters                          גוף: לוחם בפורמט fighter_to_dict (בלי fighter_id)
+    PATCH  /fighters/<id>                     גוף: name / wins / losses / draws
+    DELETE /fighters/<id>
+    GET    /fights?limit=10
+    GET    /stats
+    POST   /simulate                          גוף: {"count": N, "ids": [...], "weight_class": ..., "seed": ..., "save": true}
+
+שימוש:
+    python http_service.py --port 8765 --db ufc_v3.db
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from combat_engine import STAT_FIELDS, CombatEngine, fighter_stats, resolve_batch
+from models.repository import FIGHTER_TYPES, Repository, fighter_from_dict, fighter_to_dict
+
+DEFAULT_PORT = 8765
+SIM_CHUNK = 2000         # קרבות לכל משימה ב-ProcessPool
+MAX_SIM_COUNT = 1_000_000
+MAX_BODY = 1 << 20
+MAX_RECORD = 1_000_000   # תקרה לניצחונות / הפסדים / תיקו (ולמוני הניצחונות בנוקאאוט וכו')
+MAX_FIGHTER_ID = (1 << 63) - 1  # INTEGER של SQLite
+RECORD_FIELDS = ("wins", "losses", "draws", "knockout_wins", "submission_wins", "title_defenses")
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_arg(query: dict, name: str, default: int, lo: int = 0, hi: int = 10_000) -> int:
+    try:
+        value = int(query.get(name, [default])[0])
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be an integer")
+    return max(lo, min(hi, value))
+
+
+def _int_field(data: dict, name: str, lo: int, hi: int) -> int:
+    """שדה מספרי בגוף הבקשה - int (לא bool ולא מחרוזת) בטווח, אחרת 400"""
+    value = data[name]
+    if not isinstance(value, int) or isinstance(value, bool) or not lo <= value <= hi:
+        raise HTTPError(400, f"'{name}' must be an integer between {lo} and {hi}")
+    return value
+
+
+def _fighter_id(value) -> int:
+    """מזהה מהנתיב; מזהה שלא ייתכן במאגר - פשוט לא קיים"""
+    fighter_id = int(value)
+    if fighter_id > MAX_FIGHTER_ID:
+        raise HTTPError(404, f"fighter {value} not found")
+    return fighter_id
+
+
+def _check_new_fighter(data) -> None:
+    """גוף של POST /fighters: שם וקטגוריה, סוג מוכר, סטטיסטיקות 0..100 ורקורד 0..MAX_RECORD"""
+    if not isinstance(data, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    for name in ("name", "weight_class"):
+        if not isinstance(data.get(name), str) or not data[name]:
+            raise HTTPError(400, "'name' and 'weight_class' are required")
+    fighter_type = data.get("fighter_type")
+    if fighter_type is not None and fighter_type not in FIGHTER_TYPES:
+        raise HTTPError(400, f"'fighter_type' must be one of {', '.join(FIGHTER_TYPES)}")
+    for name in STAT_FIELDS:
+        if data.get(name) is not None:
+            _int_field(data, name, 0, 100)
+    for name in RECORD_FIELDS:
+        if data.get(name) is not None:
+            _int_field(data, name, 0, MAX_RECORD)
+
+
+class FighterService:
+    """
+    הלוגיקה של השירות - כל הגישה למאגר רצה ב-ThreadPool (לא חוסמת את ה-event loop),
+    לכל thread חיבור קריאה משלו ב-Repository; סימולציות רצות ב-ProcessPool
+    """
+
+    def __init__(self, db_name: str, db_threads: int = 4, sim_workers: int = 0):
+        self.repo = Repository(db_name)
+        self.engine = CombatEngine()
+        self.db_pool = ThreadPoolExecutor(max_workers=db_threads, thread_name_prefix="db")
+        self.sim_pool = ProcessPoolExecutor(max_workers=sim_workers or os.cpu_count() or 1)
+        # קריאה-ושינוי-וכתיבה (סימולציה, עדכון) אחת בכל פעם כדי ששתיים לא ידרסו זו את זו
+        self.write_lock = asyncio.Lock()
+        self.routes = [
+            ("GET", re.compile(r"^/fighters$"), self.list_fighters),
+            ("POST", re.compile(r"^/fighters$"), self.create_fighter),
+            ("GET", re.compile(r"^/fighters/search$"), self.search_fighters),
+            ("GET", re.compile(r"^/fighters/(\d+)$"), self.get_fighter),
+            ("PATCH", re.compile(r"^/fighters/(\d+)$"), self.update_fighter),
+            ("DELETE", re.compile(r"^/fighters/(\d+)$"), self.delete_fighter),
+            ("GET", re.compile(r"^/fights$"), self.fight_history),
+            ("GET", re.compile(r"^/stats$"), self.stats),
+            ("POST", re.compile(r"^/simulate$"), self.simulate),
+        ]
+
+    def close(self):
+        self.sim_pool.shutdown(cancel_futures=True)
+        self.db_pool.shutdown()
+        self.repo.close()
+
+    async def db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.db_pool, fn, *args)
+
+    async def dispatch(self, method: str, target: str, body: bytes):
+        """Returns: (status, payload)"""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            m = pattern.match(url.path)
+            if not m:
+                continue
+            allowed = True
+            if route_method == method:
+                data = None
+                if body:
+                    try:
+                        data = json.loads(body)
+                    except ValueError:
+                        raise HTTPError(400, "body is not valid JSON")
+                return await handler(query, data, *m.groups())
+        raise HTTPError(405 if allowed else 404, f"{method} {url.path} not supported" if allowed else "not found")
+
+    # ----- fighters -----
+    async def list_fighters(self, query, data):
+        offset = _int_arg(query, "offset", 0, hi=1 << 31)
+        limit = _int_arg(query, "limit", 50, lo=1, hi=1000)
+        fighters = await self.db(self.repo.get_fighters_page, offset, limit)
+        total = await self.db(self.repo.count_fighters)
+        return 200, {"total": total, "offset": offset, "fighters": [fighter_to_dict(f) for f in fighters]}
+
+    async def search_fighters(self, query, data):
+        name = query.get("name", [None])[0]
+        weight_class = query.get("weight_class", [None])[0]
+        limit = _int_arg(query, "limit", 50, lo=1, hi=1000)
+        fighters = await self.db(self.repo.search_fighters, name, weight_class, limit)
+        return 200, {"fighters": [fighter_to_dict(f) for f in fighters]}
+
+    async def _fighter_or_404(self, fighter_id):
+        fighter = await self.db(self.repo.get_fighter_by_id, _fighter_id(fighter_id))
+        if not fighter:
+            raise HTTPError(404, f"fighter {fighter_id} not found")
+        return fighter
+
+    async def get_fighter(self, query, data, fighter_id):
+        return 200, fighter_to_dict(await self._fighter_or_404(fighter_id))
+
+    async def create_fighter(self, query, data):
+        _check_new_fighter(data)
+
+        def create():
+            fighter = fighter_from_dict(dict(data, fighter_id=self.repo.get_max_fighter_id() + 1))
+            return fighter if self.repo.add_fighter(fighter) else None
+
+        # יצירה אחת בכל פעם - ה-ID הבא מחושב מהמאגר
+        async with self.write_lock:
+            fighter = await self.db(create)
+        if not fighter:
+            raise HTTPError(500, "could not add fighter")
+        return 201, fighter_to_dict(fighter)
+
+    async def update_fighter(self, query, data, fighter_id):
+        if not isinstance(data, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        fighter_id = _fighter_id(fighter_id)
+        record = {field: _int_field(data, field, 0, MAX_RECORD) for field in ("wins", "losses", "draws")
+                  if field in data}
+
+        def update():
+            fighter = self.repo.get_fighter_by_id(fighter_id)
+            if not fighter:
+                raise HTTPError(404, f"fighter {fighter_id} not found")
+            # רקורד רק עולה (כמו add_win/add_loss/add_draw) - הורדה היא שגיאה ולא מתעלמים ממנה
+            for field, value in record.items():
+                if value < getattr(fighter, field):
+                    raise HTTPError(400, f"'{field}' cannot decrease ({getattr(fighter, field)} -> {value})")
+            if "name" in data:
+                try:
+                    fighter.name = data["name"]
+                except ValueError as e:
+                    raise HTTPError(400, str(e))
+            # אין setter לרקורד - קובעים את הערך ישירות, כמו fighter_from_dict
+            for field, value in record.items():
+                setattr(fighter, "_" + field, value)
+            if not self.repo.update_fighter(fighter):
+                raise HTTPError(500, "could not update fighter")
+            return fighter
+
+        async with self.write_lock:
+            fighter = await self.db(update)
+        return 200, fighter_to_dict(fighter)
+
+    async def delete_fighter(self, query, data, fighter_id):
+        fighter_id = _fighter_id(fighter_id)
+        if not await self.db(self.repo.delete_fighter, fighter_id):
+            raise HTTPError(404, f"fighter {fighter_id} not found")
+        return 200, {"deleted": fighter_id}
+
+    # ----- fights -----
+    async def fight_history(self, query, data):
+        limit = _int_arg(query, "limit", 10, lo=1, hi=1000)
+        return 200, {"fights": await self.db(self.repo.get_fight_history, limit)}
+
+    async def stats(self, query, data):
+        return 200, {**await self.db(self.repo.get_statistics), **self.engine.get_fight_stats()}
+
+    async def simulate(self, query, data):
+        """
+        count קרבות בין זוגות אקראיים; הקרבות עצמם מחושבים במנות ב-ProcessPool
+        והעדכון והשמירה רצים ב-ThreadPool, כך שה-event loop ממשיך לשרת בקשות
+        """
+        data = data or {}
+        try:
+            count = int(data.get("count", 1))
+            ids = [int(i) for i in data.get("ids") or []]
+        except (TypeError, ValueError):
+            raise HTTPError(400, "'count' and 'ids' must be integers")
+        for i in ids:
+            if abs(i) > MAX_FIGHTER_ID:
+                raise HTTPError(404, f"fighter {i} not found")
+        if not 1 <= count <= MAX_SIM_COUNT:
+            raise HTTPError(400, f"'count' must be between 1 and {MAX_SIM_COUNT}")
+        seed = data.get("seed")
+        save = bool(data.get("save", True))
+        loop = asyncio.get_running_loop()
+
+        def prepare():
+            # הגרלת הזוגות ובניית הטאפלים - O(count), ולכן ב-ThreadPool ולא ב-event loop
+            by_id = None
+            if ids:
+                # מזהים שנבחרו: כולם חייבים להתקיים - נבדק לפני ההגרלה, לא רק על מי שהוגרל
+                by_id = {f.fighter_id: f for f in self.repo.get_fighters_by_ids(set(ids))}
+                missing = [i for i in ids if i not in by_id]
+                if missing:
+                    raise HTTPError(404, f"fighter {missing[0]} not found")
+            pool_ids = sorted(set(by_id if by_id is not None else self.repo.get_fighter_ids(data.get("weight_class"))))
+            if len(pool_ids) < 2:
+                raise HTTPError(400, "need at least 2 fighters")
+            rng = random.Random(seed)
+            id_pairs = [rng.sample(pool_ids, 2) for _ in range(count)]
+            if by_id is None:
+                # מכל הרוסטר טוענים רק את הלוחמים שהוגרלו
+                by_id = {f.fighter_id: f for f in self.repo.get_fighters_by_ids({i for pair in id_pairs for i in pair})}
+            stats = {i: fighter_stats(f) for i, f in by_id.items()}  # פעם אחת לכל לוחם
+            chunks = [([(stats[a], stats[b]) for a, b in id_pairs[i:i + SIM_CHUNK]], rng.getrandbits(64))
+                      for i in range(0, count, SIM_CHUNK)]
+            return by_id, id_pairs, chunks
+
+        async with self.write_lock:
+            t0 = time.perf_counter()
+            by_id, id_pairs, chunks = await self.db(prepare)
+            batches = await asyncio.gather(*(loop.run_in_executor(self.sim_pool, resolve_batch, chunk, chunk_seed)
+                                             for chunk, chunk_seed in chunks))
+
+            def apply_and_save():
+                outcomes = (o for batch in batches for o in batch)
+                results = [self.engine.apply_outcome(by_id[a], by_id[b], o) for (a, b), o in zip(id_pairs, outcomes)]
+                if save:
+                    self.repo.save_fight_batch(list(by_id.values()), results)
+                wins = {}
+                for r in results:
+                    wins[r["winner"]] = wins.get(r["winner"], 0) + 1
+                return results, wins
+
+            results, wins = await self.db(apply_and_save)
+
+        return 200, {
+            "fights": len(results),
+            "saved": save,
+            "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "wins": wins,
+            "sample": results[:10],
+        }
+
+    # ----- HTTP -----
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """HTTP/1.1 מינימלי עם keep-alive: שורת בקשה, כותרות, גוף לפי Content-Length"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "bad request line"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    await self.respond(writer, 400, {"error": "bad Content-Length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    status, payload = await self.dispatch(method.upper(), target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status: int, payload, keep_alive: bool = True):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(host: str, port: int, db_name: str, db_threads: int, sim_workers: int):
+    service = FighterService(db_name, db_threads, sim_workers)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Serving on http://{host}:{port} (db: {db_name})", flush=True)
+    # SIGTERM/SIGINT עוצרים את השרת בצורה מסודרת - כולל תהליכי הסימולציה
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local JSON-over-HTTP roster and simulation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--db-threads", type=int, default=4, help="pooled connections / DB worker threads")
+    parser.add_argument("--sim-workers", type=int, default=0, help="simulation processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.db_threads, args.sim_workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""
+Job Runner
+עובדי רקע לתור העבודות (models/job_store.py): סימולציות המוניות, מטריצת הסתברויות
+לכל הרוסטר, יבוא גדול ועונות שלמות (season.py) - בתהליכים נפרדים, עם דיווח התקדמות, ביטול ונקודות שמירה
+
+שימוש:
+    python job_runner.py --db ufc_v3.db --workers 2     # עובדים בחזית עד Ctrl+C
+    python job_runner.py --once                         # מריץ את מה שבתור ויוצא
+הגשה ומעקב: MainController (תפריט J), App (F6/F7) או batch_cli.py job ...
+"""
+
+import argparse
+import atexit
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+
+from combat_engine import CombatEngine, fighter_stats, resolve_bout
+from models.job_store import JobStore, STALE_AFTER
+from models.repository import Repository, fighter_from_dict
+
+# דיווח התקדמות בלי נקודת שמירה נכתב לכל היותר פעם ב-PROGRESS_INTERVAL שניות
+PROGRESS_INTERVAL = 0.5
+POLL_INTERVAL = 0.5
+# heartbeat מ-thread נפרד בזמן שעבודה רצה - כדי ש-requeue_stale של עובד אחר לא יתפוס עבודה חיה
+HEARTBEAT_INTERVAL = STALE_AFTER / 4
+
+
+class JobCancelled(Exception):
+    """התבקש ביטול (JobStore.cancel)"""
+
+
+class JobInterrupted(Exception):
+    """העובד נעצר - העבודה חוזרת לתור וממשיכה מנקודת השמירה"""
+
+
+class JobContext:
+    """מה שפונקציית עבודה מקבלת: הפרמטרים, נקודת השמירה האחרונה ודיווח התקדמות"""
+
+    def __init__(self, store: JobStore, repository: Repository, job: dict, stop_event=None):
+        self.store = store
+        self.repository = repository
+        self.job_id = job["job_id"]
+        self.params = job["params"]
+        self.checkpoint = job["checkpoint"] or {}
+        self._stop_event = stop_event
+        self._last_report = 0.0
+
+    def progress(self, done: int, total: int, message: str = "", checkpoint=None):
+        """
+        דיווח התקדמות; עם checkpoint נכתב תמיד, בלעדיו - לכל היותר פעם ב-PROGRESS_INTERVAL
+        זורק JobCancelled / JobInterrupted כשצריך לעצור
+        """
+        now = time.perf_counter()
+        if checkpoint is not None or now - self._last_report >= PROGRESS_INTERVAL:
+            # נקודת השמירה נכתבת לפני שבודקים עצירה, כדי שהעבודה שכבר נשמרה לא תחזור על עצמה
+            self._last_report = now
+            if checkpoint is not None:
+                self.checkpoint = checkpoint
+            if self.store.report_progress(self.job_id, done, total, message, checkpoint):
+                raise JobCancelled()
+        if self._stop_event is not None and self._stop_event.is_set():
+            raise JobInterrupted()
+
+
+# ----- סוגי עבודות -----
+# כל פונקציה מקבלת JobContext ומחזירה תוצאה (JSON); מצב ההמשך נשמר ב-checkpoint
+
+def job_simulate(ctx: JobContext) -> dict:
+    """
+    count קרבות בין זוגות אקראיים, במנות של chunk; כל מנה נשמרת בטרנזקציה אחת
+    params: count, chunk, seed, ids או weight_class, save
+    לכל מנה rng משלה (seed + מספר הקרב הראשון), כך שהמשך מנקודת שמירה נותן אותן תוצאות
+    """
+    params, repo = ctx.params, ctx.repository
+    count = int(params.get("count", 1000))
+    chunk = max(1, int(params.get("chunk", 2000)))
+    save = params.get("save", True)
+    ids = sorted(set(params.get("ids") or repo.get_fighter_ids(params.get("weight_class"))))
+    if len(ids) < 2:
+        raise ValueError("need at least 2 fighters")
+
+    state = ctx.checkpoint
+    seed = state.get("seed", params.get("seed"))
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    done = state.get("done", 0)
+    methods = Counter(state.get("methods", {}))
+    engine = CombatEngine()
+
+    while done < count:
+        n = min(chunk, count - done)
+        rng = random.Random(f"{seed}:{done}")
+        id_pairs = [rng.sample(ids, 2) for _ in range(n)]
+        by_id = {f.fighter_id: f for f in repo.get_fighters_by_ids({i for pair in id_pairs for i in pair})}
+        results = []
+        for a, b in id_pairs:
+            if a in by_id and b in by_id:  # לוחם שנמחק בינתיים מדלגים עליו
+                f1, f2 = by_id[a], by_id[b]
+                results.append(engine.apply_outcome(f1, f2, resolve_bout(fighter_stats(f1), fighter_stats(f2), rng)))
+        if save and results and not repo.save_fight_batch(list(by_id.values()), results):
+            raise RuntimeError("saving fight batch failed")
+        # קריסה בין השמירה לנקודת השמירה תריץ את המנה הזו שוב - לכל היותר מנה אחת כפולה
+        done += n
+        methods.update(r["method"] for r in results)
+        ctx.progress(done, count, f"{done}/{count} fights",
+                     {"seed": seed, "done": done, "methods": dict(methods)})
+
+    return {"fights": done, "saved": bool(save), "seed": seed, "methods": dict(methods)}
+
+
+def job_matrix(ctx: JobContext) -> dict:
+    """
+    מטריצת הסתברויות ניצחון לכל זוג לוחמים (שורה i: הסיכוי של i לנצח כל j) לקובץ CSV
+    params: ids או weight_class, limit, samples, seed, out
+    כל שורה נכתבת לקובץ עם flush, ונקודת השמירה היא מספר השורה + היסט בקובץ
+    """
+    params, repo = ctx.params, ctx.repository
+    ids = params.get("ids") or repo.get_fighter_ids(params.get("weight_class"))[:int(params.get("limit", 100))]
+    fighters = sorted(repo.get_fighters_by_ids(ids), key=lambda f: f.fighter_id)
+    if len(fighters) < 2:
+        raise ValueError("need at least 2 fighters")
+    samples = max(1, int(params.get("samples", 100)))
+    out = params.get("out") or f"matrix_job{ctx.job_id}.csv"
+    stats = [fighter_stats(f) for f in fighters]
+    n = len(fighters)
+
+    state = ctx.checkpoint
+    seed = state.get("seed", params.get("seed"))
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    row = state.get("row", 0)
+
+    if row == 0:
+        fh = open(out, "w", encoding="utf-8")
+        fh.write("fighter_id,name," + ",".join(str(f.fighter_id) for f in fighters) + "\n")
+    else:
+        # שורה שנכתבה חלקית לפני הקריסה נחתכת
+        fh = open(out, "r+", encoding="utf-8")
+        fh.truncate(state["offset"])
+        fh.seek(state["offset"])
+    with fh:
+        for i in range(row, n):
+            rng = random.Random(f"{seed}:{i}")
+            cells = []
+            for j in range(n):
+                if i == j:
+                    cells.append("")
+                    continue
+                score = 0.0
+                for _ in range(samples):
+                    winner = resolve_bout(stats[i], stats[j], rng)[0]
+                    score += 1.0 if winner == 0 else 0.5 if winner == -1 else 0.0
+                cells.append(f"{score / samples:.3f}")
+            name = fighters[i].name.replace(",", " ")
+            fh.write(f"{fighters[i].fighter_id},{name}," + ",".join(cells) + "\n")
+            fh.flush()
+            ctx.progress(i + 1, n, f"row {i + 1}/{n}", {"seed": seed, "row": i + 1, "offset": fh.tell()})
+
+    return {"path": os.path.abspath(out), "fighters": n, "samples": samples, "seed": seed}
+
+
+def _iter_records(path: str):
+    """רשומות מקובץ JSON (מערך) או NDJSON (בזרימה, שורה אחר שורה)"""
+    with open(path, encoding="utf-8") as fh:
+        head = fh.read(1024).lstrip()
+        fh.seek(0)
+        if head.startswith("["):
+            yield from json.load(fh)
+            return
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def job_import(ctx: JobContext) -> dict:
+    """
+    יבוא לוחמים מקובץ גדול במנות של batch; נקודת השמירה היא מספר הרשומות שעובדו
+    params: path, new_ids, batch
+    """
+    params, repo = ctx.params, ctx.repository
+    path = params["path"]
+    batch_size = max(1, int(params.get("batch", 1000)))
+    new_ids = params.get("new_ids", False)
+    total = sum(1 for _ in _iter_records(path))
+
+    state = ctx.checkpoint
+    skip = state.get("records", 0)
+    added = state.get("added", 0)
+    done = 0
+    batch = []
+
+    def flush():
+        nonlocal added
+        next_id = repo.get_max_fighter_id() + 1
+        fighters = []
+        for data in batch:
+            if "fighter_id" not in data or new_ids:
+                data = dict(data, fighter_id=next_id)
+                next_id += 1
+            fighters.append(fighter_from_dict(data))
+        added += repo.add_fighters_bulk(fighters)
+        batch.clear()
+        ctx.progress(done, total, f"{done}/{total} records", {"records": done, "added": added})
+
+    for data in _iter_records(path):
+        done += 1
+        if done <= skip:
+            continue
+        if "name" not in data or "weight_class" not in data:
+            raise ValueError(f"record {done}: 'name' and 'weight_class' are required")
+        batch.append(data)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return {"read": total, "added": added, "skipped": total - added}
+
+
+def job_season(ctx: JobContext) -> dict:
+    """
+    עונה של כמה שנים (season.Season): אירועים שבועיים, קרבות תואר ואימונים
+    params: years, events_per_year, fights_per_year, rest_events, title_every, train_chance,
+            commit_every, weight_classes, start, seed
+    נקודת שמירה אחרי כל commit_every אירועים (אותה טרנזקציה של הקרבות כבר נסגרה)
+    """
+    from season import Season
+    season = Season.from_params(ctx.repository, ctx.params)
+    return season.run(ctx.checkpoint or None, ctx.progress)
+
+
+JOB_HANDLERS = {
+    "simulate": job_simulate,
+    "matrix": job_matrix,
+    "import": job_import,
+    "season": job_season,
+}
+
+
+# ----- עובדים -----
+def run_job(store: JobStore, repository: Repository, job: dict, stop_event=None) -> str:
+    """הרצת עבודה שכבר נתפסה; מחזיר את הסטטוס הסופי"""
+    handler = JOB_HANDLERS.get(job["kind"])
+    if handler is None:
+        store.fail(job["job_id"], f"unknown job kind '{job['kind']}'")
+        return "failed"
+    ctx = JobContext(store, repository, job, stop_event)
+    beating = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(store, job["job_id"], beating, HEARTBEAT_INTERVAL),
+                            name="job-heartbeat", daemon=True)
+    beat.start()
+    try:
+        result = handler(ctx)
+    except JobCancelled:
+        store.mark_cancelled(job["job_id"])
+        return "cancelled"
+    except JobInterrupted:
+        store.release(job["job_id"])
+        return "queued"
+    except KeyboardInterrupt:
+        store.release(job["job_id"])
+        raise
+    except Exception as e:
+        store.fail(job["job_id"], f"{type(e).__name__}: {e}")
+        return "failed"
+    finally:
+        beating.set()
+        beat.join()
+    store.complete(job["job_id"], result)
+    return "done"
+
+
+def _heartbeat(store: JobStore, job_id: int, done_event, interval: float):
+    while not done_event.wait(interval):
+        try:
+            store.heartbeat(job_id)
+        except sqlite3.Error:
+            pass  # מסד נעול רגעית - ננסה שוב בפעם הבאה, הרבה לפני STALE_AFTER
+
+
+def worker_loop(db_name: str, stop_event=None, once: bool = False, poll_interval: float = POLL_INTERVAL):
+    """
+    לולאת עובד: תופס עבודה, מריץ, חוזר; בלי עבודה בתור ממתין poll_interval
+    once - יוצא כשהתור ריק
+    """
+    store = JobStore(db_name)
+    repository = Repository(db_name)
+    last_sweep = 0.0
+    while stop_event is None or not stop_event.is_set():
+        if time.monotonic() - last_sweep > STALE_AFTER / 2:
+            store.requeue_stale()
+            last_sweep = time.monotonic()
+        job = store.claim_next()
+        if job is None:
+            if once:
+                return
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        run_job(store, repository, job, stop_event)
+
+
+class JobWorkers:
+    """
+    עובדים בתהליכים נפרדים לצד אפליקציה (App / MainController)
+    spawn ולא fork - כדי לא לשכפל את pygame/החלון לתוך העובד
+    """
+
+    def __init__(self, db_name: str, workers: int = 1, once: bool = False):
+        self._db_name = db_name
+        self._count = max(1, workers)
+        self._once = once
+        self._procs = []
+        self._stop_event = None
+
+    @property
+    def running(self) -> bool:
+        return any(p.is_alive() for p in self._procs)
+
+    def start(self):
+        if self.running:
+            return
+        ctx = multiprocessing.get_context("spawn")
+        self._stop_event = ctx.Event()
+        self._procs = [ctx.Process(target=worker_loop, args=(self._db_name, self._stop_event, self._once),
+                                   name=f"job-worker-{i}", daemon=True) for i in range(self._count)]
+        for p in self._procs:
+            p.start()
+        # רשום אחרי multiprocessing, ולכן רץ לפני שהוא הורג את התהליכים ה-daemon ביציאה
+        atexit.register(self.stop)
+
+    def stop(self, timeout: float = 5.0):
+        """עצירה מסודרת: עבודה רצה חוזרת לתור עם נקודת השמירה שלה"""
+        if self._stop_event is None:
+            return
+        self._stop_event.set()
+        for p in self._procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+        atexit.unregister(self.stop)
+
+
+class JobMonitor:
+    """
+    מעקב אחרי עבודה אחת מ-thread ברקע (לולאת המשחק רק קוראת את snapshot)
+    כך שקריאה שממתינה לנעילה של המסד בזמן שעובד כותב לא עוצרת פריים
+    """
+
+    def __init__(self, store: JobStore, interval: float = POLL_INTERVAL):
+        self._store = store
+        self._interval = interval
+        self._job_id = None
+        self.snapshot = None
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name="job-monitor", daemon=True).start()
+
+    @property
+    def job_id(self):
+        return self._job_id
+
+    def track(self, job_id: int):
+        self._job_id = job_id
+        self.snapshot = None
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            job_id = self._job_id
+            if job_id is not None:
+                job = self._store.get(job_id)
+                if job_id == self._job_id:
+                    self.snapshot = job
+            self._wake.wait(self._interval)
+            self._wake.clear()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run background job workers")
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args(argv)
+
+    if args.workers == 1:
+        try:
+            worker_loop(args.db, once=args.once)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    workers = JobWorkers(args.db, args.workers, once=args.once)
+    workers.start()
+    try:
+        while workers.running:
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        workers.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Load Test
+עומס על http_service.py ב-localhost: N חיבורי keep-alive במקביל ששולחים תערובת
+של בקשות קריאה (ומדי פעם סימולציה), ומדווח throughput ו-p50/p95/p99 לכל סוג בקשה
+
+שימוש:
+    python load_test.py --spawn --db ufc_v3.db --seconds 10 --concurrency 32
+    python load_test.py --port 8765 --simulate-every 50 --sim-count 20000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from http_service import DEFAULT_PORT
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, pct):
+    """אחוזון nearest-rank (כמו ב-frame_profiler, בלי לייבא pygame)"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    return status, await reader.readexactly(length)
+
+
+def pick_request(rnd, total, args, n):
+    """תערובת הבקשות - ה-'kind' הוא המפתח בדו"ח"""
+    if args.simulate_every and n % args.simulate_every == 0:
+        return "simulate", "POST", "/simulate", {"count": args.sim_count, "save": False}
+    roll = rnd.random()
+    if roll < 0.4:
+        return "get", "GET", f"/fighters/{rnd.randint(1, max(1, total))}", None
+    if roll < 0.65:
+        return "page", "GET", f"/fighters?offset={rnd.randint(0, max(0, total - 50))}&limit=50", None
+    if roll < 0.85:
+        return "search", "GET", f"/fighters/search?name={chr(97 + rnd.randrange(26))}{chr(97 + rnd.randrange(26))}", None
+    if roll < 0.95:
+        return "fights", "GET", "/fights?limit=20", None
+    return "stats", "GET", "/stats", None
+
+
+async def worker(wid, args, total, deadline, latencies, errors, counter):
+    rnd = random.Random(args.seed + wid)
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        while time.perf_counter() < deadline:
+            counter[0] += 1
+            kind, method, path, payload = pick_request(rnd, total, args, counter[0])
+            t0 = time.perf_counter()
+            try:
+                status, _ = await request(reader, writer, args.host, method, path, payload)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                errors[kind] = errors.get(kind, 0) + 1
+                reader, writer = await asyncio.open_connection(args.host, args.port)
+                continue
+            latencies.setdefault(kind, []).append((time.perf_counter() - t0) * 1000.0)
+            if status >= 500 or (status >= 400 and kind != "get"):
+                errors[kind] = errors.get(kind, 0) + 1
+    finally:
+        writer.close()
+
+
+async def wait_for_server(host, port, timeout=15.0):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"server on {host}:{port} did not come up")
+
+
+async def run(args):
+    await wait_for_server(args.host, args.port)
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, body = await request(reader, writer, args.host, "GET", "/stats")
+    writer.close()
+    total = json.loads(body)["total_fighters"]
+
+    latencies, errors, counter = {}, {}, [0]
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(worker(i, args, total, deadline, latencies, errors, counter)
+                           for i in range(args.concurrency)))
+    wall = time.perf_counter() - start
+
+    done = sum(len(v) for v in latencies.values())
+    report = {"requests": done, "seconds": round(wall, 2), "rps": round(done / wall, 1),
+              "fighters": total, "concurrency": args.concurrency, "by_kind": {}}
+    print(f"{done} requests in {wall:.1f}s  ->  {done / wall:.0f} req/s  ({total} fighters, "
+          f"{args.concurrency} connections)")
+    for kind, values in sorted(latencies.items()):
+        stats = {"count": len(values), "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95),
+                 "p99_ms": percentile(values, 99), "max_ms": max(values), "errors": errors.get(kind, 0)}
+        report["by_kind"][kind] = stats
+        print(f"  {kind:<9} n={len(values):<7} p50 {stats['p50_ms']:7.2f}  p95 {stats['p95_ms']:7.2f}  "
+              f"p99 {stats['p99_ms']:7.2f}  max {stats['max_ms']:8.2f} ms  errors {stats['errors']}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for http_service.py")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--simulate-every", type=int, default=0, help="every Nth request is a /simulate batch")
+    parser.add_argument("--sim-count", type=int, default=10000, help="fights per /simulate request")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spawn", action="store_true", help="start http_service.py on a temp copy of --db")
+    parser.add_argument("--db", default=os.path.join(HERE, "ufc_v3.db"))
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    proc = tmp = None
+    if args.spawn:
+        tmp = tempfile.mkdtemp()
+        db = os.path.join(tmp, "load.db")
+        shutil.copy(args.db, db)
+        proc = subprocess.Popen([sys.executable, os.path.join(HERE, "http_service.py"),
+                                 "--host", args.host, "--port", str(args.port), "--db", db],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+            shutil.rmtree(tmp, ignore_errors=True)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+    return 1 if any(v["errors"] for v in report["by_kind"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,14 @@
-# אנחנו מייבאים את המשחק המלא!
-from ufc_fight_simulator_pygame import App
+import time
+
+# נקודת ההתחלה למדידת זמן עלייה (startup_report.py)
+STARTUP_T0 = time.perf_counter()
 
 def main():
     try:
         print("Starting FULL UFC Graphic Simulator...")
-        game = App()
+        # אנחנו מייבאים את המשחק המלא! (כאן ולא בראש הקובץ - ההודעה מופיעה לפני טעינת pygame)
+        from ufc_fight_simulator_pygame import App
+        game = App(startup_t0=STARTUP_T0)
         game.run()
     except Exception as e:
         print(f"Error: {e}")
@@ -12,4 +16,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,356 @@
+"""
+Matchmaking
+שידוך יריבים: כל לוחם הוא וקטור (7 הסטטיסטיקות של combat_engine + דירוג + רקורד),
+ולכל קטגוריית משקל יש KD-tree משלה לשאילתות k השכנים הקרובים ב-O(log n)
+
+- closest: היריב הכי דומה (קרב שקול)
+- contrast: אותה רמה (דירוג/רקורד) אבל סגנון הפוך - שאילתה על וקטור משוקף סביב ממוצע הקטגוריה
+- build_card: ערב קרבות שלם של זוגות מאוזנים (שידוך חמדני לשכן הפנוי הקרוב)
+
+מדגים: KD-tree עם דליים בעלים, heapq לשמירת k הטובים, תבנית Observer (מאזין על ה-Repository)
+
+שימוש:
+    mm = Matchmaker(repo)
+    mm.nearest(42, k=5)                       # 5 היריבים הקרובים ללוחם 42
+    mm.nearest(42, k=5, mode="contrast")      # אותה רמה, סגנון הפוך
+    mm.build_card(12)                         # 12 קרבות מכל הקטגוריות
+
+    python matchmaking.py --db ufc_v3.db      # מדידת זמנים מול סריקה מלאה
+"""
+
+import argparse
+import contextlib
+import heapq
+import math
+import random
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from combat_engine import STAT_FIELDS, fighter_stats
+from rating_system import DEFAULT_RATING, DEFAULT_RD, expected_score
+
+FEATURES = STAT_FIELDS + ("rating", "record")
+# משקל לכל מאפיין במרחק (הכל בסקאלה של בערך 0-100); רמה שווה חשובה יותר מסגנון זהה
+FEATURE_WEIGHTS = {name: 1.0 for name in STAT_FIELDS}
+FEATURE_WEIGHTS.update(rating=2.0, record=1.5)
+_SCALE = tuple(math.sqrt(FEATURE_WEIGHTS[name]) for name in FEATURES)
+_STYLE_DIMS = range(len(STAT_FIELDS))
+
+LEAF_SIZE = 16
+MODES = ("closest", "contrast")
+
+
+def _rating_feature(rating: float) -> float:
+    # 1100-1900 ממופה בערך ל-0-100, כמו הסטטיסטיקות
+    return (rating - DEFAULT_RATING) / 8.0 + 50.0
+
+
+def _record_feature(wins: int, losses: int, draws: int) -> float:
+    # אחוז ניצחונות מוחלק (Laplace): לוחם בלי קרבות מקבל 50, לא 0
+    return (wins + 1) / (wins + losses + draws + 2) * 100.0
+
+
+class _Entry:
+    __slots__ = ("fighter_id", "name", "weight_class", "stats", "wins", "losses", "draws", "rating", "rd")
+
+    def __init__(self, fighter, rating=DEFAULT_RATING, rd=DEFAULT_RD):
+        self.rating = rating
+        self.rd = rd
+        self.set_fighter(fighter)
+
+    def set_fighter(self, fighter):
+        self.fighter_id = fighter.fighter_id
+        self.name = fighter.name
+        self.weight_class = fighter.weight_class
+        self.stats = fighter_stats(fighter)
+        self.wins, self.losses, self.draws = fighter.wins, fighter.losses, fighter.draws
+
+    def raw_vector(self) -> tuple:
+        return self.stats + (_rating_feature(self.rating), _record_feature(self.wins, self.losses, self.draws))
+
+
+def _scaled(vector: Sequence[float]) -> tuple:
+    return tuple(v * s for v, s in zip(vector, _SCALE))
+
+
+class KDTree:
+    """
+    KD-tree סטטי (נבנה פעם אחת); צומת פנימי מפצל לפי הציר עם הפיזור הגדול ביותר בחציון,
+    עלה מחזיק עד LEAF_SIZE נקודות שנסרקות ישירות (פחות קריאות פייתון מעץ עמוק)
+    """
+
+    def __init__(self, points: List[tuple], ids: List[int], leaf_size: int = LEAF_SIZE):
+        self.points = points
+        self.ids = ids
+        self.leaf_size = leaf_size
+        self.dims = len(points[0]) if points else 0
+        # צומת: (axis, split, left, right) או (None, [אינדקסים], None, None) לעלה
+        self.nodes = []
+        self.root = self._build(list(range(len(points)))) if points else None
+
+    def __len__(self):
+        return len(self.points)
+
+    def _build(self, idx: List[int]) -> int:
+        points = self.points
+        if len(idx) <= self.leaf_size:
+            self.nodes.append((None, idx, None, None))
+            return len(self.nodes) - 1
+        # הפיזור נמדד על דגימה - מספיק כדי לבחור ציר, בלי לעבור על כל הנקודות בכל רמה
+        sample = [points[i] for i in idx[::max(1, len(idx) // 64)]]
+        axis = max(range(self.dims), key=lambda d: max(p[d] for p in sample) - min(p[d] for p in sample))
+        idx.sort(key=lambda i: points[i][axis])
+        mid = len(idx) // 2
+        split = points[idx[mid]][axis]
+        node = len(self.nodes)
+        self.nodes.append(None)
+        left = self._build(idx[:mid])
+        right = self._build(idx[mid:])
+        self.nodes[node] = (axis, split, left, right)
+        return node
+
+    def query(self, q: Sequence[float], k: int, exclude=()) -> List[tuple]:
+        """k הנקודות הקרובות ל-q (מרחק אוקלידי): רשימת (מרחק, id) מהקרוב לרחוק; exclude - ids לדלג"""
+        if self.root is None or k <= 0:
+            return []
+        points, ids, nodes, dist = self.points, self.ids, self.nodes, math.dist
+        heap = []  # max-heap של (-מרחק, id) בגודל k לכל היותר
+        worst = math.inf
+        # off[axis] - המרחק מ-q לתיבה של הצומת לאורך כל ציר; box = סכום הריבועים (מרחק לתיבה בריבוע)
+        off = [0.0] * self.dims
+
+        def visit(n, box):
+            nonlocal worst
+            axis, split, left, right = nodes[n]
+            if axis is None:
+                for i in split:
+                    d = dist(q, points[i])
+                    if d < worst and ids[i] not in exclude:
+                        if len(heap) < k:
+                            heapq.heappush(heap, (-d, ids[i]))
+                        else:
+                            heapq.heapreplace(heap, (-d, ids[i]))
+                        if len(heap) == k:
+                            worst = -heap[0][0]
+                return
+            diff = q[axis] - split
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near, box)
+            old = off[axis]
+            far_box = box - old * old + diff * diff
+            if far_box < worst * worst:
+                off[axis] = diff
+                visit(far, far_box)
+                off[axis] = old
+
+        visit(self.root, 0.0)
+        return sorted((-neg, fid) for neg, fid in heap)
+
+
+class Matchmaker:
+    """
+    אינדקס שידוכים לכל הקטגוריות. מתעדכן מה-Repository (add_listener); KD-tree לא תומך
+    בעדכון זול, אז קטגוריה שהשתנתה מסומנת ונבנית מחדש רק בשאילתה הבאה עליה
+    """
+
+    def __init__(self, repo=None):
+        self._lock = threading.RLock()
+        self._entries: Dict[int, _Entry] = {}
+        self._trees: Dict[str, KDTree] = {}
+        self._means: Dict[str, tuple] = {}
+        self._dirty = set()
+        self._repo = None
+        if repo is not None:
+            self.attach(repo)
+
+    def attach(self, repo):
+        self._repo = repo
+        repo.add_listener(self._on_change)
+        self.reload()
+
+    def detach(self):
+        if self._repo is not None:
+            self._repo.remove_listener(self._on_change)
+            self._repo = None
+
+    def reload(self):
+        repo = self._repo
+        with self._lock:
+            entries = {f.fighter_id: _Entry(f) for f in repo.iter_fighters(batch_size=2000)}
+            for fighter_id, rating, rd in repo.iter_ratings():
+                entry = entries.get(fighter_id)
+                if entry is not None:
+                    entry.rating, entry.rd = rating, rd
+            self._entries = entries
+            self._trees.clear()
+            self._dirty = {e.weight_class for e in entries.values()}
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ----- עדכונים -----
+    def _on_change(self, event: str, payload):
+        with self._lock:
+            if event == "fighters":
+                for fighter in payload:
+                    entry = self._entries.get(fighter.fighter_id)
+                    if entry is None:
+                        entry = self._entries[fighter.fighter_id] = _Entry(fighter)
+                    else:
+                        self._dirty.add(entry.weight_class)
+                        entry.set_fighter(fighter)
+                    self._dirty.add(entry.weight_class)
+            elif event == "ratings":
+                for fighter_id, (rating, rd) in payload.items():
+                    entry = self._entries.get(fighter_id)
+                    if entry is not None:
+                        entry.rating, entry.rd = rating, rd
+                        self._dirty.add(entry.weight_class)
+            elif event == "deleted":
+                entry = self._entries.pop(payload, None)
+                if entry is not None:
+                    self._dirty.add(entry.weight_class)
+            elif event == "reset":
+                self.reload()
+
+    def _tree(self, weight_class: str) -> Optional[KDTree]:
+        if weight_class in self._dirty or weight_class not in self._trees:
+            members = [e for e in self._entries.values() if e.weight_class == weight_class]
+            raw = [e.raw_vector() for e in members]
+            self._trees[weight_class] = KDTree([_scaled(v) for v in raw], [e.fighter_id for e in members])
+            self._means[weight_class] = tuple(sum(col) / len(raw) for col in zip(*raw)) if raw else ()
+            self._dirty.discard(weight_class)
+        return self._trees[weight_class]
+
+    def _query_vector(self, entry: _Entry, mode: str) -> tuple:
+        raw = entry.raw_vector()
+        if mode == "contrast":
+            # הסגנון משתקף סביב הממוצע (חובט חזק -> מתאבק חזק), הרמה נשארת
+            mean = self._means[entry.weight_class]
+            raw = tuple(min(100.0, max(0.0, 2 * mean[d] - v)) if d in _STYLE_DIMS else v
+                        for d, v in enumerate(raw))
+        return _scaled(raw)
+
+    # ----- שאילתות -----
+    def nearest(self, fighter_id: int, k: int = 5, mode: str = "closest", exclude=()) -> List[dict]:
+        """k יריבים מאותה קטגוריה, מהמתאים ביותר; ריק אם הלוחם לא קיים"""
+        if mode not in MODES:
+            raise ValueError(f"unknown mode '{mode}' (one of: {', '.join(MODES)})")
+        with self._lock:
+            entry = self._entries.get(fighter_id)
+            if entry is None:
+                return []
+            tree = self._tree(entry.weight_class)
+            skip = {fighter_id, *exclude}
+            hits = tree.query(self._query_vector(entry, mode), k, skip)
+            return [self._bout(entry, self._entries[fid], dist) for dist, fid in hits]
+
+    def _bout(self, a: _Entry, b: _Entry, distance: float) -> dict:
+        return {
+            "weight_class": a.weight_class,
+            "fighter1_id": a.fighter_id, "fighter1": a.name,
+            "fighter2_id": b.fighter_id, "fighter2": b.name,
+            "distance": round(distance, 2),
+            "fighter1_win_prob": round(expected_score(a.rating, b.rating, b.rd), 3),
+        }
+
+    def build_card(self, bouts: int = 10, weight_classes: Optional[Sequence[str]] = None,
+                   mode: str = "closest", seed: Optional[int] = None) -> List[dict]:
+        """
+        ערב קרבות: הקרבות מתחלקים בסבב בין הקטגוריות; בכל קטגוריה הלוחם המדורג הבא
+        שעוד פנוי מקבל את היריב הפנוי הקרוב ביותר. seed - ערבוב הסדר בתוך כל קטגוריה
+        (אחרת תמיד מתחילים מהדירוג הגבוה). ממוין כך שה-main event הוא הקרב החזק ביותר
+        """
+        with self._lock:
+            if weight_classes is None:
+                weight_classes = sorted({e.weight_class for e in self._entries.values()})
+            rng = random.Random(seed) if seed is not None else None
+            queues = {}
+            for wc in weight_classes:
+                members = sorted((e for e in self._entries.values() if e.weight_class == wc),
+                                 key=lambda e: (-(e.rating - 2 * e.rd), e.fighter_id))
+                if rng is not None:
+                    rng.shuffle(members)
+                queues[wc] = iter(members)
+            used = set()
+            card = []
+            active = [wc for wc in weight_classes if wc in queues]
+            while len(card) < bouts and active:
+                for wc in list(active):
+                    if len(card) >= bouts:
+                        break
+                    bout = self._next_bout(queues[wc], used, mode)
+                    if bout is None:
+                        active.remove(wc)
+                    else:
+                        card.append(bout)
+            strength = lambda b: self._entries[b["fighter1_id"]].rating + self._entries[b["fighter2_id"]].rating
+            card.sort(key=strength, reverse=True)
+            return card
+
+    def _next_bout(self, queue, used: set, mode: str) -> Optional[dict]:
+        for entry in queue:
+            if entry.fighter_id in used:
+                continue
+            hits = self.nearest(entry.fighter_id, 1, mode, exclude=used)
+            if hits:
+                used.update((hits[0]["fighter1_id"], hits[0]["fighter2_id"]))
+                return hits[0]
+        return None
+
+
+def main(argv=None) -> int:
+    from models.repository import Repository
+
+    parser = argparse.ArgumentParser(description="Benchmark KD-tree matchmaking against a linear scan")
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--bouts", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        repo = Repository(args.db)
+    t0 = time.perf_counter()
+    mm = Matchmaker(repo)
+    print(f"load: {len(mm)} fighters in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    if len(mm) < 2:
+        return 1
+    t0 = time.perf_counter()
+    for wc in sorted({e.weight_class for e in mm._entries.values()}):
+        mm._tree(wc)
+    print(f"build trees: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    rng = random.Random(args.seed)
+    ids = rng.sample(sorted(mm._entries), min(args.queries, len(mm)))
+    for mode in MODES:
+        t0 = time.perf_counter()
+        results = [mm.nearest(fid, args.k, mode) for fid in ids]
+        tree_ms = (time.perf_counter() - t0) * 1000 / len(ids)
+        # אימות מול סריקה מלאה של הקטגוריה
+        t0 = time.perf_counter()
+        mismatches = 0
+        for fid, got in zip(ids, results):
+            entry = mm._entries[fid]
+            q = mm._query_vector(entry, mode)
+            brute = sorted((math.dist(q, _scaled(e.raw_vector())), e.fighter_id) for e in mm._entries.values()
+                           if e.weight_class == entry.weight_class and e.fighter_id != fid)[:args.k]
+            mismatches += [round(d, 2) for d, _ in brute] != [b["distance"] for b in got]
+        scan_ms = (time.perf_counter() - t0) * 1000 / len(ids)
+        print(f"{mode:<9} k={args.k}: tree {tree_ms:.3f} ms/query, linear scan {scan_ms:.1f} ms/query, "
+              f"mismatches {mismatches}")
+
+    t0 = time.perf_counter()
+    card = mm.build_card(args.bouts)
+    print(f"card of {len(card)} bouts in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    for bout in card:
+        print(f"  {bout['weight_class']:<18} {bout['fighter1']:<24} vs {bout['fighter2']:<24} "
+              f"d={bout['distance']:<6} p1={bout['fighter1_win_prob']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
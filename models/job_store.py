@@ -0,0 +1,228 @@
+"""
+JobStore Class
+טבלת jobs באותו קובץ SQLite של fighters ו-fights - תור עבודות רקע
+מדגים: תור מבוסס מסד נתונים, תפיסה אטומית (BEGIN IMMEDIATE), נקודות שמירה
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+# מצבי עבודה
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+FINAL_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+# עבודה ב-running שה-heartbeat שלה ישן מזה חוזרת לתור (העובד שלה מת)
+STALE_AFTER = 60.0
+
+_JSON_FIELDS = ("params", "checkpoint", "result")
+
+
+class JobStore:
+    """
+    גישה לטבלת jobs
+    כל פעולה פותחת חיבור קצר, כך שאפשר להשתמש בה מכמה תהליכים במקביל
+    """
+
+    def __init__(self, db_name: str = "ufc_v3.db"):
+        self._db_name = db_name
+        self._create_table()
+
+    @property
+    def db_name(self) -> str:
+        return self._db_name
+
+    def _get_connection(self):
+        # isolation_level=None - הטרנזקציות מנוהלות ידנית (BEGIN IMMEDIATE בתפיסה)
+        conn = sqlite3.connect(self._db_name, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _create_table(self):
+        conn = self._get_connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'queued',
+                done INTEGER DEFAULT 0,
+                total INTEGER DEFAULT 0,
+                message TEXT DEFAULT '',
+                checkpoint TEXT,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER DEFAULT 0,
+                worker_pid INTEGER,
+                attempts INTEGER DEFAULT 0,
+                created_at REAL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, job_id)')
+        conn.close()
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        for field in _JSON_FIELDS:
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        job["progress"] = job["done"] / job["total"] if job["total"] else 0.0
+        return job
+
+    # ----- צד המגיש (App / MainController / CLI) -----
+    def submit(self, kind: str, params: Optional[dict] = None) -> int:
+        """הוספת עבודה לתור; מחזיר job_id"""
+        conn = self._get_connection()
+        cursor = conn.execute(
+            'INSERT INTO jobs (kind, params, created_at) VALUES (?, ?, ?)',
+            (kind, json.dumps(params or {}), time.time()))
+        job_id = cursor.lastrowid
+        conn.close()
+        return job_id
+
+    def get(self, job_id: int) -> Optional[dict]:
+        """מצב עבודה אחת - שאילתה לפי מפתח ראשי, זולה מספיק לפולינג בכל פריים"""
+        conn = self._get_connection()
+        row = conn.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        conn.close()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """העבודות האחרונות (החדשה ראשונה)"""
+        conn = self._get_connection()
+        if status:
+            rows = conn.execute('SELECT * FROM jobs WHERE status = ? ORDER BY job_id DESC LIMIT ?',
+                                (status, limit)).fetchall()
+        else:
+            rows = conn.execute('SELECT * FROM jobs ORDER BY job_id DESC LIMIT ?', (limit,)).fetchall()
+        conn.close()
+        return [self._row_to_job(row) for row in rows]
+
+    def count_active(self) -> int:
+        conn = self._get_connection()
+        count = conn.execute('SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)', ACTIVE_STATUSES).fetchone()[0]
+        conn.close()
+        return count
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        ביטול: עבודה בתור מבוטלת מיד, עבודה רצה מסומנת והעובד עוצר בדיווח ההתקדמות הבא
+        (נקודת השמירה נשארת, כך שאפשר להמשיך אותה עם resume)
+        """
+        conn = self._get_connection()
+        cursor = conn.execute(
+            'UPDATE jobs SET status = ?, finished_at = ? WHERE job_id = ? AND status = ?',
+            (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED))
+        if not cursor.rowcount:
+            cursor = conn.execute('UPDATE jobs SET cancel_requested = 1 WHERE job_id = ? AND status = ?',
+                                  (job_id, STATUS_RUNNING))
+        conn.close()
+        return cursor.rowcount > 0
+
+    def resume(self, job_id: int) -> bool:
+        """החזרת עבודה שבוטלה או נכשלה לתור; היא תמשיך מנקודת השמירה האחרונה"""
+        conn = self._get_connection()
+        cursor = conn.execute(
+            'UPDATE jobs SET status = ?, cancel_requested = 0, error = NULL, finished_at = NULL '
+            'WHERE job_id = ? AND status IN (?, ?)',
+            (STATUS_QUEUED, job_id, STATUS_CANCELLED, STATUS_FAILED))
+        conn.close()
+        return cursor.rowcount > 0
+
+    # ----- צד העובד -----
+    def claim_next(self, kinds=None) -> Optional[dict]:
+        """
+        תפיסה אטומית של העבודה הוותיקה ביותר בתור
+        BEGIN IMMEDIATE נועל כתיבה, כך ששני עובדים לא יתפסו את אותה עבודה
+        """
+        conn = self._get_connection()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            if kinds:
+                row = conn.execute(
+                    f'SELECT * FROM jobs WHERE status = ? AND kind IN ({",".join("?" * len(kinds))}) '
+                    f'ORDER BY job_id LIMIT 1', (STATUS_QUEUED, *kinds)).fetchone()
+            else:
+                row = conn.execute('SELECT * FROM jobs WHERE status = ? ORDER BY job_id LIMIT 1',
+                                   (STATUS_QUEUED,)).fetchone()
+            if row is None:
+                conn.execute('ROLLBACK')
+                return None
+            now = time.time()
+            conn.execute(
+                'UPDATE jobs SET status = ?, worker_pid = ?, attempts = attempts + 1, '
+                'started_at = COALESCE(started_at, ?), heartbeat_at = ? WHERE job_id = ?',
+                (STATUS_RUNNING, os.getpid(), now, now, row["job_id"]))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return self.get(row["job_id"])
+
+    def report_progress(self, job_id: int, done: int, total: int, message: str = "",
+                        checkpoint=None) -> bool:
+        """
+        עדכון התקדמות (ונקודת שמירה אם ניתנה) + heartbeat
+
+        Returns:
+            bool: האם התבקש ביטול
+        """
+        conn = self._get_connection()
+        if checkpoint is None:
+            conn.execute('UPDATE jobs SET done = ?, total = ?, message = ?, heartbeat_at = ? WHERE job_id = ?',
+                         (done, total, message, time.time(), job_id))
+        else:
+            conn.execute('UPDATE jobs SET done = ?, total = ?, message = ?, heartbeat_at = ?, checkpoint = ? '
+                         'WHERE job_id = ?', (done, total, message, time.time(), json.dumps(checkpoint), job_id))
+        cancel = conn.execute('SELECT cancel_requested FROM jobs WHERE job_id = ?', (job_id,)).fetchone()[0]
+        conn.close()
+        return bool(cancel)
+
+    def heartbeat(self, job_id: int):
+        """העובד עדיין חי - גם כשהעבודה לא דיווחה התקדמות (חישוב ארוך בין דיווחים)"""
+        conn = self._get_connection()
+        conn.execute('UPDATE jobs SET heartbeat_at = ? WHERE job_id = ? AND status = ?',
+                     (time.time(), job_id, STATUS_RUNNING))
+        conn.close()
+
+    def _finish(self, job_id: int, status: str, **fields):
+        conn = self._get_connection()
+        sets = ", ".join(f"{k} = ?" for k in fields)
+        conn.execute(f'UPDATE jobs SET status = ?, finished_at = ?, worker_pid = NULL{", " + sets if sets else ""} '
+                     f'WHERE job_id = ?', (status, time.time(), *fields.values(), job_id))
+        conn.close()
+
+    def complete(self, job_id: int, result=None):
+        self._finish(job_id, STATUS_DONE, result=json.dumps(result), cancel_requested=0)
+
+    def fail(self, job_id: int, error: str):
+        self._finish(job_id, STATUS_FAILED, error=error)
+
+    def mark_cancelled(self, job_id: int):
+        self._finish(job_id, STATUS_CANCELLED, cancel_requested=0)
+
+    def release(self, job_id: int):
+        """העובד נעצר באמצע - העבודה חוזרת לתור ותמשיך מנקודת השמירה"""
+        conn = self._get_connection()
+        conn.execute('UPDATE jobs SET status = ?, worker_pid = NULL WHERE job_id = ? AND status = ?',
+                     (STATUS_QUEUED, job_id, STATUS_RUNNING))
+        conn.close()
+
+    def requeue_stale(self, stale_after: float = STALE_AFTER) -> int:
+        """עבודות running שהעובד שלהן הפסיק לדווח חוזרות לתור (וימשיכו מנקודת השמירה)"""
+        conn = self._get_connection()
+        cursor = conn.execute(
+            'UPDATE jobs SET status = ?, worker_pid = NULL WHERE status = ? AND heartbeat_at < ?',
+            (STATUS_QUEUED, STATUS_RUNNING, time.time() - stale_after))
+        conn.close()
+        return cursor.rowcount
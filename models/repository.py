@@ -5,113 +5,358 @@ Repository Class
 """
 
 import sqlite3
-from typing import List, Optional
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, List, Optional
 from fighter import Fighter
 from striker import Striker
 from grappler import Grappler
 from hybrid_champion import HybridChampion
+from rating_system import DEFAULT_RATING, DEFAULT_RD, rate_fight
+
+FIGHTER_TYPES = {cls.__name__: cls for cls in (Fighter, Striker, Grappler, HybridChampion)}
+
+# מונים שלא מתקבלים ב-__init__ ונשמרים ישירות על האובייקט
+_COUNTER_FIELDS = ('knockout_wins', 'submission_wins', 'title_defenses')
+_COLOR_DEFAULTS = {
+    'skin_color': (255, 220, 180),
+    'hair_color': (40, 40, 40),
+    'pants_color': (30, 30, 30),
+}
+
+
+@lru_cache(maxsize=4096)
+def _parse_color_str(value: str) -> tuple:
+    # מעט צבעים שונים חוזרים על עצמם בכל הרוסטר - מפרסרים כל מחרוזת פעם אחת
+    return tuple(int(c) for c in value.split(','))
+
+
+def _parse_color(value, default):
+    """צבע כטקסט "R,G,B" (כמו במאגר) או כרשימה (כמו ב-JSON)"""
+    if not value: return default
+    try:
+        if isinstance(value, str):
+            return _parse_color_str(value)
+        return tuple(int(c) for c in value)
+    except (TypeError, ValueError):
+        return default
+
+
+def fighter_from_dict(data: dict) -> Fighter:
+    """
+    יצירת לוחם מהסוג הנכון ממילון (שורת מאגר, JSON מיובא)
+    
+    Args:
+        data: מילון עם fighter_type ושדות to_dict; ערכי None מתעלמים מהם
+        
+    Returns:
+        Fighter: מופע של המחלקה לפי fighter_type
+    """
+    data = {k: v for k, v in data.items() if v is not None}
+    cls = FIGHTER_TYPES.get(data.get('fighter_type'), Fighter)
+    f = cls.from_dict(data)
+    for field in _COUNTER_FIELDS:
+        if field in data and hasattr(f, '_' + field):
+            setattr(f, '_' + field, int(data[field]))
+    for field, default in _COLOR_DEFAULTS.items():
+        setattr(f, field, _parse_color(data.get(field), default))
+    return f
+
+
+def fighter_to_dict(f: Fighter) -> dict:
+    """to_dict של הלוחם כולל סוג וצבעים - הפורמט ש-fighter_from_dict מקבל"""
+    data = f.to_dict()
+    data['fighter_type'] = f.__class__.__name__
+    for field, default in _COLOR_DEFAULTS.items():
+        data[field] = list(getattr(f, field, default))
+    return data
+
+
+# נעילות: busy_timeout של SQLite, ואם הוא נגמר - עוד כמה ניסיונות עם המתנה שגדלה
+BUSY_TIMEOUT = 5.0
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+
+def _is_busy(error: Exception) -> bool:
+    """SQLITE_BUSY / SQLITE_LOCKED - מגיעים מ-sqlite3 כ-OperationalError עם הודעה"""
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in str(error) or "busy" in str(error))
+
+
+class _ThreadConnection(sqlite3.Connection):
+    """חיבור שנשאר פתוח ל-thread שלו; close() רק מסיים טרנזקציה פתוחה"""
+    
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+    
+    def really_close(self):
+        super().close()
+
+
+class _Reader:
+    """מחזיק את חיבור הקריאה ב-threading.local; כשה-thread נגמר הוא נמחק והחיבור נסגר"""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+def _release(connections: dict, conn: _ThreadConnection):
+    # נקרא מ-weakref.finalize - בלי נעילה: יכול לרוץ גם מתוך close() שמחזיק אותה
+    connections.pop(id(conn), None)
+    conn.really_close()
 
 
 class Repository:
     """
     מחלקה לניהול מסד נתונים SQLite
     מדגימה: שכבת גישה לנתונים (Data Access Layer)
+    
+    בטוחה לשימוש מכמה threads:
+    - קריאה: לכל thread חיבור משלו (נפתח בפעם הראשונה ונסגר כשה-thread נגמר)
+    - כתיבה: חיבור כותב יחיד, תחת נעילה, ב-BEGIN IMMEDIATE עם ניסיון חוזר על BUSY
+    - WAL: קוראים לא נחסמים מאחורי כתיבה ארוכה (וגם לא מאחורי תהליך אחר שכותב)
     """
     
-    def __init__(self, db_name: str = "ufc_v3.db"):
+    def __init__(self, db_name: str = "ufc_v3.db", wal: bool = True):
         """
         אתחול מסד נתונים
         
         Args:
             db_name: שם קובץ מסד הנתונים
+            wal: journal_mode=WAL (נשמר בקובץ עצמו)
         """
         self._db_name = db_name
+        self._wal = wal
+        self._local = threading.local()
+        self._connections = {}  # id -> חיבור פתוח (קוראים + הכותב), ל-close()
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self.busy_retries = 0
+        self._listeners = []
         self._create_tables()
     
-    def _get_connection(self):
-        """יצירת חיבור למסד נתונים עם תמיכה בשמות עמודות"""
-        conn = sqlite3.connect(self._db_name)
+    def _open(self, **kwargs) -> _ThreadConnection:
+        conn = sqlite3.connect(self._db_name, factory=_ThreadConnection, check_same_thread=False,
+                               timeout=BUSY_TIMEOUT, **kwargs)
         # השורה הזו היא הקסם - היא מאפשרת לנו לגשת לנתונים לפי שם העמודה
         conn.row_factory = sqlite3.Row
+        if self._wal:
+            # ב-WAL מספיק fsync בנקודות checkpoint; עדיין עמיד לקריסה של התהליך
+            conn.execute('PRAGMA synchronous=NORMAL')
+        with self._connections_lock:
+            self._connections[id(conn)] = conn
         return conn
     
+    def _get_connection(self):
+        """חיבור הקריאה של ה-thread הנוכחי (close() לא סוגר אותו באמת)"""
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = self._local.reader = _Reader(self._open())
+            weakref.finalize(reader, _release, self._connections, reader.conn)
+        return reader.conn
+    
+    def release_connection(self):
+        """סגירת חיבור הקריאה של ה-thread הנוכחי מיד (בלי לחכות לסוף ה-thread)"""
+        reader = getattr(self._local, "reader", None)
+        if reader is not None:
+            del self._local.reader
+    
+    def _retry(self, fn, *args):
+        """הרצה עם ניסיון חוזר כשהמסד נעול גם אחרי busy_timeout (למשל תהליך עובד באמצע מנה)"""
+        for attempt in range(BUSY_RETRIES + 1):
+            try:
+                return fn(*args)
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or attempt == BUSY_RETRIES:
+                    raise
+                self.busy_retries += 1
+                time.sleep(BUSY_BACKOFF * 2 ** attempt)
+    
+    @contextmanager
+    def _write(self):
+        """
+        טרנזקציית כתיבה על החיבור הכותב היחיד
+        BEGIN IMMEDIATE תופס את נעילת הכתיבה מראש, כך ש-BUSY יכול לקרות רק כאן ולא באמצע
+        """
+        with self._write_lock:
+            if self._writer is None:
+                # isolation_level=None - הטרנזקציות מנוהלות ידנית
+                self._writer = self._open(isolation_level=None)
+                if self._wal:
+                    self._retry(self._writer.execute, 'PRAGMA journal_mode=WAL')
+            conn = self._writer
+            self._retry(conn.execute, 'BEGIN IMMEDIATE')
+            try:
+                yield conn
+                self._retry(conn.commit)
+            except BaseException:
+                conn.rollback()
+                raise
+    
+    def add_listener(self, listener):
+        """
+        הרשמה לשינויים: listener(event, payload) נקרא אחרי commit מוצלח, ב-thread שכתב
+        
+        אירועים:
+            'fighters' - רשימת לוחמים שנוספו או עודכנו (רקורד, סטטיסטיקות, קטגוריה)
+            'deleted' - fighter_id
+            'ratings' - {fighter_id: (rating, rd)} אחרי שמירת קרבות
+            'reset' - שינוי גורף (בנייה מחדש של דירוגים, ייבוא חלקי) - לטעון מחדש
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, event: str, payload=None):
+        for listener in list(self._listeners):
+            try:
+                listener(event, payload)
+            except Exception as e:
+                # מאזין שנכשל לא מבטל כתיבה שכבר נשמרה
+                print(f"❌ Listener error on '{event}': {e}")
+    
+    def close(self):
+        """סגירת כל החיבורים (של כל ה-threads); שימוש נוסף יפתח חיבורים חדשים"""
+        with self._write_lock, self._connections_lock:
+            connections, self._connections = self._connections, {}
+            for conn in list(connections.values()):
+                conn.really_close()
+            self._writer = None
+        # מחוץ לנעילה: שחרור ה-local של ה-thread הזה מפעיל את ה-finalize של הקורא שלו
+        self._local = threading.local()
+    
     def _create_tables(self):
         """יצירת טבלאות במסד נתונים"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._write() as conn:
+            cursor = conn.cursor()
+            
+            # טבלת לוחמים
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS fighters (
+                    fighter_id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    weight_class TEXT NOT NULL,
+                    wins INTEGER DEFAULT 0,
+                    losses INTEGER DEFAULT 0,
+                    draws INTEGER DEFAULT 0,
+                    striking_power INTEGER DEFAULT 50,
+                    grappling_skill INTEGER DEFAULT 50,
+                    skin_color TEXT,
+                    hair_color TEXT,
+                    pants_color TEXT,
+                    fighter_type TEXT DEFAULT 'Fighter',
+                    speed INTEGER,
+                    kick_power INTEGER,
+                    knockout_wins INTEGER,
+                    submission_skill INTEGER,
+                    takedown_defense INTEGER,
+                    submission_wins INTEGER,
+                    versatility INTEGER,
+                    title_defenses INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        
+            # טבלת קרבות
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS fights (
+                    fight_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    fighter1_name TEXT NOT NULL,
+                    fighter2_name TEXT NOT NULL,
+                    winner_name TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    fighter1_score REAL,
+                    fighter2_score REAL,
+                    fight_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        
+            # אינדקס לפי שם - עבור דפדוף וקפיצה לאות ברשימות וירטואליות
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_fighters_name
+                ON fighters (name COLLATE NOCASE)
+            ''')
+            
+            # מזהי הלוחמים בקרב (מסדי נתונים ישנים - רק שמות; הדירוג צריך מזהים)
+            fight_columns = {row[1] for row in cursor.execute('PRAGMA table_info(fights)').fetchall()}
+            for column in ('fighter1_id', 'fighter2_id', 'winner_id'):
+                if column not in fight_columns:
+                    cursor.execute(f'ALTER TABLE fights ADD COLUMN {column} INTEGER')
+            
+            # דירוג Glicko נוכחי לכל לוחם, והיסטוריה (שורה ללוחם לכל קרב) לשאילתות לאורך זמן
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ratings (
+                    fighter_id INTEGER PRIMARY KEY,
+                    rating REAL NOT NULL,
+                    rd REAL NOT NULL,
+                    fights INTEGER DEFAULT 0,
+                    last_fight_id INTEGER
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rating_history (
+                    fight_id INTEGER NOT NULL,
+                    fighter_id INTEGER NOT NULL,
+                    rating REAL NOT NULL,
+                    rd REAL NOT NULL,
+                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_rating_history_fighter
+                ON rating_history (fighter_id, fight_id)
+            ''')
         
-        # טבלת לוחמים
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS fighters (
-                fighter_id INTEGER PRIMARY KEY,
-                name TEXT NOT NULL,
-                weight_class TEXT NOT NULL,
-                wins INTEGER DEFAULT 0,
-                losses INTEGER DEFAULT 0,
-                draws INTEGER DEFAULT 0,
-                striking_power INTEGER DEFAULT 50,
-                grappling_skill INTEGER DEFAULT 50,
-                skin_color TEXT,
-                hair_color TEXT,
-                pants_color TEXT,
-                fighter_type TEXT DEFAULT 'Fighter',
-                speed INTEGER,
-                kick_power INTEGER,
-                knockout_wins INTEGER,
-                submission_skill INTEGER,
-                takedown_defense INTEGER,
-                submission_wins INTEGER,
-                versatility INTEGER,
-                title_defenses INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # טבלת קרבות
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS fights (
-                fight_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                fighter1_name TEXT NOT NULL,
-                fighter2_name TEXT NOT NULL,
-                winner_name TEXT NOT NULL,
-                method TEXT NOT NULL,
-                fighter1_score REAL,
-                fighter2_score REAL,
-                fight_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
         print(f"✅ Database '{self._db_name}' Successfully Initialized")
     
     # CRUD Operations - CREATE
+    _INSERT_FIGHTER_SQL = '''
+        INSERT OR IGNORE INTO fighters (
+            fighter_id, name, weight_class, wins, losses, draws, 
+            striking_power, grappling_skill, 
+            skin_color, hair_color, pants_color, 
+            fighter_type,
+            speed, kick_power, knockout_wins,
+            submission_skill, takedown_defense, submission_wins,
+            versatility, title_defenses
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _fighter_insert_values(f: Fighter) -> tuple:
+        """ערכי שורת INSERT ללוחם (לפי הסדר של _INSERT_FIGHTER_SQL)"""
+        data = f.to_dict()
+        return (
+            f.fighter_id, f.name, f.weight_class, f.wins, f.losses, f.draws,
+            f.striking_power, f.grappling_skill,
+            # הופכים את ה-Tuple (R,G,B) למחרוזת טקסט פשוטה "R,G,B"
+            ",".join(map(str, getattr(f, 'skin_color', (255,220,180)))),
+            ",".join(map(str, getattr(f, 'hair_color', (40,40,40)))),
+            ",".join(map(str, getattr(f, 'pants_color', (30,30,30)))),
+            f.__class__.__name__,
+            data.get('speed'), data.get('kick_power'), data.get('knockout_wins'),
+            data.get('submission_skill'), data.get('takedown_defense'), data.get('submission_wins'),
+            data.get('versatility'), data.get('title_defenses')
+        )
+    
     def add_fighter(self, f: Fighter) -> bool:
         """הוספת לוחם למסד נתונים כולל צבעי מראה"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            with self._write() as conn:
+                # אנחנו מוסיפים את עמודות הצבעים לפקודת ה-INSERT
+                added = conn.execute(self._INSERT_FIGHTER_SQL, self._fighter_insert_values(f)).rowcount > 0
             
-            # אנחנו מוסיפים את עמודות הצבעים לפקודת ה-INSERT
-            cursor.execute('''
-                INSERT OR IGNORE INTO fighters (
-                    fighter_id, name, weight_class, wins, losses, draws, 
-                    striking_power, grappling_skill, 
-                    skin_color, hair_color, pants_color, 
-                    fighter_type
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                f.fighter_id, f.name, f.weight_class, f.wins, f.losses, f.draws,
-                f.striking_power, f.grappling_skill,
-                # הופכים את ה-Tuple (R,G,B) למחרוזת טקסט פשוטה "R,G,B"
-                ",".join(map(str, getattr(f, 'skin_color', (255,220,180)))),
-                ",".join(map(str, getattr(f, 'hair_color', (40,40,40)))),
-                ",".join(map(str, getattr(f, 'pants_color', (30,30,30)))),
-                f.__class__.__name__
-            ))
-            
-            conn.commit()
-            conn.close()
+            if added:
+                self._notify('fighters', [f])
             print(f"✅ {f.name} added with custom style")
             return True
             
@@ -119,6 +364,38 @@ class Repository:
             print(f"❌ Error adding fighter: {e}")
             return False
     
+    def add_fighters_bulk(self, fighters) -> int:
+        """
+        הוספת הרבה לוחמים בטרנזקציה אחת (executemany)
+        
+        Args:
+            fighters: איטרבל של לוחמים
+            
+        Returns:
+            int: מספר השורות שנוספו בפועל
+        """
+        try:
+            if self._listeners:
+                fighters = list(fighters)
+            with self._write() as conn:
+                before = conn.total_changes
+                conn.executemany(self._INSERT_FIGHTER_SQL,
+                                 (self._fighter_insert_values(f) for f in fighters))
+                added = conn.total_changes - before
+            
+            if self._listeners and added:
+                # INSERT OR IGNORE - אם חלק דולגו לא יודעים אילו, אז המאזינים טוענים מחדש
+                if added == len(fighters):
+                    self._notify('fighters', fighters)
+                else:
+                    self._notify('reset')
+            print(f"✅ {added} fighters added")
+            return added
+            
+        except Exception as e:
+            print(f"❌ Error adding fighters: {e}")
+            return 0
+    
     # CRUD Operations - READ
     def get_fighter_by_id(self, fighter_id: int) -> Optional[Fighter]:
         """
@@ -167,6 +444,152 @@ class Repository:
         
         return [self._row_to_fighter(row) for row in rows]
     
+    def iter_fighters(self, weight_class: Optional[str] = None, batch_size: int = 500) -> Iterator[Fighter]:
+        """
+        מעבר על כל הלוחמים (בסדר של get_all_fighters) בלי לטעון את כולם לזיכרון
+        השורות נשלפות ב-fetchmany; החיבור נסגר כשהאיטרטור נגמר או נזרק
+        
+        Args:
+            weight_class: רק קטגוריית משקל אחת (None - כולם)
+            batch_size: שורות לכל fetchmany
+        """
+        conn = self._get_connection()
+        try:
+            cursor = conn.cursor()
+            if weight_class:
+                cursor.execute('SELECT * FROM fighters WHERE weight_class = ? ORDER BY wins DESC', (weight_class,))
+            else:
+                cursor.execute('SELECT * FROM fighters ORDER BY wins DESC')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_fighter(row)
+        finally:
+            conn.close()
+    
+    def search_fighters(self, name: Optional[str] = None, weight_class: Optional[str] = None,
+                        limit: int = 50) -> List[Fighter]:
+        """
+        חיפוש לוחמים לפי חלק מהשם ו/או קטגוריית משקל
+        
+        Args:
+            name: מחרוזת שמופיעה בשם (לא תלוי רישיות)
+            weight_class: קטגוריית משקל מדויקת
+            limit: מספר תוצאות מקסימלי
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT * FROM fighters
+            WHERE (? IS NULL OR name LIKE ?) AND (? IS NULL OR weight_class = ?)
+            ORDER BY name COLLATE NOCASE, fighter_id
+            LIMIT ?
+        ''', (name, f'%{name}%', weight_class, weight_class, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [self._row_to_fighter(row) for row in rows]
+    
+    def get_fighter_ids(self, weight_class: Optional[str] = None) -> List[int]:
+        """רק המזהים (זול גם ברוסטר ענק) - למשל להגרלת זוגות לפני טעינת הלוחמים עצמם"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        if weight_class:
+            cursor.execute('SELECT fighter_id FROM fighters WHERE weight_class = ?', (weight_class,))
+        else:
+            cursor.execute('SELECT fighter_id FROM fighters')
+        ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        
+        return ids
+    
+    def get_fighters_by_ids(self, fighter_ids) -> List[Fighter]:
+        """
+        טעינת לוחמים לפי רשימת מזהים (מזהה שלא קיים פשוט לא מוחזר)
+        השאילתות נשלחות במנות כדי לא לעבור את מגבלת הפרמטרים של SQLite
+        """
+        fighter_ids = list(fighter_ids)
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        fighters = []
+        for i in range(0, len(fighter_ids), 500):
+            chunk = fighter_ids[i:i + 500]
+            cursor.execute(f'SELECT * FROM fighters WHERE fighter_id IN ({",".join("?" * len(chunk))})', chunk)
+            fighters.extend(self._row_to_fighter(row) for row in cursor.fetchall())
+        conn.close()
+        
+        return fighters
+    
+    def count_fighters(self) -> int:
+        """מספר הלוחמים במאגר"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*) FROM fighters')
+        count = cursor.fetchone()[0]
+        conn.close()
+        
+        return count
+    
+    def get_fighters_page(self, offset: int, limit: int) -> List[Fighter]:
+        """
+        קריאת חלון של לוחמים לפי סדר אלפביתי (לגלילה וירטואלית)
+        
+        Args:
+            offset: אינדקס השורה הראשונה
+            limit: מספר שורות מקסימלי
+            
+        Returns:
+            List[Fighter]: הלוחמים בחלון המבוקש
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT * FROM fighters
+            ORDER BY name COLLATE NOCASE, fighter_id
+            LIMIT ? OFFSET ?
+        ''', (limit, offset))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [self._row_to_fighter(row) for row in rows]
+    
+    def get_fighter_index_by_prefix(self, prefix: str) -> int:
+        """
+        המיקום של הלוחם הראשון ששמו מתחיל ב-prefix (או שבא אחריו) בסדר האלפביתי
+        
+        Args:
+            prefix: תחילית שם, למשל אות בודדת
+            
+        Returns:
+            int: אינדקס בסדר של get_fighters_page
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT COUNT(*) FROM fighters WHERE name < ? COLLATE NOCASE', (prefix,))
+        index = cursor.fetchone()[0]
+        conn.close()
+        
+        return index
+    
+    def get_max_fighter_id(self) -> int:
+        """המזהה הגבוה ביותר במאגר (0 אם אין לוחמים)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT MAX(fighter_id) FROM fighters')
+        max_id = cursor.fetchone()[0]
+        conn.close()
+        
+        return max_id or 0
+    
     def get_fighters_by_weight_class(self, weight_class: str) -> List[Fighter]:
         """קריאת לוחמים לפי קטגוריית משקל"""
         conn = self._get_connection()
@@ -179,6 +602,39 @@ class Repository:
         return [self._row_to_fighter(row) for row in rows]
     
     # CRUD Operations - UPDATE
+    _UPDATE_FIGHTER_SQL = '''
+        UPDATE fighters SET
+            name = ?, weight_class = ?, wins = ?, losses = ?, draws = ?,
+            striking_power = ?, grappling_skill = ?,
+            speed = ?, kick_power = ?, knockout_wins = ?,
+            submission_skill = ?, takedown_defense = ?, submission_wins = ?,
+            versatility = ?, title_defenses = ?
+        WHERE fighter_id = ?
+    '''
+    
+    @staticmethod
+    def _fighter_update_values(fighter: Fighter) -> tuple:
+        """ערכי UPDATE ללוחם (לפי הסדר של _UPDATE_FIGHTER_SQL)"""
+        data = fighter.to_dict()
+        return (
+            data['name'],
+            data['weight_class'],
+            data['wins'],
+            data['losses'],
+            data['draws'],
+            data['striking_power'],
+            data['grappling_skill'],
+            data.get('speed'),
+            data.get('kick_power'),
+            data.get('knockout_wins'),
+            data.get('submission_skill'),
+            data.get('takedown_defense'),
+            data.get('submission_wins'),
+            data.get('versatility'),
+            data.get('title_defenses'),
+            data['fighter_id']
+        )
+    
     def update_fighter(self, fighter: Fighter) -> bool:
         """
         עדכון נתוני לוחם
@@ -190,40 +646,10 @@ class Repository:
             bool: האם העדכון הצליח
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            data = fighter.to_dict()
+            with self._write() as conn:
+                conn.execute(self._UPDATE_FIGHTER_SQL, self._fighter_update_values(fighter))
             
-            cursor.execute('''
-                UPDATE fighters SET
-                    name = ?, weight_class = ?, wins = ?, losses = ?, draws = ?,
-                    striking_power = ?, grappling_skill = ?,
-                    speed = ?, kick_power = ?, knockout_wins = ?,
-                    submission_skill = ?, takedown_defense = ?, submission_wins = ?,
-                    versatility = ?, title_defenses = ?
-                WHERE fighter_id = ?
-            ''', (
-                data['name'],
-                data['weight_class'],
-                data['wins'],
-                data['losses'],
-                data['draws'],
-                data['striking_power'],
-                data['grappling_skill'],
-                data.get('speed'),
-                data.get('kick_power'),
-                data.get('knockout_wins'),
-                data.get('submission_skill'),
-                data.get('takedown_defense'),
-                data.get('submission_wins'),
-                data.get('versatility'),
-                data.get('title_defenses'),
-                data['fighter_id']
-            ))
-            
-            conn.commit()
-            conn.close()
+            self._notify('fighters', [fighter])
             print(f"✅ {fighter.name} Updated Successfully")
             return True
             
@@ -243,16 +669,13 @@ class Repository:
             bool: האם המחיקה הצליחה
         """
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM fighters WHERE fighter_id = ?', (fighter_id,))
-            
-            conn.commit()
-            deleted = cursor.rowcount > 0
-            conn.close()
+            with self._write() as conn:
+                deleted = conn.execute('DELETE FROM fighters WHERE fighter_id = ?', (fighter_id,)).rowcount > 0
+                conn.execute('DELETE FROM ratings WHERE fighter_id = ?', (fighter_id,))
+                conn.execute('DELETE FROM rating_history WHERE fighter_id = ?', (fighter_id,))
             
             if deleted:
+                self._notify('deleted', fighter_id)
                 print(f"✅ Fighter {fighter_id} Deleted Successfully")
             else:
                 print(f"❌ Fighter {fighter_id} Not Found")
@@ -263,32 +686,114 @@ class Repository:
             print(f"❌ Error deleting fighter: {e}")
             return False
     
+    _INSERT_FIGHT_SQL = '''
+        INSERT INTO fights (
+            fighter1_name, fighter2_name, winner_name, method,
+            fighter1_score, fighter2_score,
+            fighter1_id, fighter2_id, winner_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _fight_values(fight_result: dict) -> tuple:
+        return (
+            fight_result['fighter1'],
+            fight_result['fighter2'],
+            fight_result['winner'],
+            fight_result['method'],
+            fight_result['fighter1_score'],
+            fight_result['fighter2_score'],
+            fight_result.get('fighter1_id'),
+            fight_result.get('fighter2_id'),
+            fight_result.get('winner_id')
+        )
+    
+    _UPSERT_RATING_SQL = '''
+        INSERT INTO ratings (fighter_id, rating, rd, fights, last_fight_id) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (fighter_id) DO UPDATE SET
+            rating = excluded.rating, rd = excluded.rd,
+            fights = excluded.fights, last_fight_id = excluded.last_fight_id
+    '''
+    _INSERT_RATING_HISTORY_SQL = 'INSERT INTO rating_history (fight_id, fighter_id, rating, rd) VALUES (?, ?, ?, ?)'
+    
+    @staticmethod
+    def _rate(conn, ratings: dict, history: list, fight_id: int, id1, id2, winner_id):
+        """
+        עדכון דירוג O(1) לקרב אחד - רק לשני הלוחמים שלו
+        ratings: מטמון {fighter_id: (rating, rd, fights, last_fight_id)} לטרנזקציה הנוכחית
+        conn=None - לא קוראים מהטבלה (בנייה מחדש מתחילה מדירוג ברירת מחדל)
+        """
+        if id1 is None or id2 is None:
+            return
+        current = []
+        for fid in (id1, id2):
+            state = ratings.get(fid)
+            if state is None:
+                row = conn.execute('SELECT rating, rd, fights, last_fight_id FROM ratings WHERE fighter_id = ?',
+                                   (fid,)).fetchone() if conn is not None else None
+                state = tuple(row) if row else (DEFAULT_RATING, DEFAULT_RD, 0, None)
+            current.append(state)
+        (r1, rd1, n1, _), (r2, rd2, n2, _) = current
+        winner = 0 if winner_id == id1 else 1 if winner_id == id2 else None
+        r1, rd1, r2, rd2 = rate_fight(r1, rd1, r2, rd2, winner)
+        ratings[id1] = (r1, rd1, n1 + 1, fight_id)
+        ratings[id2] = (r2, rd2, n2 + 1, fight_id)
+        history.append((fight_id, id1, r1, rd1))
+        history.append((fight_id, id2, r2, rd2))
+    
+    def _insert_fights(self, conn, fight_results) -> dict:
+        """
+        INSERT לכל קרב + עדכון הדירוג של שני הלוחמים, באותה טרנזקציה
+        מחזיר {fighter_id: (rating, rd)} של מי שהדירוג שלו השתנה (בשביל המאזינים)
+        """
+        ratings, history = {}, []
+        for result in fight_results:
+            fight_id = conn.execute(self._INSERT_FIGHT_SQL, self._fight_values(result)).lastrowid
+            self._rate(conn, ratings, history, fight_id,
+                       result.get('fighter1_id'), result.get('fighter2_id'), result.get('winner_id'))
+        conn.executemany(self._UPSERT_RATING_SQL, ((fid, *state) for fid, state in ratings.items()))
+        conn.executemany(self._INSERT_RATING_HISTORY_SQL, history)
+        return {fid: state[:2] for fid, state in ratings.items()}
+    
     def save_fight_result(self, fight_result: dict) -> bool:
         """שמירת תוצאות קרב"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            with self._write() as conn:
+                ratings = self._insert_fights(conn, [fight_result])
+            if ratings:
+                self._notify('ratings', ratings)
+            return True
             
-            cursor.execute('''
-                INSERT INTO fights (
-                    fighter1_name, fighter2_name, winner_name, method,
-                    fighter1_score, fighter2_score
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                fight_result['fighter1'],
-                fight_result['fighter2'],
-                fight_result['winner'],
-                fight_result['method'],
-                fight_result['fighter1_score'],
-                fight_result['fighter2_score']
-            ))
+        except Exception as e:
+            print(f"❌ Error saving fight result: {e}")
+            return False
+    
+    def save_fight_batch(self, fighters, fight_results) -> bool:
+        """
+        שמירת הרבה קרבות ועדכון הלוחמים שהשתתפו בהם בטרנזקציה אחת
+        
+        Args:
+            fighters: הלוחמים המעודכנים (כל אחד פעם אחת)
+            fight_results: תוצאות בפורמט של save_fight_result
             
-            conn.commit()
-            conn.close()
+        Returns:
+            bool: האם השמירה הצליחה (בכישלון שום דבר לא נשמר)
+        """
+        try:
+            with self._write() as conn:
+                if self._listeners:
+                    fighters = list(fighters)
+                conn.executemany(self._UPDATE_FIGHTER_SQL,
+                                 (self._fighter_update_values(f) for f in fighters))
+                ratings = self._insert_fights(conn, fight_results)
+            if fighters:
+                self._notify('fighters', fighters)
+            if ratings:
+                self._notify('ratings', ratings)
             return True
             
         except Exception as e:
-            print(f"❌ Error saving fight result: {e}")
+            print(f"❌ Error saving fight batch: {e}")
             return False
     
     def get_fight_history(self, limit: int = 10) -> List[dict]:
@@ -320,39 +825,114 @@ class Repository:
         
         return fights
     
-    def _row_to_fighter(self, row: sqlite3.Row) -> Fighter:
-        """הופכת שורה מהדאטה-בייס לאובייקט לוחם עם צבעים"""
-        # שליפת סוג הלוחם
-        f_type = row['fighter_type']
-        
-        # יצירת הלוחם עם נתוני הבסיס
-        args = (row['fighter_id'], row['name'], row['weight_class'], 
-                row['wins'], row['losses'], row['draws'], 
-                row['striking_power'], row['grappling_skill'])
-        
-        if f_type == 'Striker':
-            f = Striker(*args)
-        elif f_type == 'Grappler':
-            f = Grappler(*args)
-        elif f_type == 'HybridChampion':
-            f = HybridChampion(*args)
-        else:
-            f = Fighter(*args)
-
-        # פונקציית עזר להפוך טקסט "255,0,0" חזרה לטבלה של מספרים
-        def parse_color(color_str, default):
-            if not color_str: return default
-            try:
-                return tuple(map(int, color_str.split(',')))
-            except:
-                return default
-
-        # הוספת הצבעים לאובייקט הלוחם
-        f.skin_color = parse_color(row['skin_color'], (255, 220, 180))
-        f.hair_color = parse_color(row['hair_color'], (40, 40, 40))
-        f.pants_color = parse_color(row['pants_color'], (30, 30, 30))
+    # Ratings
+    def rebuild_ratings(self, chunk_size: int = 5000) -> int:
+        """
+        חישוב כל הדירוגים מחדש ממעבר על טבלת fights לפי הסדר, במנות של chunk_size שורות
+        (fetchmany - לא טוענים את כל ההיסטוריה לזיכרון). קרבות ישנים בלי מזהים
+        ממופים לפי שם, אם השם ייחודי. הכל בטרנזקציה אחת - קוראים רואים את הישן עד הסוף.
         
-        return f
+        Returns:
+            int: מספר הקרבות שדורגו
+        """
+        with self._write() as conn:
+            conn.execute('DELETE FROM rating_history')
+            conn.execute('DELETE FROM ratings')
+            names = {name: fid for name, fid, count in conn.execute(
+                'SELECT name, MIN(fighter_id), COUNT(*) FROM fighters GROUP BY name') if count == 1}
+            
+            ratings, rated = {}, 0
+            cursor = conn.execute('''
+                SELECT fight_id, fighter1_name, fighter2_name, winner_name,
+                       fighter1_id, fighter2_id, winner_id
+                FROM fights ORDER BY fight_id
+            ''')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                history = []
+                for fight_id, name1, name2, winner_name, id1, id2, winner_id in rows:
+                    if id1 is None or id2 is None:
+                        id1, id2 = names.get(name1), names.get(name2)
+                        winner_id = id1 if winner_name == name1 else id2 if winner_name == name2 else None
+                    if id1 is not None and id2 is not None:
+                        self._rate(None, ratings, history, fight_id, id1, id2, winner_id)
+                        rated += 1
+                conn.executemany(self._INSERT_RATING_HISTORY_SQL, history)
+            conn.executemany(self._UPSERT_RATING_SQL, ((fid, *state) for fid, state in ratings.items()))
+        
+        self._notify('reset')
+        print(f"✅ Ratings rebuilt from {rated} fights")
+        return rated
+    
+    def get_rating(self, fighter_id: int) -> dict:
+        """הדירוג הנוכחי של לוחם (ברירת מחדל אם עוד לא נלחם)"""
+        conn = self._get_connection()
+        row = conn.execute('SELECT rating, rd, fights FROM ratings WHERE fighter_id = ?', (fighter_id,)).fetchone()
+        conn.close()
+        
+        if not row:
+            return {'fighter_id': fighter_id, 'rating': DEFAULT_RATING, 'rd': DEFAULT_RD, 'fights': 0}
+        return {'fighter_id': fighter_id, 'rating': row['rating'], 'rd': row['rd'], 'fights': row['fights']}
+    
+    def iter_ratings(self, batch_size: int = 5000) -> Iterator[tuple]:
+        """(fighter_id, rating, rd) לכל לוחם שיש לו דירוג, ב-fetchmany"""
+        conn = self._get_connection()
+        try:
+            cursor = conn.execute('SELECT fighter_id, rating, rd FROM ratings')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield tuple(row)
+        finally:
+            conn.close()
+    
+    def get_top_rated(self, limit: int = 10, weight_class: Optional[str] = None) -> List[dict]:
+        """
+        הלוחמים המובילים לפי דירוג שמרני (rating - 2*RD), כך שמי שנלחם מעט לא עוקף
+        
+        Args:
+            limit: כמה לוחמים
+            weight_class: רק קטגוריית משקל אחת (None - כולם)
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT f.fighter_id, f.name, f.weight_class, r.rating, r.rd, r.fights,
+                   r.rating - 2 * r.rd AS conservative
+            FROM ratings r JOIN fighters f ON f.fighter_id = r.fighter_id
+            WHERE (? IS NULL OR f.weight_class = ?)
+            ORDER BY conservative DESC
+            LIMIT ?
+        ''', (weight_class, weight_class, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def get_rating_history(self, fighter_id: int, limit: Optional[int] = None) -> List[dict]:
+        """הדירוג של לוחם אחרי כל קרב, לפי הסדר (limit - רק האחרונים)"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT * FROM (
+                SELECT fight_id, rating, rd, recorded_at FROM rating_history
+                WHERE fighter_id = ? ORDER BY fight_id DESC LIMIT ?
+            ) ORDER BY fight_id
+        ''', (fighter_id, -1 if limit is None else limit))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def _row_to_fighter(self, row: sqlite3.Row) -> Fighter:
+        """הופכת שורה מהדאטה-בייס לאובייקט לוחם עם צבעים וכל הסטטיסטיקות של הסוג"""
+        return fighter_from_dict(dict(row))
     
     def get_statistics(self) -> dict:
         """סטטיסטיקות כלליות"""
@@ -0,0 +1,239 @@
+"""
+Move Table
+המכות של הזירה כנתונים (assets/moves.json): מחיר סטמינה, טעינה, טווח, טווח נזק, איזו
+סטטיסטיקה של התוקף מגבירה את הנזק ואיזו של המגן מחלישה אותו, חסימה ומכפיל לכל סגנון.
+הקובץ נטען ומקומפל פעם אחת לטאפלים שטוחים לפי מזהה מכה (ולפי סגנון), ולכל קרב נבנית
+טבלת נזק לשני הלוחמים - כך שמכה בזירה היא שליפות מטאפלים וקריאה אחת ל-randint
+
+בלוחם ניטרלי (Fighter, כל הסטטיסטיקות 50) הנוסחה מחזירה בדיוק את הטווח שבקובץ
+
+מדגים: הגדרה דקלרטיבית, קומפילציה מראש לטבלאות חיפוש, Structure of Arrays
+
+שימוש:
+    python move_table.py show                  # הטבלה המקומפלת ודוגמאות נזק לכל סגנון
+    python move_table.py bench --ticks 200000  # זמן מכה מול נוסחה שמחושבת בכל פגיעה
+"""
+
+import argparse
+import functools
+import json
+import os
+import random
+import sys
+import time
+from typing import NamedTuple, Tuple
+
+from combat_engine import STAT_FIELDS, fighter_stats
+from grappler import Grappler
+from hybrid_champion import HybridChampion
+from striker import Striker
+
+MOVES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "moves.json")
+STYLES = ("Fighter", "Striker", "Grappler", "Hybrid")
+
+# (אינדקס סגנון, *הסטטיסטיקות לפי STAT_FIELDS) - מה שהזירה צריכה לדעת על לוחם
+NEUTRAL_PROFILE = (0,) + (50,) * len(STAT_FIELDS)
+
+
+class MoveTable(NamedTuple):
+    """הטבלה המקומפלת: כל שדה הוא טאפל לפי מזהה מכה (style_mult - לפי סגנון * n + מזהה)"""
+    names: Tuple[str, ...]
+    cost: Tuple[int, ...]
+    cooldown: Tuple[float, ...]
+    reach: Tuple[float, ...]
+    dmg_lo: Tuple[int, ...]
+    dmg_hi: Tuple[int, ...]
+    power: Tuple[int, ...]      # אינדקס ב-STAT_FIELDS, -1 = אין
+    power_scale: Tuple[float, ...]
+    defense: Tuple[int, ...]
+    defense_scale: Tuple[float, ...]
+    block_divisor: Tuple[int, ...]
+    style_mult: Tuple[float, ...]
+    neutral: int
+
+    @property
+    def n(self) -> int:
+        return len(self.names)
+
+    def index(self, name: str) -> int:
+        return self.names.index(name)
+
+    def multiplier(self, m: int, attacker: tuple, defender: tuple) -> float:
+        """מכפיל הנזק של מכה m מתוקף במגן (פרופילים כמו NEUTRAL_PROFILE)"""
+        mult = self.style_mult[attacker[0] * self.n + m]
+        if self.power[m] >= 0:
+            mult *= 1 + self.power_scale[m] * (attacker[1 + self.power[m]] - self.neutral) / self.neutral
+        if self.defense[m] >= 0:
+            mult *= 1 - self.defense_scale[m] * (defender[1 + self.defense[m]] - self.neutral) / self.neutral
+        return max(0.0, mult)
+
+    def damage_table(self, p1: tuple, p2: tuple) -> Tuple[tuple, tuple]:
+        """
+        (dmg_lo, dmg_hi) לקרב אחד - טאפלים שטוחים לפי צד * n + מזהה מכה
+        (0..n-1 - המכות של שחקן 1 בשחקן 2, n..2n-1 - של שחקן 2 בשחקן 1)
+        """
+        lo, hi = [], []
+        for attacker, defender in ((p1, p2), (p2, p1)):
+            for m in range(self.n):
+                mult = self.multiplier(m, attacker, defender)
+                a = max(1, round(self.dmg_lo[m] * mult))
+                lo.append(a)
+                hi.append(max(a, round(self.dmg_hi[m] * mult)))
+        return tuple(lo), tuple(hi)
+
+
+def _stat(move: dict, key: str) -> int:
+    name = move.get(key)
+    if name is None:
+        return -1
+    if name not in STAT_FIELDS:
+        raise ValueError(f"move {move['name']!r}: unknown stat {name!r} for {key}")
+    return STAT_FIELDS.index(name)
+
+
+def compile_moves(spec: dict) -> MoveTable:
+    """בודק את ההגדרה ומקמפל אותה ל-MoveTable"""
+    if tuple(spec.get("styles", STYLES)) != STYLES:
+        raise ValueError(f"styles must be {list(STYLES)}")
+    moves = spec.get("moves") or []
+    if not moves:
+        raise ValueError("no moves defined")
+    try:
+        names = tuple(move["name"] for move in moves)
+        if len(set(names)) != len(names):
+            raise ValueError(f"duplicate move names: {names}")
+        cols = {key: [] for key in MoveTable._fields if key not in ("names", "style_mult", "neutral")}
+        style_mult = [1.0] * (len(STYLES) * len(moves))
+        for m, move in enumerate(moves):
+            lo, hi = (int(v) for v in move["damage"])
+            if not 0 < lo <= hi:
+                raise ValueError(f"move {move['name']!r}: bad damage range {move['damage']}")
+            divisor = int(move.get("block_divisor", 1))
+            if divisor < 1:
+                raise ValueError(f"move {move['name']!r}: block_divisor must be >= 1")
+            cols["cost"].append(int(move["cost"]))
+            cols["cooldown"].append(float(move["cooldown"]))
+            cols["reach"].append(move["range"])
+            cols["dmg_lo"].append(lo)
+            cols["dmg_hi"].append(hi)
+            cols["power"].append(_stat(move, "power"))
+            cols["power_scale"].append(float(move.get("power_scale", 0)))
+            cols["defense"].append(_stat(move, "defense"))
+            cols["defense_scale"].append(float(move.get("defense_scale", 0)))
+            cols["block_divisor"].append(divisor)
+            for style, mult in move.get("style", {}).items():
+                if style not in STYLES:
+                    raise ValueError(f"move {move['name']!r}: unknown style {style!r}")
+                style_mult[STYLES.index(style) * len(moves) + m] = float(mult)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"bad move definition: missing or invalid {e}") from e
+    return MoveTable(names, *(tuple(cols[key]) for key in cols), tuple(style_mult),
+                     int(spec.get("stat_neutral", 50)))
+
+
+@functools.lru_cache(maxsize=None)
+def load_moves(path: str = MOVES_FILE) -> MoveTable:
+    """טבלה אחת משותפת לכל הזירות"""
+    with open(path, encoding="utf-8") as f:
+        return compile_moves(json.load(f))
+
+
+def style_index(fighter) -> int:
+    if isinstance(fighter, HybridChampion): return 3
+    if isinstance(fighter, Striker): return 1
+    if isinstance(fighter, Grappler): return 2
+    return 0
+
+
+def fighter_profile(fighter=None) -> tuple:
+    """הפרופיל של לוחם לזירה (בלי לוחם - NEUTRAL_PROFILE)"""
+    if fighter is None:
+        return NEUTRAL_PROFILE
+    return (style_index(fighter),) + tuple(max(0, min(255, s)) for s in fighter_stats(fighter))
+
+
+def _bench(ticks: int, seed: int) -> dict:
+    # נזק של מכה: שליפה מהטבלה המקומפלת מול חישוב הנוסחה מה-JSON בכל פגיעה
+    table = load_moves()
+    with open(MOVES_FILE, encoding="utf-8") as f:
+        spec = json.load(f)
+    rng = random.Random(seed)
+    profiles = [(rng.randrange(len(STYLES)),) + tuple(rng.randint(20, 100) for _ in STAT_FIELDS) for _ in range(64)]
+    pairs = [(rng.choice(profiles), rng.choice(profiles)) for _ in range(256)]
+    hits = [(rng.randrange(len(pairs)), rng.randrange(table.n), rng.random() < 0.3) for _ in range(ticks)]
+
+    t0 = time.perf_counter()
+    compiled = [table.damage_table(*pair) for pair in pairs]
+    t_compile = time.perf_counter() - t0
+
+    rng.seed(seed)
+    t0 = time.perf_counter()
+    total = 0
+    for i, m, blocked in hits:
+        lo, hi = compiled[i]
+        dmg = rng.randint(lo[m], hi[m])
+        if blocked: dmg //= table.block_divisor[m]
+        total += dmg
+    t_table = time.perf_counter() - t0
+
+    rng.seed(seed)
+    t0 = time.perf_counter()
+    total_naive = 0
+    for i, m, blocked in hits:
+        a, d = pairs[i]
+        move = spec["moves"][m]
+        mult = move.get("style", {}).get(STYLES[a[0]], 1.0)
+        mult *= 1 + move["power_scale"] * (a[1 + STAT_FIELDS.index(move["power"])] - 50) / 50
+        if move["defense"]:
+            mult *= 1 - move["defense_scale"] * (d[1 + STAT_FIELDS.index(move["defense"])] - 50) / 50
+        lo = max(1, round(move["damage"][0] * max(0.0, mult)))
+        dmg = rng.randint(lo, max(lo, round(move["damage"][1] * max(0.0, mult))))
+        if blocked: dmg //= move["block_divisor"]
+        total_naive += dmg
+    t_naive = time.perf_counter() - t0
+    return {"hits": ticks, "same": total == total_naive, "compile_us": t_compile / len(pairs) * 1e6,
+            "table_ns": t_table / ticks * 1e9, "naive_ns": t_naive / ticks * 1e9}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect and benchmark the compiled arena move table")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("show", help="print the compiled table and damage per style")
+    p.add_argument("--file", default=MOVES_FILE)
+    p = sub.add_parser("bench", help="per-hit cost: compiled table vs formula from the spec")
+    p.add_argument("--ticks", type=int, default=200000)
+    p.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        r = _bench(args.ticks, args.seed)
+        print(f"{r['hits']} hits: compiled table {r['table_ns']:.0f} ns/hit, formula per hit {r['naive_ns']:.0f} ns/hit "
+              f"({r['naive_ns'] / r['table_ns']:.1f}x); per-fight compile {r['compile_us']:.1f} us; "
+              f"same damage: {r['same']}")
+        return 0 if r["same"] else 1
+
+    try:
+        table = load_moves(args.file)
+    except (OSError, ValueError) as e:
+        print(f"{args.file}: {e}", file=sys.stderr)
+        return 1
+    print(f"{'move':<9}{'cost':>5}{'cd':>6}{'range':>6}{'damage':>9}  power / defense")
+    for m, name in enumerate(table.names):
+        power = STAT_FIELDS[table.power[m]] if table.power[m] >= 0 else "-"
+        defense = STAT_FIELDS[table.defense[m]] if table.defense[m] >= 0 else "-"
+        print(f"{name:<9}{table.cost[m]:>5}{table.cooldown[m]:>6.2f}{table.reach[m]:>6}"
+              f"{f'{table.dmg_lo[m]}-{table.dmg_hi[m]}':>9}  {power} x{table.power_scale[m]:g} / "
+              f"{defense} x{table.defense_scale[m]:g}, block /{table.block_divisor[m]}")
+    print()
+    print("damage vs a neutral opponent (all stats 50 / 80):")
+    for s, style in enumerate(STYLES):
+        cells = []
+        for level in (50, 80):
+            lo, hi = table.damage_table((s,) + (level,) * len(STAT_FIELDS), NEUTRAL_PROFILE)
+            cells.append(" ".join(f"{name} {lo[m]}-{hi[m]}" for m, name in enumerate(table.names)))
+        print(f"  {style:<9}{cells[0]:<30}| {cells[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
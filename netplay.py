@@ -0,0 +1,614 @@
+"""
+Netplay
+מצב 2 שחקנים ברשת (UDP) עם rollback בסגנון GGPO, מעל ArenaSim הדטרמיניסטי:
+כל צד מריץ את הקרב מיד עם הקלט המקומי (אחרי השהיה קבועה קטנה - input_delay טיקים)
+ו"מנחש" את הקלט של היריב (אותו כיוון כמו בקלט האחרון שהגיע, בלי לחיצות חדשות).
+כשהקלט האמיתי מגיע ושונה מהניחוש - חוזרים ל-snapshot של אותו טיק ומריצים מחדש עד עכשיו
+
+כל חבילה נושאת את כל הקלטים המקומיים שהצד השני עוד לא אישר (עמידות לאיבוד חבילות),
+ה-checksum של המצב בכל שנייה מאושרת (זיהוי desync), וחותמות זמן למדידת ping.
+הקלט המאושר של שני הצדדים הוא Replay רגיל - replay.verify מריץ אותו מחדש בלי רשת
+
+מדגים: rollback/resimulation, snapshot/restore, פרוטוקול UDP עם struct, סימולציית רשת (השהיה/איבוד)
+
+שימוש:
+    python netplay.py host --port 7777 --fighters 1 2         # מחכה ליריב, שחקן 1
+    python netplay.py join 192.168.1.5:7777                   # שחקן 2
+    python netplay.py loopback --latency 50 --loss 0.05       # שני צדדים בתהליך אחד, בלי חלון
+"""
+
+import argparse
+import heapq
+import random
+import socket
+import struct
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+from arena_sim import DT, TICK_RATE, LEFT, RIGHT, JAB, KICK, GRAPPLE, BLOCK, RECOVER, ArenaSim
+from move_table import fighter_profile
+from replay import CHECK_EVERY, Replay, verify
+
+MAGIC = b"RB"
+PROTOCOL = 2  # 2 - הכותרת היא Replay גרסה 2 (עם הפרופילים של הלוחמים)
+HELLO, WELCOME, INPUT, BYE = 1, 2, 3, 4
+DEFAULT_PORT = 7777
+MAX_INPUTS_PER_PACKET = 64
+
+_HEAD = struct.Struct("<2sB")
+# first_frame, ack (כמה קלטים רצופים של היריב יש לנו), frame, hash_frame, hash, stamp, echo, echo_age, count
+_INPUT = struct.Struct("<IIIIIIIHB")
+
+
+def _now_ms(clock: Callable[[], float]) -> int:
+    return int(clock() * 1000) & 0xFFFFFFFF
+
+
+# ----- תעבורה -----
+class UdpTransport:
+    """
+    סוקט UDP לא חוסם. remote=None - הכתובת נלמדת מהחבילה הראשונה (המארח);
+    אחרי זה חבילות מכתובות אחרות נזרקות
+    """
+
+    def __init__(self, bind: Tuple[str, int] = ("0.0.0.0", 0), remote: Optional[Tuple[str, int]] = None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(bind)
+        self.sock.setblocking(False)
+        self.remote = remote
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.sock.getsockname()
+
+    def send(self, data: bytes):
+        if self.remote is not None:
+            try:
+                self.sock.sendto(data, self.remote)
+            except OSError:
+                pass  # UDP - אובדן חבילה הוא מצב רגיל
+
+    def recv(self) -> List[bytes]:
+        packets = []
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError):
+                return packets
+            if self.remote is None:
+                self.remote = addr
+            if addr == self.remote:
+                packets.append(data)
+
+    def close(self):
+        self.sock.close()
+
+
+class LossyTransport:
+    """עוטף תעבורה ומדמה רשת: השהיה לכל כיוון (+ jitter) ואיבוד חבילות ביציאה"""
+
+    def __init__(self, inner, latency_ms: float = 0, jitter_ms: float = 0, loss: float = 0.0,
+                 seed: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        self.inner = inner
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.loss = loss
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self._queue = []
+        self._seq = 0
+        self.sent = self.dropped = 0
+
+    @property
+    def address(self):
+        return self.inner.address
+
+    def send(self, data: bytes):
+        self.sent += 1
+        if self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        due = self.clock() + max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        self._seq += 1
+        heapq.heappush(self._queue, (due, self._seq, data))
+        self.flush()
+
+    def flush(self):
+        now = self.clock()
+        while self._queue and self._queue[0][0] <= now:
+            self.inner.send(heapq.heappop(self._queue)[2])
+
+    def recv(self) -> List[bytes]:
+        self.flush()
+        return self.inner.recv()
+
+    def close(self):
+        self.inner.close()
+
+
+# ----- סשן -----
+class RollbackSession:
+    """
+    צד אחד של קרב ברשת מעל sim (ArenaSim / FightArena). side - 0 אם הקלט המקומי הוא של שחקן 1.
+    advance() נקרא פעם בכל צעד סימולציה עם הקלט המקומי
+
+    Args:
+        input_delay: אחרי כמה טיקים הקלט המקומי מופעל (2 = 33ms) - פחות rollback, עדיין מיידי
+        max_rollback: כמה טיקים אפשר לרוץ קדימה בלי קלט מהיריב לפני שעוצרים לחכות לו
+        welcome: חבילת WELCOME לשלוח שוב אם HELLO נוסף מגיע (המארח, כשהראשונה אבדה)
+    """
+
+    def __init__(self, sim: ArenaSim, side: int, transport, input_delay: int = 2, max_rollback: int = 8,
+                 clock: Callable[[], float] = time.monotonic, welcome: Optional[bytes] = None):
+        self.sim = sim
+        self.side = side
+        self.transport = transport
+        self.input_delay = input_delay
+        self.max_rollback = max_rollback
+        self.clock = clock
+        self.welcome = welcome
+
+        self.local = {f: 0 for f in range(input_delay)}  # frame -> קלט מקומי
+        self.remote = {}      # frame -> קלט של היריב (אמיתי)
+        self.predicted = {}   # frame -> הניחוש שבו הורץ הטיק
+        self.snapshots = {}   # frame -> המצב לפני הטיק
+        self.remote_confirmed = -1  # כל קלטי היריב עד כאן (כולל) ידועים
+        self.last_remote = 0        # הקלט של היריב ב-remote_confirmed - הבסיס לניחוש
+        self.remote_acked = -1      # היריב אישר את הקלטים המקומיים עד כאן
+        self.remote_frame = 0
+        self._rollback_to = None
+        self.confirmed = bytearray()  # (קלט 1, קלט 2) לכל טיק ששני הקלטים שלו ידועים
+        self._tentative = {}  # checksum לכל CHECK_EVERY טיקים, עד שהקלטים לפניו מאושרים
+        self.hashes = {}
+        self.remote_hashes = {}
+        self._peer_stamp = None
+        self._peer_stamp_at = 0.0
+        self._last_wait = 0
+
+        self.rtt_ms = 0.0
+        self.rollbacks = self.rollback_frames = self.max_depth = self.last_rollback = 0
+        self.stalls = self.sync_waits = self.bad_packets = 0
+        self.stalled = False
+        self.desync_frame = None
+        self.remote_left = False
+        self.closed = False
+
+    @property
+    def frame(self) -> int:
+        return self.sim.tick
+
+    @property
+    def finished(self) -> bool:
+        """הקרב נגמר וכל הקלטים עד הסוף מאושרים - התוצאה לא תשתנה יותר"""
+        return self.sim.over and self._rollback_to is None and self.remote_confirmed >= self.sim.tick - 1
+
+    # ----- קבלה -----
+    def poll(self):
+        for data in self.transport.recv():
+            try:
+                self._on_packet(data)
+            except (struct.error, ValueError):
+                self.bad_packets += 1
+
+    def _on_packet(self, data: bytes):
+        magic, kind = _HEAD.unpack_from(data, 0)
+        if magic != MAGIC:
+            self.bad_packets += 1
+            return
+        if kind == HELLO and self.welcome is not None:
+            self.transport.send(self.welcome)
+            return
+        if kind == BYE:
+            self.remote_left = True
+            return
+        if kind != INPUT:
+            return
+        first, ack, frame, hash_frame, state_hash, stamp, echo, echo_age, count = _INPUT.unpack_from(data, _HEAD.size)
+        inputs = data[_HEAD.size + _INPUT.size:_HEAD.size + _INPUT.size + count]
+        if len(inputs) != count:
+            raise ValueError("truncated packet")
+
+        now = self.clock()
+        self._peer_stamp, self._peer_stamp_at = stamp, now
+        if echo:
+            rtt = (_now_ms(self.clock) - echo - echo_age) & 0xFFFFFFFF
+            if rtt < 10000:
+                self.rtt_ms = rtt if not self.rtt_ms else self.rtt_ms * 0.8 + rtt * 0.2
+        self.remote_acked = max(self.remote_acked, ack - 1)
+        self.remote_frame = max(self.remote_frame, frame)
+
+        for i, value in enumerate(inputs):
+            f = first + i
+            if f <= self.remote_confirmed or f in self.remote:
+                continue
+            self.remote[f] = value
+            guess = self.predicted.pop(f, None)
+            if guess is not None and guess != value:
+                self._rollback_to = f if self._rollback_to is None else min(self._rollback_to, f)
+        while self.remote_confirmed + 1 in self.remote:
+            self.remote_confirmed += 1
+            self.last_remote = self.remote[self.remote_confirmed]
+
+        if hash_frame:
+            self.remote_hashes[hash_frame] = state_hash
+            self._check_hash(hash_frame)
+
+    # ----- סימולציה -----
+    def _inputs(self, f: int) -> Tuple[int, int]:
+        local = self.local.get(f, 0)
+        remote = self.remote.get(f)
+        if remote is None:
+            # ניחוש: ממשיכים באותו כיוון, בלי לחיצות חדשות
+            remote = self.last_remote & (LEFT | RIGHT)
+            self.predicted[f] = remote
+        return (local, remote) if self.side == 0 else (remote, local)
+
+    def _step(self):
+        sim = self.sim
+        self.snapshots[sim.tick] = sim.snapshot()
+        sim.step(*self._inputs(sim.tick))
+        if sim.tick % CHECK_EVERY == 0:
+            self._tentative[sim.tick] = sim.state_hash()
+
+    def _apply_rollback(self):
+        target = self._rollback_to
+        if target is None:
+            return
+        self._rollback_to = None
+        end = self.sim.tick
+        if target >= end:
+            return
+        self.sim.restore(self.snapshots[target])
+        for t in [t for t in self._tentative if t > target]:
+            del self._tentative[t]
+        while self.sim.tick < end and not self.sim.over:
+            self._step()
+        depth = end - target
+        self.rollbacks += 1
+        self.rollback_frames += depth
+        self.last_rollback = depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def _promote_hashes(self):
+        for t in [t for t in self._tentative if t - 1 <= self.remote_confirmed]:
+            self.hashes[t] = self._tentative.pop(t)
+            self._check_hash(t)
+
+    def _check_hash(self, t: int):
+        if self.desync_frame is None and t in self.hashes and t in self.remote_hashes \
+                and self.hashes[t] != self.remote_hashes[t]:
+            self.desync_frame = t
+
+    def _confirm(self):
+        f = len(self.confirmed) // 2
+        while f <= self.remote_confirmed and f in self.local:
+            pair = (self.local[f], self.remote[f]) if self.side == 0 else (self.remote[f], self.local[f])
+            self.confirmed += bytes(pair)
+            f += 1
+
+    def _can_advance(self) -> bool:
+        if self.sim.over or self.closed:
+            return False
+        if self.frame - self.remote_confirmed - 1 >= self.max_rollback:
+            self.stalls += 1
+            return False
+        # סנכרון זמן: אם אנחנו רצים לפני היריב (בהתחשב בהשהיה) מוותרים על טיק מדי פעם
+        ahead = self.frame - (self.remote_frame + self.rtt_ms / 2000 / DT)
+        if ahead >= 2 and self.frame - self._last_wait >= 8:
+            self._last_wait = self.frame
+            self.sync_waits += 1
+            return False
+        return True
+
+    def advance(self, local_input: int) -> bool:
+        """
+        טיק אחד עם הקלט המקומי. False - לא התקדמנו (מחכים ליריב, או שהקרב נגמר);
+        הקלט לא נצרך ויש לשלוח אותו שוב בקריאה הבאה
+        """
+        self._receive()
+        advanced = self._can_advance()
+        if advanced:
+            self.local[self.frame + self.input_delay] = local_input
+            self._step()
+        self.stalled = not advanced and not self.sim.over
+        self._publish()
+        return advanced
+
+    def sync(self):
+        """קבלה (ו-rollback אם צריך) ושליחה, בלי להתקדם - למשל אחרי סוף הקרב"""
+        self._receive()
+        self._publish()
+
+    def _receive(self):
+        self.poll()
+        self._apply_rollback()
+        self._promote_hashes()
+
+    def _publish(self):
+        self._confirm()
+        self._send()
+        self._prune()
+
+    def _prune(self):
+        # rollback לא יחזור לפני הקלט הראשון שעוד לא ידוע
+        horizon = min(self.remote_confirmed + 1, self.frame)
+        for table in (self.snapshots, self.remote, self.predicted):
+            for f in [f for f in table if f < horizon]:
+                del table[f]
+        keep_local = min(self.remote_acked + 1, horizon, len(self.confirmed) // 2)
+        for f in [f for f in self.local if f < keep_local]:
+            del self.local[f]
+
+    # ----- שליחה -----
+    def _send(self):
+        start = self.remote_acked + 1
+        end = max(self.local) + 1 if self.local else start
+        inputs = bytes(self.local[f] for f in range(start, min(end, start + MAX_INPUTS_PER_PACKET)))
+        hash_frame = max(self.hashes) if self.hashes else 0
+        now = self.clock()
+        if self._peer_stamp is None:
+            echo, echo_age = 0, 0
+        else:
+            echo, echo_age = self._peer_stamp, min(0xFFFF, int((now - self._peer_stamp_at) * 1000))
+        stamp = _now_ms(self.clock) or 1
+        self.transport.send(_HEAD.pack(MAGIC, INPUT) + _INPUT.pack(
+            start, self.remote_confirmed + 1, self.frame, hash_frame, self.hashes.get(hash_frame, 0),
+            stamp, echo, echo_age, len(inputs)) + inputs)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for _ in range(3):
+            self.transport.send(_HEAD.pack(MAGIC, BYE))
+        self.transport.close()
+
+    def replay(self, fighter_ids=(None, None), names=("", "")) -> Replay:
+        """הקלט המאושר כ-Replay רגיל (checksum סופי רק אם הקרב נגמר והסוף מאושר)"""
+        ticks = len(self.confirmed) // 2
+        if self.sim.over:
+            ticks = min(ticks, self.sim.tick)
+        checks = []
+        for t in range(CHECK_EVERY, ticks + 1, CHECK_EVERY):
+            if t not in self.hashes:
+                break
+            checks.append(self.hashes[t])
+        done = self.finished
+        return Replay(self.sim.seed, "2P", fighter_ids, names, self.confirmed[:2 * ticks], checks,
+                      self.sim.winner_side if done else 0, self.sim.state_hash() if done else None,
+                      self.sim.profiles)
+
+
+# ----- לחיצת יד -----
+class NetMatch:
+    """מה ששני הצדדים מסכימים עליו לפני הקרב; session() בונה את ה-RollbackSession מעל sim"""
+
+    def __init__(self, transport, side: int, header: Replay, input_delay: int, welcome: Optional[bytes] = None):
+        self.transport = transport
+        self.side = side
+        self.header = header  # Replay בלי קלטים: seed, מזהי, שמות ופרופילים של הלוחמים
+        self.input_delay = input_delay
+        self.welcome = welcome
+
+    @property
+    def seed(self) -> int:
+        return self.header.seed
+
+    @property
+    def profiles(self) -> tuple:
+        return self.header.profiles
+
+    def fighters(self, repo=None):
+        return self.header.fighters(repo)
+
+    def session(self, sim: ArenaSim, **kwargs) -> RollbackSession:
+        return RollbackSession(sim, self.side, self.transport, self.input_delay, welcome=self.welcome, **kwargs)
+
+
+def _wrap(transport, latency_ms=0, jitter_ms=0, loss=0.0):
+    if latency_ms or jitter_ms or loss:
+        return LossyTransport(transport, latency_ms, jitter_ms, loss)
+    return transport
+
+
+def host(port: int = DEFAULT_PORT, seed: Optional[int] = None, fighter_ids=(None, None), names=("", ""),
+         input_delay: int = 2, timeout: float = 120, bind: str = "0.0.0.0", profiles=None, **link) -> NetMatch:
+    """
+    מחכה ל-HELLO מהיריב ומחזיר NetMatch (שחקן 1); link - latency_ms / jitter_ms / loss לבדיקות.
+    profiles (move_table.fighter_profile) עוברים ליריב בכותרת, כך ששני הצדדים מחשבים אותו נזק
+    """
+    transport = _wrap(UdpTransport((bind, port)), **link)
+    header = Replay(seed if seed is not None else random.randrange(2 ** 32), "2P", fighter_ids, names,
+                    profiles=profiles)
+    welcome = _HEAD.pack(MAGIC, WELCOME) + bytes((PROTOCOL, input_delay)) + header.to_bytes()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for data in transport.recv():
+            if data[:3] == _HEAD.pack(MAGIC, HELLO) and data[3:4] == bytes((PROTOCOL,)):
+                transport.send(welcome)
+                return NetMatch(transport, 0, header, input_delay, welcome)
+        time.sleep(0.01)
+    transport.close()
+    raise TimeoutError(f"no opponent joined on port {port}")
+
+
+def join(address: str, timeout: float = 30, **link) -> NetMatch:
+    """HOST[:PORT] - שולח HELLO עד שמגיע WELCOME; מחזיר NetMatch (שחקן 2)"""
+    hostname, _, port = address.rpartition(":") if ":" in address else (address, "", str(DEFAULT_PORT))
+    transport = _wrap(UdpTransport(remote=(socket.gethostbyname(hostname), int(port))), **link)
+    hello = _HEAD.pack(MAGIC, HELLO) + bytes((PROTOCOL,))
+    deadline = time.monotonic() + timeout
+    next_hello = 0.0
+    while time.monotonic() < deadline:
+        if time.monotonic() >= next_hello:
+            transport.send(hello)
+            next_hello = time.monotonic() + 0.2
+        for data in transport.recv():
+            if data[:3] == _HEAD.pack(MAGIC, WELCOME):
+                if data[3] != PROTOCOL:
+                    raise ValueError(f"host speaks protocol {data[3]}, we speak {PROTOCOL}")
+                return NetMatch(transport, 1, Replay.from_bytes(data[5:]), data[4])
+        time.sleep(0.01)
+    transport.close()
+    raise TimeoutError(f"no answer from {address}")
+
+
+# ----- בדיקה על loopback -----
+class _Bot:
+    """שחקן אקראי "אנושי": מחזיק כיוון כמה טיקים, לוחץ על פעולות מדי פעם"""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.direction = 0
+        self.hold = 0
+
+    def input(self, sim: ArenaSim, side: int) -> int:
+        rng = self.rng
+        me, foe = (sim.x1, sim.x2) if side == 0 else (sim.x2, sim.x1)
+        if self.hold <= 0:
+            toward = RIGHT if foe > me else LEFT
+            self.direction = rng.choices((toward, toward ^ (LEFT | RIGHT), 0), (6, 2, 2))[0]
+            self.hold = rng.randint(5, 40)
+        self.hold -= 1
+        mask = self.direction
+        if rng.random() < 0.06:
+            mask |= rng.choice((JAB, KICK, GRAPPLE, BLOCK, RECOVER))
+        return mask
+
+
+def loopback(seconds: float = 30, latency_ms: float = 50, jitter_ms: float = 0, loss: float = 0.0,
+             input_delay: int = 2, max_rollback: int = 8, seed: int = 1, realtime: bool = False) -> dict:
+    """
+    שני צדדים בתהליך אחד על 127.0.0.1, עם סימולציית רשת בכל כיוון ושחקנים אקראיים.
+    realtime=False - שעון וירטואלי (טיק = DT) בלי לחכות, דטרמיניסטי
+
+    Returns:
+        dict: נתונים לכל צד + האם הקלט המאושר זהה בשני הצדדים ועובר replay.verify
+    """
+    now = [0.0]
+    clock = time.monotonic if realtime else (lambda: now[0])
+    a, b = UdpTransport(("127.0.0.1", 0)), UdpTransport(("127.0.0.1", 0))
+    a.remote, b.remote = b.address, a.address
+    peers = []
+    for side, raw in enumerate((a, b)):
+        link = LossyTransport(raw, latency_ms, jitter_ms, loss, seed=seed * 2 + side, clock=clock)
+        session = RollbackSession(ArenaSim(seed, "2P"), side, link, input_delay, max_rollback, clock=clock)
+        peers.append((session, _Bot(seed * 2 + side), [0]))
+
+    t0 = time.monotonic()
+    ticks = 0
+    while ticks < seconds * TICK_RATE and not all(session.finished for session, _, _ in peers):
+        for session, bot, pending in peers:
+            if not pending[0]:
+                pending[0] = bot.input(session.sim, session.side) or 0
+            if session.advance(pending[0]):
+                pending[0] = 0
+        ticks += 1
+        if realtime:
+            time.sleep(max(0.0, t0 + ticks * DT - time.monotonic()))
+        else:
+            now[0] += DT
+    # ניקוז: עוד כמה סיבובים בלי קלט חדש, כדי שהחבילות האחרונות יגיעו
+    for _ in range(int((latency_ms + jitter_ms) / 1000 / DT) + 10):
+        for session, _, _ in peers:
+            session.sync()
+        if realtime:
+            time.sleep(DT)
+        else:
+            now[0] += DT
+
+    replays = [session.replay() for session, _, _ in peers]
+    common = min(r.ticks for r in replays)
+    result = {
+        "ticks": ticks, "seconds": time.monotonic() - t0,
+        "inputs_match": replays[0].inputs[:2 * common] == replays[1].inputs[:2 * common],
+        "confirmed_ticks": common, "verify": verify(replays[0]), "replay": replays[0], "peers": [],
+    }
+    for session, _, _ in peers:
+        link = session.transport
+        result["peers"].append({
+            "side": session.side + 1, "frame": session.frame, "finished": session.finished,
+            "winner_side": session.sim.winner_side, "state_hash": session.sim.state_hash(),
+            "rollbacks": session.rollbacks, "rollback_frames": session.rollback_frames,
+            "max_depth": session.max_depth, "stalls": session.stalls, "sync_waits": session.sync_waits,
+            "rtt_ms": session.rtt_ms, "desync_frame": session.desync_frame,
+            "sent": link.sent, "dropped": link.dropped,
+        })
+        session.close()
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="2-player arena fights over UDP with rollback netcode")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_link(p):
+        p.add_argument("--latency", type=float, default=0, help="simulated one-way latency (ms)")
+        p.add_argument("--jitter", type=float, default=0, help="simulated latency jitter (ms)")
+        p.add_argument("--loss", type=float, default=0.0, help="simulated outgoing packet loss (0-1)")
+
+    p = sub.add_parser("host", help="wait for an opponent (you are player 1)")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--fighters", type=int, nargs=2, metavar="ID", help="fighter ids (default: first two)")
+    p.add_argument("--delay", type=int, default=2, help="input delay in ticks")
+    p.add_argument("--db", default="ufc_v3.db")
+    add_link(p)
+    p = sub.add_parser("join", help="join a host (you are player 2)")
+    p.add_argument("address", help="HOST[:PORT]")
+    p.add_argument("--db", default="ufc_v3.db")
+    add_link(p)
+    p = sub.add_parser("loopback", help="headless two-peer test on 127.0.0.1")
+    p.add_argument("--seconds", type=float, default=30)
+    p.add_argument("--delay", type=int, default=2)
+    p.add_argument("--max-rollback", type=int, default=8)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--realtime", action="store_true", help="pace at 60 ticks/s instead of a virtual clock")
+    p.add_argument("--save", help="write the confirmed inputs as a replay file")
+    add_link(p)
+    args = parser.parse_args(argv)
+    link = {"latency_ms": args.latency, "jitter_ms": args.jitter, "loss": args.loss}
+
+    if args.command == "loopback":
+        r = loopback(args.seconds, args.latency, args.jitter, args.loss, args.delay, args.max_rollback,
+                     args.seed, args.realtime)
+        print(f"{r['ticks']} ticks in {r['seconds']:.1f}s, link {args.latency:g}ms +-{args.jitter:g}ms one way, "
+              f"{args.loss * 100:g}% loss, input delay {args.delay} ({args.delay * DT * 1000:.0f} ms local latency)")
+        for p in r["peers"]:
+            print(f"  P{p['side']}: frame {p['frame']}, rtt {p['rtt_ms']:.0f} ms, {p['rollbacks']} rollbacks "
+                  f"({p['rollback_frames']} frames resimulated, max depth {p['max_depth']}), {p['stalls']} stalls, "
+                  f"{p['sync_waits']} sync waits, {p['dropped']}/{p['sent']} packets dropped, "
+                  f"desync {p['desync_frame'] or '-'}, winner {p['winner_side'] or '-'}")
+        v = r["verify"]
+        same_end = len({(p["state_hash"], p["winner_side"]) for p in r["peers"]}) == 1
+        print(f"  confirmed inputs identical on both peers: {r['inputs_match']} ({r['confirmed_ticks']} ticks); "
+              f"replay verify: {'OK' if v['ok'] else 'FAILED'}; same final state: {same_end}")
+        if args.save:
+            print(f"  saved {r['replay'].save(args.save)}")
+        ok = r["inputs_match"] and v["ok"] and all(p["desync_frame"] is None for p in r["peers"])
+        return 0 if ok else 1
+
+    from ufc_fight_simulator_pygame import App
+    app = App(args.db)
+    app.wait_for_roster()
+    if args.command == "host":
+        if args.fighters:
+            f1, f2 = (app.repo.get_fighter_by_id(fid) for fid in args.fighters)
+        else:
+            f1, f2 = app.roster.get(0), app.roster.get(1)
+        if f1 is None or f2 is None:
+            print("need two fighters (see --fighters)", file=sys.stderr)
+            return 1
+        print(f"{f1.name} vs {f2.name} - waiting for an opponent on UDP port {args.port}...")
+        match = host(args.port, None, (f1.fighter_id, f2.fighter_id), (f1.name, f2.name), args.delay,
+                     profiles=(fighter_profile(f1), fighter_profile(f2)), **link)
+    else:
+        print(f"joining {args.address}...")
+        match = join(args.address, **link)
+    app.start_net_fight(match)
+    app.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
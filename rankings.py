@@ -0,0 +1,272 @@
+"""
+Rankings
+דירוגים לכל קטגוריית משקל, בזיכרון: לכל (קטגוריה, סדר) רשימה ממוינת של מפתחות
+שמתעדכנת ב-bisect (הסרה + insort) כשלוחם משתנה - אף פעם לא ממיינים מחדש את כל הקטגוריה
+
+מדגים: bisect, תבנית Observer (מאזין על ה-Repository), נעילה לשימוש מכמה threads
+
+שימוש:
+    rankings = Rankings(repo)              # טעינה ראשונית + הרשמה לשינויים
+    rankings.top("Lightweight", 15)        # 15 הראשונים לפי דירוג
+    rankings.rank_of(42, order="record")   # המקום של לוחם 42 בקטגוריה שלו
+
+    python rankings.py --db ufc_v3.db --updates 10000   # מדידת זמנים
+"""
+
+import argparse
+import contextlib
+import random
+import sys
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import List, Optional
+
+from rating_system import DEFAULT_RATING, DEFAULT_RD, conservative_rating
+
+# סדרי דירוג: rating - Glicko שמרני, record - מאזן ניצחונות/הפסדים, skill - overall_skill
+ORDERS = ("rating", "record", "skill")
+
+
+class _Entry:
+    """מה שצריך כדי לחשב מפתחות ולהציג שורה - בלי להחזיק את אובייקט ה-Fighter"""
+    __slots__ = ("fighter_id", "name", "weight_class", "wins", "losses", "draws", "skill", "rating", "rd")
+
+    def __init__(self, fighter_id, name, weight_class, wins, losses, draws, skill,
+                 rating=DEFAULT_RATING, rd=DEFAULT_RD):
+        self.fighter_id = fighter_id
+        self.name = name
+        self.weight_class = weight_class
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+        self.skill = skill
+        self.rating = rating
+        self.rd = rd
+
+    def key(self, order: str) -> tuple:
+        """מפתח מיון עולה (ערכים שליליים = הגבוה ראשון); fighter_id שובר שוויון"""
+        if order == "rating":
+            return -conservative_rating(self.rating, self.rd), self.fighter_id
+        if order == "record":
+            return self.losses - self.wins, -self.wins, self.fighter_id
+        return -self.skill, self.fighter_id
+
+    def to_dict(self) -> dict:
+        return {
+            "fighter_id": self.fighter_id, "name": self.name, "weight_class": self.weight_class,
+            "wins": self.wins, "losses": self.losses, "draws": self.draws,
+            "skill": round(self.skill, 1), "rating": round(self.rating, 1), "rd": round(self.rd, 1),
+        }
+
+
+class Ladder:
+    """רשימה ממוינת אחת: הכנסה/הסרה/מקום ב-O(log n) חיפוש (+ הזזה של זיכרון רציף)"""
+
+    def __init__(self, keys=()):
+        self._keys = sorted(keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def insert(self, key: tuple):
+        insort(self._keys, key)
+
+    def remove(self, key: tuple) -> bool:
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            del self._keys[i]
+            return True
+        return False
+
+    def rank(self, key: tuple) -> int:
+        """מקום (מ-1) של מפתח שנמצא ברשימה"""
+        return bisect_left(self._keys, key) + 1
+
+    def top(self, n: int) -> List[tuple]:
+        return self._keys[:n]
+
+
+class Rankings:
+    """
+    כל הדירוגים של כל הקטגוריות. מקבל עדכונים מה-Repository (add_listener),
+    כך שכתיבה דרך אותו Repository - update_fighter, save_fight_batch, מחיקה - מתעדכנת מיד.
+    כתיבות של תהליכים אחרים (עובדי job_runner) לא נראות כאן עד reload()
+    """
+
+    def __init__(self, repo=None):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._ladders = {}
+        self._repo = None
+        if repo is not None:
+            self.attach(repo)
+
+    def attach(self, repo):
+        """הרשמה לשינויים וטעינה; עדכון שמגיע בזמן הטעינה מחכה לנעילה ומוחל אחריה"""
+        self._repo = repo
+        repo.add_listener(self._on_change)
+        self.reload()
+
+    def detach(self):
+        if self._repo is not None:
+            self._repo.remove_listener(self._on_change)
+            self._repo = None
+
+    def reload(self):
+        """טעינה מלאה מהמסד (פעם אחת בהתחלה, או אחרי 'reset') - מיון אחד לכל רשימה"""
+        repo = self._repo
+        with self._lock:
+            entries = {f.fighter_id: _Entry(f.fighter_id, f.name, f.weight_class, f.wins, f.losses,
+                                            f.draws, f.overall_skill)
+                       for f in repo.iter_fighters(batch_size=2000)}
+            for fighter_id, rating, rd in repo.iter_ratings():
+                entry = entries.get(fighter_id)
+                if entry is not None:
+                    entry.rating, entry.rd = rating, rd
+            keys = {}
+            for entry in entries.values():
+                for order in ORDERS:
+                    keys.setdefault((entry.weight_class, order), []).append(entry.key(order))
+            self._entries = entries
+            self._ladders = {slot: Ladder(slot_keys) for slot, slot_keys in keys.items()}
+
+    # ----- עדכונים מצטברים -----
+    def _unlink(self, entry: _Entry):
+        for order in ORDERS:
+            self._ladders[(entry.weight_class, order)].remove(entry.key(order))
+
+    def _link(self, entry: _Entry):
+        for order in ORDERS:
+            ladder = self._ladders.get((entry.weight_class, order))
+            if ladder is None:
+                ladder = self._ladders[(entry.weight_class, order)] = Ladder()
+            ladder.insert(entry.key(order))
+
+    def update_fighter(self, fighter):
+        """לוחם חדש או מעודכן (רקורד, סטטיסטיקות, שם, קטגוריה)"""
+        with self._lock:
+            entry = self._entries.get(fighter.fighter_id)
+            if entry is None:
+                entry = self._entries[fighter.fighter_id] = _Entry(
+                    fighter.fighter_id, fighter.name, fighter.weight_class,
+                    fighter.wins, fighter.losses, fighter.draws, fighter.overall_skill)
+                self._link(entry)
+                return
+            self._unlink(entry)
+            entry.name, entry.weight_class = fighter.name, fighter.weight_class
+            entry.wins, entry.losses, entry.draws = fighter.wins, fighter.losses, fighter.draws
+            entry.skill = fighter.overall_skill
+            self._link(entry)
+
+    def update_rating(self, fighter_id: int, rating: float, rd: float):
+        """רק הרשימה של סדר 'rating' זזה"""
+        with self._lock:
+            entry = self._entries.get(fighter_id)
+            if entry is None:
+                return
+            ladder = self._ladders[(entry.weight_class, "rating")]
+            ladder.remove(entry.key("rating"))
+            entry.rating, entry.rd = rating, rd
+            ladder.insert(entry.key("rating"))
+
+    def remove(self, fighter_id: int):
+        with self._lock:
+            entry = self._entries.pop(fighter_id, None)
+            if entry is not None:
+                self._unlink(entry)
+
+    def _on_change(self, event: str, payload):
+        if event == "fighters":
+            for fighter in payload:
+                self.update_fighter(fighter)
+        elif event == "ratings":
+            for fighter_id, (rating, rd) in payload.items():
+                self.update_rating(fighter_id, rating, rd)
+        elif event == "deleted":
+            self.remove(payload)
+        elif event == "reset":
+            self.reload()
+
+    # ----- שאילתות -----
+    def rank_of(self, fighter_id: int, order: str = "rating") -> Optional[int]:
+        """המקום של הלוחם בקטגוריה שלו (מ-1), או None אם לא קיים"""
+        with self._lock:
+            entry = self._entries.get(fighter_id)
+            if entry is None:
+                return None
+            return self._ladders[(entry.weight_class, order)].rank(entry.key(order))
+
+    def top(self, weight_class: str, n: int = 15, order: str = "rating") -> List[dict]:
+        """n הראשונים בקטגוריה, כולל המקום"""
+        if order not in ORDERS:
+            raise ValueError(f"unknown order '{order}' (one of: {', '.join(ORDERS)})")
+        with self._lock:
+            ladder = self._ladders.get((weight_class, order))
+            if ladder is None:
+                return []
+            return [dict(self._entries[key[-1]].to_dict(), rank=i)
+                    for i, key in enumerate(ladder.top(n), 1)]
+
+    def division_size(self, weight_class: str) -> int:
+        with self._lock:
+            ladder = self._ladders.get((weight_class, ORDERS[0]))
+            return len(ladder) if ladder else 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def weight_classes(self) -> List[str]:
+        with self._lock:
+            return sorted({weight_class for weight_class, _ in self._ladders})
+
+
+def main(argv=None) -> int:
+    from models.repository import Repository
+
+    parser = argparse.ArgumentParser(description="Benchmark incremental weight-class rankings")
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--updates", type=int, default=10000, help="random record/rating changes to apply")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        repo = Repository(args.db)
+    t0 = time.perf_counter()
+    rankings = Rankings(repo)
+    print(f"load: {len(rankings)} fighters, {len(rankings.weight_classes())} divisions "
+          f"in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    if len(rankings) < 2:
+        return 1
+
+    # עדכונים בזיכרון בלבד (בלי לכתוב למסד) - כמו שהמאזין מקבל אותם
+    rng = random.Random(args.seed)
+    ids = repo.get_fighter_ids()
+    fighters = repo.get_fighters_by_ids(rng.sample(ids, min(2000, len(ids))))
+    t0 = time.perf_counter()
+    for _ in range(args.updates):
+        fighter = rng.choice(fighters)
+        if rng.random() < 0.5:
+            fighter.add_win()
+        else:
+            fighter.add_loss()
+        rankings.update_fighter(fighter)
+        rankings.update_rating(fighter.fighter_id, rng.uniform(1200, 1800), rng.uniform(50, 350))
+    per_update = (time.perf_counter() - t0) * 1e6 / args.updates
+    print(f"update (record + rating, all orders): {per_update:.1f} us each")
+
+    for name, fn in (("top 15", lambda f: rankings.top(f.weight_class, 15)),
+                     ("rank_of", lambda f: rankings.rank_of(f.fighter_id, rng.choice(ORDERS)))):
+        samples = []
+        for _ in range(2000):
+            fighter = rng.choice(fighters)
+            t0 = time.perf_counter()
+            fn(fighter)
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        print(f"{name:<8} p50 {samples[len(samples) // 2]:.4f} ms  max {samples[-1]:.4f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Rating System
+דירוג Glicko (גרסה 1) ללוחמים: rating + rating deviation (RD, כמה אנחנו לא בטוחים בדירוג)
+כל קרב הוא "תקופת דירוג" של משחק אחד, כך שעדכון הוא O(1) - שני לוחמים, בלי לעבור על ההיסטוריה
+מדגים: פונקציות טהורות (בלי מסד נתונים), שימוש חוזר גם בעדכון מצטבר וגם בבנייה מחדש
+"""
+
+import math
+from typing import Optional
+
+DEFAULT_RATING = 1500.0
+DEFAULT_RD = 350.0
+MIN_RD = 30.0
+MAX_RD = DEFAULT_RD
+# כמה אי-ודאות נוספת לפני כל קרב (לוחם שלא נלחם הרבה זמן - פחות בטוחים בו)
+RD_INFLATION = 10.0
+
+_Q = math.log(10) / 400.0
+
+
+def _g(rd: float) -> float:
+    return 1.0 / math.sqrt(1.0 + 3.0 * _Q * _Q * rd * rd / (math.pi * math.pi))
+
+
+def expected_score(rating: float, opp_rating: float, opp_rd: float) -> float:
+    """הסיכוי (0-1) של לוחם לנצח יריב, בהתחשב באי-הוודאות בדירוג של היריב"""
+    return 1.0 / (1.0 + 10.0 ** (-_g(opp_rd) * (rating - opp_rating) / 400.0))
+
+
+def _update_one(rating: float, rd: float, opp_rating: float, opp_rd: float, score: float) -> tuple:
+    rd = min(math.sqrt(rd * rd + RD_INFLATION * RD_INFLATION), MAX_RD)
+    g = _g(opp_rd)
+    e = expected_score(rating, opp_rating, opp_rd)
+    d2_inv = _Q * _Q * g * g * e * (1.0 - e)
+    denom = 1.0 / (rd * rd) + d2_inv
+    new_rating = rating + (_Q / denom) * g * (score - e)
+    new_rd = max(math.sqrt(1.0 / denom), MIN_RD)
+    return new_rating, new_rd
+
+
+def rate_fight(r1: float, rd1: float, r2: float, rd2: float, winner: Optional[int]) -> tuple:
+    """
+    עדכון אחרי קרב אחד; שני הצדדים מתעדכנים לפי הערכים שלפני הקרב
+
+    Args:
+        winner: 0 - הראשון ניצח, 1 - השני ניצח, None / -1 - תיקו
+
+    Returns:
+        tuple: (r1, rd1, r2, rd2) החדשים
+    """
+    score1 = 0.5 if winner in (None, -1) else 1.0 - winner
+    new_r1, new_rd1 = _update_one(r1, rd1, r2, rd2, score1)
+    new_r2, new_rd2 = _update_one(r2, rd2, r1, rd1, 1.0 - score1)
+    return new_r1, new_rd1, new_r2, new_rd2
+
+
+def conservative_rating(rating: float, rd: float) -> float:
+    """דירוג "בטוח" לדירוגים: מי שנלחם מעט (RD גבוה) לא קופץ לראש הטבלה"""
+    return rating - 2.0 * rd
@@ -0,0 +1,354 @@
+"""
+Replay
+הקלטה והפעלה חוזרת של קרבות זירה (arena_sim): רק ה-seed והקלט של שני השחקנים בכל טיק.
+הקובץ בינארי ודחוס ב-RLE (קלט חוזר על עצמו הרבה טיקים ברצף) - כמה KB לקרב, לא וידאו.
+כל CHECK_EVERY טיקים נשמר checksum של המצב, כך ש-verify מוצא את השנייה הראשונה שבה
+ההפעלה החוזרת סוטה מהמקור (למשל אחרי שינוי בלוגיקת הקרב)
+
+מבנה הקובץ (little-endian):
+    כותרת    magic 'UFCR', גרסה, mode, seed (u64), מזהי הלוחמים (i32, -1 = אין)
+    שמות     לכל לוחם: אורך (u8) + UTF-8
+    פרופילים לכל לוחם: סגנון + הסטטיסטיקות (u8 כל אחד, move_table) - מגרסה 2
+    קלט      מספר רצפים (u32), ולכל רצף: אורך (u16), קלט שחקן 1, קלט שחקן 2
+    סיום     מספר טיקים (u32), מנצח (0/1/2), checksum סופי (u32)
+    בדיקות   מספר checksums (u32) + checksum (u32) בכל CHECK_EVERY טיקים
+
+שימוש:
+    python replay.py record --mode SIM --seed 7 --out fight.ufcr   # קרב מחשב מול מחשב בלי חלון
+    python replay.py info fight.ufcr
+    python replay.py verify replays/*.ufcr                         # הרצה מחדש בלי חלון
+    python replay.py play fight.ufcr --db ufc_v3.db                # צפייה, עם קפיצה והרצה מהירה
+    python replay_render.py fight.ufcr --out fight.gif             # וידאו בלי חלון (GIF / PNG)
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from arena_sim import MODES, TICK_RATE, ArenaSim
+from fighter import Fighter
+from move_table import NEUTRAL_PROFILE, STYLES
+
+MAGIC = b"UFCR"
+VERSION = 2  # 1 - בלי פרופילים (נקרא כלוחמים ניטרליים)
+CHECK_EVERY = TICK_RATE        # checksum לכל שנייה של קרב
+KEYFRAME_EVERY = 5 * TICK_RATE  # snapshot לקפיצה אחורה, כל 5 שניות
+MAX_RUN = 0xFFFF
+REPLAY_DIR = "replays"
+
+_HEADER = struct.Struct("<4sBBQii")
+_COUNT = struct.Struct("<I")
+_RUN = struct.Struct("<HBB")
+_TRAILER = struct.Struct("<IBI")
+_PROFILE = struct.Struct(f"<{len(NEUTRAL_PROFILE)}B")
+
+
+class Replay:
+    """הקלטה אחת בזיכרון; inputs - שני בתים לכל טיק (שחקן 1, שחקן 2)"""
+
+    def __init__(self, seed: int, mode: str, fighter_ids=(None, None), names=("", ""),
+                 inputs=b"", checks=(), winner_side: int = 0, final_hash: Optional[int] = None,
+                 profiles=None):
+        self.seed = seed
+        self.mode = mode
+        self.fighter_ids = tuple(fighter_ids)
+        self.names = tuple(names)
+        self.profiles = tuple(tuple(p) for p in profiles) if profiles else (NEUTRAL_PROFILE, NEUTRAL_PROFILE)
+        self.inputs = bytearray(inputs)
+        self.checks = list(checks)
+        self.winner_side = winner_side
+        self.final_hash = final_hash
+
+    @property
+    def ticks(self) -> int:
+        return len(self.inputs) // 2
+
+    @property
+    def duration(self) -> float:
+        return self.ticks / TICK_RATE
+
+    def input_at(self, tick: int) -> Tuple[int, int]:
+        """הקלטים של הטיק שמתחיל אחרי tick טיקים"""
+        return self.inputs[2 * tick], self.inputs[2 * tick + 1]
+
+    @property
+    def winner(self) -> Optional[str]:
+        return self.names[self.winner_side - 1] if self.winner_side else None
+
+    def fighters(self, repo=None) -> Tuple[Fighter, Fighter]:
+        """
+        הלוחמים לציור: מהמסד אם הם עוד שם (אותו מזהה ואותו שם), אחרת לוחם גנרי עם השם
+        מההקלטה - הקרב עצמו לא תלוי במסד: הסגנון והסטטיסטיקות שמורים ב-profiles
+        """
+        fighters = []
+        for fighter_id, name in zip(self.fighter_ids, self.names):
+            f = repo.get_fighter_by_id(fighter_id) if repo is not None and fighter_id is not None else None
+            if f is None or f.name != name:
+                f = Fighter(fighter_id or 0, name or "?", "")
+            fighters.append(f)
+        return fighters[0], fighters[1]
+
+    def runs(self) -> List[Tuple[int, int, int]]:
+        """(אורך, קלט 1, קלט 2) לכל רצף של טיקים עם אותו קלט"""
+        runs = []
+        data = self.inputs
+        for i in range(0, len(data), 2):
+            in1, in2 = data[i], data[i + 1]
+            if runs and runs[-1][1] == in1 and runs[-1][2] == in2 and runs[-1][0] < MAX_RUN:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, in1, in2])
+        return [tuple(run) for run in runs]
+
+    # ----- קובץ -----
+    def to_bytes(self) -> bytes:
+        id1, id2 = (-1 if fid is None else fid for fid in self.fighter_ids)
+        parts = [_HEADER.pack(MAGIC, VERSION, MODES.index(self.mode), self.seed, id1, id2)]
+        for name in self.names:
+            raw = (name or "").encode("utf-8")[:255]
+            parts.append(bytes((len(raw),)) + raw)
+        parts.extend(_PROFILE.pack(*profile) for profile in self.profiles)
+        runs = self.runs()
+        parts.append(_COUNT.pack(len(runs)))
+        parts.extend(_RUN.pack(*run) for run in runs)
+        parts.append(_TRAILER.pack(self.ticks, self.winner_side, self.final_hash or 0))
+        parts.append(_COUNT.pack(len(self.checks)))
+        parts.append(struct.pack(f"<{len(self.checks)}I", *self.checks))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Replay":
+        try:
+            magic, version, mode, seed, id1, id2 = _HEADER.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError("not a replay file")
+            if not 1 <= version <= VERSION:
+                raise ValueError(f"unsupported replay version {version}")
+            if mode >= len(MODES):
+                raise ValueError(f"corrupt replay file: unknown mode {mode}")
+            pos = _HEADER.size
+            names = []
+            for _ in range(2):
+                size = data[pos]
+                names.append(data[pos + 1:pos + 1 + size].decode("utf-8"))
+                pos += 1 + size
+            profiles = None
+            if version >= 2:
+                profiles = (_PROFILE.unpack_from(data, pos), _PROFILE.unpack_from(data, pos + _PROFILE.size))
+                if any(p[0] >= len(STYLES) for p in profiles):
+                    raise ValueError("corrupt replay file: unknown fighter style")
+                pos += 2 * _PROFILE.size
+            (count,), pos = _COUNT.unpack_from(data, pos), pos + _COUNT.size
+            inputs = bytearray()
+            for length, in1, in2 in _RUN.iter_unpack(data[pos:pos + count * _RUN.size]):
+                inputs += bytes((in1, in2)) * length
+            pos += count * _RUN.size
+            ticks, winner_side, final_hash = _TRAILER.unpack_from(data, pos)
+            pos += _TRAILER.size
+            (count,), pos = _COUNT.unpack_from(data, pos), pos + _COUNT.size
+            checks = struct.unpack_from(f"<{count}I", data, pos)
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"corrupt replay file: {e}") from e
+        if len(inputs) != 2 * ticks:
+            raise ValueError(f"corrupt replay file: {len(inputs) // 2} input ticks, header says {ticks}")
+        # checksum 0 = לא נשמר (הקלטה שנעצרה לפני שהסוף היה ידוע)
+        return cls(seed, MODES[mode], (None if id1 < 0 else id1, None if id2 < 0 else id2), names,
+                   inputs, checks, winner_side, final_hash or None, profiles)
+
+    def save(self, path: Optional[str] = None) -> str:
+        """שמירה (ברירת מחדל: replays/<תאריך>-<seed>.ufcr); מחזיר את הנתיב"""
+        if path is None:
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            path = os.path.join(REPLAY_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{self.seed}.ufcr")
+        with open(path, "wb") as fh:
+            fh.write(self.to_bytes())
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with open(path, "rb") as fh:
+            return cls.from_bytes(fh.read())
+
+
+class ReplayRecorder:
+    """מריץ טיקים של sim ורושם את הקלטים שהופעלו בפועל (כולל החלטות ה-AI)"""
+
+    def __init__(self, sim: ArenaSim, fighter_ids=(None, None), names=("", "")):
+        self.sim = sim
+        self.replay = Replay(sim.seed, sim.mode, fighter_ids, names, profiles=sim.profiles)
+
+    def tick(self, in1: int = 0, in2: int = 0):
+        sim = self.sim
+        if sim.over:
+            sim.step(0, 0)
+            return
+        in1, in2 = sim.tick_inputs(in1, in2)
+        sim.step(in1, in2)
+        replay = self.replay
+        replay.inputs += bytes((in1, in2))
+        if sim.tick % CHECK_EVERY == 0:
+            replay.checks.append(sim.state_hash())
+        if sim.over:
+            self.finish()
+
+    def finish(self) -> Replay:
+        """סגירת ההקלטה (גם לקרב שנעצר באמצע)"""
+        self.replay.winner_side = self.sim.winner_side
+        self.replay.final_hash = self.sim.state_hash()
+        return self.replay
+
+
+class ReplayPlayer:
+    """
+    הפעלה חוזרת של Replay על sim (ברירת מחדל - ArenaSim חדש). ה-AI לא רץ: הקלטים שלו בקובץ.
+    seek אחורה חוזר ל-snapshot הקרוב (נשמרים תוך כדי הפעלה) ומריץ קדימה ממנו
+    """
+
+    def __init__(self, replay: Replay, sim: Optional[ArenaSim] = None):
+        self.replay = replay
+        self.sim = sim if sim is not None else ArenaSim(replay.seed, replay.mode, replay.profiles)
+        self.keyframes = {0: self.sim.snapshot()}
+        self.desync_tick = None
+
+    @property
+    def tick(self) -> int:
+        return self.sim.tick
+
+    @property
+    def at_end(self) -> bool:
+        # קובץ ששונה יכול לסיים את הקרב לפני הטיק האחרון שבו - אחרי over הטיק לא מתקדם
+        return self.sim.tick >= self.replay.ticks or self.sim.over
+
+    def step(self) -> bool:
+        sim = self.sim
+        if self.at_end:
+            sim.prev_x1, sim.prev_x2 = sim.x1, sim.x2
+            return False
+        sim.step(*self.replay.input_at(sim.tick))
+        tick = sim.tick
+        if tick % KEYFRAME_EVERY == 0 and tick not in self.keyframes:
+            self.keyframes[tick] = sim.snapshot()
+        if tick % CHECK_EVERY == 0:
+            i = tick // CHECK_EVERY - 1
+            if i < len(self.replay.checks) and self.replay.checks[i] != sim.state_hash() \
+                    and self.desync_tick is None:
+                self.desync_tick = tick
+        return True
+
+    def seek(self, tick: int):
+        tick = max(0, min(tick, self.replay.ticks))
+        base = max(k for k in self.keyframes if k <= tick)
+        if tick < self.sim.tick or base > self.sim.tick:
+            self.sim.restore(self.keyframes[base])
+        while self.sim.tick < tick and self.step():
+            pass
+        self.sim.prev_x1, self.sim.prev_x2 = self.sim.x1, self.sim.x2
+
+
+def verify(replay: Replay) -> dict:
+    """הרצה מחדש של כל ההקלטה בלי חלון והשוואה ל-checksums שנשמרו"""
+    t0 = time.perf_counter()
+    player = ReplayPlayer(replay)
+    while player.step():
+        pass
+    sim = player.sim
+    final_ok = replay.final_hash is None or sim.state_hash() == replay.final_hash
+    desync = player.desync_tick
+    if desync is None and not final_ok:
+        desync = sim.tick
+    return {
+        "ok": desync is None and sim.winner_side == replay.winner_side,
+        "ticks": sim.tick, "desync_tick": desync,
+        "winner_side": sim.winner_side, "expected_winner_side": replay.winner_side,
+        "elapsed_ms": (time.perf_counter() - t0) * 1000,
+    }
+
+
+def record_headless(mode: str = "SIM", seed: Optional[int] = None, max_seconds: float = 300) -> Replay:
+    """קרב שלם בלי חלון (במצב CPU שחקן 1 לא זז) - להקלטות בדיקה ודיווחי באגים"""
+    sim = ArenaSim(seed, mode)
+    recorder = ReplayRecorder(sim, names=("Player 1", "Player 2"))
+    for _ in range(int(max_seconds * TICK_RATE)):
+        if sim.over:
+            break
+        recorder.tick()
+    return recorder.finish()
+
+
+def _describe(replay: Replay) -> str:
+    names = " vs ".join(name or "?" for name in replay.names)
+    return (f"{names} [{replay.mode}] seed {replay.seed}: {replay.ticks} ticks ({replay.duration:.1f}s), "
+            f"{len(replay.runs())} input runs, winner {replay.winner or '-'}")
+
+
+def _parse_seed(text: str) -> int:
+    # ה-seed נשמר בכותרת כ-u64
+    try:
+        seed = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"seed must be an integer, got '{text}'")
+    if not 0 <= seed < 2 ** 64:
+        raise argparse.ArgumentTypeError("seed must be between 0 and 2**64-1")
+    return seed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Record, inspect, verify and play arena fight replays")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("record", help="record a headless fight")
+    p.add_argument("--mode", choices=MODES, default="SIM")
+    p.add_argument("--seed", type=_parse_seed)
+    p.add_argument("--max-seconds", type=float, default=300)
+    p.add_argument("--out")
+    p = sub.add_parser("info", help="show replay header")
+    p.add_argument("files", nargs="+")
+    p = sub.add_parser("verify", help="re-simulate headless and compare checksums")
+    p.add_argument("files", nargs="+")
+    p = sub.add_parser("play", help="watch a replay in the pygame window")
+    p.add_argument("file")
+    p.add_argument("--db", default="ufc_v3.db")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        replay = record_headless(args.mode, args.seed, args.max_seconds)
+        path = replay.save(args.out)
+        print(f"{path}: {_describe(replay)}, {os.path.getsize(path)} bytes")
+        return 0
+
+    if args.command == "play":
+        from ufc_fight_simulator_pygame import App
+        app = App(args.db)
+        app.wait_for_roster()
+        app.watch_replay(Replay.load(args.file))
+        app.run()
+        return 0
+
+    failed = 0
+    for path in args.files:
+        try:
+            replay = Replay.load(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}")
+            failed += 1
+            continue
+        if args.command == "info":
+            print(f"{path}: {_describe(replay)}, {os.path.getsize(path)} bytes")
+            continue
+        result = verify(replay)
+        if result["ok"]:
+            print(f"{path}: OK {result['ticks']} ticks in {result['elapsed_ms']:.1f} ms, winner {replay.winner or '-'}")
+        else:
+            failed += 1
+            where = (f"desync at tick {result['desync_tick']} ({result['desync_tick'] / TICK_RATE:.1f}s)"
+                     if result["desync_tick"] is not None else
+                     f"winner {result['winner_side']} != {result['expected_winner_side']}")
+            print(f"{path}: FAILED - {where}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Replay Render
+רינדור של הקלטת קרב (replay.py) לסדרת PNG או ל-GIF מונפש, בלי חלון (SDL dummy driver):
+FightArena.draw מצייר על Surface רגיל, בכל frame_step טיקים, ברזולוציה שנבחרה
+
+הפריימים מחולקים לטווחים רציפים ונפרדים, וכל תהליך עובד מריץ את ההקלטה עד תחילת הטווח שלו
+ומרנדר רק אותו. שום תהליך לא מחזיק יותר מפריים אחד (+ הקודם, להפרש ב-GIF) בזיכרון:
+PNG נכתב ישר לקובץ, ו-GIF נכתב לקובץ חלק לכל טווח ומשורשר לפי הסדר בסוף
+
+GIF בלי ספריות חיצוניות: פלטה קבועה 6x7x6, כימות ב-bytes.translate (לכל ערוץ) וחיבור
+של שלושת הערוצים כמספרים שלמים גדולים, LZW משלנו, וכל פריים שומר רק את המלבן שהשתנה
+
+שימוש:
+    python replay_render.py fight.ufcr --out fight.gif --size 640x360 --frame-step 3 --workers 4
+    python replay_render.py fight.ufcr --format png --out frames/ --db ufc_v3.db
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import multiprocessing
+import shutil
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Optional, Tuple
+
+from arena_sim import TICK_RATE
+from replay import Replay
+
+FORMATS = ("gif", "png")
+FINAL_HOLD_CS = 200  # הפריים האחרון של GIF נשאר 2 שניות
+
+# פלטה קבועה: 6 רמות אדום x 7 ירוק x 6 כחול = 252 צבעים (העין רגישה יותר לירוק)
+_LEVELS = (6, 7, 6)
+_WEIGHTS = (_LEVELS[1] * _LEVELS[2], _LEVELS[2], 1)
+PALETTE = bytes(
+    round(i * 255 / (n - 1))
+    for r in range(_LEVELS[0]) for g in range(_LEVELS[1]) for b in range(_LEVELS[2])
+    for i, n in zip((r, g, b), _LEVELS)
+).ljust(256 * 3, b"\0")
+# לכל ערוץ: ערך 0-255 -> (הרמה הקרובה) * המשקל שלה באינדקס; סכום שלושת הערוצים <= 251
+_CHANNEL_TABLES = tuple(bytes(round(v * (n - 1) / 255) * w for v in range(256)) for n, w in zip(_LEVELS, _WEIGHTS))
+
+
+# ----- GIF -----
+def quantize(rgb: bytes) -> bytes:
+    """RGB (3 בתים לפיקסל) -> אינדקס בפלטה (בית לפיקסל), בלי לולאה בפייתון לכל פיקסל"""
+    pixels = len(rgb) // 3
+    total = 0
+    for channel, table in enumerate(_CHANNEL_TABLES):
+        # כל בית בנפרד קטן מ-256 גם אחרי החיבור, ולכן חיבור המספרים לא גולש בין בתים
+        total += int.from_bytes(rgb[channel::3].translate(table), "little")
+    return total.to_bytes(pixels, "little")
+
+
+def lzw_encode(data: bytes, min_code_size: int = 8) -> bytes:
+    """דחיסת LZW של GIF (קודים באורך משתנה 9-12 ביט, clear כשהטבלה מתמלאת)"""
+    clear, eoi = 1 << min_code_size, (1 << min_code_size) + 1
+    size, next_code = min_code_size + 1, eoi + 1
+    table = {}
+    out = bytearray()
+    acc, nbits = clear, size
+    prefix = data[0]
+    for byte in data[1:]:
+        key = prefix << 8 | byte
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        acc |= prefix << nbits
+        nbits += size
+        while nbits >= 8:
+            out.append(acc & 0xFF)
+            acc >>= 8
+            nbits -= 8
+        table[key] = next_code
+        if next_code == 1 << size and size < 12:
+            size += 1
+        next_code += 1
+        if next_code == 4096:
+            acc |= clear << nbits
+            nbits += size
+            table.clear()
+            size, next_code = min_code_size + 1, eoi + 1
+        prefix = byte
+    for code in (prefix, eoi):
+        acc |= code << nbits
+        nbits += size
+    while nbits > 0:
+        out.append(acc & 0xFF)
+        acc >>= 8
+        nbits -= 8
+    return bytes(out)
+
+
+def _sub_blocks(data: bytes) -> bytes:
+    return b"".join(bytes((len(data[i:i + 255]),)) + data[i:i + 255] for i in range(0, len(data), 255)) + b"\0"
+
+
+def gif_header(width: int, height: int) -> bytes:
+    """כותרת, פלטה גלובלית ולולאה אינסופית (NETSCAPE2.0)"""
+    return (b"GIF89a" + struct.pack("<HHBBB", width, height, 0xF7, 0, 0) + PALETTE
+            + b"\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+
+def gif_frame(indices: bytes, width: int, rect: Tuple[int, int, int, int], delay_cs: int) -> bytes:
+    """פריים אחד: רק המלבן rect=(x, y, w, h) מתוך תמונת האינדקסים המלאה; השאר נשאר מהקודם"""
+    x, y, w, h = rect
+    if (x, w) == (0, width):
+        pixels = indices[y * width:(y + h) * width]
+    else:
+        pixels = b"".join(indices[row * width + x:row * width + x + w] for row in range(y, y + h))
+    return (b"\x21\xF9\x04" + struct.pack("<BHBB", 0x04, delay_cs, 0, 0)
+            + b"\x2C" + struct.pack("<HHHHB", x, y, w, h, 0)
+            + b"\x08" + _sub_blocks(lzw_encode(pixels)))
+
+
+def _first_diff(a: bytes, b: bytes) -> int:
+    """האינדקס הראשון שבו שני רצפים באותו אורך שונים (חיפוש בינארי על השוואות slice)"""
+    lo, hi = 0, len(a)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] != b[lo:mid]:
+            hi = mid
+        else:
+            lo = mid
+    return lo
+
+
+def changed_rect(prev: Optional[bytes], cur: bytes, width: int, height: int) -> Tuple[int, int, int, int]:
+    """המלבן הקטן שמכיל את כל הפיקסלים שהשתנו (פיקסל אחד אם אין שינוי - GIF צריך מלבן)"""
+    if prev is None:
+        return 0, 0, width, height
+    rows = [y for y in range(height) if prev[y * width:(y + 1) * width] != cur[y * width:(y + 1) * width]]
+    if not rows:
+        return 0, 0, 1, 1
+    left, right = width, 0
+    for y in rows:
+        a, b = prev[y * width:(y + 1) * width], cur[y * width:(y + 1) * width]
+        left = min(left, _first_diff(a, b))
+        right = max(right, width - _first_diff(a[::-1], b[::-1]))
+    return left, rows[0], right - left, rows[-1] - rows[0] + 1
+
+
+def frame_delay_cs(frame: int, frame_step: int) -> int:
+    """השהיה במאיות שנייה; מעוגלת מצטבר כך שאין סחף בזמן (33,33,34 ל-30fps)"""
+    per = 100 * frame_step / TICK_RATE
+    return round((frame + 1) * per) - round(frame * per)
+
+
+# ----- עובד -----
+_ctx = None
+
+
+class _RenderContext:
+    """מה ש-FightArena.draw צריך מה-App: גופנים ושעון (תמיד במהירות רגילה)"""
+
+    def __init__(self):
+        import pygame
+        from sim_clock import FixedStepClock
+        from ufc_fight_simulator_pygame import SIM_DT, WIDTH, HEIGHT
+        pygame.display.init()
+        pygame.font.init()
+        pygame.display.set_mode((1, 1))  # convert_alpha של רקע הזירה צריך תצוגה
+        self.font_s = pygame.font.Font(None, 20)
+        self.font = pygame.font.Font(None, 26)
+        self.font_b = pygame.font.Font(None, 36)
+        self.sim_clock = FixedStepClock(SIM_DT)
+        self.canvas = pygame.Surface((WIDTH, HEIGHT))
+
+
+def _init_worker():
+    global _ctx
+    if _ctx is None:
+        _ctx = _RenderContext()
+
+
+def _render_range(replay: Replay, fighters, fmt: str, out: str, size: Tuple[int, int], frame_step: int,
+                  start: int, stop: int, n_frames: int) -> Tuple[int, int]:
+    """
+    רינדור הפריימים [start, stop). PNG - ישר ל-out/frame_NNNNN.png; GIF - לקובץ חלק
+    out.partNNNNN (מתחיל בהפרש מהפריים start-1, שמרונדר רק כבסיס)
+
+    Returns:
+        (מספר פריימים, בתים שנכתבו)
+    """
+    import pygame
+    from ufc_fight_simulator_pygame import FightArena
+
+    _init_worker()
+    arena = FightArena(_ctx, fighters[0], fighters[1], replay.mode, replay=replay)
+    arena.hud = False
+    canvas, scaled = _ctx.canvas, None
+    if size != canvas.get_size():
+        scaled = pygame.Surface(size)
+
+    def render(frame):
+        arena.player.seek(min(frame * frame_step, replay.ticks))
+        arena.draw(canvas, (0, 0), alpha=1.0)
+        if scaled is None:
+            return canvas
+        pygame.transform.smoothscale(canvas, size, scaled)
+        return scaled
+
+    written = 0
+    if fmt == "png":
+        for frame in range(start, stop):
+            path = os.path.join(out, f"frame_{frame:05d}.png")
+            pygame.image.save(render(frame), path)
+            written += os.path.getsize(path)
+        return stop - start, written
+
+    width, height = size
+    prev = quantize(pygame.image.tobytes(render(start - 1), "RGB")) if start > 0 else None
+    with open(f"{out}.part{start:05d}", "wb") as fh:
+        for frame in range(start, stop):
+            cur = quantize(pygame.image.tobytes(render(frame), "RGB"))
+            delay = frame_delay_cs(frame, frame_step) + (FINAL_HOLD_CS if frame == n_frames - 1 else 0)
+            written += fh.write(gif_frame(cur, width, changed_rect(prev, cur, width, height), delay))
+            prev = cur
+    return stop - start, written
+
+
+# ----- הרצה -----
+def render_replay(replay: Replay, out: str, fmt: str = "gif", size: Tuple[int, int] = (640, 360),
+                  frame_step: int = 3, workers: Optional[int] = None, repo=None,
+                  progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """
+    רינדור הקלטה שלמה ל-out (קובץ GIF, או תיקייה ל-PNG)
+
+    Args:
+        size: רזולוציית הפלט (הזירה מצוירת ב-1280x720 ומוקטנת)
+        frame_step: פריים כל כמה טיקים (3 = 20fps; ב-GIF השהיה מתחת ל-2/100 שנייה לא נתמכת בדפדפנים)
+        workers: תהליכים (ברירת מחדל - מספר המעבדים); 1 - בתהליך הנוכחי
+        repo: Repository למראה הלוחמים (replay.fighters)
+        progress(done_frames, total_frames) אחרי כל טווח
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown format '{fmt}' (one of: {', '.join(FORMATS)})")
+    frame_step = max(1, frame_step)
+    n_frames = replay.ticks // frame_step + 1
+    workers = max(1, min(workers or os.cpu_count() or 1, n_frames))
+    fighters = replay.fighters(repo)
+    # יותר טווחים מעובדים - איזון עומס; ב-GIF כל טווח עולה פריים בסיס אחד נוסף
+    chunks = min(n_frames, workers * 2) if workers > 1 else 1
+    bounds = [n_frames * i // chunks for i in range(chunks + 1)]
+    tasks = [(replay, fighters, fmt, out, size, frame_step, bounds[i], bounds[i + 1], n_frames)
+             for i in range(chunks)]
+    if fmt == "png":
+        os.makedirs(out, exist_ok=True)
+
+    t0 = time.perf_counter()
+    done = written = 0
+    try:
+        if workers == 1:
+            results = (_render_range(*task) for task in tasks)
+            for count, size_bytes in results:
+                done += count
+                written += size_bytes
+                if progress: progress(done, n_frames)
+        else:
+            # spawn - כל עובד מאתחל SDL משלו
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker) as pool:
+                for future in as_completed([pool.submit(_render_range, *task) for task in tasks]):
+                    count, size_bytes = future.result()
+                    done += count
+                    written += size_bytes
+                    if progress: progress(done, n_frames)
+        if fmt == "gif":
+            with open(out, "wb") as fh:
+                fh.write(gif_header(*size))
+                for i in range(chunks):
+                    with open(f"{out}.part{bounds[i]:05d}", "rb") as part:
+                        shutil.copyfileobj(part, fh)
+                fh.write(b"\x3B")
+            written = os.path.getsize(out)
+    finally:
+        if fmt == "gif":
+            for i in range(chunks):
+                try:
+                    os.remove(f"{out}.part{bounds[i]:05d}")
+                except FileNotFoundError:
+                    pass
+    elapsed = time.perf_counter() - t0
+    return {"frames": n_frames, "bytes": written, "seconds": elapsed, "workers": workers,
+            "fps": n_frames / elapsed if elapsed else 0.0}
+
+
+def _parse_size(text: str) -> Tuple[int, int]:
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"size must look like 640x360, got '{text}'")
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError("size must be positive")
+    return w, h
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Render a fight replay to an animated GIF or PNG frames, headless")
+    parser.add_argument("replay")
+    parser.add_argument("--out", help="GIF file or PNG directory (default: next to the replay)")
+    parser.add_argument("--format", choices=FORMATS, default="gif")
+    parser.add_argument("--size", type=_parse_size, default=(640, 360))
+    parser.add_argument("--frame-step", type=int, default=3, help="ticks per frame (60 ticks = 1s)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--db", help="database for fighter appearance")
+    args = parser.parse_args(argv)
+
+    try:
+        replay = Replay.load(args.replay)
+    except (OSError, ValueError) as e:
+        print(f"{args.replay}: {e}", file=sys.stderr)
+        return 1
+    repo = None
+    if args.db:
+        import contextlib
+        from models.repository import Repository
+        with contextlib.redirect_stdout(sys.stderr):
+            repo = Repository(args.db)
+    out = args.out or os.path.splitext(args.replay)[0] + (".gif" if args.format == "gif" else "_frames")
+
+    def report(done, total):
+        print(f"\r{done}/{total} frames", end="", file=sys.stderr)
+
+    result = render_replay(replay, out, args.format, args.size, args.frame_step, args.workers, repo, report)
+    print(file=sys.stderr)
+    print(f"{out}: {result['frames']} frames {args.size[0]}x{args.size[1]}, {result['bytes'] / 1024:.0f} KB "
+          f"in {result['seconds']:.1f}s ({result['fps']:.1f} frames/s, {result['workers']} workers)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Season
+מצב קריירה: עונה של כמה שנים בלוח שנה - אירוע כל שבוע, שידוך לפי דירוג בתוך כל קטגוריה,
+קרבות על תואר, ומחנות אימון בין אירועים (train_striking / train_grappling /
+train_complete_mma, defend_title לאלוף שמגן בהצלחה)
+
+כל הלוחמים והדירוגים בזיכרון; התוצאות נשמרות ב-save_fight_batch כל commit_every אירועים,
+ואחרי כל שמירה נכתבת נקודת שמירה - כך שעבודת 'season' (job_runner) ממשיכה מאותו אירוע
+
+מדגים: סימולציה מבוססת לוח שנה, rng דטרמיניסטי לכל אירוע, כתיבה במנות עם נקודות שמירה
+
+שימוש:
+    python batch_cli.py job submit season --param years=10 --param seed=7
+    python season.py --db ufc_v3.db --years 10        # ריצה ישירה בחזית
+"""
+
+import argparse
+import contextlib
+import random
+import sys
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+from combat_engine import CombatEngine, fighter_stats, resolve_bout
+from rating_system import DEFAULT_RATING, DEFAULT_RD, conservative_rating, rate_fight
+
+EVENT_INTERVAL_DAYS = 7
+
+
+class Season:
+    """
+    עונה אחת מעל Repository. הפרמטרים זהים ל-params של עבודת 'season':
+
+    Args:
+        years: אורך העונה
+        events_per_year: אירועים בשנה (52 - כל שבוע)
+        fights_per_year: כמה קרבות בשנה ללוחם בממוצע (קובע את מספר הקרבות בכל אירוע)
+        rest_events: כמה אירועים לוחם לא נלחם אחרי קרב
+        title_every: קרב על תואר בכל קטגוריה כל כמה אירועים
+        train_chance: הסיכוי של לוחם להתאמן אחרי קרב
+        commit_every: כמה אירועים בכל שמירה (טרנזקציה אחת + נקודת שמירה)
+        weight_classes: רק הקטגוריות האלה (None - כולן)
+        start: תאריך האירוע הראשון (YYYY-MM-DD)
+        seed: זרע; אותו seed ואותו מסד נותנים אותה עונה, גם אחרי המשך מנקודת שמירה
+    """
+
+    def __init__(self, repository, years: int = 1, events_per_year: int = 52, fights_per_year: float = 3.0,
+                 rest_events: int = 8, title_every: int = 13, train_chance: float = 0.25, commit_every: int = 4,
+                 weight_classes: Optional[List[str]] = None, start: Optional[str] = None,
+                 seed: Optional[int] = None):
+        self.repository = repository
+        self.total_events = max(1, int(years * events_per_year))
+        self.events_per_year = events_per_year
+        self.fights_per_year = fights_per_year
+        self.rest_events = rest_events
+        self.title_every = max(1, title_every)
+        self.train_chance = train_chance
+        self.commit_every = max(1, commit_every)
+        self.weight_classes = weight_classes
+        self.start = start or date.today().isoformat()
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.engine = CombatEngine()
+
+    @classmethod
+    def from_params(cls, repository, params: dict) -> "Season":
+        keys = ("years", "events_per_year", "fights_per_year", "rest_events", "title_every",
+                "train_chance", "commit_every", "weight_classes", "start", "seed")
+        return cls(repository, **{k: params[k] for k in keys if params.get(k) is not None})
+
+    def event_date(self, event: int) -> str:
+        return (date.fromisoformat(self.start) + timedelta(days=event * EVENT_INTERVAL_DAYS)).isoformat()
+
+    # ----- טעינה -----
+    def _load(self):
+        repo = self.repository
+        if self.weight_classes:
+            fighters = [f for wc in self.weight_classes for f in repo.iter_fighters(wc, batch_size=2000)]
+        else:
+            fighters = list(repo.iter_fighters(batch_size=2000))
+        self.fighters = {f.fighter_id: f for f in fighters}
+        self.ratings = {fid: (DEFAULT_RATING, DEFAULT_RD) for fid in self.fighters}
+        for fighter_id, rating, rd in repo.iter_ratings():
+            if fighter_id in self.ratings:
+                self.ratings[fighter_id] = (rating, rd)
+        self.divisions: Dict[str, List[int]] = {}
+        for f in fighters:
+            self.divisions.setdefault(f.weight_class, []).append(f.fighter_id)
+        for ids in self.divisions.values():
+            ids.sort()
+
+    def _score(self, fighter_id: int) -> float:
+        return conservative_rating(*self.ratings[fighter_id])
+
+    # ----- אירוע אחד -----
+    def _pairings(self, division: str, event: int, rng: random.Random, last_fought: dict, state: dict) -> List[tuple]:
+        """
+        (f1, f2, title) לאירוע בקטגוריה אחת: קרב תואר כל title_every אירועים (אלוף מול
+        המתמודד המדורג ביותר שפנוי), והשאר - מדגם אקראי של לוחמים פנויים, ממוין לפי
+        דירוג ומשודך לשכן הקרוב בטבלה
+        """
+        ids = self.divisions[division]
+        free = [fid for fid in ids if event - last_fought.get(fid, -self.rest_events - 1) > self.rest_events]
+        bouts = []
+        champions = state["champions"]
+        champ = champions.get(division)
+        if champ is None and free:
+            champ = champions[division] = [max(free, key=self._score), event, 0]
+        if event % self.title_every == self.title_every - 1 and champ and champ[0] in free:
+            contenders = [fid for fid in free if fid != champ[0]]
+            if contenders:
+                challenger = max(contenders, key=self._score)
+                bouts.append((champ[0], challenger, True))
+                free = [fid for fid in contenders if fid != challenger]
+
+        # מספר הקרבות הצפוי באירוע, עם עיגול אקראי כדי לשמור על הקצב הממוצע
+        expected = len(ids) * self.fights_per_year / 2.0 / self.events_per_year
+        count = int(expected) + (rng.random() < expected - int(expected))
+        count = min(count, len(free) // 2)
+        if count:
+            picked = sorted(rng.sample(free, 2 * count), key=lambda fid: (-self._score(fid), fid))
+            bouts.extend((picked[i], picked[i + 1], False) for i in range(0, len(picked), 2))
+        return bouts
+
+    def _train(self, fighter, rng: random.Random) -> bool:
+        if rng.random() >= self.train_chance:
+            return False
+        for method in ("train_complete_mma", "train_striking", "train_grappling"):
+            train = getattr(fighter, method, None)
+            if train is not None:
+                train()
+                return True
+        return False
+
+    def _run_event(self, event: int, last_fought: dict, state: dict, results: list, touched: dict):
+        rng = random.Random(f"{self.seed}:{event}")
+        fought = []
+        for division in sorted(self.divisions):
+            for a, b, title in self._pairings(division, event, rng, last_fought, state):
+                f1, f2 = self.fighters[a], self.fighters[b]
+                champ = state["champions"][division] if title else None
+                holder = f1 if title else None
+                result = self.engine.apply_outcome(f1, f2, resolve_bout(fighter_stats(f1), fighter_stats(f2), rng),
+                                                   title_holder=holder)
+                results.append(result)
+                winner = result["winner_id"]
+                r1, rd1, r2, rd2 = rate_fight(*self.ratings[a], *self.ratings[b],
+                                              0 if winner == a else 1 if winner == b else None)
+                self.ratings[a], self.ratings[b] = (r1, rd1), (r2, rd2)
+                if title:
+                    if winner == b:
+                        state["champions"][division] = [b, event, 0]
+                        state["title_changes"] += 1
+                    elif winner == a:
+                        champ[2] += 1
+                fought.extend((f1, f2))
+        # מחנה אימונים בין אירועים - רק למי שנלחם
+        for f in fought:
+            last_fought[f.fighter_id] = event
+            touched[f.fighter_id] = f
+            state["trained"] += self._train(f, rng)
+        state["fights"] += len(fought) // 2
+
+    # ----- הרצה -----
+    def run(self, checkpoint: Optional[dict] = None,
+            progress: Optional[Callable[[int, int, str, dict], None]] = None) -> dict:
+        """
+        הרצת העונה מהאירוע שבנקודת השמירה (או מההתחלה)
+        progress(done, total, message, checkpoint) נקרא אחרי כל שמירה; חריגה ממנו עוצרת את העונה
+        """
+        state = dict(checkpoint or {})
+        if state:
+            self.seed, self.start = state["seed"], state["start"]
+        state.setdefault("seed", self.seed)
+        state.setdefault("start", self.start)
+        state.setdefault("event", 0)
+        state.setdefault("fights", 0)
+        state.setdefault("title_changes", 0)
+        state.setdefault("trained", 0)
+        state.setdefault("champions", {})
+        # JSON הופך מפתחות למחרוזות
+        last_fought = {int(fid): e for fid, e in state.get("last_fought", {}).items()}
+        self._load()
+        if sum(len(ids) for ids in self.divisions.values()) < 2:
+            raise ValueError("need at least 2 fighters")
+
+        event = state["event"]
+        while event < self.total_events:
+            results, touched = [], {}
+            stop = min(self.total_events, event + self.commit_every)
+            for e in range(event, stop):
+                self._run_event(e, last_fought, state, results, touched)
+            if results and not self.repository.save_fight_batch(list(touched.values()), results):
+                raise RuntimeError("saving season events failed")
+            event = state["event"] = stop
+            # מספיק לזכור מי נלחם בחלון המנוחה
+            last_fought = {fid: e for fid, e in last_fought.items() if event - e <= self.rest_events}
+            state["last_fought"] = last_fought
+            if progress is not None:
+                progress(event, self.total_events, f"{self.event_date(event - 1)}: {state['fights']} fights",
+                         state)
+        return self.summary(state)
+
+    def summary(self, state: dict) -> dict:
+        champions = {}
+        for division, (fid, since, defenses) in sorted(state["champions"].items()):
+            fighter = self.fighters.get(fid)
+            champions[division] = {"fighter_id": fid, "name": fighter.name if fighter else None,
+                                   "since": self.event_date(since), "defenses": defenses}
+        return {
+            "events": state["event"], "fights": state["fights"], "seed": state["seed"],
+            "start": state["start"], "end": self.event_date(state["event"] - 1),
+            "title_changes": state["title_changes"], "trained": state["trained"], "champions": champions,
+        }
+
+
+def main(argv=None) -> int:
+    from models.repository import Repository
+
+    parser = argparse.ArgumentParser(description="Run a season in the foreground (saves to the database)")
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--years", type=float, default=1)
+    parser.add_argument("--events-per-year", type=int, default=52)
+    parser.add_argument("--fights-per-year", type=float, default=3.0)
+    parser.add_argument("--commit-every", type=int, default=4)
+    parser.add_argument("--weight-class", action="append", dest="weight_classes")
+    parser.add_argument("--start")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        repo = Repository(args.db)
+    season = Season(repo, args.years, args.events_per_year, args.fights_per_year, commit_every=args.commit_every,
+                    weight_classes=args.weight_classes, start=args.start, seed=args.seed)
+    t0 = time.perf_counter()
+
+    def report(done, total, message, checkpoint):
+        elapsed = time.perf_counter() - t0
+        print(f"\r{done}/{total} events  {message}  {checkpoint['fights'] / max(elapsed, 1e-9):,.0f} fights/s",
+              end="", file=sys.stderr)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        result = season.run(progress=report)
+    print(file=sys.stderr)
+    print(f"{result['events']} events, {result['fights']} fights in {time.perf_counter() - t0:.1f}s "
+          f"({result['start']} .. {result['end']}), {result['title_changes']} title changes, "
+          f"{result['trained']} training camps")
+    for division, champ in result["champions"].items():
+        print(f"  {division:<18} {champ['name']} (since {champ['since']}, {champ['defenses']} defenses)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Fixed Step Clock
+שעון סימולציה בצעד קבוע - מפריד בין קצב הציור לקצב הסימולציה
+מדגים: Accumulator, Time Scaling, Render Interpolation
+"""
+
+TIME_SCALES = (0.25, 0.5, 1.0, 10.0, 100.0)
+NORMAL_SCALE_IDX = TIME_SCALES.index(1.0)
+
+
+class FixedStepClock:
+    """
+    צובר זמן אמיתי ומחזיר כמה צעדי סימולציה קבועים יש להריץ בכל פריים
+    alpha - החלק היחסי של הצעד הבא, לאינטרפולציה בזמן הציור
+    """
+
+    def __init__(self, step: float, max_frame_dt: float = 0.25, max_steps: int = 2000):
+        """
+        Args:
+            step: אורך צעד סימולציה בשניות
+            max_frame_dt: תקרת זמן אמיתי לפריים בודד (מונע "ספירלת מוות" אחרי תקיעה)
+            max_steps: תקרת צעדים לפריים (רלוונטי בהרצה מהירה)
+        """
+        self.step = step
+        self.max_frame_dt = max_frame_dt
+        self.max_steps = max_steps
+        self.scale_idx = NORMAL_SCALE_IDX
+        self.max_scale_idx = NORMAL_SCALE_IDX
+        self.paused = False
+        self.reset()
+
+    def reset(self):
+        self.sim_time = 0.0
+        self.accumulator = 0.0
+        self.paused = False
+        self.scale_idx = NORMAL_SCALE_IDX
+
+    @property
+    def time_scale(self) -> float:
+        return TIME_SCALES[self.scale_idx]
+
+    @property
+    def alpha(self) -> float:
+        return self.accumulator / self.step
+
+    def allow_fast_forward(self, allowed: bool):
+        """הרצה מהירה (10x/100x) מותרת רק כששני הצדדים בשליטת המחשב"""
+        self.max_scale_idx = len(TIME_SCALES) - 1 if allowed else NORMAL_SCALE_IDX
+        self.scale_idx = min(self.scale_idx, self.max_scale_idx)
+
+    def faster(self):
+        self.scale_idx = min(self.scale_idx + 1, self.max_scale_idx)
+
+    def slower(self):
+        self.scale_idx = max(self.scale_idx - 1, 0)
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+
+    def advance(self, real_dt: float) -> int:
+        """
+        הוספת זמן אמיתי שעבר מהפריים הקודם
+
+        Returns:
+            int: מספר צעדי הסימולציה להריץ עכשיו
+        """
+        if self.paused:
+            return 0
+        self.accumulator += min(real_dt, self.max_frame_dt) * self.time_scale
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            # המכונה לא עומדת בקצב - מוותרים על הזמן העודף במקום להצטבר לנצח
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step
+        self.sim_time += steps * self.step
+        return steps
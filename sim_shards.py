@@ -0,0 +1,279 @@
+"""
+Sim Shards
+סימולציה של מיליוני קרבות בכמה תהליכים בלי לשלוח אובייקטי Fighter:
+טבלת הסטטיסטיקות של הרוסטר נכתבת פעם אחת ל-shared_memory, כל משימה מקבלת רק
+טווח [start, stop) וזרע, והתוצאות נכתבות ישר לבאפר פלט משותף
+
+מדגים: multiprocessing.shared_memory, memoryview.cast, חלוקה לשארדים דטרמיניסטית
+(אותו seed נותן אותן תוצאות בכל מספר עובדים)
+
+שימוש:
+    python sim_shards.py --db ufc_v3.db --bouts 1000000 --workers 1 2 4 --compare-pickle
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Sequence
+
+from combat_engine import (STAT_FIELDS, METHOD_KO, METHOD_SUB, METHOD_DECISION, METHOD_DRAW,
+                           fighter_stats, resolve_bout)
+
+METHODS = (METHOD_KO, METHOD_SUB, METHOD_DECISION, METHOD_DRAW)
+_METHOD_CODES = {m: i for i, m in enumerate(METHODS)}
+_NSTATS = len(STAT_FIELDS)
+
+# גודל שארד ברירת מחדל: מספיק גדול כדי שהתקורה של משימה תהיה זניחה,
+# מספיק קטן כדי שהעבודה תתחלק יפה בין העובדים
+SHARD_SIZE = 50_000
+
+
+# ----- צד העובד -----
+# כל תהליך עובד מחזיק חיבור (attach) אחד לכל בלוק משותף, ואת טבלת הסטטיסטיקות כטאפלים
+_attached = {}
+_stats = None
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        shm = _attached[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+
+def _init_worker(stats_name: str, n: int):
+    """initializer של ה-pool: קריאת טבלת הסטטיסטיקות פעם אחת לכל תהליך"""
+    global _stats
+    with _attach(stats_name).buf.cast("i") as view:
+        flat = view.tolist()
+    _stats = [tuple(flat[k * _NSTATS:(k + 1) * _NSTATS]) for k in range(n)]
+
+
+def _detach_except(keep):
+    for name in [name for name in _attached if name not in keep]:
+        _attached.pop(name).close()
+
+
+def _run_shard(stats_name: str, out_names: tuple, n: int, start: int, stop: int, seed, given_pairs: bool) -> int:
+    """
+    קרבות [start, stop) - זוגות אקראיים (או זוגות שכבר כתובים בבאפר), תוצאות לבאפר המשותף
+    rng לכל שארד נגזר מ-(seed, start), כך שהתוצאה לא תלויה בחלוקה לעובדים
+    """
+    pairs_name, codes_name, scores_name = out_names
+    _detach_except({stats_name, *out_names})  # באפרים של ריצות קודמות
+    rng = random.Random(f"{seed}:{start}")
+    stats = _stats
+    pairs = array("i")
+    codes = array("b")
+    scores = array("f")
+    with _attach(pairs_name).buf.cast("i") as pairs_view:
+        if given_pairs:
+            pairs = array("i", pairs_view[2 * start:2 * stop])
+        else:
+            for _ in range(start, stop):
+                i = rng.randrange(n)
+                j = rng.randrange(n - 1)
+                pairs.append(i)
+                pairs.append(j + (j >= i))
+            pairs_view[2 * start:2 * stop] = pairs
+    for k in range(0, len(pairs), 2):
+        winner, method, rnd, s1, s2 = resolve_bout(stats[pairs[k]], stats[pairs[k + 1]], rng)
+        codes.extend((winner, _METHOD_CODES[method], rnd))
+        scores.append(s1)
+        scores.append(s2)
+    with _attach(codes_name).buf.cast("b") as view:
+        view[3 * start:3 * stop] = codes
+    with _attach(scores_name).buf.cast("f") as view:
+        view[2 * start:2 * stop] = scores
+    return stop - start
+
+
+# ----- צד המתאם -----
+class SimResults:
+    """
+    תוצאות ריצה: לכל קרב k - אינדקסים של הלוחמים (pairs[2k], pairs[2k+1]),
+    codes[3k:3k+3] = (winner 0/1/-1, קוד שיטה ב-METHODS, סיבוב), scores[2k:2k+2]
+    """
+
+    def __init__(self, fighter_ids: List[int], pairs: array, codes: array, scores: array):
+        self.fighter_ids = fighter_ids
+        self.pairs = pairs
+        self.codes = codes
+        self.scores = scores
+
+    def __len__(self):
+        return len(self.codes) // 3
+
+    def outcomes(self) -> Iterator[tuple]:
+        """(i, j, outcome) לכל קרב; outcome בפורמט של resolve_bout"""
+        pairs, codes, scores = self.pairs, self.codes, self.scores
+        for k in range(len(self)):
+            yield (pairs[2 * k], pairs[2 * k + 1],
+                   (codes[3 * k], METHODS[codes[3 * k + 1]], codes[3 * k + 2],
+                    round(scores[2 * k], 1), round(scores[2 * k + 1], 1)))
+
+    def tally(self) -> dict:
+        """ניצחונות/הפסדים/תיקו לכל לוחם (לפי fighter_id) ומונה שיטות"""
+        n = len(self.fighter_ids)
+        wins, losses, draws = [0] * n, [0] * n, [0] * n
+        pairs, codes = self.pairs, self.codes
+        for k in range(len(self)):
+            i, j, winner = pairs[2 * k], pairs[2 * k + 1], codes[3 * k]
+            if winner == -1:
+                draws[i] += 1
+                draws[j] += 1
+            else:
+                w, l = (i, j) if winner == 0 else (j, i)
+                wins[w] += 1
+                losses[l] += 1
+        methods = Counter(METHODS[c] for c in self.codes[1::3])
+        return {
+            "records": {fid: (wins[k], losses[k], draws[k]) for k, fid in enumerate(self.fighter_ids)},
+            "methods": dict(methods),
+        }
+
+
+class ShardedSimulator:
+    """
+    מריץ קרבות ב-ProcessPool מעל טבלת סטטיסטיקות משותפת
+    הטבלה נכתבת פעם אחת ב-__init__; כל run() מקצה באפרי פלט משותפים משלו
+
+    דוגמה:
+        with ShardedSimulator(repo.get_all_fighters(), workers=4) as sim:
+            results = sim.run(1_000_000, seed=7)
+    """
+
+    def __init__(self, fighters: Sequence, workers: Optional[int] = None):
+        """
+        Args:
+            fighters: לוחמים (Fighter) או טאפלים של סטטיסטיקות לפי STAT_FIELDS
+            workers: מספר תהליכים (ברירת מחדל: מספר הליבות)
+        """
+        if len(fighters) < 2:
+            raise ValueError("need at least 2 fighters")
+        stats = [f if isinstance(f, tuple) else fighter_stats(f) for f in fighters]
+        self.fighter_ids = [None if isinstance(f, tuple) else f.fighter_id for f in fighters]
+        self._n = len(stats)
+        flat = array("i", (v for row in stats for v in row))
+        self._stats_shm = shared_memory.SharedMemory(create=True, size=len(flat) * flat.itemsize)
+        with self._stats_shm.buf.cast("i") as view:
+            view[:] = flat
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self._stats_shm.name, self._n))
+
+    def run(self, count: int, seed=None, pairs: Optional[Sequence[int]] = None,
+            shard_size: int = SHARD_SIZE) -> SimResults:
+        """
+        count קרבות; בלי pairs - זוגות אקראיים (לא לוחם מול עצמו), אחרת pairs הוא
+        רצף שטוח של אינדקסים i0, j0, i1, j1, ... לתוך רשימת הלוחמים
+        """
+        if pairs is not None:
+            count = len(pairs) // 2
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        if count <= 0:
+            return SimResults(self.fighter_ids, array("i"), array("b"), array("f"))
+
+        blocks = [shared_memory.SharedMemory(create=True, size=count * size)
+                  for size in (2 * 4, 3, 2 * 4)]
+        try:
+            if pairs is not None:
+                with blocks[0].buf.cast("i") as view:
+                    view[:] = array("i", pairs)
+            names = tuple(b.name for b in blocks)
+            futures = [self._pool.submit(_run_shard, self._stats_shm.name, names, self._n,
+                                         start, min(start + shard_size, count), seed, pairs is not None)
+                       for start in range(0, count, shard_size)]
+            for future in futures:
+                future.result()
+            out = []
+            for block, code, per_bout in zip(blocks, "ibf", (2, 3, 2)):
+                data = array(code)
+                data.frombytes(block.buf[:count * per_bout * data.itemsize])
+                out.append(data)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return SimResults(self.fighter_ids, *out)
+
+    def close(self):
+        self._pool.shutdown()
+        self._stats_shm.close()
+        self._stats_shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ----- השוואה: שליחת אובייקטי Fighter לכל משימה -----
+def _resolve_fighter_pairs(fighter_pairs, seed):
+    rng = random.Random(seed)
+    return [resolve_bout(fighter_stats(a), fighter_stats(b), rng) for a, b in fighter_pairs]
+
+
+def pickle_baseline(fighters, count: int, seed: int, workers: int, chunk: int = 2000) -> float:
+    """הגישה הישנה: רשימות של (Fighter, Fighter) עוברות pickle לכל משימה; מחזיר שניות"""
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_resolve_fighter_pairs,
+                               [rng.sample(fighters, 2) for _ in range(min(chunk, count - start))], start)
+                   for start in range(0, count, chunk)]
+        for f in futures:
+            f.result()
+    return time.perf_counter() - t0
+
+
+def main(argv=None) -> int:
+    import contextlib
+    from models.repository import Repository
+
+    parser = argparse.ArgumentParser(description="Benchmark shared-memory sharded simulation")
+    parser.add_argument("--db", default="ufc_v3.db")
+    parser.add_argument("--bouts", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--compare-pickle", action="store_true",
+                        help="also time sending Fighter objects per task (on a tenth of the bouts)")
+    args = parser.parse_args(argv)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        fighters = Repository(args.db).get_all_fighters()
+    print(f"{len(fighters)} fighters, {args.bouts} bouts, {os.cpu_count()} CPUs")
+    baseline = None
+    checksum = None
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        with ShardedSimulator(fighters, workers) as sim:
+            setup = time.perf_counter() - t0
+            t1 = time.perf_counter()
+            results = sim.run(args.bouts, seed=args.seed, shard_size=args.shard_size)
+            elapsed = time.perf_counter() - t1
+        if checksum is None:
+            baseline, checksum = elapsed, (results.codes, results.pairs)
+        same = checksum == (results.codes, results.pairs)
+        print(f"  shared-memory  workers={workers:<3} setup {setup:6.2f}s  run {elapsed:7.2f}s  "
+              f"{args.bouts / elapsed:>10,.0f} bouts/s  speedup x{baseline / elapsed:.2f}  "
+              f"{'same results' if same else 'RESULTS DIFFER'}")
+    if args.compare_pickle:
+        count = max(1, args.bouts // 10)
+        for workers in args.workers:
+            elapsed = pickle_baseline(fighters, count, args.seed, workers)
+            print(f"  pickle Fighter workers={workers:<3} run {elapsed:7.2f}s  {count / elapsed:>10,.0f} bouts/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Startup Report
+מדידת זמן עלייה של המשחק: זמני import לכל מודול (python -X importtime)
+וזמנים עד App מוכן, עד הפריים הראשון ועד שהרוסטר נטען ברקע
+
+שימוש:
+    python startup_report.py --runs 5 --top 15 --out startup.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# רץ בתהליך נפרד כדי שכל מדידה תתחיל ממטמון import ריק
+PROBE = r"""
+import os, sys, time, json
+t0 = time.perf_counter()
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, sys.argv[1])
+from ufc_fight_simulator_pygame import App
+import_ms = (time.perf_counter() - t0) * 1000.0
+app = App(db_name=sys.argv[2], startup_t0=t0)
+app.run_frame(0.0)
+app.wait_for_roster(30)
+print(json.dumps(dict(app.startup_times, import_ms=import_ms)))
+"""
+
+
+def run_probe(db_path):
+    out = subprocess.run([sys.executable, "-c", PROBE, HERE, db_path],
+                         capture_output=True, text=True, cwd=HERE, timeout=120)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip() or "probe failed")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def parse_importtime(stderr: str):
+    """
+    שורות בפורמט: import time: self [us] | cumulative | imported package
+    Returns:
+        list: (module, self_ms, cumulative_ms)
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            rows.append((name.strip(), int(self_us) / 1000.0, int(cum_us) / 1000.0))
+        except ValueError:
+            continue
+    return rows
+
+
+def import_profile():
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import ufc_fight_simulator_pygame"],
+                         capture_output=True, text=True, cwd=HERE, env=env, timeout=120)
+    return parse_importtime(out.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure game startup time")
+    parser.add_argument("--runs", type=int, default=5, help="probe runs (median is reported)")
+    parser.add_argument("--top", type=int, default=15, help="modules to list by import time")
+    parser.add_argument("--db", default=os.path.join(HERE, "ufc_v3.db"), help="database to copy for the probe")
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    rows = import_profile()
+    print(f"{'self ms':>9} {'cum ms':>9}  module")
+    for name, self_ms, cum_ms in sorted(rows, key=lambda r: r[1], reverse=True)[:args.top]:
+        print(f"{self_ms:9.2f} {cum_ms:9.2f}  {name}")
+
+    # עותק זמני - ה-probe לא נוגע במאגר האמיתי
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "startup.db")
+        if os.path.exists(args.db):
+            shutil.copy(args.db, db)
+        runs = [run_probe(db) for _ in range(args.runs)]
+
+    keys = ("import_ms", "init_ms", "first_frame_ms", "roster_ready_ms")
+    median = {k: statistics.median(r[k] for r in runs if k in r) for k in keys}
+    print()
+    for k in keys:
+        print(f"{k:<16} {median[k]:8.1f} ms (median of {len(runs)})")
+
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump({
+                "median": median,
+                "runs": runs,
+                "imports": [dict(module=n, self_ms=s, cumulative_ms=c) for n, s, c in rows],
+            }, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Stress Repository
+בדיקת עומס ל-Repository משותף בין threads: קוראים, כותבים קטנים, כותב מנות גדולות,
+ואופציונלית תהליכים נפרדים שכותבים לאותו קובץ (כמו עובדי job_runner)
+
+בודק: אין שגיאות, מספר הקרבות במסד = מספר הקרבות שנכתבו, integrity_check,
+וכמה זמן קריאה חיכתה בזמן שמנה גדולה נכתבה
+
+שימוש:
+    python stress_repository.py --db ufc_v3.db --seconds 10 --readers 8 --writers 2 --processes 1
+    python stress_repository.py --no-wal       # להשוואה: journal_mode=DELETE
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from combat_engine import CombatEngine
+from models.repository import Repository
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, pct):
+    """אחוזון nearest-rank"""
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+class Stats:
+    """מונים ומדידות משותפים לכל ה-threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.fights_written = 0
+        self.batch_active = threading.Event()
+        self.reads_during_batch = []
+
+    def record(self, kind, ms, ok=True):
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(ms)
+            if not ok:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def error(self, kind, e):
+        with self.lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+            if self.errors[kind] == 1:
+                print(f"{kind}: {type(e).__name__}: {e}", file=sys.__stderr__)
+
+
+def reader(repo, ids, total, deadline, stats, seed):
+    rnd = random.Random(seed)
+    while time.perf_counter() < deadline:
+        roll = rnd.random()
+        t0 = time.perf_counter()
+        try:
+            if roll < 0.5:
+                kind, ok = "get", repo.get_fighter_by_id(rnd.choice(ids)) is not None
+            elif roll < 0.8:
+                kind, ok = "page", bool(repo.get_fighters_page(rnd.randint(0, max(0, total - 50)), 50))
+            elif roll < 0.95:
+                kind, ok = "search", True
+                repo.search_fighters(chr(97 + rnd.randrange(26)), limit=20)
+            else:
+                kind, ok = "stats", True
+                repo.get_statistics()
+        except Exception as e:
+            stats.error("read", e)
+            continue
+        ms = (time.perf_counter() - t0) * 1000.0
+        stats.record(kind, ms, ok)
+        if stats.batch_active.is_set():
+            with stats.lock:
+                stats.reads_during_batch.append(ms)
+
+
+def writer(repo, ids, deadline, stats, seed):
+    """כתיבות קטנות: קרב בודד נשמר עם שני הלוחמים, ומדי פעם עדכון לוחם"""
+    rnd = random.Random(seed)
+    engine = CombatEngine(seed)
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            f1 = repo.get_fighter_by_id(rnd.choice(ids))
+            f2 = repo.get_fighter_by_id(rnd.choice(ids))
+            if not f1 or not f2 or f1.fighter_id == f2.fighter_id:
+                continue
+            if rnd.random() < 0.8:
+                ok = repo.save_fight_batch([f1, f2], [engine.simulate_fight(f1, f2)])
+                kind = "fight"
+                if ok:
+                    with stats.lock:
+                        stats.fights_written += 1
+            else:
+                f1.add_draw()
+                ok, kind = repo.update_fighter(f1), "update"
+        except Exception as e:
+            stats.error("write", e)
+            continue
+        stats.record(kind, (time.perf_counter() - t0) * 1000.0, ok)
+
+
+def batch_writer(repo, ids, deadline, stats, seed, batch_size):
+    """מנות גדולות בטרנזקציה אחת - מה שקוראים לא אמורים להרגיש"""
+    rnd = random.Random(seed)
+    engine = CombatEngine(seed)
+    fighters = repo.get_fighters_by_ids(rnd.sample(ids, min(len(ids), 2000)))
+    while time.perf_counter() < deadline:
+        results = [engine.simulate_fight(*rnd.sample(fighters, 2)) for _ in range(batch_size)]
+        t0 = time.perf_counter()
+        stats.batch_active.set()
+        try:
+            ok = repo.save_fight_batch(fighters, results)
+        except Exception as e:
+            stats.error("batch", e)
+            continue
+        finally:
+            stats.batch_active.clear()
+        stats.record("batch", (time.perf_counter() - t0) * 1000.0, ok)
+        if ok:
+            with stats.lock:
+                stats.fights_written += len(results)
+        time.sleep(0.05)
+
+
+def process_writer(db, seconds, seed, wal, out):
+    """תהליך נפרד שכותב מנות קטנות לאותו קובץ - כמו עובד של job_runner"""
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        repo = Repository(db, wal=wal)
+        ids = repo.get_fighter_ids()
+        rnd = random.Random(seed)
+        engine = CombatEngine(seed)
+        fighters = repo.get_fighters_by_ids(rnd.sample(ids, min(len(ids), 500)))
+        written = failed = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            results = [engine.simulate_fight(*rnd.sample(fighters, 2)) for _ in range(200)]
+            if repo.save_fight_batch(fighters, results):
+                written += len(results)
+            else:
+                failed += 1
+        out.put({"written": written, "failed": failed, "busy_retries": repo.busy_retries})
+
+
+def run(args, db):
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        repo = Repository(db, wal=not args.no_wal)
+    ids = repo.get_fighter_ids()
+    if len(ids) < 2:
+        raise SystemExit("need at least 2 fighters in the database")
+    total = repo.count_fighters()
+    fights_before = repo.get_statistics()["total_fights"]
+
+    stats = Stats()
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=process_writer, args=(db, args.seconds, args.seed + 1000 + i, not args.no_wal, out))
+             for i in range(args.processes)]
+    for p in procs:
+        p.start()
+
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=reader, args=(repo, ids, total, deadline, stats, args.seed + i))
+               for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(repo, ids, deadline, stats, args.seed + 100 + i))
+                for i in range(args.writers)]
+    threads += [threading.Thread(target=batch_writer,
+                                 args=(repo, ids, deadline, stats, args.seed + 200 + i, args.batch_size))
+                for i in range(args.batch_writers)]
+    start = time.perf_counter()
+    # ה-Repository מדפיס ✅ על כל כתיבה - לא מציפים את הדו"ח
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    proc_results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    wall = time.perf_counter() - start
+
+    written = stats.fights_written + sum(r["written"] for r in proc_results)
+    fights_after = repo.get_statistics()["total_fights"]
+    conn = sqlite3.connect(db)
+    integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    journal = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    conn.close()
+    repo.close()
+
+    errors = sum(stats.errors.values()) + sum(r["failed"] for r in proc_results)
+    report = {
+        "seconds": round(wall, 2), "journal_mode": journal, "fighters": total,
+        "threads": {"readers": args.readers, "writers": args.writers, "batch_writers": args.batch_writers},
+        "processes": args.processes, "fights_written": written, "fights_in_db": fights_after - fights_before,
+        "integrity": integrity, "errors": errors,
+        "busy_retries": repo.busy_retries + sum(r["busy_retries"] for r in proc_results), "by_kind": {},
+    }
+    print(f"{wall:.1f}s  journal={journal}  {total} fighters  {args.readers} readers / {args.writers} writers / "
+          f"{args.batch_writers} batch writers / {args.processes} processes")
+    for kind, values in sorted(stats.latencies.items()):
+        row = {"count": len(values), "p50_ms": percentile(values, 50), "p99_ms": percentile(values, 99),
+               "max_ms": max(values), "errors": stats.errors.get(kind, 0)}
+        report["by_kind"][kind] = row
+        print(f"  {kind:<7} n={len(values):<7} p50 {row['p50_ms']:8.2f}  p99 {row['p99_ms']:8.2f}  "
+              f"max {row['max_ms']:8.2f} ms  errors {row['errors']}")
+    if stats.reads_during_batch:
+        during = stats.reads_during_batch
+        report["reads_during_batch"] = {"count": len(during), "p99_ms": percentile(during, 99), "max_ms": max(during)}
+        print(f"  reads while a batch was being written: n={len(during)}  p99 {percentile(during, 99):.2f}  "
+              f"max {max(during):.2f} ms")
+    print(f"  fights written {written}, in db {fights_after - fights_before}, integrity {integrity}, "
+          f"errors {errors}, busy retries {report['busy_retries']}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-threaded stress test for Repository")
+    parser.add_argument("--db", default=os.path.join(HERE, "ufc_v3.db"), help="copied to a temp file first")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--batch-writers", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=5000, help="fights per batch transaction")
+    parser.add_argument("--processes", type=int, default=1, help="extra writer processes on the same file")
+    parser.add_argument("--no-wal", action="store_true", help="use journal_mode=DELETE")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp()
+    try:
+        db = os.path.join(tmp, "stress.db")
+        shutil.copy(args.db, db)
+        if args.no_wal:
+            conn = sqlite3.connect(db)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+        report = run(args, db)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+    ok = not report["errors"] and report["integrity"] == "ok" and report["fights_written"] == report["fights_in_db"]
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,26 @@
-import pygame, sys, random, math, time, os
+import pygame, sys, math, time, os, threading
 from dataclasses import dataclass
 
-from models.repository import Repository
+# models.repository ו-virtual_list נטענים בעצלות (ב-thread הרוסטר / בבניית הסצנה)
+# כדי שמסך הבית יופיע לפני שה-SQLite והמאגר מוכנים
 from fighter import Fighter
 from striker import Striker
 from grappler import Grappler
 from hybrid_champion import HybridChampion
+from sim_clock import FixedStepClock
+from arena_sim import ArenaSim, TICK_RATE, ARENA_LEFT, ARENA_RIGHT, ARENA_BOTTOM, GROUND_Y
+from replay import ReplayPlayer, ReplayRecorder
+from arena_input import ArenaInput, KeyBindings
+from arena_ai import LEVELS, make_ai
+from move_table import fighter_profile
+from build_optimizer import BuildOptimizer, TYPE_KEYS, budget_of, load_opponents
+from fusion_explorer import BY as FUSION_BY, FusionList, explore
+from frame_profiler import FrameProfiler, CountingFont, install_draw_counters
 
 # ----------------- Config -----------------
 WIDTH, HEIGHT = 1280, 720
 FPS = 60
+SIM_DT = 1 / FPS  # צעד סימולציה קבוע, לא תלוי בקצב הציור
 ASSETS_DIR = "assets"
 HOME_IMAGE = os.path.join(ASSETS_DIR, "home_fighters.png")
 
@@ -25,6 +36,17 @@ BLUE = (80, 150, 255)
 YELLOW = (255, 210, 120)
 GREEN = (95, 235, 170)
 
+# כמו models.job_store.FINAL_STATUSES - בלי לייבא את שכבת המסד בעליית החלון
+FINAL_JOB_STATUSES = ("done", "failed", "cancelled")
+
+LEGEND_COUNTRIES = {
+    "Khabib Nurmagomedov": "Russia",
+    "Conor McGregor": "Ireland",
+    'Ahavat "Goldenboy" Gordon': "Israel",
+    "Anderson Silva": "Brazil",
+    "Jon Jones": "USA"
+}
+
 def clamp(v, lo, hi): return max(lo, min(hi, v))
 
 def fighter_style(f: Fighter) -> str:
@@ -81,418 +103,437 @@ class Button:
 
 @dataclass
 class AppState:
-    mode: str = "CPU"  # "CPU" or "2P"
-
-class App:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Fight Simulator")
-        self.clock = pygame.time.Clock()
-
-        self.font_s = pygame.font.SysFont(None, 20)
-        self.font = pygame.font.SysFont(None, 26)
-        self.font_b = pygame.font.SysFont(None, 36)
-        self.font_title = pygame.font.SysFont(None, 64)
-
-        self.home_img = load_image(HOME_IMAGE, max_size=(360, 260))
-
-        self.repo = Repository()
-        self.refresh_fighters()
-
-        self.state = AppState()
-        self.scene = "home"  # home/select/create/roster/fight/about
-        self.log = ["Welcome! If no fighters appear, click Add Legends."]
-        self.log_max = 6
-
-        # selection
-        self.sel_a = None
-        self.sel_b = None
-        self.scroll_a = 0
-        self.scroll_b = 0
-
-        # create
-        self.create_name = ""
-        self.create_weight_idx = 3
-        self.create_type_idx = 0
-        self.weight_classes = ["Flyweight","Bantamweight","Featherweight","Lightweight","Welterweight","Middleweight","Light Heavyweight","Heavyweight"]
-        self.types = ["Striker","Grappler","Hybrid"]
-        self.edit_stat_idx = 0
-        self.stats_template = {"STR":70,"GRP":70,"SPD":70,"KICK":70,"SUB":70,"DEF":70,"VERS":70,"STA":70}
-        self.stats = dict(self.stats_template)
-
-        # roster
-        self.roster_scroll = 0
-        self.roster_selected = None
-
-        # fight
-        self.fight = None
+    mode: str = "CPU"  # "CPU", "SIM" (CPU vs CPU) or "2P"
+    difficulty: str = "normal"  # arena_ai.LEVELS
 
-        # home buttons
-        self.btn_vs_cpu = Button((WIDTH//2-260, 320, 520, 80), "PLAY VS CPU", self.font_b, accent=GREEN)
-        self.btn_roster = Button((WIDTH//2-260, 420, 520, 80), "FIGHTER ROSTER", self.font_b, accent=YELLOW)
-        self.btn_about = Button((WIDTH//2-260, 520, 250, 60), "ABOUT", self.font_b, accent=(140,140,200))
-        self.btn_exit = Button((WIDTH//2+10, 520, 250, 60), "EXIT", self.font_b, accent=(120,120,180))
+STAT_KEYS = ["STR","GRP","SPD","KICK","SUB","DEF","VERS","STA"]
 
-        # select buttons
-        self.btn_add_legends = Button((70, 600, 220, 50), "Add Legends", self.font, accent=RED)
-        self.btn_create = Button((300, 600, 220, 50), "Create Fighter", self.font, accent=YELLOW)
-        self.btn_start = Button((530, 600, 220, 50), "START FIGHT", self.font, accent=GREEN)
-        self.btn_back = Button((760, 600, 160, 50), "Back", self.font, accent=(140,140,200))
+# ----------------- SCENES -----------------
+class Scene:
+    """
+    בסיס לסצנה: ה-state הזול נוצר ב-__init__, הווידג'טים והנכסים נבנים ב-build()
+    רק בכניסה הראשונה לסצנה. סצנה עם needs_roster=True נבנית רק אחרי שהרוסטר נטען ברקע.
+    """
+    needs_roster = False
 
-        # create buttons
-        self.btn_save = Button((920, 560, 260, 56), "SAVE", self.font_b, accent=GREEN)
-        self.btn_create_back = Button((920, 630, 260, 56), "BACK", self.font_b, accent=(140,140,200))
-
-        # roster buttons
-        self.btn_roster_back = Button((980, 120, 250, 50), "Back", self.font, accent=(140,140,200))
-
-    def push_log(self, msg):
-        for line in str(msg).splitlines():
-            line = line.strip()
-            if line:
-                self.log.append(line)
-        self.log = self.log[-self.log_max:]
-
-    def refresh_fighters(self):
-        all_from_repo = self.repo.get_all_fighters()
-        unique_fighters = []
-        seen_names = set()
-        for f in all_from_repo:
-            if f.name not in seen_names:
-                unique_fighters.append(f)
-                seen_names.add(f.name)
-        self.fighters = unique_fighters
-
-    def next_id(self):
-        if not self.fighters:
-            return 1
-        return max(f.fighter_id for f in self.fighters) + 1
-
-    def add_legends(self):
-        self.fighters.clear()
-        if hasattr(self.repo, 'fighters'):
-            self.repo.fighters.clear()
-        if hasattr(self.repo, '_fighters'):
-            self.repo._fighters.clear()
-            
-        base = 1 
-        
-        khabib = Grappler(base, "Khabib Nurmagomedov", "Lightweight", 78, 97, 92, 90)
-        khabib.skin_color, khabib.hair_color, khabib.pants_color = (198, 134, 103), (20, 20, 20), (20, 20, 20)
-        khabib.country = "Russia"  
-
-        conor = Striker(base+1, "Conor McGregor", "Lightweight", 95, 65, 78, 86)
-        conor.country = "Ireland" 
-        conor.skin_color, conor.hair_color, conor.pants_color = (255, 224, 196), (180, 90, 40), (34, 139, 34)
-
-        ah_gordon = HybridChampion(base+2, 'Ahavat "Goldenboy" Gordon', "Light Heavyweight", 92, 88, 86, 85, 84, 88, 90)
-        ah_gordon.skin_color = (220, 175, 140)  
-        ah_gordon.hair_color = (160, 130, 80)   
-        ah_gordon.pants_color = (90, 10, 10)    
-        ah_gordon.hair_length = "long" 
-        ah_gordon.country = "Israel"  
-
-        silva = Striker(base+3, "Anderson Silva", "Middleweight", 96, 70, 85, 90)
-        silva.skin_color, silva.hair_color, silva.pants_color = (110, 75, 55), (10, 10, 10), (255, 215, 0)
-        silva.country = "Brazil"
+    def __init__(self, app):
+        self.app = app
+        self.built = False
+
+    def ensure_built(self):
+        if self.built: return True
+        if self.needs_roster and not self.app.roster_ready.is_set(): return False
+        self.build()
+        self.built = True
+        return True
+
+    def build(self): pass
+    def enter(self): pass
+    def handle(self, ev): pass
+    def update(self, frame_dt): pass
+    def draw(self, mouse): pass
+
+    def draw_loading(self, mouse):
+        screen = self.app.screen
+        screen.fill(BG)
+        msg = self.app.roster_error or "Loading roster..."
+        t = self.app.font_b.render(msg, True, MUTED)
+        screen.blit(t, t.get_rect(center=(WIDTH//2, HEIGHT//2)))
+
+    def handle_loading(self, ev):
+        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
+            self.app.scene = "home"
 
-        jones = Grappler(base+4, "Jon Jones", "Heavyweight", 88, 95, 92, 90)
-        jones.skin_color, jones.hair_color, jones.pants_color = (100, 65, 45), (10, 10, 10), (200, 20, 20)
-        jones.country = "USA"
 
-        legends = [khabib, conor, ah_gordon, silva, jones]
-        
-        added = 0
-        for f in legends:
-            self.repo.add_fighter(f)
-            added += 1
-            
-        self.refresh_fighters()
-        self.push_log(f"Roster Reset: {added} legends ready.")
-
-    # ----------------- HOME -----------------
-    def draw_home(self, mouse):
-        self.screen.fill(BG)
+class HomeScene(Scene):
+    def build(self):
+        app = self.app
+        self.home_img = load_image(HOME_IMAGE, max_size=(360, 260))
+        self.home_art = pygame.transform.smoothscale(self.home_img, (300, 300)) if self.home_img else None
+        self.btn_vs_cpu = Button((WIDTH//2-260, 320, 520, 80), "PLAY VS CPU", app.font_b, accent=GREEN)
+        self.btn_roster = Button((WIDTH//2-260, 420, 520, 80), "FIGHTER ROSTER", app.font_b, accent=YELLOW)
+        self.btn_about = Button((WIDTH//2-260, 520, 250, 60), "ABOUT", app.font_b, accent=(140,140,200))
+        self.btn_exit = Button((WIDTH//2+10, 520, 250, 60), "EXIT", app.font_b, accent=(120,120,180))
+
+    def draw(self, mouse):
+        app, screen = self.app, self.app.screen
+        screen.fill(BG)
         for i in range(0, 260, 10):
             col = (10+i//7, 8, 10)
-            pygame.draw.rect(self.screen, col, (0, i, WIDTH, 10))
+            pygame.draw.rect(screen, col, (0, i, WIDTH, 10))
 
-        sub = self.font.render("ULTIMATE FIGHTING CHAMPIONSHIP", True, MUTED)
-        self.screen.blit(sub, (WIDTH//2 - sub.get_width()//2, 70))
+        sub = app.font.render("ULTIMATE FIGHTING CHAMPIONSHIP", True, MUTED)
+        screen.blit(sub, (WIDTH//2 - sub.get_width()//2, 70))
 
-        title1 = self.font_title.render("FIGHT", True, TEXT)
-        title2 = self.font_title.render("SIMULATOR", True, RED)
-        self.screen.blit(title1, (WIDTH//2 - title1.get_width()//2, 110))
-        self.screen.blit(title2, (WIDTH//2 - title2.get_width()//2, 165))
+        title1 = app.font_title.render("FIGHT", True, TEXT)
+        title2 = app.font_title.render("SIMULATOR", True, RED)
+        screen.blit(title1, (WIDTH//2 - title1.get_width()//2, 110))
+        screen.blit(title2, (WIDTH//2 - title2.get_width()//2, 165))
 
-        self.btn_vs_cpu.draw(self.screen, mouse)
-        self.btn_roster.draw(self.screen, mouse)
-        self.btn_about.draw(self.screen, mouse)
-        self.btn_exit.draw(self.screen, mouse)
+        self.btn_vs_cpu.draw(screen, mouse)
+        self.btn_roster.draw(screen, mouse)
+        self.btn_about.draw(screen, mouse)
+        self.btn_exit.draw(screen, mouse)
 
         self.draw_home_art()
 
         names = "Inbar Dayan ; Or Higani ; Chen Turgeman"
-        n = self.font_s.render(names, True, MUTED)
-        self.screen.blit(n, (WIDTH - n.get_width() - 18, HEIGHT - 24))
+        n = app.font_s.render(names, True, MUTED)
+        screen.blit(n, (WIDTH - n.get_width() - 18, HEIGHT - 24))
+
+        if not app.roster_ready.is_set():
+            t = app.font_s.render("Loading roster...", True, MUTED)
+            screen.blit(t, (WIDTH - t.get_width() - 18, HEIGHT - 44))
 
     def draw_home_art(self):
+        screen = self.app.screen
         art_size = (300, 300)
         x = 40
         y = HEIGHT - 340
         art_rect = pygame.Rect(x, y, art_size[0], art_size[1])
 
-        if self.home_img:
-            scaled_img = pygame.transform.smoothscale(self.home_img, art_size)
-            pygame.draw.rect(self.screen, (40, 40, 60), art_rect, width=3, border_radius=12)
-            self.screen.blit(scaled_img, (x+3, y+3))
+        if self.home_art:
+            pygame.draw.rect(screen, (40, 40, 60), art_rect, width=3, border_radius=12)
+            screen.blit(self.home_art, (x+3, y+3))
         else:
-            draw_rect_round(self.screen, art_rect, (20, 20, 30), r=12)
-            t = self.font_s.render("Image not found", True, MUTED)
-            self.screen.blit(t, t.get_rect(center=art_rect.center))
+            draw_rect_round(screen, art_rect, (20, 20, 30), r=12)
+            t = self.app.font_s.render("Image not found", True, MUTED)
+            screen.blit(t, t.get_rect(center=art_rect.center))
 
-    def handle_home(self, ev):
+    def handle(self, ev):
+        app = self.app
         if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
             pygame.quit(); sys.exit()
 
         if self.btn_vs_cpu.clicked(ev):
-            self.state.mode = "CPU"
-            self.scene = "select"
-            self.push_log("Mode: VS CPU. Select two fighters.")
+            app.state.mode = "CPU"
+            app.scene = "select"
+            app.push_log("Mode: VS CPU. Select two fighters.")
         elif self.btn_roster.clicked(ev):
-            self.scene = "roster"
-            self.roster_selected = None
+            app.scene = "roster"
         elif self.btn_about.clicked(ev):
-            self.scene = "about"
+            app.scene = "about"
         elif self.btn_exit.clicked(ev):
             pygame.quit(); sys.exit()
 
-    # ----------------- ABOUT -----------------
-    def draw_about(self, mouse):
-        self.screen.fill(BG)
-        rect = pygame.Rect(80, 90, WIDTH-160, HEIGHT-180)
-        draw_panel(self.screen, rect, "About", self.font_b)
-        lines = [
-            "Fight Simulator (Pygame) - Real-time arena",
-            "",
-            "Home:",
-            "• PLAY VS CPU  - Player controls Fighter 1 (Arrows), CPU controls Fighter 2",
-            "• PLAY 2 PLAYERS - Two players: P1 Arrows, P2 WASD",
-            "",
-            "Fight Controls:",
-            "P1: Move = Arrows | Actions = 1/2/3/4/5",
-            "P2: Move = WASD  | Actions = 6/7/8/9/0",
-            "Actions: 1/6 Jab, 2/7 Kick, 3/8 Grapple, 4/9 Block, 5/0 Rest",
-            "",
-            "Back: ESC",
-        ]
-        y = rect.y + 70
-        for ln in lines:
-            t = self.font.render(ln, True, TEXT if ln and not ln.startswith("•") else MUTED)
-            self.screen.blit(t, (rect.x + 24, y)); y += 28
-
-        self._about_back = Button((WIDTH-260, HEIGHT-120, 180, 50), "Back", self.font, accent=(140,140,200))
-        self._about_back.draw(self.screen, mouse)
-
-    def handle_about(self, ev):
+
+class AboutScene(Scene):
+    LINES = [
+        "Fight Simulator (Pygame) - Real-time arena",
+        "",
+        "Home:",
+        "• PLAY VS CPU  - Player controls Fighter 1 ({p1_move}), CPU controls Fighter 2 (AI button: difficulty)",
+        "• 2 PLAYERS - Mode button on the select screen: P1 {p1_move}, P2 {p2_move}",
+        "• ONLINE - python netplay.py host / join HOST (rollback netcode over UDP)",
+        "",
+        "Fight Controls:",
+        "P1: {p1}",
+        "P2: {p2}",
+        "Rebind: python arena_input.py bind P1 jab j (saved to controls.json)",
+        "Time: P Pause | [ Slower | ] Faster (10x/100x in CPU vs CPU)",
+        "Debug: F3 Frame profiler | F4 Export frame timings (CSV + JSON)",
+        "Jobs: F6 Simulate 10,000 fights in the background | F7 Cancel",
+        "",
+        "Back: ESC",
+    ]
+
+    def build(self):
+        app = self.app
+        self.rect = pygame.Rect(80, 90, WIDTH-160, HEIGHT-180)
+        keys = {"p1": app.bindings.describe(0), "p2": app.bindings.describe(1),
+                "p1_move": app.bindings.hint(0, labels=False), "p2_move": app.bindings.hint(1, labels=False)}
+        self.lines = [app.font.render(ln.format(**keys), True, TEXT if ln and not ln.startswith("•") else MUTED)
+                      for ln in self.LINES]
+        self.btn_back = Button((WIDTH-260, HEIGHT-120, 180, 50), "Back", app.font, accent=(140,140,200))
+
+    def draw(self, mouse):
+        screen = self.app.screen
+        screen.fill(BG)
+        draw_panel(screen, self.rect, "About", self.app.font_b)
+        y = self.rect.y + 70
+        for t in self.lines:
+            screen.blit(t, (self.rect.x + 24, y)); y += 28
+        self.btn_back.draw(screen, mouse)
+
+    def handle(self, ev):
         if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
-            self.scene = "home"
-        if hasattr(self, "_about_back") and self._about_back.clicked(ev):
-            self.scene = "home"
+            self.app.scene = "home"
+        if self.btn_back.clicked(ev):
+            self.app.scene = "home"
+
+
+class SelectScene(Scene):
+    needs_roster = True
+
+    def build(self):
+        from virtual_list import VirtualList
+        app = self.app
+        self.panel_a = pygame.Rect(70, 210, 520, 380)
+        self.panel_b = pygame.Rect(690, 210, 520, 380)
+        self.list_a = VirtualList(self._list_view(self.panel_a), 58, app.roster,
+                                  lambda f, sel, w, h: self.render_list_item(f, sel, w, h, RED))
+        self.list_b = VirtualList(self._list_view(self.panel_b), 58, app.roster,
+                                  lambda f, sel, w, h: self.render_list_item(f, sel, w, h, BLUE))
+        self._flags = {}
+
+        self.btn_add_legends = Button((70, 600, 220, 50), "Add Legends", app.font, accent=RED)
+        self.btn_create = Button((300, 600, 220, 50), "Create Fighter", app.font, accent=YELLOW)
+        self.btn_start = Button((530, 600, 220, 50), "START FIGHT", app.font, accent=GREEN)
+        self.btn_back = Button((760, 600, 160, 50), "Back", app.font, accent=(140,140,200))
+        self.btn_mode = Button((940, 600, 270, 50), "Mode: VS CPU", app.font, accent=BLUE)
+        self.btn_difficulty = Button((940, 60, 270, 50), "AI: NORMAL", app.font, accent=YELLOW)
+
+    def draw(self, mouse):
+        app, screen = self.app, self.app.screen
+        screen.fill(BG)
+        title = app.font_title.render("SELECT FIGHTERS", True, TEXT)
+        screen.blit(title, (70, 60))
+
+        mode_txt = MODE_LABELS[app.state.mode]
+        badge = app.font_b.render(f"MODE: {mode_txt}", True, BLUE if app.state.mode=="2P" else GREEN)
+        screen.blit(badge, (70, 120))
+
+        hint1 = app.font.render("Pick Fighter 1 (left) and Fighter 2 (right), then press START FIGHT. TAB = fair opponent.", True, MUTED)
+        screen.blit(hint1, (70, 150))
+
+        if app.state.mode == "CPU":
+            hint2 = app.font_s.render(f"Fight controls: {app.bindings.hint(0)}", True, MUTED)
+        elif app.state.mode == "SIM":
+            hint2 = app.font_s.render("Both fighters are CPU-controlled. P Pause | [ ] Speed up to 100x", True, MUTED)
+        else:
+            hint2 = app.font_s.render(f"P1: {app.bindings.hint(0, labels=False)}   |   "
+                                      f"P2: {app.bindings.hint(1, labels=False)}", True, MUTED)
+        screen.blit(hint2, (70, 175))
 
-    # ----------------- SELECT -----------------
-    def draw_select(self, mouse):
-        self.screen.fill(BG)
-        title = self.font_title.render("SELECT FIGHTERS", True, TEXT)
-        self.screen.blit(title, (70, 60))
+        draw_panel(screen, self.panel_a, "FIGHTER 1", app.font_b)
+        draw_panel(screen, self.panel_b, "FIGHTER 2", app.font_b)
 
-        mode_txt = "VS CPU" if self.state.mode == "CPU" else "2 PLAYERS"
-        badge = self.font_b.render(f"MODE: {mode_txt}", True, GREEN if self.state.mode=="CPU" else BLUE)
-        self.screen.blit(badge, (70, 120))
+        self.draw_fighter_list(self.panel_a, mouse, side="A")
+        self.draw_fighter_list(self.panel_b, mouse, side="B")
 
-        hint1 = self.font.render("Pick Fighter 1 (left) and Fighter 2 (right), then press START FIGHT.", True, MUTED)
-        self.screen.blit(hint1, (70, 150))
+        self.btn_add_legends.draw(screen, mouse)
+        self.btn_create.draw(screen, mouse)
+        self.btn_start.draw(screen, mouse)
+        self.btn_back.draw(screen, mouse)
+        self.btn_mode.text = f"Mode: {MODE_LABELS[app.state.mode]}"
+        self.btn_mode.draw(screen, mouse)
+        if app.state.mode != "2P":
+            self.btn_difficulty.text = f"AI: {app.state.difficulty.upper()}"
+            self.btn_difficulty.draw(screen, mouse)
 
-        if self.state.mode == "CPU":
-            hint2 = self.font_s.render("Fight controls: Move=Arrows | 1 Jab 2 Kick 3 Grapple 4 Block 5 Rest", True, MUTED)
-        else:
-            hint2 = self.font_s.render("P1: Arrows+1..5   |   P2: WASD+6..0", True, MUTED)
-        self.screen.blit(hint2, (70, 175))
+        app.draw_log()
 
-        left = pygame.Rect(70, 210, 520, 380)
-        right = pygame.Rect(690, 210, 520, 380)
-        draw_panel(self.screen, left, "FIGHTER 1", self.font_b)
-        draw_panel(self.screen, right, "FIGHTER 2", self.font_b)
+    def _list_view(self, panel_rect):
+        return pygame.Rect(panel_rect.x + 18, panel_rect.y + 68, panel_rect.w - 36, panel_rect.h - 88)
 
-        self.draw_fighter_list(left, mouse, side="A")
-        self.draw_fighter_list(right, mouse, side="B")
+    def draw_fighter_list(self, panel_rect, mouse, side="A"):
+        app, screen = self.app, self.app.screen
+        view = self._list_view(panel_rect)
+        draw_rect_round(screen, view, (14, 14, 22), r=14)
+        draw_rect_round(screen, view, (45, 45, 70), r=14, width=2)
+
+        if not len(app.roster):
+            t = app.font.render("No fighters in DB. Click 'Add Legends'.", True, (100, 100, 120))
+            screen.blit(t, (view.x + 16, view.y + 18))
+            return
 
-        self.btn_add_legends.draw(self.screen, mouse)
-        self.btn_create.draw(self.screen, mouse)
-        self.btn_start.draw(self.screen, mouse)
-        self.btn_back.draw(self.screen, mouse)
+        lst = self.list_a if side == "A" else self.list_b
+        sel = app.sel_a if side == "A" else app.sel_b
+        lst.draw(screen, mouse, selected_id=sel.fighter_id if sel else None,
+                 accent=RED if side == "A" else BLUE)
 
-        self.draw_log()
+    def flag_image(self, country):
+        if country not in self._flags:
+            img = load_image(os.path.join(ASSETS_DIR, f"{country}.png")) if country else None
+            self._flags[country] = pygame.transform.scale(img, (24, 16)) if img else None
+        return self._flags[country]
 
-    def draw_fighter_list(self, panel_rect, mouse, side="A"):
-        view = pygame.Rect(panel_rect.x + 18, panel_rect.y + 68, panel_rect.w - 36, panel_rect.h - 88)
-        draw_rect_round(self.screen, view, (14, 14, 22), r=14)
-        draw_rect_round(self.screen, view, (45, 45, 70), r=14, width=2)
-
-        fighters = self.fighters
-        if not fighters:
-            t = self.font.render("No fighters in DB. Click 'Add Legends'.", True, (100, 100, 120))
-            self.screen.blit(t, (view.x + 16, view.y + 18))
-            return
+    def render_list_item(self, f, selected, w, h, icon_color):
+        app = self.app
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        draw_rect_round(surf, surf.get_rect(), (34, 30, 44) if selected else (26, 26, 38), r=12)
+        pygame.draw.circle(surf, icon_color, (22, 26), 9)
 
-        item_h = 58
-        visible = view.h // item_h
-        scroll = self.scroll_a if side == "A" else self.scroll_b
-        scroll = clamp(scroll, 0, max(0, len(fighters) - visible))
-        
-        if side == "A": self.scroll_a = scroll
-        else: self.scroll_b = scroll
+        name_txt = app.font.render(f.name.upper()[:22], True, (255, 255, 255))
+        surf.blit(name_txt, (44, 10))
 
-        for i in range(visible):
-            idx = int(scroll) + i
-            if idx >= len(fighters): break
-            f = fighters[idx]
-            
-            r = pygame.Rect(view.x + 10, view.y + 10 + i * item_h, view.w - 20, item_h - 10)
+        flag_img = self.flag_image(LEGEND_COUNTRIES.get(f.name))
+        if flag_img:
+            surf.blit(flag_img, (44 + name_txt.get_width() + 10, 14))
 
-            selected = (self.sel_a and f.fighter_id == self.sel_a.fighter_id) if side == "A" else (self.sel_b and f.fighter_id == self.sel_b.fighter_id)
-            bg = (26, 26, 38) if not selected else (34, 30, 44)
-            draw_rect_round(self.screen, r, bg, r=12)
-            
-            outline = (RED if side == "A" else BLUE) if selected else (70, 70, 105)
-            draw_rect_round(self.screen, r, outline, r=12, width=2 if r.collidepoint(mouse) else 1)
-
-            icon_color = RED if side == "A" else BLUE
-            pygame.draw.circle(self.screen, icon_color, (r.x + 22, r.y + 26), 9)
-
-            name_txt = self.font.render(f.name.upper()[:22], True, (255, 255, 255))
-            self.screen.blit(name_txt, (r.x + 44, r.y + 10))
-
-            country_map = {
-                "Khabib Nurmagomedov": "Russia",
-                "Conor McGregor": "Ireland",
-                'Ahavat "Goldenboy" Gordon': "Israel",
-                "Anderson Silva": "Brazil",
-                "Jon Jones": "USA"
-            }
-
-            f_country = country_map.get(f.name)
-
-            if f_country:
-                try:
-                    flag_path = f"assets/{f_country}.png"
-                    flag_img = pygame.image.load(flag_path).convert_alpha()
-                    flag_img = pygame.transform.scale(flag_img, (24, 16))
-                    
-                    flag_x = r.x + 44 + name_txt.get_width() + 10
-                    flag_y = r.y + 14 
-                    
-                    self.screen.blit(flag_img, (flag_x, flag_y))
-                except Exception as e:
-                    pass
-
-            sub = self.font_s.render(f"{f.weight_class}  •  {fighter_style(f)}", True, (140, 140, 160))
-            self.screen.blit(sub, (r.x + 44, r.y + 32))
-
-            ovr = int(get_stat(f, "overall_skill", 50))
-            o = self.font.render(f"OVR {ovr}", True, (255, 215, 0))
-            self.screen.blit(o, (r.right - o.get_width() - 14, r.y + 18))
-
-    def handle_select(self, ev):
+        sub = app.font_s.render(f"{f.weight_class}  •  {fighter_style(f)}", True, (140, 140, 160))
+        surf.blit(sub, (44, 32))
+
+        ovr = int(get_stat(f, "overall_skill", 50))
+        o = app.font.render(f"OVR {ovr}", True, (255, 215, 0))
+        surf.blit(o, (w - o.get_width() - 14, 18))
+        return surf
+
+    def handle(self, ev):
+        app = self.app
         if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
-            self.scene = "home"
+            app.scene = "home"
             return
 
         if self.btn_back.clicked(ev):
-            self.scene = "home"
+            app.scene = "home"
             return
 
         if self.btn_add_legends.clicked(ev):
-            self.add_legends()
+            app.add_legends()
+            return
+
+        if self.btn_mode.clicked(ev):
+            app.state.mode = MODE_CYCLE[app.state.mode]
+            app.push_log(f"Mode: {MODE_LABELS[app.state.mode]}.")
+            return
+
+        if app.state.mode != "2P" and self.btn_difficulty.clicked(ev):
+            app.state.difficulty = LEVELS[(LEVELS.index(app.state.difficulty) + 1) % len(LEVELS)]
+            app.push_log(f"CPU difficulty: {app.state.difficulty.upper()}.")
             return
 
         if self.btn_create.clicked(ev):
-            self.scene = "create"
-            self.create_name = ""
-            self.stats = dict(self.stats_template)
-            self.push_log("Create Fighter: type name, pick weight/type, set stats.")
+            app.scene = "create"
             return
 
         if ev.type == pygame.MOUSEWHEEL:
             mx, my = pygame.mouse.get_pos()
-            if 70 <= mx <= 590 and 210 <= my <= 590:
-                self.scroll_a = clamp(self.scroll_a - ev.y, 0, max(0, len(self.fighters)-6))
-            if 690 <= mx <= 1210 and 210 <= my <= 590:
-                self.scroll_b = clamp(self.scroll_b - ev.y, 0, max(0, len(self.fighters)-6))
+            if self.panel_a.collidepoint(mx, my): self.list_a.handle_wheel(ev)
+            if self.panel_b.collidepoint(mx, my): self.list_b.handle_wheel(ev)
+
+        # קפיצה לאות - ברשימה שמתחת לעכבר, או בשתיהן
+        if ev.type == pygame.KEYDOWN and ev.unicode and ev.unicode.isalpha():
+            mx, my = pygame.mouse.get_pos()
+            on_a = self.panel_a.collidepoint(mx, my)
+            on_b = self.panel_b.collidepoint(mx, my)
+            if on_a or not on_b: self.list_a.jump_to_letter(ev.unicode)
+            if on_b or not on_a: self.list_b.jump_to_letter(ev.unicode)
 
         if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
             f = self.pick_from_list(ev.pos, side="A")
             if f:
-                self.sel_a = f
-                self.push_log(f"Fighter 1: {f.name}")
+                app.sel_a = f
+                app.push_log(f"Fighter 1: {f.name}")
             f = self.pick_from_list(ev.pos, side="B")
             if f:
-                self.sel_b = f
-                self.push_log(f"Fighter 2: {f.name}")
+                app.sel_b = f
+                app.push_log(f"Fighter 2: {f.name}")
+
+        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_TAB:
+            app.suggest_opponent()
+            return
 
         if self.btn_start.clicked(ev) or (ev.type==pygame.KEYDOWN and ev.key==pygame.K_RETURN):
-            if not self.sel_a or not self.sel_b:
-                self.push_log("Pick TWO fighters first.")
+            if not app.sel_a or not app.sel_b:
+                app.push_log("Pick TWO fighters first.")
                 return
-            if self.sel_a.fighter_id == self.sel_b.fighter_id:
-                self.push_log("Choose two different fighters.")
+            if app.sel_a.fighter_id == app.sel_b.fighter_id:
+                app.push_log("Choose two different fighters.")
                 return
-            self.start_fight()
+            app.start_fight()
 
     def pick_from_list(self, pos, side="A"):
-        fighters = self.fighters
-        if not fighters: return None
-        panel = pygame.Rect(70, 210, 520, 380) if side=="A" else pygame.Rect(690, 210, 520, 380)
-        view = pygame.Rect(panel.x + 18, panel.y + 68, panel.w - 36, panel.h - 88)
-        if not view.collidepoint(pos): return None
-        item_h = 58
-        rel_y = pos[1] - (view.y + 10)
-        if rel_y < 0: return None
-        row = rel_y // item_h
-        scroll = self.scroll_a if side=="A" else self.scroll_b
-        idx = int(scroll) + int(row)
-        if 0 <= idx < len(fighters):
-            return fighters[idx]
-        return None
+        return (self.list_a if side == "A" else self.list_b).item_at(pos)
+
 
-    # ----------------- CREATE -----------------
-    def draw_create(self, mouse):
-        self.screen.fill(BG)
-        title = self.font_title.render("CREATE FIGHTER", True, TEXT)
-        self.screen.blit(title, (70, 60))
+class CreateScene(Scene):
+    needs_roster = True
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.create_name = ""
+        self.create_weight_idx = 3
+        self.create_type_idx = 0
+        self.weight_classes = ["Flyweight","Bantamweight","Featherweight","Lightweight","Welterweight","Middleweight","Light Heavyweight","Heavyweight"]
+        self.types = ["Striker","Grappler","Hybrid"]
+        self.edit_stat_idx = 0
+        self.stats_template = {"STR":70,"GRP":70,"SPD":70,"KICK":70,"SUB":70,"DEF":70,"VERS":70,"STA":70}
+        self.stats = dict(self.stats_template)
+        self.optimizer = None  # BuildOptimizer שרץ ברקע (או סיים) על הסוג והקטגוריה הנוכחיים
 
-        rect = pygame.Rect(70, 150, 820, 540)
-        draw_panel(self.screen, rect, "Details & Stats", self.font_b)
+    def build(self):
+        app = self.app
+        self.rect = pygame.Rect(70, 150, 820, 540)
+        self.btn_optimize = Button((920, 490, 260, 56), "OPTIMIZE", app.font_b, accent=YELLOW)
+        self.btn_save = Button((920, 560, 260, 56), "SAVE", app.font_b, accent=GREEN)
+        self.btn_back = Button((920, 630, 260, 56), "BACK", app.font_b, accent=(140,140,200))
 
-        self.screen.blit(self.font.render("Name (type):", True, MUTED), (rect.x+24, rect.y+80))
+    def enter(self):
+        self.stop_optimizer()
+        self.create_name = ""
+        self.stats = dict(self.stats_template)
+        self.app.push_log("Create Fighter: type name, pick weight/type, set stats.")
+
+    # ----- אופטימייזר -----
+    def start_optimizer(self):
+        # התקציב הוא מה שעל המסך: סכום הסטטיסטיקות שהסוג משתמש בהן
+        app = self.app
+        tp, wc = self.types[self.create_type_idx], self.weight_classes[self.create_weight_idx]
+        # היריבים נטענים מהמאגר ב-thread של האופטימייזר, לא בפריים
+        repo = app.repo
+        self.optimizer = BuildOptimizer(tp, None, budget_of(self.stats, tp), start=self.stats)
+        self.optimizer.start_background(opponents_loader=lambda: load_opponents(repo, wc))
+        app.push_log(f"Optimizer: {tp}, {self.optimizer.budget} points vs the {wc} roster...")
+
+    def stop_optimizer(self):
+        # עוצרים ומכניסים למסך את הטוב ביותר עכשיו - כדי ששינוי ידני אחרי זה לא יידרס
+        if self.optimizer is not None:
+            self.optimizer.stop()
+            self.update(0)
+            # אם עדיין טוען יריבים (stop לא חיכה לו) - מנתקים, כך שתוצאה מאוחרת לא תיכנס
+            self.optimizer = None
+
+    def update(self, frame_dt):
+        opt = self.optimizer
+        if opt is None:
+            return
+        # הטוב ביותר עד עכשיו נכנס למסך תוך כדי החיפוש
+        if opt.best is not None:
+            self.stats.update(opt.best)
+        if opt.done:
+            if opt.error:
+                self.app.push_log(f"Optimizer: {opt.error}.")
+            elif opt.best is not None:
+                self.app.push_log(f"Optimizer: best build wins {opt.best_score * 100:.0f}% vs "
+                                  f"{len(opt.opponents)} opponents ({opt.generation} generations, {opt.elapsed:.1f}s).")
+            self.optimizer = None
+
+    def draw(self, mouse):
+        app, screen = self.app, self.app.screen
+        screen.fill(BG)
+        title = app.font_title.render("CREATE FIGHTER", True, TEXT)
+        screen.blit(title, (70, 60))
+
+        rect = self.rect
+        draw_panel(screen, rect, "Details & Stats", app.font_b)
+
+        screen.blit(app.font.render("Name (type):", True, MUTED), (rect.x+24, rect.y+80))
         name_box = pygame.Rect(rect.x+24, rect.y+110, 360, 44)
-        draw_rect_round(self.screen, name_box, (14,14,22), r=12)
-        draw_rect_round(self.screen, name_box, BORDER, r=12, width=2)
-        nm = self.font.render(self.create_name or "—", True, TEXT)
-        self.screen.blit(nm, (name_box.x+12, name_box.y+10))
+        draw_rect_round(screen, name_box, (14,14,22), r=12)
+        draw_rect_round(screen, name_box, BORDER, r=12, width=2)
+        nm = app.font.render(self.create_name or "—", True, TEXT)
+        screen.blit(nm, (name_box.x+12, name_box.y+10))
 
         wc = self.weight_classes[self.create_weight_idx]
-        self.screen.blit(self.font.render(f"Weight class: {wc}  (LEFT/RIGHT)", True, MUTED), (rect.x+24, rect.y+175))
+        screen.blit(app.font.render(f"Weight class: {wc}  (LEFT/RIGHT)", True, MUTED), (rect.x+24, rect.y+175))
 
         tp = self.types[self.create_type_idx]
-        self.screen.blit(self.font.render(f"Type: {tp}  (UP/DOWN)", True, MUTED), (rect.x+24, rect.y+210))
-
-        self.screen.blit(self.font.render("Edit stats: TAB to select, +/- to change", True, MUTED), (rect.x+24, rect.y+250))
+        screen.blit(app.font.render(f"Type: {tp}  (UP/DOWN)", True, MUTED), (rect.x+24, rect.y+210))
+
+        screen.blit(app.font.render("Edit stats: TAB to select, +/- to change", True, MUTED), (rect.x+24, rect.y+250))
+        budget = budget_of(self.stats, tp)
+        screen.blit(app.font_s.render(f"Budget: {budget} pts on {' '.join(TYPE_KEYS[tp])}", True, MUTED),
+                    (920, 420))
+        opt = self.optimizer
+        if opt is not None:
+            status = (f"gen {opt.generation}: {opt.best_score * 100:.0f}% wins ({opt.elapsed:.1f}s)"
+                      if opt.best else "searching..." if opt.opponents else "loading opponents...")
+            screen.blit(app.font_s.render(status, True, YELLOW), (920, 445))
+        self.btn_optimize.text = "STOP" if opt is not None and opt.running else "OPTIMIZE"
 
-        stat_keys = ["STR","GRP","SPD","KICK","SUB","DEF","VERS","STA"]
         x0, y0 = rect.x+24, rect.y+285
-        for i,k in enumerate(stat_keys):
+        for i,k in enumerate(STAT_KEYS):
             val = int(self.stats.get(k,70))
             row = i//2
             col = i%2
@@ -502,63 +543,80 @@ class App:
             label = f"{k} {'<-' if i==self.edit_stat_idx else ''}"
             self._draw_bar(bx, by+24, 330, 18, label, val, 100, colr)
 
-        self.btn_save.draw(self.screen, mouse)
-        self.btn_create_back.draw(self.screen, mouse)
-        self.draw_log()
+        self.btn_optimize.draw(screen, mouse)
+        self.btn_save.draw(screen, mouse)
+        self.btn_back.draw(screen, mouse)
+        app.draw_log()
 
     def _draw_bar(self, x, y, w, h, label, val, maxv, color):
+        screen = self.app.screen
         val = clamp(val, 0, maxv)
-        draw_rect_round(self.screen, pygame.Rect(x, y, w, h), (12, 12, 18), r=10)
-        draw_rect_round(self.screen, pygame.Rect(x, y, w, h), BORDER, r=10, width=2)
+        draw_rect_round(screen, pygame.Rect(x, y, w, h), (12, 12, 18), r=10)
+        draw_rect_round(screen, pygame.Rect(x, y, w, h), BORDER, r=10, width=2)
         fill_w = int((w - 4) * (val / maxv if maxv else 0))
-        draw_rect_round(self.screen, pygame.Rect(x + 2, y + 2, fill_w, h - 4), color, r=10)
-        txt = self.font_s.render(f"{label}: {val}/{maxv}", True, TEXT)
-        self.screen.blit(txt, (x, y - 20))
+        draw_rect_round(screen, pygame.Rect(x + 2, y + 2, fill_w, h - 4), color, r=10)
+        txt = self.app.font_s.render(f"{label}: {val}/{maxv}", True, TEXT)
+        screen.blit(txt, (x, y - 20))
 
-    def handle_create(self, ev):
+    def handle(self, ev):
+        app = self.app
         if ev.type == pygame.KEYDOWN:
             if ev.key == pygame.K_ESCAPE:
-                self.scene = "select"; return
+                self.stop_optimizer()
+                app.scene = "select"; return
             if ev.key == pygame.K_BACKSPACE:
                 self.create_name = self.create_name[:-1]
             elif ev.key == pygame.K_TAB:
                 self.edit_stat_idx = (self.edit_stat_idx + 1) % 8
             elif ev.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                self.stop_optimizer()
                 self._change_stat(+3)
             elif ev.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.stop_optimizer()
                 self._change_stat(-3)
-            elif ev.key == pygame.K_LEFT:
-                self.create_weight_idx = (self.create_weight_idx - 1) % len(self.weight_classes)
-            elif ev.key == pygame.K_RIGHT:
-                self.create_weight_idx = (self.create_weight_idx + 1) % len(self.weight_classes)
-            elif ev.key == pygame.K_UP:
-                self.create_type_idx = (self.create_type_idx - 1) % len(self.types)
-            elif ev.key == pygame.K_DOWN:
-                self.create_type_idx = (self.create_type_idx + 1) % len(self.types)
+            elif ev.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+                # החיפוש היה על הסוג והקטגוריה הקודמים
+                self.stop_optimizer()
+                if ev.key == pygame.K_LEFT:
+                    self.create_weight_idx = (self.create_weight_idx - 1) % len(self.weight_classes)
+                elif ev.key == pygame.K_RIGHT:
+                    self.create_weight_idx = (self.create_weight_idx + 1) % len(self.weight_classes)
+                elif ev.key == pygame.K_UP:
+                    self.create_type_idx = (self.create_type_idx - 1) % len(self.types)
+                else:
+                    self.create_type_idx = (self.create_type_idx + 1) % len(self.types)
             elif ev.unicode and ev.unicode.isprintable():
                 if len(self.create_name) < 22:
                     self.create_name += ev.unicode
 
-        if self.btn_create_back.clicked(ev):
-            self.scene = "select"; return
+        if self.btn_back.clicked(ev):
+            self.stop_optimizer()
+            app.scene = "select"; return
+
+        if self.btn_optimize.clicked(ev):
+            if self.optimizer is not None and self.optimizer.running:
+                self.stop_optimizer()
+            else:
+                self.start_optimizer()
+            return
 
         if self.btn_save.clicked(ev) or (ev.type==pygame.KEYDOWN and ev.key==pygame.K_RETURN):
             if not self.create_name.strip():
-                self.push_log("Name is required.")
+                app.push_log("Name is required.")
                 return
+            self.stop_optimizer()
             f = self.build_custom_fighter()
-            ok = self.repo.add_fighter(f)
-            self.refresh_fighters()
-            self.push_log(f"Saved: {f.name} ({fighter_style(f)})" if ok else "Failed to save fighter.")
-            self.scene = "select"
+            ok = app.repo.add_fighter(f)
+            app.refresh_fighters()
+            app.push_log(f"Saved: {f.name} ({fighter_style(f)})" if ok else "Failed to save fighter.")
+            app.scene = "select"
 
     def _change_stat(self, delta):
-        stat_keys = ["STR","GRP","SPD","KICK","SUB","DEF","VERS","STA"]
-        k = stat_keys[self.edit_stat_idx]
+        k = STAT_KEYS[self.edit_stat_idx]
         self.stats[k] = int(clamp(self.stats.get(k,70) + delta, 10, 100))
 
     def build_custom_fighter(self):
-        fid = self.next_id()
+        fid = self.app.next_id()
         name = self.create_name.strip()
         wc = self.weight_classes[self.create_weight_idx]
         tp = self.types[self.create_type_idx]
@@ -578,124 +636,505 @@ class App:
         return HybridChampion(fid, name, wc, striking_power=STR, grappling_skill=GRP, speed=SPD, kick_power=KICK,
                               submission_skill=SUB, takedown_defense=DEF, versatility=VERS)
 
-    # ----------------- ROSTER -----------------
-    def draw_roster(self, mouse):
-        self.screen.fill(BG)
-        title = self.font_title.render("FIGHTER ROSTER", True, TEXT)
-        self.screen.blit(title, (70, 60))
 
-        grid = pygame.Rect(70, 150, 880, 540)
-        draw_panel(self.screen, grid, "", self.font_b)
+class RosterScene(Scene):
+    needs_roster = True
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.selected = None
+        # צירופים (fusion_explorer): מחושבים ב-thread ברקע, התוצאה נכנסת לרשימה ב-update
+        self.show_fusions = False
+        self.fusion_by = 0
+        self.fusion_wc = None
+        self.fusion_stats = None
+        self.fusion_job = None
+        self.fusion_result = None
+        self.selected_fusion = None
+
+    def build(self):
+        from virtual_list import VirtualGrid, VirtualList
+        app = self.app
+        self.panel = pygame.Rect(70, 150, 880, 540)
+        card_w = (self.panel.w - 24*3)//2
+        self.grid = VirtualGrid((70, 150, 880, 506), card_w, 170, app.roster, self.render_roster_card, cols=2)
+        self.fusions = FusionList()
+        self.fusion_list = VirtualList((70, 150, 880, 506), 92, self.fusions, self.render_fusion_card, pad=24,
+                                       with_index=True)
+        self.btn_back = Button((980, 120, 250, 50), "Back", app.font, accent=(140,140,200))
+        self.btn_fusions = Button((980, 190, 250, 50), "Fusions", app.font, accent=YELLOW)
+        self.btn_fusion_by = Button((980, 260, 250, 50), "", app.font, accent=YELLOW)
+
+    def enter(self):
+        self.selected = None
+        self.show_fusions = False
+
+    # ----- צירופים -----
+    def start_fusions(self):
+        # הקטגוריה של הלוחם שנבחר (אחרת Lightweight); חישוב אחד בכל פעם
+        if self.fusion_job is not None and self.fusion_job.is_alive():
+            return
+        app = self.app
+        wc = self.selected.weight_class if self.selected else "Lightweight"
+        by = FUSION_BY[self.fusion_by]
+        self.fusion_wc = wc
+        self.fusion_stats = None
+        self.selected_fusion = None
+        self.fusions.set(())
+        self.fusion_job = threading.Thread(target=self._run_fusions, args=(wc, by), name="fusion-explorer",
+                                           daemon=True)
+        self.fusion_job.start()
+        app.push_log(f"Fusions: ranking every {wc} pair by {by}...")
+
+    def _run_fusions(self, wc, by):
+        repo = self.app.repo
+        try:
+            self.fusion_result = explore(repo, wc, by=by)
+        except Exception as e:
+            self.fusion_result = e
+        finally:
+            repo.release_connection()  # thread לכל חישוב - לא משאירים אחריו חיבור פתוח
+
+    def update(self, frame_dt):
+        result, self.fusion_result = self.fusion_result, None
+        if result is None:
+            return
+        if isinstance(result, Exception):
+            self.app.push_log(f"Fusions failed: {result}")
+            return
+        self.fusions.set(result["fusions"])
+        self.fusion_list.scroll_to_index(0)
+        self.fusion_stats = result
+        self.app.push_log(f"Fusions: top {len(result['fusions'])} of {result['pairs']:,} {result['weight_class']} pairs "
+                          f"({result['evaluated']} evaluated, {result['load_ms'] + result['search_ms']:.0f} ms).")
+
+    def draw(self, mouse):
+        app, screen = self.app, self.app.screen
+        screen.fill(BG)
+        title = app.font_title.render("FIGHTER ROSTER", True, TEXT)
+        screen.blit(title, (70, 60))
+
+        grid = self.panel
+        draw_panel(screen, grid, "", app.font_b)
 
         # כפתור ה-Back
-        self.btn_roster_back.draw(self.screen, mouse)
+        self.btn_back.draw(screen, mouse)
+        self.btn_fusions.text = "Roster" if self.show_fusions else "Fusions"
+        self.btn_fusions.draw(screen, mouse)
+        if self.show_fusions:
+            self.btn_fusion_by.text = "By: " + ("Skill" if FUSION_BY[self.fusion_by] == "skill" else "Win rate")
+            self.btn_fusion_by.draw(screen, mouse)
+            self.draw_fusions(mouse)
+            app.draw_log()
+            return
 
-        fighters = self.fighters
-        if not fighters:
-            t = self.font.render("No fighters. Go Select > Add Legends.", True, MUTED)
-            self.screen.blit(t, (grid.x+24, grid.y+60))
+        if not len(app.roster):
+            t = app.font.render("No fighters. Go Select > Add Legends.", True, MUTED)
+            screen.blit(t, (grid.x+24, grid.y+60))
             return
 
-        cols = 2
-        card_w = (grid.w - 24*3)//2
-        card_h = 170
-        
-        # --- תיקון: 2 שורות במקום 3 כדי שלא ייחתך ---
-        per_page = 2*cols  
-        rows_total = math.ceil(len(fighters)/cols)
-        max_scroll = max(0, rows_total - 2)
-        self.roster_scroll = clamp(self.roster_scroll, 0, max_scroll)
-
-        start_row = int(self.roster_scroll)
-        idx0 = start_row*cols
-        show = fighters[idx0: idx0 + per_page]
-
-        for i,f in enumerate(show):
-            r = i//cols
-            c = i%cols
-            x = grid.x + 24 + c*(card_w+24)
-            y = grid.y + 24 + r*(card_h+24)
-            card = pygame.Rect(x, y, card_w, card_h)
-            selected = self.roster_selected and f.fighter_id == self.roster_selected.fighter_id
-            draw_rect_round(self.screen, card, PANEL_2 if selected else PANEL, r=16)
-            draw_rect_round(self.screen, card, (RED if selected else BORDER), r=16, width=2)
-
-            nm = self.font_b.render(f.name.upper()[:18], True, TEXT)
-            self.screen.blit(nm, (card.x+16, card.y+14))
-            st = self.font_s.render(f"{fighter_style(f)}  •  {f.weight_class}", True, MUTED)
-            self.screen.blit(st, (card.x+16, card.y+52))
-
-            STR = get_stat(f,"striking_power",50)
-            GRP = get_stat(f,"grappling_skill",50)
-            STA = int(60 + (get_stat(f,"speed",60)*0.2) + (get_stat(f,"versatility",60)*0.2))
-            DEF = int((get_stat(f,"takedown_defense",60) + get_stat(f,"grappling_skill",60)) / 2)
-
-            self._mini_bar(card.x+16, card.y+82, 250, "STR", STR, RED)
-            self._mini_bar(card.x+16, card.y+104, 250, "GRP", GRP, BLUE)
-            self._mini_bar(card.x+16, card.y+126, 250, "STA", clamp(STA,10,100), YELLOW)
-            self._mini_bar(card.x+16, card.y+148, 250, "DEF", clamp(DEF,10,100), GREEN)
-
-        self.draw_log()
-
-    def _mini_bar(self, x, y, w, label, val, color):
-        t = self.font_s.render(label, True, MUTED)
-        self.screen.blit(t, (x, y))
+        selected_id = self.selected.fighter_id if self.selected else None
+        self.grid.draw(screen, mouse, selected_id=selected_id, accent=RED, idle=BORDER, radius=16, width=2)
+
+        app.draw_log()
+
+    def draw_fusions(self, mouse):
+        app, screen = self.app, self.app.screen
+        grid = self.panel
+        busy = self.fusion_job is not None and self.fusion_job.is_alive()
+        head = f"Best fusions: {self.fusion_wc}" + ("  (computing...)" if busy else "")
+        screen.blit(app.font.render(head, True, YELLOW if busy else MUTED), (980, 330))
+        r = self.fusion_stats
+        if r is not None:
+            for k, line in enumerate((f"{r['fighters']:,} fighters, {r['pairs']:,} pairs",
+                                      f"{r['evaluated']:,} evaluated" +
+                                      (f", {r['simulated']} simulated" if r["simulated"] else ""),
+                                      f"{r['load_ms'] + r['search_ms']:.0f} ms")):
+                screen.blit(app.font_s.render(line, True, MUTED), (980, 362 + k*22))
+        if not len(self.fusions):
+            if not busy:
+                t = app.font.render(f"No pairs in {self.fusion_wc}.", True, MUTED)
+                screen.blit(t, (grid.x+24, grid.y+60))
+            return
+        selected_id = self.selected_fusion.fighter_id if self.selected_fusion else None
+        self.fusion_list.draw(screen, mouse, selected_id=selected_id, accent=YELLOW, idle=BORDER, radius=14, width=2)
+
+    def render_fusion_card(self, fu, selected, w, h, index=0):
+        app = self.app
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        draw_rect_round(surf, surf.get_rect(), PANEL_2 if selected else PANEL, r=14)
+        surf.blit(app.font_b.render(f"#{index + 1}", True, YELLOW), (16, 12))
+        surf.blit(app.font.render(f"{fu.name1[:22]} + {fu.name2[:22]}", True, TEXT), (90, 10))
+        surf.blit(app.font_s.render(f"{fu.weight_class}  •  overall {fu.overall_skill:.1f}"
+                                    + (f"  •  win {fu.win_rate * 100:.0f}%" if fu.win_rate is not None else ""),
+                                    True, MUTED), (90, 40))
+        self._mini_bar(surf, 16, 58, 330, "STR", fu.striking_power, RED)
+        self._mini_bar(surf, 420, 58, 330, "GRP", fu.grappling_skill, BLUE)
+        return surf
+
+    def render_roster_card(self, f, selected, w, h):
+        app = self.app
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        draw_rect_round(surf, surf.get_rect(), PANEL_2 if selected else PANEL, r=16)
+
+        nm = app.font_b.render(f.name.upper()[:18], True, TEXT)
+        surf.blit(nm, (16, 14))
+        st = app.font_s.render(f"{fighter_style(f)}  •  {f.weight_class}", True, MUTED)
+        surf.blit(st, (16, 52))
+
+        STR = get_stat(f,"striking_power",50)
+        GRP = get_stat(f,"grappling_skill",50)
+        STA = int(60 + (get_stat(f,"speed",60)*0.2) + (get_stat(f,"versatility",60)*0.2))
+        DEF = int((get_stat(f,"takedown_defense",60) + get_stat(f,"grappling_skill",60)) / 2)
+
+        self._mini_bar(surf, 16, 82, 250, "STR", STR, RED)
+        self._mini_bar(surf, 16, 104, 250, "GRP", GRP, BLUE)
+        self._mini_bar(surf, 16, 126, 250, "STA", clamp(STA,10,100), YELLOW)
+        self._mini_bar(surf, 16, 148, 250, "DEF", clamp(DEF,10,100), GREEN)
+        return surf
+
+    def _mini_bar(self, surf, x, y, w, label, val, color):
+        t = self.app.font_s.render(label, True, MUTED)
+        surf.blit(t, (x, y))
         bar = pygame.Rect(x+34, y+4, w-34, 12)
-        pygame.draw.rect(self.screen, (12,12,18), bar, border_radius=8)
-        pygame.draw.rect(self.screen, BORDER, bar, width=1, border_radius=8)
+        pygame.draw.rect(surf, (12,12,18), bar, border_radius=8)
+        pygame.draw.rect(surf, BORDER, bar, width=1, border_radius=8)
         fill = int((bar.w-2)*clamp(val,0,100)/100)
-        pygame.draw.rect(self.screen, color, (bar.x+1, bar.y+1, fill, bar.h-2), border_radius=8)
-        v = self.font_s.render(str(val), True, TEXT)
-        self.screen.blit(v, (x+w+8, y-1))
+        pygame.draw.rect(surf, color, (bar.x+1, bar.y+1, fill, bar.h-2), border_radius=8)
+        v = self.app.font_s.render(str(val), True, TEXT)
+        surf.blit(v, (x+w+8, y-1))
 
-    def handle_roster(self, ev):
+    def handle(self, ev):
+        app = self.app
         if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
-            self.scene = "home"; return
-        if self.btn_roster_back.clicked(ev):
-            self.scene = "home"; return
+            app.scene = "home"; return
+        if self.btn_back.clicked(ev):
+            app.scene = "home"; return
+        if self.btn_fusions.clicked(ev):
+            self.show_fusions = not self.show_fusions
+            # חישוב מחדש רק כשהקטגוריה השתנתה מאז הפעם הקודמת
+            wc = self.selected.weight_class if self.selected else "Lightweight"
+            if self.show_fusions and (wc != self.fusion_wc or not len(self.fusions)):
+                self.start_fusions()
+            return
+        if self.show_fusions:
+            self.handle_fusions(ev)
+            return
         if ev.type == pygame.MOUSEWHEEL:
-            self.roster_scroll = clamp(self.roster_scroll - ev.y, 0, 999)
+            self.grid.handle_wheel(ev)
+        if ev.type == pygame.KEYDOWN and ev.unicode and ev.unicode.isalpha():
+            self.grid.jump_to_letter(ev.unicode)
 
         if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
             f = self.pick_roster_card(ev.pos)
             if f:
-                self.roster_selected = f
+                self.selected = f
+
+    def handle_fusions(self, ev):
+        if self.btn_fusion_by.clicked(ev):
+            if self.fusion_job is not None and self.fusion_job.is_alive():
+                return
+            self.fusion_by = (self.fusion_by + 1) % len(FUSION_BY)
+            self.start_fusions()
+            return
+        if ev.type == pygame.MOUSEWHEEL:
+            self.fusion_list.handle_wheel(ev)
+        if ev.type == pygame.KEYDOWN and ev.unicode and ev.unicode.isalpha():
+            self.fusion_list.jump_to_letter(ev.unicode)
+        if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
+            fu = self.fusion_list.item_at(ev.pos)
+            if fu:
+                self.selected_fusion = fu
 
     def pick_roster_card(self, pos):
-        grid = pygame.Rect(70, 150, 880, 540)
-        if not grid.collidepoint(pos): return None
-        cols=2
-        card_w = (grid.w - 24*3)//2
-        card_h = 170
-        start_row = int(self.roster_scroll)
+        return self.grid.item_at(pos)
+
+
+class FightScene(Scene):
+    needs_roster = True
+
+    def update(self, frame_dt):
+        app = self.app
+        for _ in range(app.sim_clock.advance(frame_dt)):
+            app.fight.update(app.sim_clock.step)
+
+    def draw(self, mouse):
+        self.app.fight.draw(self.app.screen, mouse, alpha=self.app.sim_clock.alpha)
+
+    def handle(self, ev):
+        app = self.app
+        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
+            app.scene = "select"
+            app.fight.close()
+            app.fight = None
+            return
+        app.fight.handle_event(ev)
+
+
+SCENES = {
+    "home": HomeScene, "about": AboutScene, "select": SelectScene,
+    "create": CreateScene, "roster": RosterScene, "fight": FightScene,
+}
+
+class App:
+    def __init__(self, db_name="ufc_v3.db", startup_t0=None):
+        self.startup_t0 = startup_t0 if startup_t0 is not None else time.perf_counter()
+        self.startup_times = {}
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Fight Simulator")
+        self.clock = pygame.time.Clock()
+        self.sim_clock = FixedStepClock(SIM_DT)
+        self.profiler = FrameProfiler()
+        install_draw_counters()
+
+        # CountingFont זהה ל-SysFont(None, size) אבל סופר רינדורי טקסט לפרופיילר
+        self.font_s = CountingFont(None, 20)
+        self.font = CountingFont(None, 26)
+        self.font_b = CountingFont(None, 36)
+        self.font_title = CountingFont(None, 64)
+
+        self.state = AppState()
+        self.log = ["Welcome! If no fighters appear, click Add Legends."]
+        self.log_max = 6
+
+        # מקשי הזירה (arena_input) - controls.json אם קיים
+        try:
+            self.bindings = KeyBindings.load()
+        except (OSError, ValueError) as e:
+            self.bindings = KeyBindings()
+            self.push_log(f"controls.json ignored: {e}")
+
+        # selection
+        self.sel_a = None
+        self.sel_b = None
+
+        # fight
+        self.fight = None
+
+        # סצנות נוצרות רק כשנכנסים אליהן לראשונה
+        self._scenes = {}
+        self.scene = "home"  # home/select/create/roster/fight/about
+        self._entered = None
+
+        # הרוסטר (Repository + דף ראשון) נטען ב-thread ברקע, מסך הבית זמין מיד
+        self.repo = None
+        self.roster = None
+        self.roster_error = None
+        self.roster_ready = threading.Event()
+        threading.Thread(target=self._load_roster, args=(db_name,), name="roster-loader", daemon=True).start()
+
+        # עבודות רקע (job_runner) - העובדים והמעקב עולים רק בהגשה הראשונה
+        self.db_name = db_name
+        self.jobs = None
+        self.job_workers = None
+        self.job_monitor = None
+        self._job_reported = None
+
+        # אינדקס השידוכים נבנה ברקע בלחיצת TAB הראשונה
+        self.matchmaker = None
+        self._matchmaker_loading = False
+        self._matchmaker_built = None  # Matchmaker או Exception מה-thread; הלולאה הראשית מעבירה אותו
+
+        self._mark_startup("init_ms")
+
+    def _mark_startup(self, key):
+        self.startup_times.setdefault(key, (time.perf_counter() - self.startup_t0) * 1000.0)
+
+    def _load_roster(self, db_name):
+        try:
+            from models.repository import Repository
+            from virtual_list import RosterPager
+            repo = Repository(db_name)
+            roster = RosterPager(repo)
+            roster.get(0)  # ספירה + הבלוק הראשון, כדי שמסך הבחירה יצויר מיד
+            self.repo, self.roster = repo, roster
+        except Exception as e:
+            self.roster_error = f"Roster failed to load: {e}"
+        finally:
+            self._mark_startup("roster_ready_ms")
+            self.roster_ready.set()
+
+    def wait_for_roster(self, timeout=None):
+        return self.roster_ready.wait(timeout)
+
+    def get_scene(self, name):
+        sc = self._scenes.get(name)
+        if sc is None:
+            sc = self._scenes[name] = SCENES[name](self)
+        return sc
+
+    def current_scene(self):
+        sc = self.get_scene(self.scene)
+        if self._entered is not sc:
+            self._entered = sc
+            sc.enter()
+        return sc
+
+    def push_log(self, msg):
+        for line in str(msg).splitlines():
+            line = line.strip()
+            if line:
+                self.log.append(line)
+        self.log = self.log[-self.log_max:]
+
+    def refresh_fighters(self):
+        # הרשימות טוענות מחדש רק את החלון הנראה
+        self.roster.invalidate()
+
+    def next_id(self):
+        return self.repo.get_max_fighter_id() + 1
+
+    def add_legends(self):
+        if hasattr(self.repo, 'fighters'):
+            self.repo.fighters.clear()
+        if hasattr(self.repo, '_fighters'):
+            self.repo._fighters.clear()
+            
+        base = 1 
         
-        # --- תיקון: לולאה על 2 שורות ---
-        for r in range(2):
-            for c in range(cols):
-                x = grid.x + 24 + c*(card_w+24)
-                y = grid.y + 24 + r*(card_h+24)
-                card = pygame.Rect(x,y,card_w,card_h)
-                if card.collidepoint(pos):
-                    idx = (start_row*cols) + (r*cols+c)
-                    if 0 <= idx < len(self.fighters):
-                        return self.fighters[idx]
-        return None
+        khabib = Grappler(base, "Khabib Nurmagomedov", "Lightweight", 78, 97, 92, 90)
+        khabib.skin_color, khabib.hair_color, khabib.pants_color = (198, 134, 103), (20, 20, 20), (20, 20, 20)
+        khabib.country = "Russia"  
+
+        conor = Striker(base+1, "Conor McGregor", "Lightweight", 95, 65, 78, 86)
+        conor.country = "Ireland" 
+        conor.skin_color, conor.hair_color, conor.pants_color = (255, 224, 196), (180, 90, 40), (34, 139, 34)
+
+        ah_gordon = HybridChampion(base+2, 'Ahavat "Goldenboy" Gordon', "Light Heavyweight", 92, 88, 86, 85, 84, 88, 90)
+        ah_gordon.skin_color = (220, 175, 140)  
+        ah_gordon.hair_color = (160, 130, 80)   
+        ah_gordon.pants_color = (90, 10, 10)    
+        ah_gordon.hair_length = "long" 
+        ah_gordon.country = "Israel"  
+
+        silva = Striker(base+3, "Anderson Silva", "Middleweight", 96, 70, 85, 90)
+        silva.skin_color, silva.hair_color, silva.pants_color = (110, 75, 55), (10, 10, 10), (255, 215, 0)
+        silva.country = "Brazil"
+
+        jones = Grappler(base+4, "Jon Jones", "Heavyweight", 88, 95, 92, 90)
+        jones.skin_color, jones.hair_color, jones.pants_color = (100, 65, 45), (10, 10, 10), (200, 20, 20)
+        jones.country = "USA"
+
+        legends = [khabib, conor, ah_gordon, silva, jones]
+        
+        added = 0
+        for f in legends:
+            self.repo.add_fighter(f)
+            added += 1
+            
+        self.refresh_fighters()
+        self.push_log(f"Roster Reset: {added} legends ready.")
+
+    # ----------------- MATCHMAKING -----------------
+    def suggest_opponent(self):
+        if not self.sel_a:
+            self.push_log("Pick Fighter 1 first, then TAB for a fair opponent.")
+            return
+        if self.matchmaker is None:
+            if not self._matchmaker_loading:
+                self._matchmaker_loading = True
+                self.push_log("Building matchmaking index...")
+                threading.Thread(target=self._load_matchmaker, name="matchmaker-loader", daemon=True).start()
+            return
+        hits = self.matchmaker.nearest(self.sel_a.fighter_id, 1)
+        if not hits:
+            self.push_log(f"No opponent for {self.sel_a.name} in {self.sel_a.weight_class}.")
+            return
+        self.sel_b = self.repo.get_fighter_by_id(hits[0]["fighter2_id"])
+        self.push_log(f"Fighter 2: {self.sel_b.name} (closest match, {hits[0]['fighter1_win_prob'] * 100:.0f}% for "
+                      f"{self.sel_a.name})")
+
+    def _load_matchmaker(self):
+        # רק בונה - sel_b והלוג משתנים בלולאה הראשית (poll_matchmaker), לא ב-thread הזה
+        from matchmaking import Matchmaker
+        try:
+            self._matchmaker_built = Matchmaker(self.repo)
+        except Exception as e:
+            self._matchmaker_built = e
+        finally:
+            self.repo.release_connection()
+
+    def poll_matchmaker(self):
+        built, self._matchmaker_built = self._matchmaker_built, None
+        if built is None:
+            return
+        self._matchmaker_loading = False
+        if isinstance(built, Exception):
+            self.push_log(f"Matchmaking failed: {built}")
+            return
+        self.matchmaker = built
+        self.suggest_opponent()
 
     # ----------------- FIGHT -----------------
     def start_fight(self):
         self.scene = "fight"
         self.fight = FightArena(self, self.sel_a, self.sel_b, self.state.mode)
+        self.sim_clock.reset()
+        self.sim_clock.allow_fast_forward(self.state.mode == "SIM")
         self.push_log("Fight started!")
 
-    def draw_fight(self, mouse):
-        self.fight.draw(self.screen, mouse)
-
-    def handle_fight(self, ev):
-        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_ESCAPE:
-            self.scene = "select"
-            self.fight = None
-            return
-        self.fight.handle_event(ev)
+    def start_net_fight(self, match):
+        # קרב רשת (netplay.host / join) - בלי עצירה והרצה מהירה, השעון של שני הצדדים זהה
+        f1, f2 = match.fighters(self.repo)
+        self.scene = "fight"
+        self.fight = FightArena(self, f1, f2, "2P", net=match)
+        self.sim_clock.reset()
+        self.sim_clock.allow_fast_forward(False)
+        self.push_log(f"Online fight: {f1.name} vs {f2.name} - you are Player {match.side + 1} ({self.bindings.hint(0, labels=False)}).")
+
+    def watch_replay(self, replay):
+        # צפייה בהקלטה - הרצה מהירה מותרת תמיד (אין קלט חי)
+        f1, f2 = replay.fighters(self.repo)
+        self.scene = "fight"
+        self.fight = FightArena(self, f1, f2, replay.mode, replay=replay)
+        self.sim_clock.reset()
+        self.sim_clock.allow_fast_forward(True)
+        self.push_log(f"Replay: {f1.name} vs {f2.name} ({replay.duration:.0f}s, seed {replay.seed})")
+
+    # ----------------- JOBS -----------------
+    def submit_job(self, kind, params=None):
+        from models.job_store import JobStore
+        from job_runner import JobMonitor, JobWorkers
+        if self.jobs is None:
+            self.jobs = JobStore(self.db_name)
+            self.job_monitor = JobMonitor(self.jobs)
+            self.job_workers = JobWorkers(self.db_name, workers=1)
+        self.job_workers.start()
+        job_id = self.jobs.submit(kind, params)
+        self.job_monitor.track(job_id)
+        self.push_log(f"Job #{job_id} ({kind}) queued - F7 to cancel.")
+        return job_id
+
+    def cancel_job(self):
+        if self.job_monitor is None or self.job_monitor.job_id is None: return
+        if self.jobs.cancel(self.job_monitor.job_id):
+            self.push_log(f"Job #{self.job_monitor.job_id}: cancel requested.")
+
+    def poll_job(self):
+        # רק קריאת snapshot שה-JobMonitor מעדכן ב-thread - בלי גישה למסד בפריים
+        job = self.job_monitor.snapshot if self.job_monitor else None
+        if not job or job["status"] not in FINAL_JOB_STATUSES or self._job_reported == job["job_id"]:
+            return job
+        self._job_reported = job["job_id"]
+        if job["status"] == "done":
+            self.push_log(f"Job #{job['job_id']} done: {job['result']}")
+            if self.roster: self.refresh_fighters()  # הרקורדים השתנו
+        else:
+            self.push_log(f"Job #{job['job_id']} {job['status']} {job['error'] or ''}")
+        return job
+
+    def draw_job_hud(self, job):
+        if not job: return
+        rect = pygame.Rect(WIDTH - 330, 12, 310, 26)
+        draw_rect_round(self.screen, rect, (14,14,22), r=8)
+        fill = rect.inflate(-4, -4)
+        fill.width = int(fill.width * min(1.0, job["progress"]))
+        if fill.width: draw_rect_round(self.screen, fill, (60,110,60) if job["status"] == "done" else (70,70,140), r=6)
+        label = f"Job #{job['job_id']} {job['kind']}: {job['status']} {job['progress'] * 100:.0f}%"
+        t = self.font_s.render(label, True, TEXT)
+        self.screen.blit(t, t.get_rect(center=rect.center))
 
     # ----------------- LOG -----------------
     def draw_log(self):
@@ -708,161 +1147,202 @@ class App:
             self.screen.blit(t, (rect.x + 12, y))
             y += 18
 
+    def handle_global(self, ev):
+        # מקשים שפעילים בכל סצנה: F3 פרופיילר, F4 ייצוא תזמונים, F6/F7 עבודת רקע
+        if ev.type != pygame.KEYDOWN: return False
+        if ev.key == pygame.K_F3:
+            self.profiler.toggle()
+            return True
+        if ev.key == pygame.K_F4:
+            self.push_log(f"Frame timings exported: {self.profiler.export()}.csv/.json")
+            return True
+        if ev.key == pygame.K_F6:
+            self.submit_job("simulate", {"count": 10000})
+            return True
+        if ev.key == pygame.K_F7:
+            self.cancel_job()
+            return True
+        return False
+
     def run(self):
         while True:
-            self.clock.tick(FPS)
-            mouse = pygame.mouse.get_pos()
-
-            for ev in pygame.event.get():
-                if ev.type == pygame.QUIT:
-                    pygame.quit(); sys.exit()
-
-                if self.scene == "home": self.handle_home(ev)
-                elif self.scene == "about": self.handle_about(ev)
-                elif self.scene == "select": self.handle_select(ev)
-                elif self.scene == "create": self.handle_create(ev)
-                elif self.scene == "roster": self.handle_roster(ev)
-                elif self.scene == "fight": self.handle_fight(ev)
-
-            if self.scene == "home": self.draw_home(mouse)
-            elif self.scene == "about": self.draw_about(mouse)
-            elif self.scene == "select": self.draw_select(mouse)
-            elif self.scene == "create": self.draw_create(mouse)
-            elif self.scene == "roster": self.draw_roster(mouse)
-            elif self.scene == "fight":
-                self.fight.update(1/FPS)
-                self.draw_fight(mouse)
-
-            pygame.display.flip()
-
-class FightArena:
-    def __init__(self, app: App, f1: Fighter, f2: Fighter, mode: str):
+            self.run_frame(self.clock.tick(FPS) / 1000.0)
+
+    def run_frame(self, frame_dt):
+        # פריים אחד של הלולאה - מופרד כדי שאפשר יהיה להריץ אותו גם בלי חלון (benchmark)
+        prof = self.profiler
+        prof.begin_frame(self.scene)
+        mouse = pygame.mouse.get_pos()
+
+        for ev in pygame.event.get():
+            if ev.type == pygame.QUIT:
+                pygame.quit(); sys.exit()
+            if self.handle_global(ev): continue
+            # handle() יכול להחליף סצנה - כל אירוע הולך לסצנה העדכנית
+            sc = self.current_scene()
+            if sc.ensure_built(): sc.handle(ev)
+            else: sc.handle_loading(ev)
+        self.poll_matchmaker()
+        prof.mark("events")
+
+        sc = self.current_scene()
+        ready = sc.ensure_built()
+        if ready: sc.update(frame_dt)
+        prof.mark("update")
+
+        if ready: sc.draw(mouse)
+        else: sc.draw_loading(mouse)
+        # ה-HUD-ים הם חלק מהציור - הזמן שלהם נזקף ל-draw ולא ל-flip, אבל לא נכנסים לספירת הקריאות
+        prof.count()
+        self.draw_job_hud(self.poll_job())
+        prof.draw_hud(self.screen, self.font_s)
+        prof.mark("draw")
+
+        pygame.display.flip()
+        prof.mark("flip")
+        prof.end_frame()
+        self._mark_startup("first_frame_ms")
+
+MODE_CYCLE = {"CPU": "SIM", "SIM": "2P", "2P": "CPU"}
+MODE_LABELS = {"CPU": "VS CPU", "SIM": "CPU VS CPU", "2P": "2 PLAYERS"}
+REPLAY_SEEK_TICKS = 5 * TICK_RATE
+
+
+class FightArena(ArenaSim):
+    """
+    הזירה על המסך: ArenaSim + ציור וקלט מהמקלדת. בקרב חי כל טיק מוקלט (ReplayRecorder);
+    עם replay=... הטיקים מגיעים מההקלטה (ReplayPlayer) - צפייה, קפיצה והרצה מהירה;
+    עם net=NetMatch (netplay.py) הטיקים עוברים דרך RollbackSession והמקומי משחק במקשי שחקן 1
+    """
+
+    def __init__(self, app: App, f1: Fighter, f2: Fighter, mode: str, replay=None, net=None):
+        seed = replay.seed if replay else net.seed if net else None
+        # הנזק לפי הסגנון והסטטיסטיקות: מההקלטה / מהמארח ברשת / מהלוחמים בקרב חי
+        profiles = (replay.profiles if replay else net.profiles if net
+                    else (fighter_profile(f1), fighter_profile(f2)))
+        super().__init__(seed, replay.mode if replay else "2P" if net else mode, profiles)
         self.app = app
         self.f1, self.f2 = f1, f2
-        self.mode = mode 
-        self.arena = pygame.Rect(70, 120, 1140, 520)
-        
-        # נתוני חיים וכוח
-        self.hp1, self.hp2 = 100, 100
-        self.sta1, self.sta2 = 100, 100
-        
-        # טיימרים להבהוב (אפקט פגיעה)
-        self.p1_hit_timer, self.p2_hit_timer = 0.0, 0.0
-        
-        # הגנה וטעינה
-        self.block1_until, self.block2_until = 0.0, 0.0
-        self.cooldowns = {"p1": {"jab":0,"kick":0,"grapple":0}, "p2": {"jab":0,"kick":0,"grapple":0}}
-        self.stun1_until, self.stun2_until = 0.0, 0.0
-
-        # מיקום התחלתי
-        GROUND_Y = self.arena.bottom - 120
-        self.p1 = pygame.Vector2(self.arena.left + 220, GROUND_Y)
-        self.p2 = pygame.Vector2(self.arena.right - 220, GROUND_Y)
-        self.v1, self.v2 = pygame.Vector2(0,0), pygame.Vector2(0,0)
+        self.arena = pygame.Rect(ARENA_LEFT, 120, ARENA_RIGHT - ARENA_LEFT, ARENA_BOTTOM - 120)
         self.size = 40
-        self.over = False
-        self.winner = None
+        self.hud = True  # פס ההקלטה ורמזי המקשים (replay_render מכבה)
+
+        self.replay, self.match = replay, net
+        self.player = self.recorder = self.net = self.input = None
+        if replay is not None:
+            self.player = ReplayPlayer(replay, self)
+        elif net is not None:
+            # ברשת משחקים תמיד במקשי שחקן 1, בצד שקיבלנו בלחיצת היד
+            self.net = net.session(self)
+            self.input = ArenaInput(self, app.bindings, (None, 0) if net.side else (0, None))
+        else:
+            self.recorder = ReplayRecorder(self, (f1.fighter_id, f2.fighter_id), (f1.name, f2.name))
+            self.init_cpu(app.state.difficulty)
+            if mode != "SIM":
+                self.input = ArenaInput(self, app.bindings, (0, 1) if mode == "2P" else (0, None))
 
         try:
             img = pygame.image.load("assets/arena_bg.png").convert_alpha()
             self.arena_img = pygame.transform.scale(img, (self.arena.width, self.arena.height))
         except: self.arena_img = None
 
+    def init_cpu(self, difficulty):
+        # בקר arena_ai לכל צד בשליטת המחשב, מוטה לפי הסגנון של הלוחם שלו;
+        # champion מחפש ב-thread עובד כדי שהפריים לא יחכה לחיפוש
+        try:
+            for side, fighter in enumerate((self.f1, self.f2)):
+                if self.cpu[side]:
+                    self.ai[side] = make_ai(difficulty, fighter, seed=f"{self.seed}:ai{side}", threaded=True)
+        except (OSError, ValueError) as e:
+            self.ai = [None, None]
+            self.app.push_log(f"AI policy unavailable ({e}) - using the classic CPU.")
+
+    @property
+    def p1(self): return pygame.Vector2(self.x1, GROUND_Y)
+
+    @property
+    def p2(self): return pygame.Vector2(self.x2, GROUND_Y)
+
+    @property
+    def winner(self):
+        return (self.f1.name, self.f2.name)[self.winner_side - 1] if self.winner_side else None
+
     def update(self, dt):
-        if self.over: return
-
-        # התחדשות סטמינה
-        self.sta1 = clamp(self.sta1 + 7*dt, 0, 100)
-        self.sta2 = clamp(self.sta2 + 7*dt, 0, 100)
-
-        # תנועה
-        self.p1.x += self.v1.x * dt
-        self.p2.x += self.v2.x * dt
-
-        # --- פיזיקה: מעבר חופשי בין צדדים עם דחייה קלה ---
-        dist_x = self.p1.x - self.p2.x
-        if abs(dist_x) < 55:
-            nudge = 2.5
-            if dist_x >= 0: 
-                self.p1.x += nudge; self.p2.x -= nudge
-            else: 
-                self.p1.x -= nudge; self.p2.x += nudge
-
-        # גבולות זירה
-        self.p1.x = clamp(self.p1.x, self.arena.left + 40, self.arena.right - 40)
-        self.p2.x = clamp(self.p2.x, self.arena.left + 40, self.arena.right - 40)
-
-        # עדכון טיימרים להבהוב נזק
-        self.p1_hit_timer = max(0, self.p1_hit_timer - dt)
-        self.p2_hit_timer = max(0, self.p2_hit_timer - dt)
-
-        # עדכון AI וניצחון
-        if self.mode == "CPU": self.ai_step(dt)
-        if int(self.hp1) <= 0 or int(self.hp2) <= 0:
-            self.over = True
-            self.winner = self.f2.name if self.hp1 <= 0 else self.f1.name
+        # dt הוא תמיד צעד ה-FixedStepClock; ArenaSim מתקדם ב-DT קבוע
+        if self.player is not None:
+            self.player.step()
+            return
+        # המקלדת נדגמת בכל טיק - גם כשכמה טיקים רצים באותו פריים
+        in1, in2 = self.input.poll(pygame.key.get_pressed()) if self.input else (0, 0)
+        if self.net is not None:
+            # בלי התקדמות (מחכים ליריב) הלחיצות נשארות בחוצץ לטיק הבא
+            if self.net.advance(in2 if self.net.side else in1):
+                self.input.commit(in1, in2, delay=self.net.input_delay)
+            return
+        self.recorder.tick(in1, in2)
+        if self.input: self.input.commit(in1, in2)
+
+    def current_replay(self):
+        if self.net is not None:
+            return self.net.replay((self.f1.fighter_id, self.f2.fighter_id), (self.f1.name, self.f2.name))
+        return self.recorder.finish()
+
+    def close(self):
+        # יציאה מהזירה: בקרב רשת - הודעה ליריב וסגירת הסוקט; עצירת threads של חיפוש
+        if self.net is not None: self.net.close()
+        for ai in self.ai:
+            if hasattr(ai, "close"): ai.close()
 
     def handle_event(self, ev):
-        # איפוס קרב (R) - עובד רק כשהקרב נגמר
-        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_r and self.over:
-            self.__init__(self.app, self.f1, self.f2, self.mode)
+        # איפוס קרב (R) - עובד רק כשהקרב נגמר (לא ברשת - הצד השני לא מתאפס איתנו)
+        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_r and self.over and self.net is None:
+            self.close()
+            self.__init__(self.app, self.f1, self.f2, self.mode, self.replay)
             return
 
-        if self.over: return
+        # שליטה בזמן: עצירה, הילוך איטי והרצה מהירה (לא ברשת)
+        if ev.type == pygame.KEYDOWN and self.net is None:
+            if ev.key == pygame.K_p: self.app.sim_clock.toggle_pause(); return
+            if ev.key == pygame.K_LEFTBRACKET: self.app.sim_clock.slower(); return
+            if ev.key == pygame.K_RIGHTBRACKET: self.app.sim_clock.faster(); return
 
-        # מקשי תנועה (חצים)
-        keys = pygame.key.get_pressed()
-        self.v1.x = 0
-        if keys[pygame.K_LEFT]: self.v1.x = -280
-        if keys[pygame.K_RIGHT]: self.v1.x = 280
+        if self.player is not None:
+            self.handle_replay_event(ev)
+            return
 
-        # מקשי פעולה (1-5)
-        if ev.type == pygame.KEYDOWN:
-            if ev.key == pygame.K_1: self.try_attack("p1", "jab")
-            elif ev.key == pygame.K_2: self.try_attack("p1", "kick")
-            elif ev.key == pygame.K_3: self.try_attack("p1", "grapple")
-            elif ev.key == pygame.K_4: self.block1_until = time.time() + 0.6
-            elif ev.key == pygame.K_5: self.sta1 = clamp(self.sta1 + 15, 0, 100)
-
-    def try_attack(self, who, move):
-        now = time.time()
-        cd = self.cooldowns[who]
-        if now < cd[move]: return
-        
-        cost = {"jab":10, "kick":15, "grapple":20}[move]
-        if who == "p1" and self.sta1 < cost: return
-        if who == "p2" and self.sta2 < cost: return
-        
-        if who == "p1": self.sta1 -= cost
-        else: self.sta2 -= cost
-        
-        cd[move] = now + {"jab":0.4, "kick":0.6, "grapple":0.8}[move]
-        self.resolve_attack(who, move)
+        # הקלטה: S שומר (גם באמצע קרב), V צופה בקרב שנגמר
+        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_s:
+            self.app.push_log(f"Replay saved: {self.current_replay().save()}")
+            return
+        if ev.type == pygame.KEYDOWN and ev.key == pygame.K_v and self.over:
+            replay = self.current_replay()
+            self.close()
+            self.app.watch_replay(replay)
+            return
 
-    def resolve_attack(self, who, move):
-        dist = (self.p1 - self.p2).length()
-        if dist > (135 if move != "grapple" else 90): return
-        
-        dmg = random.randint(6, 11) if move == "jab" else random.randint(13, 19)
-        if (time.time() < self.block2_until if who == "p1" else time.time() < self.block1_until):
-            dmg //= 2
+        if self.over or self.input is None: return
 
-        if who == "p1":
-            self.hp2 = clamp(self.hp2 - dmg, 0, 100)
-            self.p2_hit_timer = 0.15 
-        else:
-            self.hp1 = clamp(self.hp1 - dmg, 0, 100)
-            self.p1_hit_timer = 0.15 
+        # לחיצות פעולה נכנסות לחוצץ; התנועה נדגמת בכל טיק ב-update
+        if ev.type == pygame.KEYDOWN: self.input.key_down(ev.key)
+
+    def handle_replay_event(self, ev):
+        # חצים - 5 שניות אחורה/קדימה, Home/End - התחלה/סוף
+        if ev.type != pygame.KEYDOWN: return
+        player = self.player
+        if ev.key == pygame.K_LEFT: player.seek(player.tick - REPLAY_SEEK_TICKS)
+        elif ev.key == pygame.K_RIGHT: player.seek(player.tick + REPLAY_SEEK_TICKS)
+        elif ev.key == pygame.K_HOME: player.seek(0)
+        elif ev.key == pygame.K_END: player.seek(self.replay.ticks)
 
-    def draw_fighter(self, surf, center, fighter_obj, main_color):
+    def draw_fighter(self, surf, center, fighter_obj, main_color, is_p1=None):
         SCALE = 1.6
         cx, cy = int(center.x), int(center.y)
-        is_p1 = (center == self.p1)
+        if is_p1 is None: is_p1 = (center == self.p1)
         p_key = "p1" if is_p1 else "p2"
         dir_x = 1 if self.p1.x < self.p2.x else -1
         if not is_p1: dir_x *= -1
 
-        t = time.time()
+        t = self.t
         # בדיקת מצבים לאנימציה
         is_punching = t < self.cooldowns[p_key].get("jab", 0)
         is_kicking = t < self.cooldowns[p_key].get("kick", 0)
@@ -914,7 +1394,7 @@ class FightArena:
         pygame.draw.circle(surf, skin, head_pos, head_r)
         pygame.draw.arc(surf, hair, (head_pos[0]-head_r, head_pos[1]-head_r, head_r*2, head_r*2), 0, 3.14, int(12*SCALE))
 
-    def draw(self, surf, mouse):
+    def draw(self, surf, mouse, alpha=1.0):
         surf.fill(BG)
         if self.arena_img: surf.blit(self.arena_img, self.arena.topleft)
         
@@ -924,17 +1404,66 @@ class FightArena:
         self.draw_bar(surf, center_x + 20, 40, 400, 25, self.f2.name, self.hp2, 100, BLUE)
         self.draw_bar(surf, center_x + 20, 70, 400, 12, "STA", self.sta2, 100, YELLOW)
         
-        self.draw_fighter(surf, self.p1, self.f1, RED)
-        self.draw_fighter(surf, self.p2, self.f2, BLUE)
+        # אינטרפולציה בין שני צעדי הסימולציה האחרונים
+        x1 = self.prev_x1 + (self.p1.x - self.prev_x1) * alpha
+        x2 = self.prev_x2 + (self.p2.x - self.prev_x2) * alpha
+        self.draw_fighter(surf, pygame.Vector2(x1, self.p1.y), self.f1, RED, is_p1=True)
+        self.draw_fighter(surf, pygame.Vector2(x2, self.p2.y), self.f2, BLUE, is_p1=False)
+
+        clock = self.app.sim_clock
+        if clock.paused or clock.time_scale != 1.0:
+            label = "PAUSED" if clock.paused else f"x{clock.time_scale:g}"
+            t = self.app.font_b.render(label, True, YELLOW)
+            surf.blit(t, t.get_rect(center=(WIDTH//2, 100)))
+
+        if self.player is not None and self.hud: self.draw_replay_bar(surf)
+        if self.net is not None: self.draw_net_hud(surf)
+        if self.input is not None and self.app.profiler.visible: self.draw_input_stats(surf)
         
         if self.over:
             overlay = pygame.Rect(WIDTH//2-250, HEIGHT//2-100, 500, 200)
             pygame.draw.rect(surf, PANEL, overlay, border_radius=20)
             pygame.draw.rect(surf, BORDER, overlay, width=3, border_radius=20)
             t1 = self.app.font_b.render(f"WINNER: {self.winner}", True, TEXT)
-            t2 = self.app.font.render("Press R to Restart", True, MUTED)
+            if self.player: hint = "R Restart replay   ESC Back"
+            elif self.net: hint = "ESC Leave   S Save replay   V Watch replay"
+            else: hint = "R Restart   S Save replay   V Watch replay"
+            t2 = self.app.font.render(hint, True, MUTED)
             surf.blit(t1, t1.get_rect(center=(WIDTH//2, HEIGHT//2-20)))
-            surf.blit(t2, t2.get_rect(center=(WIDTH//2, HEIGHT//2+40)))
+            if self.hud: surf.blit(t2, t2.get_rect(center=(WIDTH//2, HEIGHT//2+40)))
+
+    def draw_replay_bar(self, surf):
+        total = max(1, self.replay.ticks)
+        rect = pygame.Rect(self.arena.x + 20, self.arena.bottom - 30, self.arena.width - 40, 10)
+        pygame.draw.rect(surf, (12, 12, 18), rect, border_radius=5)
+        done = rect.copy()
+        done.width = int(rect.width * min(1.0, self.tick / total))
+        if done.width: pygame.draw.rect(surf, YELLOW, done, border_radius=5)
+        label = (f"REPLAY {self.tick / TICK_RATE:5.1f}s / {total / TICK_RATE:.1f}s   "
+                 "<- -> seek 5s   Home/End   [ ] speed   P pause")
+        if self.player.desync_tick is not None:
+            label += f"   DESYNC at {self.player.desync_tick / TICK_RATE:.1f}s"
+        t = self.app.font_s.render(label, True, RED if self.player.desync_tick is not None else TEXT)
+        surf.blit(t, (rect.x, rect.y - 22))
+
+    def draw_net_hud(self, surf):
+        net = self.net
+        label = (f"ONLINE P{net.side + 1}   ping {net.rtt_ms:.0f} ms   "
+                 f"rollback {net.last_rollback} (max {net.max_depth})   delay {net.input_delay}")
+        color = MUTED
+        if net.remote_left: label, color = label + "   OPPONENT LEFT", RED
+        elif net.desync_frame is not None: label, color = label + f"   DESYNC at {net.desync_frame / TICK_RATE:.0f}s", RED
+        elif net.stalled: label, color = label + "   waiting for opponent...", YELLOW
+        t = self.app.font_s.render(label, True, color)
+        surf.blit(t, t.get_rect(center=(WIDTH//2, 100)))
+
+    def draw_input_stats(self, surf):
+        # עם פרופיילר הפריימים (F3): השהיה מלחיצה לביצוע בטיקים
+        s = self.input.stats()
+        label = (f"INPUT latency p50 {s['p50_ticks']} / p95 {s['p95_ticks']} / max {s['max_ticks']} ticks   "
+                 f"executed {s['executed']}   buffered {s['buffered']}   dropped {s['dropped']}")
+        t = self.app.font_s.render(label, True, MUTED)
+        surf.blit(t, (self.arena.x + 20, self.arena.bottom - 30))
 
     def draw_bar(self, surf, x, y, w, h, label, val, maxv, color):
         pygame.draw.rect(surf, (12, 12, 18), (x, y, w, h), border_radius=10)
@@ -943,11 +1472,3 @@ class FightArena:
         if label != "STA":
             t = self.app.font_s.render(f"{label}: {int(val)}/100", True, TEXT)
             surf.blit(t, (x, y - 20))
-
-    def ai_step(self, dt):
-        if time.time() < self.stun2_until: return
-        dist = (self.p1 - self.p2).length()
-        dir_x = 1 if self.p1.x > self.p2.x else -1
-        self.v2.x = dir_x * 240 if dist > 115 else 0
-        if dist < 135 and random.random() < 0.03:
-            self.try_attack("p2", "jab")
\ No newline at end of file
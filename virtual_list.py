@@ -0,0 +1,197 @@
+"""
+Virtual List Widgets
+רשימה ורשת וירטואליות - מציירות רק את השורות הנראות במסך
+וטוענות מה-Repository רק את חלון השורות הנדרש
+"""
+
+import math
+from collections import OrderedDict
+from typing import Optional
+
+import pygame
+
+from fighter import Fighter
+
+
+class RosterPager:
+    """
+    מקור נתונים לרשימות וירטואליות
+    טוען מהמאגר בלוקים של שורות לפי הצורך ושומר מטמון LRU של בלוקים
+    """
+
+    def __init__(self, repo, block_size: int = 64, max_blocks: int = 32):
+        self.repo = repo
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.version = 0
+        self._blocks = OrderedDict()
+        self._count = None
+
+    def __len__(self):
+        if self._count is None:
+            self._count = self.repo.count_fighters()
+        return self._count
+
+    def get(self, index: int) -> Optional[Fighter]:
+        """לוחם לפי אינדקס בסדר האלפביתי"""
+        if index < 0 or index >= len(self):
+            return None
+        block_idx, offset = divmod(index, self.block_size)
+        rows = self._blocks.get(block_idx)
+        if rows is None:
+            rows = self.repo.get_fighters_page(block_idx * self.block_size, self.block_size)
+            self._blocks[block_idx] = rows
+            if len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block_idx)
+        return rows[offset] if offset < len(rows) else None
+
+    def index_of_prefix(self, prefix: str) -> int:
+        return self.repo.get_fighter_index_by_prefix(prefix)
+
+    def invalidate(self):
+        """לקרוא אחרי כל שינוי במאגר"""
+        self._blocks.clear()
+        self._count = None
+        self.version += 1
+
+
+class VirtualList:
+    """
+    רשימה אנכית עם גלילה חלקה בפיקסלים
+    כל שורה מצוירת פעם אחת ל-Surface ונשמרת במטמון; בכל פריים רק מעתיקים (blit)
+    """
+
+    SCROLL_SPEED = 14.0  # קצב ההתקרבות ליעד הגלילה (לשנייה)
+
+    def __init__(self, rect, item_h, source: RosterPager, render_item, gap=10, pad=10, cache_size=128,
+                 with_index=False):
+        self.rect = pygame.Rect(rect)
+        self.item_h = item_h
+        self.gap = gap
+        self.pad = pad
+        self.source = source
+        self.render_item = render_item  # (fighter, selected, w, h) -> Surface
+        self.with_index = with_index  # render_item מקבל גם את המיקום ברשימה (index=)
+        self.cache_size = cache_size
+        self.scroll_px = 0.0
+        self.target_px = 0.0
+        self._cache = OrderedDict()
+        self._cache_version = source.version
+        self._last_ticks = None
+
+    # ----- geometry -----
+    @property
+    def cols(self):
+        return 1
+
+    @property
+    def item_w(self):
+        return self.rect.w - 2 * self.pad
+
+    def row_count(self):
+        return math.ceil(len(self.source) / self.cols)
+
+    def max_scroll(self):
+        content_h = self.row_count() * self.item_h + self.pad
+        return max(0, content_h - self.rect.h)
+
+    def item_rect(self, index):
+        row, col = divmod(index, self.cols)
+        x = self.rect.x + self.pad + col * (self.item_w + self.gap)
+        y = self.rect.y + self.pad + row * self.item_h - int(self.scroll_px)
+        return pygame.Rect(x, y, self.item_w, self.item_h - self.gap)
+
+    def visible_range(self):
+        first_row = max(0, int((self.scroll_px - self.pad) // self.item_h))
+        last_row = int((self.scroll_px + self.rect.h) // self.item_h) + 1
+        first = first_row * self.cols
+        last = min(len(self.source), (last_row + 1) * self.cols)
+        return range(first, last)
+
+    # ----- scrolling -----
+    def scroll_by(self, dy_px):
+        self.target_px = max(0, min(self.max_scroll(), self.target_px + dy_px))
+
+    def scroll_to_index(self, index):
+        self.target_px = max(0, min(self.max_scroll(), (index // self.cols) * self.item_h))
+
+    def handle_wheel(self, ev):
+        self.scroll_by(-ev.y * self.item_h)
+
+    def jump_to_letter(self, letter):
+        if letter and letter.isalnum():
+            self.scroll_to_index(self.source.index_of_prefix(letter.upper()))
+
+    def _animate(self):
+        now = pygame.time.get_ticks()
+        dt = 0.0 if self._last_ticks is None else (now - self._last_ticks) / 1000.0
+        self._last_ticks = now
+        self.target_px = max(0, min(self.max_scroll(), self.target_px))
+        diff = self.target_px - self.scroll_px
+        if abs(diff) > 2 * self.rect.h:
+            # קפיצה רחוקה: מדלגים קרוב ליעד כדי לא לטעון את כל הבלוקים שבדרך
+            self.scroll_px = self.target_px - math.copysign(self.rect.h, diff)
+        elif abs(diff) < 0.5:
+            self.scroll_px = self.target_px
+        else:
+            self.scroll_px += diff * min(1.0, dt * self.SCROLL_SPEED)
+
+    # ----- rendering -----
+    def _item_surface(self, f: Fighter, selected, size, index):
+        if self._cache_version != self.source.version:
+            self._cache.clear()
+            self._cache_version = self.source.version
+        key = (f.fighter_id, bool(selected))
+        surf = self._cache.get(key)
+        if surf is None:
+            # המטמון מתנקה כשהמקור משתנה (version), כך שהמיקום של מפתח לא משתנה בתוכו
+            surf = (self.render_item(f, selected, *size, index=index) if self.with_index
+                    else self.render_item(f, selected, *size))
+            self._cache[key] = surf
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return surf
+
+    def draw(self, surf, mouse, selected_id=None, accent=(235, 70, 85), idle=(70, 70, 105), radius=12, width=1):
+        self._animate()
+        old_clip = surf.get_clip()
+        surf.set_clip(self.rect.clip(old_clip))
+        for idx in self.visible_range():
+            f = self.source.get(idx)
+            if f is None:
+                break
+            r = self.item_rect(idx)
+            selected = selected_id is not None and f.fighter_id == selected_id
+            surf.blit(self._item_surface(f, selected, r.size, idx), r.topleft)
+            hovered = r.collidepoint(mouse) and self.rect.collidepoint(mouse)
+            pygame.draw.rect(surf, accent if selected else idle, r, width=2 if hovered else width, border_radius=radius)
+        surf.set_clip(old_clip)
+
+    def item_at(self, pos) -> Optional[Fighter]:
+        if not self.rect.collidepoint(pos):
+            return None
+        for idx in self.visible_range():
+            if self.item_rect(idx).collidepoint(pos):
+                return self.source.get(idx)
+        return None
+
+
+class VirtualGrid(VirtualList):
+    """רשת כרטיסים וירטואלית - אותה לוגיקה כמו VirtualList עם מספר עמודות"""
+
+    def __init__(self, rect, item_w, item_h, source: RosterPager, render_item, cols=2, gap=24, pad=24, cache_size=64):
+        self._cols = cols
+        self._item_w = item_w
+        super().__init__(rect, item_h + gap, source, render_item, gap=gap, pad=pad, cache_size=cache_size)
+
+    @property
+    def cols(self):
+        return self._cols
+
+    @property
+    def item_w(self):
+        return self._item_w